@@ -1064,7 +1064,7 @@ def split_data_tool(target: str, test_size: float = 0.2, csv_path: str = "", too
     _log_tool_result_diagnostics(result, "split_data", "raw_tool_output")
     return _ensure_ui_display(result, "split_data", tool_context)
 
-def grid_search_tool(target: str, model: str, param_grid: str = "{}", csv_path: str = "", tool_context=None, **kwargs) -> Dict[str, Any]:
+def grid_search_tool(target: str, model: str, param_grid: str = "{}", csv_path: str = "", search_mode: str = "auto", tool_context=None, **kwargs) -> Dict[str, Any]:
     """ADK-safe wrapper for grid_search."""
     from .ds_tools import grid_search
     import json
@@ -1091,7 +1091,7 @@ def grid_search_tool(target: str, model: str, param_grid: str = "{}", csv_path:
     except json.JSONDecodeError:
         param_dict = {}
     # grid_search is async, must use _run_async
-    result = _run_async(grid_search(target=target, model=model, param_grid=param_dict, csv_path=csv_path, tool_context=tool_context))
+    result = _run_async(grid_search(target=target, model=model, param_grid=param_dict, csv_path=csv_path, search_mode=search_mode, tool_context=tool_context))
     _log_tool_result_diagnostics(result, "grid_search", "raw_tool_output")
     return _ensure_ui_display(result, "grid_search", tool_context)
 
@@ -2227,9 +2227,17 @@ def causal_identify_tool(target: str, treatment: str, csv_path: str = "", tool_c
     _log_tool_result_diagnostics(result, "causal_identify", "raw_tool_output")
     return _ensure_ui_display(result, "causal_identify", tool_context)
 
-def causal_estimate_tool(target: str, treatment: str, csv_path: str = "", tool_context=None, **kwargs) -> Dict[str, Any]:
-    """ADK-safe wrapper for causal_estimate."""
-    from .ds_tools import causal_estimate
+def causal_estimate_tool(target: str = "", treatment: str = "", csv_path: str = "", outcome: str = "",
+                         method: str = "backdoor.propensity_score_matching", confounders: str = "",
+                         refuters: str = "", num_simulations: int = 50, n_bootstrap: int = 20,
+                         sample_rows: int = -1, tool_context=None, **kwargs) -> Dict[str, Any]:
+    """ADK-safe wrapper for causal_estimate.
+
+    target is the outcome column (outcome is accepted too). confounders and
+    refuters are comma-separated; refuters="none" skips refutation and
+    sample_rows=-1 keeps the CAUSAL_SIMULATION_SAMPLE_ROWS default.
+    """
+    from .extended_tools import causal_estimate
     
     # ===== CRITICAL: Setup artifact manager (enables artifact saving/loading) =====
     state = getattr(tool_context, "state", {}) if tool_context else {}
@@ -2248,7 +2256,18 @@ def causal_estimate_tool(target: str, treatment: str, csv_path: str = "", tool_c
     except Exception as e:
         logger.error(f"[TOOL WRAPPER] Unexpected error: {e}")
 
-    result = causal_estimate(target=target, treatment=treatment, csv_path=csv_path, tool_context=tool_context)
+    confounder_list = [c.strip() for c in confounders.split(",") if c.strip()] or None
+    if refuters.strip().lower() == "none":
+        refuter_list = []
+    else:
+        refuter_list = [r.strip() for r in refuters.split(",") if r.strip()] or None
+    # causal_estimate is async, must use _run_async
+    result = _run_async(causal_estimate(
+        treatment=treatment, outcome=outcome or target, csv_path=csv_path or None, method=method,
+        confounders=confounder_list, refuters=refuter_list, num_simulations=num_simulations,
+        n_bootstrap=n_bootstrap, sample_rows=None if sample_rows < 0 else sample_rows,
+        tool_context=tool_context,
+    ))
     _log_tool_result_diagnostics(result, "causal_estimate", "raw_tool_output")
     return _ensure_ui_display(result, "causal_estimate", tool_context)
 
@@ -2279,9 +2298,16 @@ def ts_prophet_forecast_tool(target: str, date_col: str, csv_path: str = "", too
     _log_tool_result_diagnostics(result, "ts_prophet_forecast", "raw_tool_output")
     return _ensure_ui_display(result, "ts_prophet_forecast", tool_context)
 
-def ts_backtest_tool(target: str, date_col: str, csv_path: str = "", tool_context=None, **kwargs) -> Dict[str, Any]:
-    """ADK-safe wrapper for ts_backtest."""
-    from .ds_tools import ts_backtest
+def ts_backtest_tool(target: str, date_col: str = "", csv_path: str = "", horizon: int = 30, n_folds: int = 5,
+                     step: int = 0, window: str = "expanding", window_size: int = 0, models: str = "",
+                     metric: str = "mae", arima_order: str = "", time_limit: int = 120,
+                     tool_context=None, **kwargs) -> Dict[str, Any]:
+    """ADK-safe wrapper for ts_backtest.
+
+    models and arima_order are comma-separated (e.g. "prophet,naive", "1,1,1");
+    step / window_size of 0 and empty strings mean the tool defaults.
+    """
+    from .extended_tools import ts_backtest
     
     # ===== CRITICAL: Setup artifact manager (enables artifact saving/loading) =====
     state = getattr(tool_context, "state", {}) if tool_context else {}
@@ -2300,7 +2326,19 @@ def ts_backtest_tool(target: str, date_col: str, csv_path: str = "", tool_contex
     except Exception as e:
         logger.error(f"[TOOL WRAPPER] Unexpected error: {e}")
 
-    result = ts_backtest(target=target, date_col=date_col, csv_path=csv_path, tool_context=tool_context)
+    model_list = [m.strip() for m in models.split(",") if m.strip()] or None
+    try:
+        order = [int(p) for p in arima_order.split(",") if p.strip()] or None
+    except ValueError:
+        return _ensure_ui_display({"status": "error", "error": f"arima_order must be three integers like '1,1,1', got '{arima_order}'"},
+                                  "ts_backtest", tool_context)
+    # ts_backtest is async, must use _run_async
+    result = _run_async(ts_backtest(
+        target=target, date_col=date_col or None, csv_path=csv_path or None, horizon=horizon,
+        n_folds=n_folds, step=step or None, window=window, window_size=window_size or None,
+        models=model_list, metric=metric, arima_order=order, time_limit=time_limit,
+        tool_context=tool_context,
+    ))
     _log_tool_result_diagnostics(result, "ts_backtest", "raw_tool_output")
     return _ensure_ui_display(result, "ts_backtest", tool_context)
 
@@ -2540,7 +2578,7 @@ def kmeans_cluster_tool(n_clusters: int = 3, csv_path: str = "", tool_context=No
     _log_tool_result_diagnostics(result, "kmeans_cluster", "raw_tool_output")
     return _ensure_ui_display(result, "kmeans_cluster", tool_context)
 
-def dbscan_cluster_tool(eps: float = 0.5, min_samples: int = 5, csv_path: str = "", tool_context=None, **kwargs) -> Dict[str, Any]:
+def dbscan_cluster_tool(eps: float = 0.5, min_samples: int = 5, csv_path: str = "", backend: str = "auto", tool_context=None, **kwargs) -> Dict[str, Any]:
     """ADK-safe wrapper for dbscan_cluster."""
     from .ds_tools import dbscan_cluster
     
@@ -2562,11 +2600,11 @@ def dbscan_cluster_tool(eps: float = 0.5, min_samples: int = 5, csv_path: str =
         logger.error(f"[TOOL WRAPPER] Unexpected error: {e}")
 
     # dbscan_cluster is async, must use _run_async
-    result = _run_async(dbscan_cluster(eps=eps, min_samples=min_samples, csv_path=csv_path, tool_context=tool_context))
+    result = _run_async(dbscan_cluster(eps=eps, min_samples=min_samples, csv_path=csv_path, backend=backend, tool_context=tool_context))
     _log_tool_result_diagnostics(result, "dbscan_cluster", "raw_tool_output")
     return _ensure_ui_display(result, "dbscan_cluster", tool_context)
 
-def hierarchical_cluster_tool(n_clusters: int = 3, csv_path: str = "", tool_context=None, **kwargs) -> Dict[str, Any]:
+def hierarchical_cluster_tool(n_clusters: int = 3, csv_path: str = "", backend: str = "auto", tool_context=None, **kwargs) -> Dict[str, Any]:
     """ADK-safe wrapper for hierarchical_cluster."""
     from .ds_tools import hierarchical_cluster
     
@@ -2588,7 +2626,7 @@ def hierarchical_cluster_tool(n_clusters: int = 3, csv_path: str = "", tool_cont
         logger.error(f"[TOOL WRAPPER] Unexpected error: {e}")
 
     # hierarchical_cluster is async, must use _run_async
-    result = _run_async(hierarchical_cluster(n_clusters=n_clusters, csv_path=csv_path, tool_context=tool_context))
+    result = _run_async(hierarchical_cluster(n_clusters=n_clusters, csv_path=csv_path, backend=backend, tool_context=tool_context))
     _log_tool_result_diagnostics(result, "hierarchical_cluster", "raw_tool_output")
     return _ensure_ui_display(result, "hierarchical_cluster", tool_context)
 
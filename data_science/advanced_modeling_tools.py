@@ -2,8 +2,13 @@
 Advanced modeling tools: GBM family, explainability, imbalance handling, NLP, etc.
 20+ tools with safe fallbacks for missing dependencies.
 """
+import json
 import logging
+import os
 from typing import Dict, Any, List, Optional
+
+import numpy as np
+from google.adk.tools import ToolContext
 from .ds_tools import ensure_display_fields
 
 logger = logging.getLogger(__name__)
@@ -15,6 +20,21 @@ def _lib_missing(name: str) -> dict:
         "hint": f"pip install {name}  (or its extras) to enable this tool."
     }
 
+def _resolve_registered_model(model_name: Optional[str], model_path: Optional[str], target: Optional[str]) -> dict:
+    """Registry entry for model_name, else the latest non-derived model (for target), else a bare entry for model_path.
+
+    Derived entries (ONNX exports) are only used when named explicitly; they
+    are not joblib pipelines.
+    """
+    from .model_registry import get_model as get_registered, get_latest_model
+    if model_path:
+        return {"model_name": os.path.splitext(os.path.basename(model_path))[0],
+                "model_path": model_path, "model_type": "Unknown", "target": target}
+    entry = get_registered(model_name) if model_name else get_latest_model(target)
+    if not entry:
+        raise ValueError(f"Model '{model_name or target or 'latest'}' not found in the model registry. Train a model first.")
+    return entry
+
 # ---------- MODELING (GBM family) ----------
 @ensure_display_fields
 async def train_lightgbm_classifier(**kwargs) -> dict:
@@ -59,14 +79,93 @@ async def train_catboost_classifier(**kwargs) -> dict:
 
 # ---------- EXPLAINABILITY ----------
 @ensure_display_fields
-async def permutation_importance_tool(model_name: Optional[str]=None, n_repeats: int=10) -> dict:
-    try:
-        from sklearn.inspection import permutation_importance
+async def permutation_importance_tool(
+    model_name: Optional[str] = None,
+    n_repeats: int = 10,
+    csv_path: Optional[str] = None,
+    target: Optional[str] = None,
+    scoring: Optional[str] = None,
+    n_workers: Optional[int] = None,
+    tool_context: Optional[ToolContext] = None,
+) -> dict:
+    """
+    Permutation importance of a registered model on its held-out rows.
+
+    Columns are split into blocks scored by parallel workers over a shared
+    read-only copy of the evaluation rows (the registered split's test rows,
+    at most PERMUTATION_SAMPLE_ROWS). Baseline predictions are cached per
+    model file version and dataset, so repeated calls skip them.
+
+    Args:
+        model_name: Registered model (default: latest, optionally for target)
+        n_repeats: Shuffles per column
+        csv_path: Dataset the model was trained on (default: uploaded dataset)
+        target: Target column (default: the registered model's target)
+        scoring: accuracy/balanced_accuracy/f1_macro/f1_weighted for classifiers
+            (default accuracy), r2/neg_mean_squared_error/neg_mean_absolute_error
+            for regressors (default r2)
+        n_workers: Worker processes (default IMPORTANCE_WORKERS)
+    """
+    try:
+        from sklearn.inspection import permutation_importance  # noqa
     except Exception:
         return _lib_missing("scikit-learn")
     try:
-        from .ds_tools import explain_model
-        return await explain_model(method="permutation_importance", model_name=model_name, n_repeats=n_repeats)
+        import asyncio
+        from .dataset_fingerprint import cache_key, dataset_fingerprint
+        from .ds_tools import _get_workspace_dir, _json_safe, _load_dataframe
+        from .importance_engine import permutation_importance as run_permutation_importance
+        from .large_data_config import PERMUTATION_SAMPLE_ROWS
+        from .model_cache import get_model
+        from .split_registry import get_split
+
+        entry = _resolve_registered_model(model_name, None, target)
+        target = target or entry.get("target")
+        model = get_model(entry["model_path"])
+        if not hasattr(model, "feature_names_in_"):
+            return {"status": "failed",
+                    "error": f"Model '{entry['model_name']}' was not fitted on named columns; "
+                             "permutation importance needs a pipeline that includes its preprocessing."}
+
+        df = await _load_dataframe(csv_path, tool_context=tool_context)
+        if target not in df.columns:
+            return {"status": "failed", "error": f"Target '{target}' not found"}
+        fingerprint = dataset_fingerprint(df)
+        split = get_split(df, target, tool_context=tool_context, fingerprint=fingerprint)
+        rows = split.test_idx
+        if rows.size > PERMUTATION_SAMPLE_ROWS:
+            rows = np.sort(np.random.RandomState(42).choice(rows, PERMUTATION_SAMPLE_ROWS, replace=False))
+        X = df.iloc[rows][[str(c) for c in model.feature_names_in_]].reset_index(drop=True)
+        y = df[target].iloc[rows].to_numpy()
+
+        scoring = scoring or ("accuracy" if hasattr(model, "classes_") else "r2")
+        baseline_key = cache_key(os.path.abspath(entry["model_path"]),
+                                 os.stat(entry["model_path"]).st_mtime_ns, fingerprint, split.key, rows.size)
+        res = await asyncio.to_thread(
+            run_permutation_importance, model, X, y, scoring,
+            n_repeats=n_repeats, n_workers=n_workers, baseline_key=baseline_key)
+
+        importances = res.pop("importances")
+        report_path = os.path.join(_get_workspace_dir(tool_context, "reports"),
+                                   f"{entry['model_name']}_permutation_importance.json")
+        with open(report_path, "w") as f:
+            json.dump(importances.to_dict("records"), f, indent=2)
+
+        top = importances.head(10)
+        lines = [f"{i + 1}. **{r.feature}**: {r.importance_mean:.4f} ± {r.importance_std:.4f}"
+                 for i, r in enumerate(top.itertuples())]
+        return _json_safe({
+            "status": "success",
+            "model_name": entry["model_name"],
+            "target": target,
+            "rows_evaluated": int(len(X)),
+            **res,
+            "importances": importances.to_dict("records"),
+            "report_path": report_path,
+            "message": (f"Permutation importance for **{entry['model_name']}** "
+                        f"({scoring} baseline {res['baseline_score']:.4f}, {len(X):,} held-out rows, "
+                        f"{res['workers']} workers, {res['seconds']}s):\n" + "\n".join(lines)),
+        })
     except Exception as e:
         return {"status":"failed","error":str(e)}
 
@@ -132,10 +231,121 @@ async def smote_rebalance_tool(strategy: str = "smote", random_state: int = 42)
         return {"status":"failed","error":str(e)}
 
 @ensure_display_fields
-async def threshold_tune_tool(model_name: Optional[str]=None, metric: str="f1") -> dict:
-    try:
-        from .ds_tools import evaluate
-        return await evaluate(model_name=model_name, optimize_threshold_for=metric)
+async def threshold_tune_tool(
+    model_name: Optional[str] = None,
+    metric: str = "f1",
+    beta: float = 1.0,
+    cost_fp: float = 1.0,
+    cost_fn: float = 1.0,
+    segment_column: Optional[str] = None,
+    positive_class: Optional[str] = None,
+    min_segment_rows: int = 100,
+    csv_path: Optional[str] = None,
+    target: Optional[str] = None,
+    tool_context: Optional[ToolContext] = None,
+) -> dict:
+    """
+    Tune the decision threshold of a registered binary classifier.
+
+    Positive-class probabilities for the registered split's test rows are
+    predicted once and cached; every distinct probability is then evaluated
+    as a threshold in a single sort + cumulative-sum pass (threshold_engine),
+    optionally per segment.
+
+    Args:
+        model_name: Registered model (default: latest, optionally for target)
+        metric: f1, fbeta, youden, accuracy or cost (minimised)
+        beta: Recall weight for fbeta
+        cost_fp, cost_fn: Cost of a false positive / false negative for cost
+        segment_column: Column whose values get their own thresholds
+        positive_class: Positive class (default: the model's last class);
+            required for multiclass models (one-vs-rest)
+        min_segment_rows: Segments smaller than this keep the overall threshold
+        csv_path: Dataset the model was trained on (default: uploaded dataset)
+        target: Target column (default: the registered model's target)
+    """
+    try:
+        import asyncio
+        import time
+        from .dataset_fingerprint import cache_key, dataset_fingerprint
+        from .ds_tools import _get_workspace_dir, _json_safe, _load_dataframe
+        from .model_cache import get_model
+        from .split_registry import get_split
+        from .threshold_engine import positive_scores, tune_thresholds
+
+        entry = _resolve_registered_model(model_name, None, target)
+        target = target or entry.get("target")
+        model = get_model(entry["model_path"])
+        if not hasattr(model, "predict_proba") or not hasattr(model, "classes_"):
+            return {"status": "failed",
+                    "error": f"Model '{entry['model_name']}' has no predict_proba; threshold tuning needs probabilities."}
+        if not hasattr(model, "feature_names_in_"):
+            return {"status": "failed",
+                    "error": f"Model '{entry['model_name']}' was not fitted on named columns; "
+                             "threshold tuning needs a pipeline that includes its preprocessing."}
+        classes = [str(c) for c in model.classes_]
+        if positive_class is None and len(classes) != 2:
+            return {"status": "failed",
+                    "error": f"Model has {len(classes)} classes; pass positive_class (one of {classes}) to tune one-vs-rest."}
+        positive_class = str(positive_class) if positive_class is not None else classes[-1]
+        if positive_class not in classes:
+            return {"status": "failed", "error": f"positive_class '{positive_class}' not in model classes {classes}"}
+
+        df = await _load_dataframe(csv_path, tool_context=tool_context)
+        if target not in df.columns:
+            return {"status": "failed", "error": f"Target '{target}' not found"}
+        if segment_column and segment_column not in df.columns:
+            return {"status": "failed", "error": f"Segment column '{segment_column}' not found"}
+        fingerprint = dataset_fingerprint(df)
+        split = get_split(df, target, tool_context=tool_context, fingerprint=fingerprint)
+        rows = split.test_idx
+        X = df.iloc[rows][[str(c) for c in model.feature_names_in_]]
+        y = df[target].iloc[rows].astype(str).to_numpy() == positive_class
+        segments = df[segment_column].iloc[rows].to_numpy() if segment_column else None
+
+        scores_key = cache_key(os.path.abspath(entry["model_path"]), os.stat(entry["model_path"]).st_mtime_ns,
+                               fingerprint, split.key, positive_class)
+        start = time.perf_counter()
+        scores = await asyncio.to_thread(positive_scores, model, X, classes.index(positive_class), scores_key)
+        predict_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        res = tune_thresholds(y, scores, metric=metric, beta=beta, cost_fp=cost_fp, cost_fn=cost_fn,
+                              segments=segments, min_segment_rows=min_segment_rows)
+        tune_seconds = time.perf_counter() - start
+
+        report_path = os.path.join(_get_workspace_dir(tool_context, "reports"),
+                                   f"{entry['model_name']}_thresholds.json")
+        with open(report_path, "w") as f:
+            json.dump(_json_safe({"model_name": entry["model_name"], "positive_class": positive_class,
+                                  "segment_column": segment_column, **res}), f, indent=2)
+
+        best, default = res["overall"], res["default"]
+        lines = [f"- **Best {metric} threshold: {best['threshold']:.4f}** "
+                 f"({metric} {best[metric]:.4f} vs {default[metric]:.4f} at 0.5; "
+                 f"precision {best['precision']:.3f}, recall {best['recall']:.3f})"]
+        for m, point in res["best_by_metric"].items():
+            if m != metric:
+                lines.append(f"- {m}: threshold {point['threshold']:.4f} ({m} {point[m]:.4f})")
+        tuned = [s for s in res.get("segments", []) if s["tuned"]]
+        if tuned:
+            lines.append(f"\n**Per-{segment_column} thresholds** ({len(tuned)} of {res['segments_total']} segments tuned):")
+            lines += [f"- {s['segment']}: {s['threshold']:.4f} ({metric} {s[metric]:.4f} vs "
+                      f"{s[metric + '_at_overall']:.4f} at the overall threshold, {s['rows']:,} rows)"
+                      for s in tuned[:10]]
+        return _json_safe({
+            "status": "success",
+            "model_name": entry["model_name"],
+            "target": target,
+            "positive_class": positive_class,
+            "rows_evaluated": int(len(y)),
+            **res,
+            "predict_seconds": round(predict_seconds, 3),
+            "tune_seconds": round(tune_seconds, 4),
+            "report_path": report_path,
+            "message": (f"Threshold tuning for **{entry['model_name']}** (positive class '{positive_class}', "
+                        f"{len(y):,} held-out rows, {res['candidates']:,} candidate thresholds in "
+                        f"{tune_seconds * 1000:.0f} ms):\n" + "\n".join(lines)),
+        })
     except Exception as e:
         return {"status":"failed","error":str(e)}
 
@@ -269,26 +479,181 @@ async def association_rules_tool(transaction_col: str, min_support: float=0.01,
         return {"status":"failed","error":str(e)}
 
 # ---------- EXPORT / RUNTIME ----------
+def _sample_rows(csv_path: Optional[str], tool_context, n_rows: int):
+    """First n_rows of csv_path (or the uploaded dataset) without loading the whole file."""
+    from .batch_scoring import _iter_input
+    if not csv_path and tool_context is not None:
+        csv_path = tool_context.state.get("default_csv_path")
+    if not csv_path:
+        raise ValueError("Provide csv_path: sample rows are needed to type the ONNX inputs.")
+    return next(_iter_input(str(csv_path), n_rows))
+
+
 @ensure_display_fields
-async def export_onnx_tool(model_name: Optional[str]=None) -> dict:
+async def export_onnx_tool(
+    model_name: Optional[str] = None,
+    model_path: Optional[str] = None,
+    csv_path: Optional[str] = None,
+    target: Optional[str] = None,
+    benchmark: bool = True,
+    intra_op_threads: Optional[int] = None,
+    tool_context: Optional[ToolContext] = None,
+) -> dict:
+    """
+    Convert a registered sklearn pipeline (preprocessing included) to ONNX.
+
+    The .onnx file is written next to the joblib model and registered as
+    <model_name>_onnx. With benchmark=True, up to ONNX_BENCHMARK_ROWS rows of
+    csv_path are scored by both the joblib model and an onnxruntime session to
+    compare single-row latency, batch throughput and prediction agreement.
+
+    Args:
+        model_name: Registered model (default: latest, optionally for target)
+        model_path: Joblib file to export instead of a registered model
+        csv_path: Data with the model's feature columns (default: uploaded dataset)
+        target: Target column, used to pick the latest model and dropped from the sample
+        benchmark: Run the joblib-vs-ONNX micro-benchmark
+        intra_op_threads: onnxruntime threads for the benchmark session
+    """
     try:
         import skl2onnx  # noqa
     except Exception:
         return _lib_missing("skl2onnx")
     try:
-        from .ds_tools import export
-        return await export(format="onnx", model_name=model_name)
+        import onnxruntime  # noqa
+    except Exception:
+        return _lib_missing("onnxruntime")
+    try:
+        import asyncio
+        from .large_data_config import ONNX_BENCHMARK_ROWS
+        from .model_cache import get_model
+        from .onnx_export import benchmark as run_benchmark, convert_to_onnx, get_session
+
+        entry = _resolve_registered_model(model_name, model_path, target)
+        model = get_model(entry["model_path"])
+        sample = _sample_rows(csv_path, tool_context, ONNX_BENCHMARK_ROWS)
+        target = target or entry.get("target")
+        if hasattr(model, "feature_names_in_"):
+            sample = sample[[str(c) for c in model.feature_names_in_]]
+        elif target in sample.columns:
+            sample = sample.drop(columns=[target])
+
+        onx, feature_columns = await asyncio.to_thread(convert_to_onnx, model, sample)
+        onnx_path = os.path.splitext(entry["model_path"])[0] + ".onnx"
+        tmp_path = onnx_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(onx.SerializeToString())
+        os.replace(tmp_path, onnx_path)
+        logger.info(f"[ONNX] Exported {entry['model_name']} -> {onnx_path}")
+
+        result = {
+            "status": "success",
+            "model_name": entry["model_name"],
+            "source_model_path": entry["model_path"],
+            "onnx_path": onnx_path,
+            "onnx_size_kb": round(os.path.getsize(onnx_path) / 1024, 1),
+            "inputs": feature_columns or ["X"],
+        }
+        if benchmark:
+            session = get_session(onnx_path, intra_op_threads=intra_op_threads)
+            result["benchmark"] = await asyncio.to_thread(run_benchmark, model, session, sample)
+
+        workspace_root = tool_context.state.get("workspace_root") if tool_context is not None else None
+        if workspace_root:
+            from .model_registry import register_model
+            register_model(
+                model_name=f"{entry['model_name']}_onnx",
+                model_path=onnx_path,
+                model_type=f"ONNX:{entry.get('model_type', 'Unknown')}",
+                target=entry.get("target") or target or "Unknown",
+                metrics=entry.get("metrics", {}),
+                metadata={"role": "onnx_export", "source_model": entry["model_name"], "inputs": result["inputs"],
+                          "benchmark": result.get("benchmark")},
+                workspace_root=workspace_root,
+                tool_context=tool_context,
+            )
+            result["registered_as"] = f"{entry['model_name']}_onnx"
+
+        lines = [f"Exported **{entry['model_name']}** to ONNX: `{os.path.basename(onnx_path)}` "
+                 f"({result['onnx_size_kb']} KB, {len(result['inputs'])} inputs)"]
+        bench = result.get("benchmark")
+        if bench:
+            lines.append(
+                f"Single-row p50: joblib {bench['joblib']['p50_ms']} ms vs ONNX {bench['onnx']['p50_ms']} ms "
+                f"({bench['latency_speedup_p50']}x); throughput: joblib {bench['joblib']['rows_per_second']:,} "
+                f"vs ONNX {bench['onnx']['rows_per_second']:,} rows/s ({bench['throughput_speedup']}x) "
+                f"on {bench['rows']:,} rows; agreement {bench['agreement']}")
+        result["message"] = "\n".join(lines)
+        return result
     except Exception as e:
         return {"status":"failed","error":str(e)}
 
 @ensure_display_fields
-async def onnx_runtime_infer_tool(model_path: str, **kwargs) -> dict:
+async def onnx_runtime_infer_tool(
+    model_path: Optional[str] = None,
+    model_name: Optional[str] = None,
+    csv_path: Optional[str] = None,
+    output_path: Optional[str] = None,
+    intra_op_threads: Optional[int] = None,
+    inter_op_threads: Optional[int] = None,
+    chunk_rows: Optional[int] = None,
+    n_workers: Optional[int] = None,
+    tool_context: Optional[ToolContext] = None,
+) -> dict:
+    """
+    Score a CSV/Parquet file with an exported .onnx model on onnxruntime (CPU).
+
+    Rows are streamed through batch_scoring.score_file in chunk_rows chunks on
+    n_workers threads sharing one session; onnxruntime releases the GIL, so
+    keep n_workers x intra_op_threads at or below the core count.
+
+    Args:
+        model_path: .onnx file (or model_name of a registered *_onnx model)
+        model_name: Registered ONNX model name
+        csv_path: File to score (default: uploaded dataset)
+        output_path: .csv or .parquet output (default: <input>_onnx_predictions.csv)
+        intra_op_threads: Threads inside one operator (default ONNX_INTRA_OP_THREADS)
+        inter_op_threads: Threads across independent operators (default 1)
+        chunk_rows: Rows per chunk (default BATCH_SCORE_CHUNK_ROWS)
+        n_workers: Scoring threads (default BATCH_SCORE_WORKERS)
+    """
     try:
         import onnxruntime as ort  # noqa
     except Exception:
         return _lib_missing("onnxruntime")
     try:
-        from .ds_tools import predict
-        return await predict(runtime="onnxruntime", model_path=model_path, **kwargs)
+        import asyncio
+        from .batch_scoring import score_file
+        from .onnx_export import get_session, onnx_predict, session_metadata
+
+        if not model_path:
+            model_path = _resolve_registered_model(model_name, None, None)["model_path"]
+        if not model_path.endswith(".onnx"):
+            return {"status": "failed", "error": f"Not an ONNX model: {model_path}",
+                    "hint": "Run export_onnx_tool first and pass the returned onnx_path."}
+        if not csv_path and tool_context is not None:
+            csv_path = tool_context.state.get("default_csv_path")
+        if not csv_path:
+            return {"status": "failed", "error": "Provide csv_path (the rows to score)."}
+        if output_path is None:
+            output_path = os.path.splitext(str(csv_path))[0] + "_onnx_predictions.csv"
+
+        session = get_session(model_path, intra_op_threads, inter_op_threads)
+        feature_columns = session_metadata(session).get("feature_columns") or None
+        summary = await asyncio.to_thread(
+            score_file, session, str(csv_path), output_path,
+            chunk_rows=chunk_rows, n_workers=n_workers,
+            feature_columns=feature_columns, predict_fn=onnx_predict)
+        options = session.get_session_options()
+        return {
+            "status": "success",
+            "runtime": "onnxruntime",
+            "model_path": model_path,
+            "intra_op_threads": options.intra_op_num_threads,
+            "inter_op_threads": options.inter_op_num_threads,
+            **summary,
+            "message": (f"Scored {summary['rows']:,} rows with onnxruntime in {summary['seconds']}s "
+                        f"({summary['rows_per_second']:,} rows/s) -> {output_path}"),
+        }
     except Exception as e:
         return {"status":"failed","error":str(e)}
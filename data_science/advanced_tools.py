@@ -93,6 +93,229 @@ async def _load_dataframe(csv_path: Optional[str], tool_context: Optional[ToolCo
 # 1. OPTUNA BAYESIAN HYPERPARAMETER OPTIMIZATION
 # ============================================================================
 
+_OPTUNA_ESTIMATORS = ("xgboost", "lightgbm", "random_forest", "svm")
+_OPTUNA_PRUNERS = ("median", "asha", "none")
+
+
+def _optuna_study_dir(tool_context: Optional[ToolContext]) -> str:
+    """Workspace folder for the SQLite study store (package .export as fallback)."""
+    try:
+        from .ds_tools import _get_workspace_dir
+        path = os.path.join(_get_workspace_dir(tool_context, "models"), "optuna")
+    except Exception:
+        path = os.path.join(os.path.dirname(__file__), '.export', 'optuna')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _optuna_storage(storage_url: str):
+    import optuna
+    # Several worker processes write trials to the same SQLite file
+    return optuna.storages.RDBStorage(
+        storage_url, engine_kwargs={"connect_args": {"timeout": 60}})
+
+
+def _optuna_pruner(name: str):
+    import optuna
+    if name == "asha":
+        return optuna.pruners.SuccessiveHalvingPruner()
+    if name == "none":
+        return optuna.pruners.NopPruner()
+    return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=0)
+
+
+# Task each scorer measures; a sibling's best params only transfer within one task
+_OPTUNA_SCORING_TASK = {"accuracy": "classification", "f1_weighted": "classification", "r2": "regression"}
+
+
+def _warm_start_study(study, storage, study_prefix: str, scoring: str) -> List[str]:
+    """Enqueue the best params of sibling studies (same estimator/target/data).
+
+    Only siblings optimised in the same direction on a scorer of the same task
+    qualify; a best trial found while minimising, or for another task, would
+    seed the study with a poor configuration. Siblings without recorded
+    metadata are skipped.
+    """
+    import optuna
+    sources = []
+    for summary in optuna.get_all_study_summaries(storage=storage):
+        if summary.study_name == study.study_name or not summary.study_name.startswith(study_prefix):
+            continue
+        if summary.direction != study.direction:
+            continue
+        sibling_scoring = summary.user_attrs.get("scoring")
+        if sibling_scoring is None or (
+                _OPTUNA_SCORING_TASK.get(sibling_scoring) != _OPTUNA_SCORING_TASK.get(scoring)):
+            continue
+        if summary.best_trial is not None:
+            study.enqueue_trial(summary.best_trial.params, skip_if_exists=True)
+            sources.append(summary.study_name)
+    if sources:
+        logger.info(f"[OPTUNA] Warm-starting {study.study_name} from {sources}")
+    return sources
+
+
+def _optuna_model(trial, estimator: str, is_classification: bool, n_jobs: int):
+    """Sample a model for this trial from the estimator's search space."""
+    if estimator == "xgboost":
+        import xgboost as xgb
+        params = {
+            'max_depth': trial.suggest_int('max_depth', 3, 10),
+            'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3, log=True),
+            'n_estimators': trial.suggest_int('n_estimators', 50, 300),
+            'min_child_weight': trial.suggest_int('min_child_weight', 1, 10),
+            'subsample': trial.suggest_float('subsample', 0.6, 1.0),
+            'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
+            'random_state': 42,
+            'n_jobs': n_jobs,
+        }
+        if is_classification:
+            return xgb.XGBClassifier(**params, eval_metric='logloss')
+        return xgb.XGBRegressor(**params)
+
+    if estimator == "lightgbm":
+        import lightgbm as lgb
+        params = {
+            'num_leaves': trial.suggest_int('num_leaves', 20, 150),
+            'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3, log=True),
+            'n_estimators': trial.suggest_int('n_estimators', 50, 300),
+            'min_child_samples': trial.suggest_int('min_child_samples', 5, 100),
+            'subsample': trial.suggest_float('subsample', 0.6, 1.0),
+            'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
+            'random_state': 42,
+            'n_jobs': n_jobs,
+            'verbose': -1
+        }
+        if is_classification:
+            return lgb.LGBMClassifier(**params)
+        return lgb.LGBMRegressor(**params)
+
+    if estimator == "random_forest":
+        from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+        params = {
+            'n_estimators': trial.suggest_int('n_estimators', 50, 300),
+            'max_depth': trial.suggest_int('max_depth', 3, 20),
+            'min_samples_split': trial.suggest_int('min_samples_split', 2, 20),
+            'min_samples_leaf': trial.suggest_int('min_samples_leaf', 1, 10),
+            'random_state': 42,
+            'n_jobs': n_jobs,
+        }
+        if is_classification:
+            return RandomForestClassifier(**params)
+        return RandomForestRegressor(**params)
+
+    # svm: scaling lives inside the pipeline so each fold is scaled on its own train rows
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.svm import SVC, SVR
+    params = {
+        'C': trial.suggest_float('C', 0.1, 100, log=True),
+        'kernel': trial.suggest_categorical('kernel', ['linear', 'rbf', 'poly']),
+    }
+    model = SVC(**params, random_state=42) if is_classification else SVR(**params)
+    return make_pipeline(StandardScaler(), model)
+
+
+class _CVObjective:
+    """Picklable Optuna objective scoring a trial fold by fold on the registered CV folds.
+
+    The running mean after each fold is reported to the pruner, so a poor
+    configuration is stopped after its first fold instead of finishing all of
+    them. Training data is read once per worker process (memory-mapped).
+    """
+
+    def __init__(self, data_path: str, estimator: str, is_classification: bool,
+                 scoring: str, n_jobs: int):
+        self.data_path = data_path
+        self.estimator = estimator
+        self.is_classification = is_classification
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self._data = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_data"] = None
+        return state
+
+    def __call__(self, trial) -> float:
+        import joblib
+        import optuna
+        from sklearn.metrics import get_scorer
+        from sklearn.model_selection import PredefinedSplit
+
+        if self._data is None:
+            self._data = joblib.load(self.data_path, mmap_mode="r")
+        X, y = self._data["X"], self._data["y"]
+        model = _optuna_model(trial, self.estimator, self.is_classification, self.n_jobs)
+        scorer = get_scorer(self.scoring)
+        scores = []
+        for step, (train, test) in enumerate(PredefinedSplit(self._data["folds"]).split()):
+            model.fit(X[train], y[train])
+            scores.append(scorer(model, X[test], y[test]))
+            trial.report(float(np.mean(scores)), step)
+            if trial.should_prune():
+                raise optuna.TrialPruned()
+        return float(np.mean(scores))
+
+
+def _optuna_worker(storage_url: str, study_name: str, objective: _CVObjective,
+                   pruner: str, n_trials: int, timeout: int) -> int:
+    """Run trials for one worker until the study holds n_trials finished trials or time is up."""
+    import optuna
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    study = optuna.load_study(
+        study_name=study_name,
+        storage=_optuna_storage(storage_url),
+        # constant_liar keeps concurrent workers from sampling the same region
+        sampler=optuna.samplers.TPESampler(constant_liar=True),
+        pruner=_optuna_pruner(pruner),
+    )
+    finished = (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+    study.optimize(
+        objective,
+        timeout=timeout,
+        callbacks=[optuna.study.MaxTrialsCallback(n_trials, states=finished)],
+        catch=(ValueError,),
+        show_progress_bar=False,
+    )
+    return len(study.trials)
+
+
+def _worker_context():
+    """
+    Start method for Optuna workers.
+
+    Never fork: the async server is multithreaded and a forked child can inherit
+    locks held by other threads and deadlock. forkserver (preloading this module)
+    where the platform has it, spawn otherwise.
+    """
+    import multiprocessing
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload([__name__])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def _run_optuna_workers(storage_url: str, study_name: str, objective: _CVObjective,
+                        pruner: str, n_trials: int, timeout: int, n_workers: int) -> None:
+    """Run the study on n_workers processes sharing the SQLite storage."""
+    if n_workers == 1:
+        _optuna_worker(storage_url, study_name, objective, pruner, n_trials, timeout)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=_worker_context()) as executor:
+        futures = [executor.submit(_optuna_worker, storage_url, study_name, objective,
+                                   pruner, n_trials, timeout)
+                   for _ in range(n_workers)]
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logger.warning(f"[OPTUNA] Worker failed: {e}")
+
+
 @ensure_display_fields
 async def optuna_tune(
     target: str,
@@ -102,6 +325,7 @@ async def optuna_tune(
     time_budget_s: int = 120,
     direction: str = "maximize",
     metric: str = "accuracy",
+    pruner: str = "median",
     tool_context: Optional[ToolContext] = None,
 ) -> dict:
     """ Optuna Bayesian Hyperparameter Optimization - Smarter than grid_search!
@@ -111,7 +335,10 @@ async def optuna_tune(
     
     **Why Optuna:**
     - [OK] Bayesian optimization (learns from previous trials)
-    - [OK] Early stopping/pruning (skips bad configs)
+    - [OK] Early stopping/pruning after each CV fold (skips bad configs)
+    - [OK] Parallel trials across worker processes (OPTUNA_WORKERS)
+    - [OK] Studies persist in workspace SQLite: interrupted runs resume and
+      re-tuning the same dataset warm-starts from earlier trials
     - [OK] 2-10x faster than grid search
     - [OK] Often finds better parameters
     
@@ -125,10 +352,12 @@ async def optuna_tune(
         target: Target column to predict
         csv_path: Path to CSV (optional, auto-detects)
         estimator: Model to tune (default: 'xgboost')
-        n_trials: Number of trials (default: 50)
+        n_trials: Total trials for the study, counting trials from earlier
+            runs on the same dataset (default: 50)
         time_budget_s: Max time in seconds (default: 120)
         direction: 'maximize' or 'minimize' the metric
         metric: Metric to optimize (default: 'accuracy')
+        pruner: 'median', 'asha' (successive halving) or 'none'
         tool_context: ADK context (auto-provided)
     
     Returns:
@@ -144,7 +373,6 @@ async def optuna_tune(
     """
     try:
         import optuna
-        from sklearn.model_selection import cross_val_score, train_test_split
         from sklearn.preprocessing import LabelEncoder
         import matplotlib.pyplot as plt
         
@@ -154,12 +382,27 @@ async def optuna_tune(
     except ImportError:
         return {"error": "Optuna not installed. Run: pip install optuna"}
     
+    if estimator not in _OPTUNA_ESTIMATORS:
+        return {"error": f"Unknown estimator '{estimator}'. Choose from: {list(_OPTUNA_ESTIMATORS)}"}
+    if pruner not in _OPTUNA_PRUNERS:
+        return {"error": f"Unknown pruner '{pruner}'. Choose from: {list(_OPTUNA_PRUNERS)}"}
+    if estimator in ("xgboost", "lightgbm"):
+        try:
+            __import__(estimator)
+        except ImportError:
+            return {"error": f"{estimator} not installed. Run: pip install {estimator}"}
+    
     # Load data
     df = await _load_dataframe(csv_path, tool_context=tool_context)
     
     if target not in df.columns:
         return {"error": f"Target '{target}' not found"}
     
+    from .dataset_fingerprint import dataset_fingerprint
+    from .large_data_config import OPTUNA_WORKERS
+    from .split_registry import get_split
+    fingerprint = dataset_fingerprint(df)
+    
     X = df.drop(columns=[target])
     y = df[target]
     
@@ -171,103 +414,69 @@ async def optuna_tune(
     if is_classification and y.dtype == 'object':
         y = LabelEncoder().fit_transform(y.astype(str))
     
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # Define objective function for Optuna
-    def objective(trial):
-        if estimator == "xgboost":
-            try:
-                import xgboost as xgb
-                params = {
-                    'max_depth': trial.suggest_int('max_depth', 3, 10),
-                    'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3, log=True),
-                    'n_estimators': trial.suggest_int('n_estimators', 50, 300),
-                    'min_child_weight': trial.suggest_int('min_child_weight', 1, 10),
-                    'subsample': trial.suggest_float('subsample', 0.6, 1.0),
-                    'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
-                    'random_state': 42
-                }
-                if is_classification:
-                    model = xgb.XGBClassifier(**params, use_label_encoder=False, eval_metric='logloss')
-                else:
-                    model = xgb.XGBRegressor(**params)
-            except ImportError:
-                return 0.0
-                
-        elif estimator == "lightgbm":
-            try:
-                import lightgbm as lgb
-                params = {
-                    'num_leaves': trial.suggest_int('num_leaves', 20, 150),
-                    'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3, log=True),
-                    'n_estimators': trial.suggest_int('n_estimators', 50, 300),
-                    'min_child_samples': trial.suggest_int('min_child_samples', 5, 100),
-                    'subsample': trial.suggest_float('subsample', 0.6, 1.0),
-                    'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
-                    'random_state': 42,
-                    'verbose': -1
-                }
-                if is_classification:
-                    model = lgb.LGBMClassifier(**params)
-                else:
-                    model = lgb.LGBMRegressor(**params)
-            except ImportError:
-                return 0.0
-                
-        elif estimator == "random_forest":
-            from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-            params = {
-                'n_estimators': trial.suggest_int('n_estimators', 50, 300),
-                'max_depth': trial.suggest_int('max_depth', 3, 20),
-                'min_samples_split': trial.suggest_int('min_samples_split', 2, 20),
-                'min_samples_leaf': trial.suggest_int('min_samples_leaf', 1, 10),
-                'random_state': 42
-            }
-            if is_classification:
-                model = RandomForestClassifier(**params)
-            else:
-                model = RandomForestRegressor(**params)
-                
-        elif estimator == "svm":
-            from sklearn.svm import SVC, SVR
-            from sklearn.preprocessing import StandardScaler
-            params = {
-                'C': trial.suggest_float('C', 0.1, 100, log=True),
-                'kernel': trial.suggest_categorical('kernel', ['linear', 'rbf', 'poly']),
-                'random_state': 42
-            }
-            # SVM needs scaling
-            scaler = StandardScaler()
-            X_train_scaled = scaler.fit_transform(X_train)
-            if is_classification:
-                model = SVC(**params)
-            else:
-                model = SVR(**params)
-            model.fit(X_train_scaled, y_train)
-            return model.score(scaler.transform(X_test), y_test)
-        else:
-            return 0.0
-        
-        # Train and evaluate with cross-validation
-        scoring = 'accuracy' if is_classification else 'r2'
-        if metric == 'accuracy':
-            scoring = 'accuracy'
-        elif metric == 'r2':
-            scoring = 'r2'
-        elif metric == 'f1':
-            scoring = 'f1_weighted'
-        
-        scores = cross_val_score(model, X_train, y_train, cv=3, scoring=scoring, n_jobs=-1)
-        return scores.mean()
-    
-    # Create and run study
+    # Registered split: trials are scored on its CV folds of the training rows
+    split = get_split(df, target, tool_context=tool_context, fingerprint=fingerprint)
+    X_train, X_test, y_train, y_test = split.train_test(X, y)
+    
+    scoring = 'accuracy' if is_classification else 'r2'
+    if metric == 'accuracy':
+        scoring = 'accuracy'
+    elif metric == 'r2':
+        scoring = 'r2'
+    elif metric == 'f1':
+        scoring = 'f1_weighted'
+    
+    # Persistent study: same dataset fingerprint + settings resumes/warm-starts
+    study_dir = _optuna_study_dir(tool_context)
+    storage_url = f"sqlite:///{os.path.join(study_dir, 'optuna_studies.db')}"
+    study_prefix = f"{estimator}-{target}-{fingerprint}"
+    study_name = f"{study_prefix}-{metric}-{direction}"
+    storage = _optuna_storage(storage_url)
     study = optuna.create_study(
+        study_name=study_name,
+        storage=storage,
         direction=direction,
-        pruner=optuna.pruners.MedianPruner()
+        load_if_exists=True,
     )
+    study.set_user_attr("metric", metric)
+    study.set_user_attr("scoring", scoring)
+    finished_states = (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+    n_previous = len(study.get_trials(deepcopy=False, states=finished_states))
+    warm_started_from = []
+    if n_previous == 0:
+        warm_started_from = _warm_start_study(study, storage, study_prefix, scoring)
+    
+    remaining = max(0, n_trials - n_previous)
+    n_workers = max(1, min(OPTUNA_WORKERS, os.cpu_count() or 1, remaining or 1))
+    threads_per_trial = max(1, (os.cpu_count() or 1) // n_workers)
+    if remaining:
+        import joblib
+        import uuid
+        # Per-run name: concurrent runs on the same data each remove only their own copy
+        data_path = os.path.join(study_dir, f"data_{fingerprint}_{split.key}_{uuid.uuid4().hex[:8]}.joblib")
+        joblib.dump({"X": np.asarray(X_train, dtype=float), "y": np.asarray(y_train),
+                     "folds": split.folds}, data_path)
+        objective = _CVObjective(data_path, estimator, is_classification, scoring, threads_per_trial)
+        logger.info(f"[OPTUNA] {study_name}: {n_previous} trials on record, running "
+                    f"{remaining} more on {n_workers} worker(s), pruner={pruner}")
+        import asyncio
+        try:
+            await asyncio.to_thread(_run_optuna_workers, storage_url, study_name, objective,
+                                    pruner, n_trials, time_budget_s, n_workers)
+        finally:
+            # The training copy only serves the workers of this run; a resumed
+            # run writes it again from the same split
+            try:
+                os.remove(data_path)
+            except OSError:
+                pass
+    study = optuna.load_study(study_name=study_name, storage=storage)
     
-    study.optimize(objective, n_trials=n_trials, timeout=time_budget_s, show_progress_bar=False)
+    completed = study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,))
+    if not completed:
+        return {"error": f"No Optuna trial completed within {time_budget_s}s; "
+                         f"increase time_budget_s (study '{study_name}' keeps its progress)"}
+    n_pruned = len(study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.PRUNED,)))
     
     # Get best parameters
     best_params = study.best_params
@@ -289,7 +498,7 @@ async def optuna_tune(
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
     
     # Optimization history
-    ax1.plot(range(len(study.trials)), [t.value for t in study.trials], 'o-')
+    ax1.plot([t.number for t in completed], [t.value for t in completed], 'o-')
     ax1.axhline(y=best_score, color='r', linestyle='--', label=f'Best: {best_score:.4f}')
     ax1.set_xlabel('Trial', fontsize=12)
     ax1.set_ylabel(metric.capitalize(), fontsize=12)
@@ -331,7 +540,14 @@ async def optuna_tune(
         "estimator": estimator,
         "best_params": best_params,
         "best_score": float(best_score),
-        "n_trials_completed": len(study.trials),
+        "n_trials_completed": len(completed),
+        "n_trials_pruned": n_pruned,
+        "n_trials_from_previous_runs": n_previous,
+        "warm_started_from": warm_started_from,
+        "study_name": study_name,
+        "study_storage": storage_url,
+        "workers": n_workers,
+        "pruner": pruner,
         "study_summary_path": summary_path,
         "visualization_path": viz_path,
         "message": f"[OK] Optuna found optimal params! Best {metric}: {best_score:.4f}",
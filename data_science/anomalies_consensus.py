@@ -1,36 +1,60 @@
 """
 Consensus anomaly detection with proper math.
+
+Detectors report one score per row (higher = more anomalous) and a flag
+threshold. Consensus works on those arrays directly: votes are a uint8 count
+per row and agreement is ranked by the mean per-method score percentile, so
+memory stays O(rows) regardless of how many rows each method flags.
 """
 import numpy as np
 import pandas as pd
-from typing import Dict, Iterable, Set
+from typing import Any, Dict, Iterable, Optional, Set
+
 
 def to_index_set(idx_like: Iterable[int]) -> Set[int]:
     """Convert index-like data to a set of integers."""
     return set(map(int, idx_like))
 
+
+def vote_counts(flags: Dict[str, np.ndarray]) -> np.ndarray:
+    """Number of methods flagging each row (uint8 array)."""
+    arrays = [np.asarray(f, dtype=bool) for f in flags.values()]
+    votes = np.zeros(len(arrays[0]) if arrays else 0, dtype=np.uint8)
+    for a in arrays:
+        votes += a
+    return votes
+
+
+def consensus_score(scores: Dict[str, np.ndarray]) -> np.ndarray:
+    """Mean percentile rank of each row's score across methods (0..1, higher = more anomalous)."""
+    ranks = [pd.Series(s).rank(pct=True).to_numpy(dtype=np.float32) for s in scores.values()]
+    return np.mean(ranks, axis=0) if ranks else np.zeros(0, dtype=np.float32)
+
+
 def consensus_from_methods(results: Dict[str, Iterable[int]], min_votes: int = 2) -> Set[int]:
     """
     Compute consensus anomalies from multiple detection methods.
-    
+
     Args:
         results: Dict mapping method names to lists of anomaly indices
         min_votes: Minimum number of methods that must agree on an anomaly
-        
+
     Returns:
         Set of row indices agreed upon by >= min_votes methods
     """
-    votes = {}
-    for method, idxs in results.items():
-        for i in set(map(int, idxs)):
-            votes[i] = votes.get(i, 0) + 1
-    return {i for i, v in votes.items() if v >= min_votes}
+    idx = [np.unique(np.fromiter(map(int, i), dtype=np.int64)) for i in results.values()]
+    idx = [i for i in idx if i.size]
+    if not idx:
+        return set()
+    votes = np.bincount(np.concatenate(idx))
+    return set(np.flatnonzero(votes >= min_votes).tolist())
+
 
 def anomaly_summary(results: Dict[str, Iterable[int]], min_votes: int = 2) -> Dict[str, Any]:
     """Generate a comprehensive anomaly detection summary."""
     per_method_counts = {method: len(set(map(int, idxs))) for method, idxs in results.items()}
     consensus = consensus_from_methods(results, min_votes)
-    
+
     return {
         "per_method_counts": per_method_counts,
         "consensus_count": len(consensus),
@@ -38,3 +62,31 @@ def anomaly_summary(results: Dict[str, Iterable[int]], min_votes: int = 2) -> Di
         "min_votes": min_votes,
         "total_unique": len(set().union(*[set(map(int, idxs)) for idxs in results.values()]))
     }
+
+
+def score_summary(
+    flags: Dict[str, np.ndarray],
+    scores: Optional[Dict[str, np.ndarray]] = None,
+    min_votes: int = 2,
+    max_indices: int = 100,
+) -> Dict[str, Any]:
+    """
+    anomaly_summary for per-row flag arrays.
+
+    Consensus rows are listed strongest first (by consensus_score when scores
+    are given), capped at max_indices; counts always cover every row.
+    """
+    votes = vote_counts(flags)
+    consensus = np.flatnonzero(votes >= min_votes)
+    if scores and consensus.size:
+        strength = consensus_score(scores)[consensus]
+        consensus = consensus[np.argsort(-strength, kind="stable")]
+
+    return {
+        "per_method_counts": {m: int(np.count_nonzero(f)) for m, f in flags.items()},
+        "consensus_count": int(consensus.size),
+        "consensus_indices": consensus[:max_indices].tolist(),
+        "min_votes": min_votes,
+        "total_unique": int(np.count_nonzero(votes)),
+        "vote_histogram": {int(v): int(c) for v, c in enumerate(np.bincount(votes)) if c},
+    }
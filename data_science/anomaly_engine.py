@@ -0,0 +1,243 @@
+"""
+Fit-on-sample, score-in-chunks anomaly detection.
+
+Every detector is fitted on a bounded sample and then scores all rows:
+
+  - the data is standardised once; the fit sample is stratified on row
+    extremeness (deciles of max |z|) so the tails keep their share
+  - IsolationForest fits on ANOMALY_FIT_SAMPLE_ROWS rows, LOF (novelty mode)
+    on ANOMALY_LOF_FIT_ROWS, One-Class SVM on ANOMALY_SVM_FIT_ROWS
+  - detectors are fitted concurrently, then all (detector, chunk) scoring tasks
+    of ANOMALY_SCORE_CHUNK_ROWS rows run on ANOMALY_WORKERS processes, reading
+    the shared matrix through a memory map
+  - each detector yields one float32 score per row (higher = more anomalous) and
+    a threshold: the (1 - contamination) quantile of its scores on
+    ANOMALY_CALIBRATION_ROWS held-out rows (not its fit sample, which LOF and
+    One-Class SVM score as more normal than unseen rows), or the fixed rule
+    for z-score (|z| > 3) and IQR (outside the 1.5 x IQR fences)
+  - data too small to hold out at least 1,000 calibration rows beyond the fit
+    sample is fitted whole and calibrated on its own scores
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .large_data_config import (
+    ANOMALY_CALIBRATION_ROWS,
+    ANOMALY_FIT_SAMPLE_ROWS,
+    ANOMALY_LOF_FIT_ROWS,
+    ANOMALY_SCORE_CHUNK_ROWS,
+    ANOMALY_SVM_FIT_ROWS,
+    ANOMALY_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METHODS = ["isolation_forest", "lof", "zscore", "iqr", "one_class_svm"]
+
+ZSCORE_THRESHOLD = 3.0
+
+
+def stratified_sample(Z: np.ndarray, n_rows: int, seed: int = 42, n_strata: int = 10) -> np.ndarray:
+    """Sorted positions of n_rows rows, allocated proportionally across deciles of max |z|."""
+    if len(Z) <= n_rows:
+        return np.arange(len(Z))
+    rng = np.random.RandomState(seed)
+    extremeness = np.abs(Z).max(axis=1)
+    edges = np.quantile(extremeness, np.linspace(0, 1, n_strata + 1)[1:-1])
+    strata = np.searchsorted(edges, extremeness)
+    picks = []
+    for s in np.unique(strata):
+        members = np.flatnonzero(strata == s)
+        take = max(1, int(round(n_rows * len(members) / len(Z))))
+        picks.append(rng.choice(members, min(take, len(members)), replace=False))
+    return np.sort(np.concatenate(picks))
+
+
+# ============================================================================
+# Detectors: fit(Z_sample, contamination, seed) -> state; score(state, Z) -> scores
+# ============================================================================
+
+def _fit_isolation_forest(Z, contamination, seed):
+    from sklearn.ensemble import IsolationForest
+    return IsolationForest(contamination=contamination, random_state=seed, n_jobs=1).fit(Z)
+
+
+def _score_isolation_forest(model, Z):
+    return -model.score_samples(Z)
+
+
+def _fit_lof(Z, contamination, seed):
+    from sklearn.neighbors import LocalOutlierFactor
+    return LocalOutlierFactor(contamination=contamination, novelty=True).fit(Z)
+
+
+def _score_lof(model, Z):
+    return -model.score_samples(Z)
+
+
+def _fit_one_class_svm(Z, contamination, seed):
+    from sklearn.svm import OneClassSVM
+    return OneClassSVM(nu=contamination, kernel="rbf").fit(Z)
+
+
+def _score_one_class_svm(model, Z):
+    return -model.decision_function(Z)
+
+
+def _fit_zscore(Z, contamination, seed):
+    return None
+
+
+def _score_zscore(state, Z):
+    return np.abs(Z).max(axis=1)
+
+
+def _fit_iqr(Z, contamination, seed):
+    q1, q3 = np.quantile(Z, [0.25, 0.75], axis=0)
+    iqr = q3 - q1
+    return q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+
+def _score_iqr(fences, Z):
+    lower, upper = fences
+    # Distance beyond the nearest fence (0 inside), worst column
+    return np.maximum(np.maximum(lower - Z, Z - upper), 0).max(axis=1)
+
+
+DETECTORS: Dict[str, Tuple[Callable, Callable]] = {
+    "isolation_forest": (_fit_isolation_forest, _score_isolation_forest),
+    "lof": (_fit_lof, _score_lof),
+    "one_class_svm": (_fit_one_class_svm, _score_one_class_svm),
+    "zscore": (_fit_zscore, _score_zscore),
+    "iqr": (_fit_iqr, _score_iqr),
+}
+
+# Detectors flagging by a fixed rule instead of a contamination quantile
+_FIXED_THRESHOLDS = {"zscore": ZSCORE_THRESHOLD, "iqr": 0.0}
+
+# Smallest held-out set a contamination quantile is taken from
+_MIN_CALIBRATION_ROWS = 1000
+
+
+def _fit_rows(method: str) -> int:
+    return {"lof": ANOMALY_LOF_FIT_ROWS, "one_class_svm": ANOMALY_SVM_FIT_ROWS}.get(method, ANOMALY_FIT_SAMPLE_ROWS)
+
+
+def _split_sample(Z: np.ndarray, fit_rows: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (fit, calibration) positions from one stratified sample.
+
+    With fewer than _MIN_CALIBRATION_ROWS rows left beyond fit_rows, a held-out
+    quantile would rest on a handful of rows, so every row is fitted and the
+    threshold is calibrated on the fitted rows, which are then exactly the
+    rows scored (the share flagged is contamination; for IsolationForest this
+    is its own offset_).
+    """
+    if len(Z) < fit_rows + _MIN_CALIBRATION_ROWS:
+        everything = np.arange(len(Z))
+        return everything, everything
+    pool = np.random.RandomState(seed).permutation(
+        stratified_sample(Z, fit_rows + ANOMALY_CALIBRATION_ROWS, seed))
+    return np.sort(pool[:fit_rows]), np.sort(pool[fit_rows:])
+
+
+def _fit_detector(method: str, Z: np.ndarray, contamination: float, seed: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    fit, score = DETECTORS[method]
+    if method in _FIXED_THRESHOLDS:
+        idx, calibration = stratified_sample(Z, _fit_rows(method), seed), None
+    else:
+        idx, calibration = _split_sample(Z, _fit_rows(method), seed)
+    try:
+        state = fit(Z[idx], contamination, seed)
+        if calibration is None:
+            threshold = _FIXED_THRESHOLDS[method]
+        else:
+            threshold = float(np.quantile(score(state, Z[calibration]), 1 - contamination))
+    except Exception as e:
+        logger.warning(f"[ANOMALY] {method} failed to fit: {e}")
+        return {"method": method, "error": str(e)}
+    return {"method": method, "state": state, "threshold": threshold,
+            "fit_rows": int(len(idx)), "calibration_rows": 0 if calibration is None else int(len(calibration)),
+            "fit_seconds": round(time.perf_counter() - start, 3)}
+
+
+def _score_chunk(method: str, state: Any, Z: np.ndarray, start: int, stop: int) -> np.ndarray:
+    return np.asarray(DETECTORS[method][1](state, Z[start:stop]), dtype=np.float32)
+
+
+def run_detectors(
+    X: np.ndarray,
+    methods: Optional[Sequence[str]] = None,
+    contamination: float = 0.1,
+    n_workers: Optional[int] = None,
+    seed: int = 42,
+) -> Dict[str, Any]:
+    """
+    Fit each detector on a bounded sample and score every row.
+
+    Args:
+        X: Numeric matrix without missing values
+        methods: Subset of DETECTORS (default: all)
+        contamination: Expected outlier share; sets the quantile thresholds
+        n_workers: Scoring processes (default ANOMALY_WORKERS)
+        seed: Seed for the fit samples and the detectors
+
+    Returns:
+        dict with "detectors" (per method: scores, threshold, flags, fit_rows,
+        calibration_rows, fit_seconds, or error) and engine stats (rows, chunks, workers, seconds)
+    """
+    from joblib import Parallel, delayed
+    from sklearn.preprocessing import StandardScaler
+
+    start = time.perf_counter()
+    methods = list(methods or DEFAULT_METHODS)
+    unknown = [m for m in methods if m not in DETECTORS]
+    if unknown:
+        raise ValueError(f"Unknown anomaly methods {unknown}. Choose from: {sorted(DETECTORS)}")
+
+    Z = StandardScaler().fit_transform(np.asarray(X, dtype=float))
+    n_workers = max(1, int(n_workers or ANOMALY_WORKERS))
+
+    # Fitting is bounded by the sample sizes; run the detectors side by side
+    fitted = Parallel(n_jobs=min(n_workers, len(methods)), backend="threading")(
+        delayed(_fit_detector)(m, Z, contamination, seed) for m in methods)
+    ready = [f for f in fitted if "error" not in f]
+
+    bounds = [(s, min(s + ANOMALY_SCORE_CHUNK_ROWS, len(Z))) for s in range(0, len(Z), ANOMALY_SCORE_CHUNK_ROWS)]
+    tasks = [(f, b) for f in ready for b in bounds]
+    logger.info(f"[ANOMALY] Scoring {len(Z):,} rows with {len(ready)} detectors "
+                f"in {len(bounds)} chunks on {n_workers} workers")
+    if n_workers > 1 and len(tasks) > 1 and len(Z) > ANOMALY_SCORE_CHUNK_ROWS:
+        # max_nbytes: Z is memory-mapped into the workers instead of copied per task
+        parts = Parallel(n_jobs=n_workers, max_nbytes="1M")(
+            delayed(_score_chunk)(f["method"], f["state"], Z, s, e) for f, (s, e) in tasks)
+    else:
+        parts = [_score_chunk(f["method"], f["state"], Z, s, e) for f, (s, e) in tasks]
+
+    detectors: Dict[str, Dict[str, Any]] = {}
+    for f in fitted:
+        if "error" in f:
+            detectors[f["method"]] = {"error": f["error"]}
+    for i, f in enumerate(ready):
+        scores = np.concatenate(parts[i * len(bounds):(i + 1) * len(bounds)])
+        detectors[f["method"]] = {
+            "scores": scores,
+            "threshold": f["threshold"],
+            "flags": scores > f["threshold"],
+            "fit_rows": f["fit_rows"],
+            "calibration_rows": f["calibration_rows"],
+            "fit_seconds": f["fit_seconds"],
+        }
+
+    return {
+        "detectors": {m: detectors[m] for m in methods},
+        "rows": int(len(Z)),
+        "chunks": len(bounds),
+        "workers": n_workers,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
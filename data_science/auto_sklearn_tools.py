@@ -5,16 +5,22 @@ Provides automated algorithm selection, hyperparameter optimization,
 feature preprocessing, and ensemble construction - cross-platform compatible.
 """
 from __future__ import annotations
-from .ds_tools import ensure_display_fields
+from .ds_tools import _load_dataframe, ensure_display_fields
+from .split_registry import get_split
 
+import asyncio
+import logging
 import os
+import time
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor, wait
 from pathlib import Path
 from typing import Optional, Any
 from io import BytesIO
 
-from sklearn.model_selection import RandomizedSearchCV, cross_val_score, train_test_split
+from sklearn.base import clone
+from sklearn.model_selection import ParameterSampler, PredefinedSplit
 from sklearn.ensemble import (
     RandomForestClassifier,
     RandomForestRegressor,
@@ -37,6 +43,10 @@ from scipy.stats import randint, uniform
 
 from google.adk.tools import ToolContext
 
+from .large_data_config import AUTOML_CANDIDATE_WORKERS
+
+logger = logging.getLogger(__name__)
+
 
 def _json_safe(obj: Any) -> Any:
     """Convert complex Python objects to JSON-serializable types using production serializer."""
@@ -179,6 +189,280 @@ def _get_regression_models():
     }
 
 
+# ============================================================================
+# Leaderboard Scheduler
+# ============================================================================
+
+def _score_fold(estimator, params, X, y, train, test, scoring):
+    """Fit one configuration on one CV fold; NaN if the configuration is invalid."""
+    from sklearn.metrics import get_scorer
+    try:
+        model = clone(estimator).set_params(**params)
+        model.fit(X[train], y[train])
+        return float(get_scorer(scoring)(model, X[test], y[test]))
+    except Exception:
+        return float("nan")
+
+
+def _score_configs(parallel, estimator, configs, X, y, cv_splits, scoring, n_jobs, deadline,
+                   batch_estimate=None):
+    """Score configs on every fold in batches of n_jobs, stopping between batches at deadline.
+
+    A batch is only started when the previous batch's duration (or
+    batch_estimate, for the first batch of a later halving round) says it can
+    finish before the deadline. Without an estimate the first batch always
+    runs, so a started candidate reaches the leaderboard.
+
+    Returns:
+        ([(params, fold scores)], stopped early, seconds of the last batch)
+    """
+    from joblib import delayed
+
+    evaluated = []
+    last = batch_estimate
+    for i in range(0, len(configs), n_jobs):
+        if last is not None and time.time() + last > deadline:
+            return evaluated, True, last
+        batch = configs[i:i + n_jobs]
+        began = time.time()
+        scores = parallel(
+            delayed(_score_fold)(estimator, params, X, y, train, test, scoring)
+            for params in batch for train, test in cv_splits)
+        last = time.time() - began
+        k = len(cv_splits)
+        for j, params in enumerate(batch):
+            evaluated.append((params, np.asarray(scores[j * k:(j + 1) * k], dtype=float)))
+    return evaluated, False, last
+
+
+def _halving_rounds(n_configs: int, n_rows: int, factor: int) -> list:
+    """Training-row fraction per successive-halving round ("exhaust": the last round uses every row)."""
+    n_rounds = 1 + int(np.floor(np.log(max(1, n_configs)) / np.log(factor)))
+    # Don't shrink folds below a few dozen rows; such rounds would rank noise
+    while n_rounds > 1 and n_rows / factor ** (n_rounds - 1) < 30:
+        n_rounds -= 1
+    return [1.0 / factor ** (n_rounds - 1 - r) for r in range(n_rounds)]
+
+
+def _search_candidate(name, estimator, param_space, X, y, folds, scoring, n_iter, n_jobs,
+                      deadline, time_slice, search_mode="grid"):
+    """Random search for one candidate within its core allocation and time slice.
+
+    Runs inside a scheduler worker. Configurations are scored in batches of
+    n_jobs (configuration x fold fits fan out over n_jobs cores) and the
+    candidate's deadline (its time slice, capped by the shared budget) is
+    checked between batches; at least one batch always runs so
+    every started candidate reaches the leaderboard. With search_mode
+    "halving" the same batches run as successive-halving rounds: every
+    configuration is scored on a fraction of each fold's training rows, the
+    best 1/HALVING_FACTOR survive, and the fraction grows by HALVING_FACTOR
+    per round until the last round uses every row. The deadline is checked
+    before every batch of every round (projected from the last batch's
+    duration); a search cut off early keeps the best
+    configuration of the deepest round it reached, refitted on that round's
+    share of the rows. The per-fold scores of the
+    winning configuration are returned, so no separate cross-validation pass
+    is needed.
+    """
+    from joblib import Parallel
+
+    start = time.time()
+    if start >= deadline:
+        return {"model": name, "skipped": "time budget exhausted before start"}
+    deadline = min(deadline, start + time_slice)
+
+    cv_splits = list(PredefinedSplit(folds).split())
+    configs = list(ParameterSampler(param_space, n_iter=n_iter, random_state=42))
+    halving = None
+    with Parallel(n_jobs=n_jobs) as parallel:
+        if search_mode == "halving":
+            from .halving_search import HALVING_FACTOR
+            fractions = _halving_rounds(len(configs), len(y), HALVING_FACTOR)
+            # One fixed permutation per fold: each round's rows extend the previous round's
+            rng = np.random.RandomState(42)
+            orders = [(rng.permutation(train), test) for train, test in cv_splits]
+            survivors, evaluated, stopped = configs, [], False
+            halving = {"search_mode": "halving", "factor": HALVING_FACTOR,
+                       "n_rounds_planned": len(fractions), "n_candidates": [], "n_resources": []}
+            batch_seconds, previous_fraction = None, None
+            for fraction in fractions:
+                splits = [(order[:max(1, int(round(len(order) * fraction)))], test) for order, test in orders]
+                # Fit time grows about linearly with rows: project this round's
+                # batches from the previous round's
+                estimate = None if batch_seconds is None else batch_seconds * fraction / previous_fraction
+                scored, stopped, batch_seconds = _score_configs(
+                    parallel, estimator, survivors, X, y, splits, scoring, n_jobs, deadline, estimate)
+                if not scored:
+                    break
+                evaluated, refit_fraction, previous_fraction = scored, fraction, fraction
+                halving["n_candidates"].append(len(evaluated))
+                halving["n_resources"].append(int(sum(len(tr) for tr, _ in splits)))
+                if stopped:
+                    break
+                means = np.array([fold_scores.mean() for _, fold_scores in evaluated])
+                keep = max(1, int(np.ceil(len(evaluated) / HALVING_FACTOR)))
+                ranked = np.argsort(-np.nan_to_num(means, nan=-np.inf), kind="stable")[:keep]
+                survivors = [evaluated[i][0] for i in ranked]
+            halving["n_iterations"] = len(halving["n_candidates"])
+            configs_evaluated = halving["n_candidates"][0] if halving["n_candidates"] else 0
+        else:
+            evaluated, stopped, _ = _score_configs(parallel, estimator, configs, X, y, cv_splits,
+                                                   scoring, n_jobs, deadline)
+            configs_evaluated = len(evaluated)
+
+    means = np.array([fold_scores.mean() for _, fold_scores in evaluated])
+    if np.all(np.isnan(means)):
+        raise ValueError(f"every sampled configuration failed for {name}")
+    best_params, best_scores = evaluated[int(np.nanargmax(means))]
+
+    refit_rows = np.arange(len(y))
+    if halving is not None and stopped and refit_fraction < 1.0:
+        # Out of time: refit on the row fraction of the deepest round reached
+        # rather than paying a full-data fit the slice has no room for
+        refit_rows = np.random.RandomState(42).permutation(len(y))[:max(1, int(round(len(y) * refit_fraction)))]
+    best_estimator = clone(estimator).set_params(**best_params).fit(X[refit_rows], y[refit_rows])
+    result = {
+        "model": name,
+        "estimator": best_estimator,
+        "best_params": best_params,
+        "cv_mean": float(best_scores.mean()),
+        "cv_std": float(best_scores.std()),
+        "configs_evaluated": configs_evaluated,
+        "configs_planned": len(configs),
+        "stopped_by_budget": stopped,
+        "refit_rows": int(len(refit_rows)),
+        "n_jobs": n_jobs,
+        "seconds": round(time.time() - start, 2),
+    }
+    if halving is not None:
+        result["halving"] = halving
+    return result
+
+
+def _worker_context():
+    """
+    Start method for candidate workers.
+
+    Never fork: the async server is multithreaded and a forked child can inherit
+    locks held by other threads and deadlock. forkserver (preloading this module)
+    where the platform has it, spawn otherwise.
+    """
+    import multiprocessing
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload([__name__])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def _report_pid(pids) -> None:
+    """Worker initializer: announce the worker's PID so it can be terminated."""
+    pids.put(os.getpid())
+
+
+def _terminate_workers(pids) -> None:
+    """Kill every worker that announced itself on pids (running tasks included)."""
+    import queue
+    import signal
+    while True:
+        try:
+            pid = pids.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            # SIGTERM is TerminateProcess on Windows
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+
+
+def _run_leaderboard(models, X_train, y_train, folds, scoring, n_iter, time_budget,
+                     search_mode="auto"):
+    """Search every candidate concurrently under one wall-clock budget.
+
+    Up to AUTOML_CANDIDATE_WORKERS candidates run at once in worker processes,
+    each with CPUs // workers cores for its own fits, so the machine is
+    filled without oversubscription. Each candidate gets an equal time slice
+    (budget * workers / candidates) so one slow model cannot starve the
+    others; candidates that finish early free their worker for the queue.
+    Candidates still queued when the budget
+    runs out are skipped; workers of candidates that have not returned shortly
+    after it (current batch + refit) are terminated and the candidates are
+    reported as killed. search_mode is
+    resolved once for all candidates (see halving_search.choose_search_mode).
+
+    Returns:
+        (candidate result dicts, scheduler info dict)
+    """
+    n_cores = os.cpu_count() or 1
+    n_workers = max(1, min(AUTOML_CANDIDATE_WORKERS, len(models), n_cores))
+    jobs_per_candidate = max(1, n_cores // n_workers)
+    start = time.time()
+    deadline = start + max(1, time_budget)
+    time_slice = max(1.0, time_budget * n_workers / max(1, len(models)))
+    grace = max(5.0, 0.2 * time_budget)
+    X = np.ascontiguousarray(X_train)
+    y = np.asarray(y_train)
+    from .halving_search import choose_search_mode
+    mode = choose_search_mode(n_iter, len(y), search_mode)
+
+    def _args(name, config):
+        return (name, config["model"], config["params"], X, y, folds, scoring,
+                n_iter, jobs_per_candidate, deadline, time_slice, mode)
+
+    results = []
+    if n_workers == 1:
+        for name, config in models.items():
+            try:
+                results.append(_search_candidate(*_args(name, config)))
+            except Exception as e:
+                results.append({"model": name, "error": str(e)})
+    else:
+        ctx = _worker_context()
+        pids = ctx.Queue()
+        executor = ProcessPoolExecutor(max_workers=n_workers, mp_context=ctx,
+                                       initializer=_report_pid, initargs=(pids,))
+        killed = False
+        try:
+            futures = {executor.submit(_search_candidate, *_args(name, config)): name
+                       for name, config in models.items()}
+            done, not_done = wait(futures, timeout=max(0.0, deadline + grace - time.time()))
+            if not_done:
+                # cancel() only drops queued candidates; running ones would keep
+                # their cores busy after the tool returns, so stop the workers
+                killed = any(not f.cancel() for f in not_done)
+                _terminate_workers(pids)
+            for future, name in futures.items():
+                if future in done:
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        results.append({"model": name, "error": str(e)})
+                elif future.cancelled():
+                    results.append({"model": name, "skipped": "time budget exhausted before start"})
+                else:
+                    results.append({"model": name, "killed": True,
+                                    "error": "did not finish within time budget; worker terminated"})
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            pids.close()
+        if killed:
+            logger.warning("[AUTOML] Terminated candidate workers still running past the time budget")
+
+    elapsed = time.time() - start
+    info = {
+        "search_mode": mode,
+        "workers": n_workers,
+        "jobs_per_candidate": jobs_per_candidate,
+        "time_slice_seconds": round(time_slice, 2),
+        "time_budget": time_budget,
+        "elapsed_seconds": round(elapsed, 2),
+        "budget_exhausted": elapsed >= time_budget,
+    }
+    logger.info(f"[AUTOML] Leaderboard search finished: {info}")
+    return results, info
+
+
 @ensure_display_fields
 async def auto_sklearn_classify(
     csv_path: str,
@@ -186,6 +470,7 @@ async def auto_sklearn_classify(
     time_budget: int = 60,
     n_iter: int = 20,
     build_ensemble: bool = True,
+    search_mode: str = "auto",
     tool_context: Optional[ToolContext] = None
 ) -> dict:
     """Auto-sklearn style classification with algorithm selection and hyperparameter optimization.
@@ -200,16 +485,20 @@ async def auto_sklearn_classify(
     Args:
         csv_path: Path to CSV file
         target: Target column name
-        time_budget: Time limit in seconds (approximate)
+        time_budget: Wall-clock budget in seconds for the model search; candidates
+            run concurrently and stop sampling configurations when it runs out
         n_iter: Number of hyperparameter combinations to try per model
         build_ensemble: Whether to build voting ensemble of top models
+        search_mode: "grid" (full random search), "halving" (successive halving
+            over sample size) or "auto" (halving above HALVING_SEARCH_THRESHOLD)
         tool_context: ADK tool context for artifacts
     
     Returns:
         dict with best model, leaderboard, and ensemble info
     """
-    # Load data
-    df = pd.read_csv(csv_path)
+    # Load data the way the other training tools do, so the dataset fingerprint
+    # (and with it the registered split) matches theirs
+    df = await _load_dataframe(csv_path, tool_context=tool_context)
     
     # Separate features and target
     X = df.drop(columns=[target])
@@ -235,51 +524,46 @@ async def auto_sklearn_classify(
     X_processed = X_processed.fillna(X_processed.median())
     
     # [OK] Split into train/test BEFORE any training (80/20 split)
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_processed, y, test_size=0.2, random_state=42, 
-        stratify=y if _can_stratify(y) else None
-    )
+    # (registered split, shared with the other training tools)
+    split = get_split(df, target, test_size=0.2, seed=42, tool_context=tool_context)
+    X_train, X_test, y_train, y_test = split.train_test(X_processed, y)
     
     # Scale features (fit on training only, transform both)
     scaler = StandardScaler()
     X_train_scaled = scaler.fit_transform(X_train)
     X_test_scaled = scaler.transform(X_test)
     
-    # Try multiple models with hyperparameter optimization
+    # Try multiple models with hyperparameter optimization, concurrently and
+    # within time_budget (searches use the training set's registered CV folds)
     models = _get_classification_models()
+    candidates, scheduler_info = await asyncio.to_thread(
+        _run_leaderboard, models, X_train_scaled, y_train, split.folds,
+        'accuracy', n_iter, time_budget, search_mode)
     results = []
     trained_models = []
     
-    for model_name, config in models.items():
+    for candidate in candidates:
+        model_name = candidate["model"]
+        if "estimator" not in candidate:
+            results.append(candidate)
+            continue
         try:
-            # Randomized search for hyperparameter optimization (on training set only)
-            search = RandomizedSearchCV(
-                config["model"],
-                config["params"],
-                n_iter=n_iter,
-                cv=min(3, len(y_train) // 2),
-                scoring='accuracy',
-                random_state=42,
-                n_jobs=-1
-            )
-            search.fit(X_train_scaled, y_train)
-            
             # [OK] Evaluate on held-out test set
-            test_accuracy = accuracy_score(y_test, search.best_estimator_.predict(X_test_scaled))
-            
-            # Cross-validation score (for comparison)
-            cv_scores = cross_val_score(search.best_estimator_, X_train_scaled, y_train, cv=3, scoring='accuracy')
+            test_accuracy = accuracy_score(y_test, candidate["estimator"].predict(X_test_scaled))
             
             results.append({
                 "model": model_name,
-                "cv_accuracy": float(search.best_score_),
+                "cv_accuracy": candidate["cv_mean"],
                 "test_accuracy": float(test_accuracy),  # [OK] NEW: Held-out test score
-                "cv_mean": float(cv_scores.mean()),
-                "cv_std": float(cv_scores.std()),
-                "best_params": _json_safe(search.best_params_)
+                "cv_mean": candidate["cv_mean"],
+                "cv_std": candidate["cv_std"],
+                "best_params": _json_safe(candidate["best_params"]),
+                "configs_evaluated": candidate["configs_evaluated"],
+                "stopped_by_budget": candidate["stopped_by_budget"],
+                "search_seconds": candidate["seconds"],
             })
             
-            trained_models.append((model_name, search.best_estimator_, test_accuracy))
+            trained_models.append((model_name, candidate["estimator"], test_accuracy))
             
         except Exception as e:
             results.append({
@@ -290,13 +574,20 @@ async def auto_sklearn_classify(
     # Sort by test performance (most reliable metric)
     results_sorted = sorted([r for r in results if 'test_accuracy' in r], 
                            key=lambda x: x['test_accuracy'], reverse=True)
+    if not results_sorted:
+        return _json_safe({
+            "status": "error",
+            "error": "No candidate model finished within the time budget",
+            "leaderboard": results,
+            "scheduler": scheduler_info,
+        })
     
     best_model_name = results_sorted[0]['model']
     best_model = next(m[1] for m in trained_models if m[0] == best_model_name)
     
     # Build ensemble if requested
     ensemble_info = None
-    if build_ensemble and len(trained_models) >= 3:
+    if build_ensemble and len(trained_models) >= 3 and not scheduler_info["budget_exhausted"]:
         # Use top 3 models for voting ensemble
         top_models = sorted(trained_models, key=lambda x: x[2], reverse=True)[:3]
         estimators = [(name, model) for name, model, _ in top_models]
@@ -323,6 +614,7 @@ async def auto_sklearn_classify(
         "n_samples_train": len(y_train),  # [OK] NEW
         "n_samples_test": len(y_test),    # [OK] NEW
         "test_split": "80/20",             # [OK] NEW
+        "split": split.summary(),
         "n_features": X.shape[1],
         "n_classes": len(classes),
         "classes": [str(c) for c in classes],
@@ -333,6 +625,8 @@ async def auto_sklearn_classify(
         "leaderboard": results_sorted,
         "ensemble": ensemble_info,
         "models_tried": len(results),
+        "models_not_ranked": [r for r in results if r not in results_sorted],
+        "scheduler": scheduler_info,
         "message": f"Best model: {best_model_name} (test accuracy: {results_sorted[0]['test_accuracy']:.4f}, CV: {results_sorted[0]['cv_accuracy']:.4f})"
     }
     
@@ -359,6 +653,7 @@ async def auto_sklearn_regress(
     time_budget: int = 60,
     n_iter: int = 20,
     build_ensemble: bool = True,
+    search_mode: str = "auto",
     tool_context: Optional[ToolContext] = None
 ) -> dict:
     """Auto-sklearn style regression with algorithm selection and hyperparameter optimization.
@@ -373,16 +668,20 @@ async def auto_sklearn_regress(
     Args:
         csv_path: Path to CSV file
         target: Target column name
-        time_budget: Time limit in seconds (approximate)
+        time_budget: Wall-clock budget in seconds for the model search; candidates
+            run concurrently and stop sampling configurations when it runs out
         n_iter: Number of hyperparameter combinations to try per model
         build_ensemble: Whether to build stacking ensemble of top models
+        search_mode: "grid" (full random search), "halving" (successive halving
+            over sample size) or "auto" (halving above HALVING_SEARCH_THRESHOLD)
         tool_context: ADK tool context for artifacts
     
     Returns:
         dict with best model, leaderboard, and ensemble info
     """
-    # Load data
-    df = pd.read_csv(csv_path)
+    # Load data the way the other training tools do, so the dataset fingerprint
+    # (and with it the registered split) matches theirs
+    df = await _load_dataframe(csv_path, tool_context=tool_context)
     
     # Separate features and target
     X = df.drop(columns=[target])
@@ -399,53 +698,49 @@ async def auto_sklearn_regress(
     X_processed = X_processed.fillna(X_processed.median())
     
     # [OK] Split into train/test BEFORE any training (80/20 split)
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_processed, y, test_size=0.2, random_state=42
-    )
+    # (registered split, shared with the other training tools)
+    split = get_split(df, target, test_size=0.2, seed=42, tool_context=tool_context)
+    X_train, X_test, y_train, y_test = split.train_test(X_processed, y)
     
     # Scale features (fit on training only, transform both)
     scaler = StandardScaler()
     X_train_scaled = scaler.fit_transform(X_train)
     X_test_scaled = scaler.transform(X_test)
     
-    # Try multiple models with hyperparameter optimization
+    # Try multiple models with hyperparameter optimization, concurrently and
+    # within time_budget (searches use the training set's registered CV folds)
     models = _get_regression_models()
+    candidates, scheduler_info = await asyncio.to_thread(
+        _run_leaderboard, models, X_train_scaled, y_train, split.folds,
+        'r2', n_iter, time_budget, search_mode)
     results = []
     trained_models = []
     
-    for model_name, config in models.items():
+    for candidate in candidates:
+        model_name = candidate["model"]
+        if "estimator" not in candidate:
+            results.append(candidate)
+            continue
         try:
-            # Randomized search for hyperparameter optimization (on training set only)
-            search = RandomizedSearchCV(
-                config["model"],
-                config["params"],
-                n_iter=n_iter,
-                cv=min(3, len(y_train) // 2),
-                scoring='r2',
-                random_state=42,
-                n_jobs=-1
-            )
-            search.fit(X_train_scaled, y_train)
-            
             # [OK] Evaluate on held-out test set
-            y_test_pred = search.best_estimator_.predict(X_test_scaled)
+            y_test_pred = candidate["estimator"].predict(X_test_scaled)
             test_r2 = r2_score(y_test, y_test_pred)
             test_rmse = float(np.sqrt(mean_squared_error(y_test, y_test_pred)))
             
-            # Cross-validation score (for comparison)
-            cv_scores = cross_val_score(search.best_estimator_, X_train_scaled, y_train, cv=3, scoring='r2')
-            
             results.append({
                 "model": model_name,
-                "cv_r2": float(search.best_score_),
+                "cv_r2": candidate["cv_mean"],
                 "test_r2": float(test_r2),      # [OK] NEW: Held-out test R²
                 "test_rmse": test_rmse,          # [OK] NEW: Held-out test RMSE
-                "cv_mean": float(cv_scores.mean()),
-                "cv_std": float(cv_scores.std()),
-                "best_params": _json_safe(search.best_params_)
+                "cv_mean": candidate["cv_mean"],
+                "cv_std": candidate["cv_std"],
+                "best_params": _json_safe(candidate["best_params"]),
+                "configs_evaluated": candidate["configs_evaluated"],
+                "stopped_by_budget": candidate["stopped_by_budget"],
+                "search_seconds": candidate["seconds"],
             })
             
-            trained_models.append((model_name, search.best_estimator_, test_r2))
+            trained_models.append((model_name, candidate["estimator"], test_r2))
             
         except Exception as e:
             results.append({
@@ -456,13 +751,20 @@ async def auto_sklearn_regress(
     # Sort by test performance (most reliable metric)
     results_sorted = sorted([r for r in results if 'test_r2' in r], 
                            key=lambda x: x['test_r2'], reverse=True)
+    if not results_sorted:
+        return _json_safe({
+            "status": "error",
+            "error": "No candidate model finished within the time budget",
+            "leaderboard": results,
+            "scheduler": scheduler_info,
+        })
     
     best_model_name = results_sorted[0]['model']
     best_model = next(m[1] for m in trained_models if m[0] == best_model_name)
     
     # Build ensemble if requested
     ensemble_info = None
-    if build_ensemble and len(trained_models) >= 3:
+    if build_ensemble and len(trained_models) >= 3 and not scheduler_info["budget_exhausted"]:
         # Use top 3 models for stacking ensemble
         top_models = sorted(trained_models, key=lambda x: x[2], reverse=True)[:3]
         estimators = [(name, model) for name, model, _ in top_models]
@@ -497,6 +799,7 @@ async def auto_sklearn_regress(
         "n_samples_train": len(y_train),  # [OK] NEW
         "n_samples_test": len(y_test),    # [OK] NEW
         "test_split": "80/20",             # [OK] NEW
+        "split": split.summary(),
         "n_features": X.shape[1],
         "best_model": best_model_name,
         "best_test_r2": results_sorted[0]['test_r2'],      # [OK] Test set R²
@@ -506,6 +809,8 @@ async def auto_sklearn_regress(
         "leaderboard": results_sorted,
         "ensemble": ensemble_info,
         "models_tried": len(results),
+        "models_not_ranked": [r for r in results if r not in results_sorted],
+        "scheduler": scheduler_info,
         "message": f"Best model: {best_model_name} (test R² = {results_sorted[0]['test_r2']:.4f}, test RMSE = {results_sorted[0]['test_rmse']:.4f})"
     }
     
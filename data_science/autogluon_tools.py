@@ -487,15 +487,52 @@ async def autogluon_predict(
     model_path: str,
     csv_path: str,
     output_path: Optional[str] = None,
+    chunk_rows: Optional[int] = None,
+    n_workers: Optional[int] = None,
     tool_context: Optional[ToolContext] = None
 ) -> dict:
-    """Load trained model and make predictions on new data."""
+    """Load trained model and make predictions on new data.
+    
+    Inputs larger than BATCH_SCORE_STREAM_MB (or any input when chunk_rows is
+    given) are scored in streaming mode: chunks are read, scored on n_workers
+    threads and appended to output_path (.csv or .parquet) in fixed memory.
+    Streaming mode skips the whole-file cleaning step; AutoGluon handles
+    missing values itself.
+    """
     if not AUTOGLUON_AVAILABLE:
         return {"error": "AutoGluon not installed. Run: pip install autogluon.tabular"}
     
     try:
-        # Load model
-        predictor = TabularPredictor.load(model_path)
+        # Load model (cached across calls until the model directory changes)
+        from .model_cache import get_model
+        predictor = get_model(model_path, loader=TabularPredictor.load)
+        
+        from .batch_scoring import score_file, should_stream
+        if should_stream(csv_path, chunk_rows):
+            if output_path is None:
+                base = Path(csv_path).stem
+                output_path = str(Path(csv_path).parent / f"{base}_predictions.csv")
+            
+            def _predict_chunk(model, X, with_proba):
+                out = pd.DataFrame({"prediction": model.predict(X).to_numpy()})
+                if with_proba and model.problem_type in ("binary", "multiclass"):
+                    proba = model.predict_proba(X)
+                    for col in proba.columns:
+                        out[f"prob_{col}"] = proba[col].to_numpy()
+                return out
+            
+            summary = score_file(predictor, csv_path, output_path, chunk_rows=chunk_rows,
+                                 n_workers=n_workers, predict_fn=_predict_chunk)
+            return _json_safe({
+                "status": "success",
+                "mode": "streaming",
+                "model_path": model_path,
+                "input_file": csv_path,
+                "output_file": output_path,
+                "num_predictions": summary["rows"],
+                "sample_predictions": [row["prediction"] for row in summary["sample"]],
+                "scoring": {k: v for k, v in summary.items() if k != "sample"},
+            })
         
         # Load data
         data = TabularDataset(csv_path)
@@ -582,8 +619,9 @@ async def autogluon_feature_importance(
         return {"error": "AutoGluon not installed. Run: pip install autogluon.tabular"}
     
     try:
-        # Load model
-        predictor = TabularPredictor.load(model_path)
+        # Load model (cached across calls until the model directory changes)
+        from .model_cache import get_model
+        predictor = get_model(model_path, loader=TabularPredictor.load)
         
         # Get feature importance
         if csv_path:
@@ -0,0 +1,384 @@
+"""
+Rolling-origin backtesting for univariate forecasters.
+
+Folds are forecast origins stepping back from the end of the series: each fold
+trains on everything before its origin (expanding window) or on the last
+window_size points (sliding window) and forecasts the next horizon points.
+
+Each model's folds are cut into runs of adjacent folds. Runs go to
+TS_BACKTEST_WORKERS processes; inside a run, folds are fitted in order and
+each fit warm-starts from the previous fold's parameters where the library
+allows it (Prophet's Stan init, ARIMA start_params). AutoGluon predictors are
+fitted cold per fold; the naive baselines need no fitting.
+
+Errors are collected as a folds x horizon matrix per model, giving MAE, RMSE,
+MAPE and sMAPE for every horizon step plus overall scores and MASE (scaled by
+each fold's in-sample naive error).
+"""
+
+import importlib.util
+import logging
+import math
+import shutil
+import tempfile
+import time
+import warnings
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .large_data_config import TS_BACKTEST_WORKERS
+
+logger = logging.getLogger(__name__)
+
+MODELS = ["prophet", "arima", "autogluon", "naive", "seasonal_naive"]
+METRICS = ["mae", "rmse", "mape", "smape", "mase"]
+
+# Module each model needs; baselines need none
+_REQUIRES = {"prophet": "prophet", "arima": "statsmodels", "autogluon": "autogluon.timeseries"}
+
+# Models with parameters worth carrying across adjacent folds
+_WARM_STARTABLE = {"prophet", "arima"}
+
+_SEASON_BY_FREQ = {"H": 24, "D": 7, "B": 5, "W": 52, "M": 12, "MS": 12, "Q": 4, "QS": 4}
+
+
+def available_models(models: Optional[Sequence[str]] = None) -> Tuple[List[str], List[str]]:
+    """(usable, missing-library) split of models; the default drops AutoGluon (minutes per fold)."""
+    requested = list(models) if models else [m for m in MODELS if m != "autogluon"]
+    unknown = [m for m in requested if m not in MODELS]
+    if unknown:
+        raise ValueError(f"Unknown models {unknown}. Choose from: {MODELS}")
+    usable, missing = [], []
+    for m in requested:
+        module = _REQUIRES.get(m)
+        try:
+            found = module is None or importlib.util.find_spec(module) is not None
+        except ModuleNotFoundError:
+            found = False
+        (usable if found else missing).append(m)
+    return usable, missing
+
+
+def season_length_for(freq: Optional[str]) -> int:
+    """Seasonal period implied by a pandas frequency string (1 when unknown)."""
+    if not freq:
+        return 1
+    base = freq.split("-")[0].lstrip("0123456789").upper()
+    return _SEASON_BY_FREQ.get(base, _SEASON_BY_FREQ.get(base.rstrip("E"), 1))
+
+
+def make_folds(
+    n: int,
+    horizon: int,
+    n_folds: int = 5,
+    step: Optional[int] = None,
+    window: str = "expanding",
+    window_size: Optional[int] = None,
+    min_train: int = 10,
+) -> List[Tuple[int, int, int]]:
+    """
+    Rolling origins as (train_start, origin, test_end) row positions, oldest first.
+
+    The last fold forecasts the final horizon points; earlier folds step back
+    by step (default horizon). Folds whose training window would be shorter
+    than min_train are dropped, so fewer than n_folds may be returned.
+    """
+    if window not in ("expanding", "sliding"):
+        raise ValueError("window must be 'expanding' or 'sliding'")
+    if int(horizon) < 1:
+        raise ValueError(f"horizon must be at least 1, got {horizon}")
+    if int(n_folds) < 1:
+        raise ValueError(f"n_folds must be at least 1, got {n_folds}")
+    if step is not None and int(step) < 1:
+        raise ValueError(f"step must be at least 1, got {step}")
+    step = step or horizon
+    folds = []
+    for k in range(n_folds):
+        origin = n - horizon - (n_folds - 1 - k) * step
+        start = max(0, origin - window_size) if window == "sliding" and window_size else 0
+        if origin - start >= min_train:
+            folds.append((start, origin, origin + horizon))
+    if not folds:
+        raise ValueError(
+            f"Series of {n} points is too short for horizon {horizon} with {n_folds} folds "
+            f"(each fold needs at least {min_train} training points)"
+        )
+    return folds
+
+
+# ============================================================================
+# Forecasters: fit(train, warm) -> (forecast, warm state, warm_started)
+# ============================================================================
+
+def _prophet_init(model) -> Dict[str, Any]:
+    """Fitted Prophet parameters in the form Prophet.fit(init=...) accepts."""
+    init = {name: float(model.params[name][0][0]) for name in ("k", "m", "sigma_obs")}
+    init.update({name: model.params[name][0] for name in ("delta", "beta")})
+    return init
+
+
+def _fit_prophet(y, dates, horizon, freq, warm, options):
+    from prophet import Prophet
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    train = pd.DataFrame({"ds": dates, "y": y})
+    model = Prophet()
+    warm_started = False
+    if warm is not None:
+        try:
+            model.fit(train, init=warm)
+            warm_started = True
+        except Exception:
+            # Changepoint count differs on short windows; refit cold
+            model = Prophet()
+    if not warm_started:
+        model.fit(train)
+    future = model.make_future_dataframe(periods=horizon, freq=freq or "D", include_history=False)
+    return model.predict(future)["yhat"].to_numpy(), _prophet_init(model), warm_started
+
+
+def _fit_arima(y, dates, horizon, freq, warm, options):
+    from statsmodels.tsa.arima.model import ARIMA
+    order = tuple(options.get("arima_order") or (1, 1, 1))
+    model = ARIMA(np.asarray(y, dtype=float), order=order)
+    warm_started = False
+    if warm is not None:
+        try:
+            result = model.fit(start_params=warm)
+            warm_started = True
+        except Exception:
+            result = model.fit()
+    else:
+        result = model.fit()
+    return np.asarray(result.forecast(horizon), dtype=float), np.asarray(result.params), warm_started
+
+
+def _fit_autogluon(y, dates, horizon, freq, warm, options):
+    from autogluon.timeseries import TimeSeriesDataFrame, TimeSeriesPredictor
+    path = tempfile.mkdtemp(prefix="ts_backtest_ag_")
+    try:
+        train = TimeSeriesDataFrame.from_data_frame(
+            pd.DataFrame({"item_id": "series", "timestamp": dates, "target": y}),
+            id_column="item_id", timestamp_column="timestamp",
+        )
+        predictor = TimeSeriesPredictor(prediction_length=horizon, path=path, target="target",
+                                        freq=freq, verbosity=0)
+        predictor.fit(train, presets=options.get("autogluon_presets", "fast_training"),
+                      time_limit=options.get("time_limit"))
+        forecast = predictor.predict(train)["mean"].to_numpy()
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+    return forecast, None, False
+
+
+def _fit_naive(y, dates, horizon, freq, warm, options):
+    return np.repeat(float(y[-1]), horizon), None, False
+
+
+def _fit_seasonal_naive(y, dates, horizon, freq, warm, options):
+    season = max(1, min(int(options.get("season_length") or 1), len(y)))
+    last = np.asarray(y[-season:], dtype=float)
+    return np.resize(last, horizon), None, False
+
+
+_FORECASTERS = {
+    "prophet": _fit_prophet,
+    "arima": _fit_arima,
+    "autogluon": _fit_autogluon,
+    "naive": _fit_naive,
+    "seasonal_naive": _fit_seasonal_naive,
+}
+
+
+def _run_chain(model: str, y: np.ndarray, dates: pd.DatetimeIndex, folds: List[Tuple[int, int, int, int]],
+               horizon: int, freq: Optional[str], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Fit model on adjacent folds in order, carrying warm-start state from one to the next."""
+    fit = _FORECASTERS[model]
+    warm = None
+    out = []
+    for fold, start, origin, _ in folds:
+        begin = time.perf_counter()
+        try:
+            forecast, warm, warm_started = fit(y[start:origin], dates[start:origin], horizon, freq, warm, options)
+            out.append({"model": model, "fold": fold, "forecast": np.asarray(forecast, dtype=float)[:horizon],
+                        "warm_started": warm_started, "seconds": round(time.perf_counter() - begin, 3)})
+        except Exception as e:
+            warm = None
+            out.append({"model": model, "fold": fold, "error": f"{type(e).__name__}: {e}",
+                        "seconds": round(time.perf_counter() - begin, 3)})
+    return out
+
+
+# ============================================================================
+# Metrics
+# ============================================================================
+
+def horizon_metrics(actual: np.ndarray, forecast: np.ndarray, scale: np.ndarray) -> Dict[str, Any]:
+    """
+    Error metrics from folds x horizon matrices (NaN rows = failed folds).
+
+    scale holds each fold's in-sample one-step naive MAE for MASE.
+    """
+    err = forecast - actual
+    abs_err = np.abs(err)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ape = np.where(actual != 0, abs_err / np.abs(actual), np.nan)
+        sape = np.where(np.abs(actual) + np.abs(forecast) > 0,
+                        2 * abs_err / (np.abs(actual) + np.abs(forecast)), 0.0)
+        sape = np.where(np.isnan(err), np.nan, sape)
+        scaled = abs_err / np.where(scale > 0, scale, np.nan)[:, None]
+
+    def _mean(a, axis=None):
+        # All-NaN columns (every fold failed) are reported as None, not warned about
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return np.nanmean(a, axis=axis)
+
+    per_h = {
+        "mae": _mean(abs_err, 0),
+        "rmse": np.sqrt(_mean(err ** 2, 0)),
+        "mape": 100 * _mean(ape, 0),
+        "smape": 100 * _mean(sape, 0),
+    }
+    by_horizon = [{"h": h + 1, **{k: _finite(v[h]) for k, v in per_h.items()}} for h in range(actual.shape[1])]
+    overall = {
+        "mae": _finite(_mean(abs_err)),
+        "rmse": _finite(np.sqrt(_mean(err ** 2))),
+        "mape": _finite(100 * _mean(ape)),
+        "smape": _finite(100 * _mean(sape)),
+        "mase": _finite(_mean(scaled)),
+    }
+    return {"overall": overall, "by_horizon": by_horizon}
+
+
+def _finite(value) -> Optional[float]:
+    value = float(value)
+    return round(value, 6) if math.isfinite(value) else None
+
+
+# ============================================================================
+# Backtest
+# ============================================================================
+
+def backtest(
+    y: np.ndarray,
+    dates: pd.DatetimeIndex,
+    horizon: int,
+    models: Sequence[str],
+    n_folds: int = 5,
+    step: Optional[int] = None,
+    window: str = "expanding",
+    window_size: Optional[int] = None,
+    freq: Optional[str] = None,
+    season_length: Optional[int] = None,
+    metric: str = "mae",
+    n_workers: Optional[int] = None,
+    options: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Rolling-origin backtest of models on one series.
+
+    Args:
+        y: Target values in time order
+        dates: Timestamps aligned with y
+        horizon: Points forecast from each origin
+        models: Names from MODELS (see available_models)
+        n_folds, step, window, window_size: Fold layout (see make_folds)
+        freq: Pandas frequency (default inferred from dates)
+        season_length: Seasonal period for seasonal_naive (default from freq)
+        metric: One of METRICS, used to rank models
+        n_workers: Processes (default TS_BACKTEST_WORKERS)
+        options: Forecaster settings (arima_order, time_limit, autogluon_presets)
+
+    Returns:
+        dict with folds (folds_requested / folds_used: short series drop the
+        oldest folds), per-model overall / per-horizon metrics and fold
+        errors, ranking, best_model and engine stats
+    """
+    from joblib import Parallel, delayed
+
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}'. Choose from: {METRICS}")
+    start_time = time.perf_counter()
+    y = np.asarray(y, dtype=float)
+    dates = pd.DatetimeIndex(dates)
+    if freq is None and len(dates) >= 3:
+        freq = pd.infer_freq(dates)
+    season_length = int(season_length or season_length_for(freq))
+    options = {**(options or {}), "season_length": season_length}
+
+    min_train = max(10, 2 * season_length) if "seasonal_naive" in models else 10
+    folds = make_folds(len(y), horizon, n_folds, step, window, window_size, min_train=min_train)
+    if len(folds) < n_folds:
+        logger.info(f"[BACKTEST] Only {len(folds)} of {n_folds} folds leave >= {min_train} training points")
+    indexed = [(i, *f) for i, f in enumerate(folds)]
+
+    # Cut each model's folds into runs of adjacent folds: enough runs to keep the
+    # workers busy, as few as possible so warm starts carry across most folds
+    n_workers = max(1, int(n_workers or TS_BACKTEST_WORKERS))
+    fitted = [m for m in models if m in _WARM_STARTABLE or m == "autogluon"]
+    runs_per_model = max(1, min(len(folds), math.ceil(n_workers / max(1, len(fitted)))))
+    tasks = []
+    for model in models:
+        n_runs = runs_per_model if model in fitted else 1
+        for run in np.array_split(np.arange(len(indexed)), n_runs):
+            if len(run):
+                tasks.append((model, [indexed[i] for i in run]))
+
+    workers = min(n_workers, len(tasks))
+    logger.info(f"[BACKTEST] {len(models)} models x {len(folds)} folds (horizon {horizon}) "
+                f"as {len(tasks)} runs on {workers} workers")
+    if workers > 1:
+        # max_nbytes: the series is memory-mapped into the workers instead of copied per task
+        chunks = Parallel(n_jobs=workers, max_nbytes="1M")(
+            delayed(_run_chain)(m, y, dates, run, horizon, freq, options) for m, run in tasks
+        )
+    else:
+        chunks = [_run_chain(m, y, dates, run, horizon, freq, options) for m, run in tasks]
+    results = [r for chunk in chunks for r in chunk]
+
+    actual = np.stack([y[origin:end] for _, origin, end in folds])
+    # One-step naive MAE inside each training window scales MASE
+    scale = np.array([np.mean(np.abs(np.diff(y[s:o]))) if o - s > 1 else np.nan for s, o, _ in folds])
+
+    per_model: Dict[str, Dict[str, Any]] = {}
+    for model in models:
+        forecast = np.full_like(actual, np.nan)
+        rows = [r for r in results if r["model"] == model]
+        for r in rows:
+            if "forecast" in r and len(r["forecast"]) == horizon:
+                forecast[r["fold"]] = r["forecast"]
+        metrics = horizon_metrics(actual, forecast, scale)
+        fold_mae = np.nanmean(np.abs(forecast - actual), axis=1) if np.isfinite(forecast).any() else []
+        per_model[model] = {
+            **metrics,
+            "folds_ok": int(np.isfinite(forecast).all(axis=1).sum()),
+            "warm_started_folds": sum(1 for r in rows if r.get("warm_started")),
+            "fold_mae": [_finite(v) for v in fold_mae],
+            "fit_seconds": round(sum(r["seconds"] for r in rows), 2),
+            "errors": [{"fold": r["fold"], "error": r["error"]} for r in rows if "error" in r],
+        }
+
+    ranking = sorted(
+        (m for m in models if per_model[m]["overall"][metric] is not None),
+        key=lambda m: per_model[m]["overall"][metric],
+    )
+    return {
+        "horizon": horizon,
+        "freq": freq,
+        "season_length": season_length,
+        "window": window,
+        "folds_requested": int(n_folds),
+        "folds_used": len(folds),
+        "folds": [{"fold": i, "train_start": str(dates[s]), "origin": str(dates[o - 1]),
+                   "train_rows": int(o - s), "test_end": str(dates[e - 1])}
+                  for i, (s, o, e) in enumerate(folds)],
+        "models": per_model,
+        "metric": metric,
+        "ranking": ranking,
+        "best_model": ranking[0] if ranking else None,
+        "tasks": len(tasks),
+        "workers": workers,
+        "seconds": round(time.perf_counter() - start_time, 2),
+    }
@@ -0,0 +1,217 @@
+"""
+Streaming batch scoring in fixed memory.
+
+Reads the input (CSV via utils.streaming_csv.read_csv_chunks, or Parquet row
+groups) chunk by chunk, scores chunks on a small thread pool, and appends the
+predictions to a CSV or Parquet output in input order. At most
+2 x workers chunks are in flight, so memory stays bounded by the chunk size
+no matter how many rows the file has.
+"""
+
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .large_data_config import BATCH_SCORE_CHUNK_ROWS, BATCH_SCORE_STREAM_MB, BATCH_SCORE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+def should_stream(input_path: str, chunk_rows: Optional[int] = None) -> bool:
+    """Stream when the caller asked for chunks or the input is larger than BATCH_SCORE_STREAM_MB."""
+    if chunk_rows:
+        return True
+    try:
+        return os.path.getsize(input_path) >= BATCH_SCORE_STREAM_MB * 1024 * 1024
+    except OSError:
+        return False
+
+
+def _iter_input(input_path: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    if input_path.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(input_path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+    from .utils.streaming_csv import read_csv_chunks
+    yield from read_csv_chunks(input_path, chunksize=chunk_rows, quotechar='"')
+
+
+def _default_predict(model: Any, X: pd.DataFrame, with_proba: bool) -> pd.DataFrame:
+    out = pd.DataFrame(index=X.index)
+    out["prediction"] = np.asarray(model.predict(X))
+    if with_proba and hasattr(model, "predict_proba"):
+        try:
+            proba = model.predict_proba(X)
+            if isinstance(proba, pd.DataFrame):
+                for col in proba.columns:
+                    out[f"prob_{col}"] = proba[col].to_numpy()
+            else:
+                classes = getattr(model, "classes_", range(proba.shape[1]))
+                for i, cls in enumerate(classes):
+                    out[f"prob_{cls}"] = proba[:, i]
+        except Exception as e:
+            logger.debug(f"[BATCH SCORE] predict_proba unavailable: {e}")
+    return out
+
+
+class _OutputWriter:
+    """Append-only CSV/Parquet writer; the file appears at output_path only once complete."""
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.tmp_path = output_path + ".part"
+        self.is_parquet = output_path.lower().endswith(".parquet")
+        self._writer = None
+        self._schema = None
+        self._header_written = False
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.is_parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._schema = table.schema
+                self._writer = pq.ParquetWriter(self.tmp_path, self._schema)
+            elif not table.schema.equals(self._schema, check_metadata=False):
+                try:
+                    table = self._conform(table)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+                    # e.g. an int column turned float (NaN) in this chunk
+                    self._promote(table.schema)
+                    table = self._conform(table)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.tmp_path, mode="a" if self._header_written else "w",
+                      header=not self._header_written, index=False)
+            self._header_written = True
+
+    def _conform(self, table):
+        """Cast table to the file schema; columns it lacks are written as nulls."""
+        import pyarrow as pa
+        columns = [table.column(f.name).cast(f.type) if f.name in table.column_names
+                   else pa.nulls(table.num_rows, f.type)
+                   for f in self._schema]
+        return pa.Table.from_arrays(columns, schema=self._schema)
+
+    def _promote(self, schema) -> None:
+        """Widen the file schema to fit schema and rewrite the rows written so far."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        promoted = pa.unify_schemas([self._schema, schema], promote_options="permissive").remove_metadata()
+        logger.info(f"[BATCH SCORE] Promoting output schema to fit a later chunk: {promoted}")
+        self._writer.close()
+        old_path = self.tmp_path + ".old"
+        os.replace(self.tmp_path, old_path)
+        self._schema = promoted
+        self._writer = pq.ParquetWriter(self.tmp_path, promoted)
+        try:
+            # Batch by batch, so the rewrite stays within the chunk memory bound
+            for batch in pq.ParquetFile(old_path).iter_batches():
+                self._writer.write_table(self._conform(pa.Table.from_batches([batch])))
+        finally:
+            os.remove(old_path)
+
+    def close(self, ok: bool) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if ok and os.path.exists(self.tmp_path):
+            os.replace(self.tmp_path, self.output_path)
+        elif os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def score_file(
+    model: Any,
+    input_path: str,
+    output_path: str,
+    *,
+    chunk_rows: Optional[int] = None,
+    n_workers: Optional[int] = None,
+    feature_columns: Optional[Sequence[str]] = None,
+    passthrough_columns: Optional[Sequence[str]] = None,
+    with_proba: bool = True,
+    predict_fn: Optional[Callable[[Any, pd.DataFrame, bool], pd.DataFrame]] = None,
+    progress_cb: Optional[Callable[[int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Score input_path chunk by chunk and append predictions to output_path.
+
+    Args:
+        model: Fitted model (pipeline with its preprocessing, or AutoGluon predictor)
+        input_path: CSV or Parquet file to score
+        output_path: .csv or .parquet output (written atomically)
+        chunk_rows: Rows per chunk (default BATCH_SCORE_CHUNK_ROWS)
+        n_workers: Scoring threads (default BATCH_SCORE_WORKERS)
+        feature_columns: Columns passed to the model (default: the model's
+            feature_names_in_ if present, else every column)
+        passthrough_columns: Input columns copied to the output (default: all)
+        with_proba: Also write prob_<class> columns when the model has predict_proba
+        predict_fn: Callable(model, X, with_proba) -> DataFrame of output columns
+        progress_cb: Called with the number of rows written so far
+
+    Returns:
+        dict with rows, chunks, seconds, rows_per_second, output_path, sample
+    """
+    chunk_rows = int(chunk_rows or BATCH_SCORE_CHUNK_ROWS)
+    n_workers = max(1, int(n_workers or BATCH_SCORE_WORKERS))
+    predict_fn = predict_fn or _default_predict
+    if feature_columns is None and hasattr(model, "feature_names_in_"):
+        feature_columns = list(model.feature_names_in_)
+
+    def _score(chunk: pd.DataFrame) -> pd.DataFrame:
+        X = chunk[list(feature_columns)] if feature_columns is not None else chunk
+        preds = predict_fn(model, X, with_proba)
+        kept = chunk[list(passthrough_columns)] if passthrough_columns is not None else chunk
+        return pd.concat([kept.reset_index(drop=True), preds.reset_index(drop=True)], axis=1)
+
+    writer = _OutputWriter(output_path)
+    start = time.perf_counter()
+    rows = chunks = 0
+    sample: List[Dict[str, Any]] = []
+    ok = False
+    try:
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            pending: deque = deque()
+
+            def _drain_one():
+                nonlocal rows, chunks
+                scored = pending.popleft().result()
+                writer.write(scored)
+                if not sample:
+                    sample.extend(scored.head(20).to_dict(orient="records"))
+                rows += len(scored)
+                chunks += 1
+                if progress_cb is not None:
+                    progress_cb(rows)
+                logger.info(f"[BATCH SCORE] {rows:,} rows scored ({chunks} chunks)")
+
+            for chunk in _iter_input(input_path, chunk_rows):
+                pending.append(executor.submit(_score, chunk))
+                # Bound memory: never hold more than 2 chunks per worker
+                if len(pending) >= 2 * n_workers:
+                    _drain_one()
+            while pending:
+                _drain_one()
+        ok = True
+    finally:
+        writer.close(ok)
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "chunks": chunks,
+        "chunk_rows": chunk_rows,
+        "workers": n_workers,
+        "seconds": round(seconds, 2),
+        "rows_per_second": round(rows / seconds, 1) if seconds > 0 else None,
+        "output_path": output_path,
+        "sample": sample,
+    }
@@ -0,0 +1,231 @@
+"""
+Cached identification and parallel refutation for the DoWhy causal tools.
+
+causal_identify and causal_estimate share identified estimands through an
+in-memory cache keyed by dataset fingerprint + treatment + outcome + common
+causes (the graph), so estimating right after identifying skips the graph
+analysis.
+
+causal_estimate then dispatches one batch of independent tasks to
+CAUSAL_WORKERS processes:
+
+  - the point estimate on the full data
+  - each refuter (placebo treatment, random common cause, data subset) with
+    its simulations, on a random sample of at most
+    CAUSAL_SIMULATION_SAMPLE_ROWS rows, re-estimating on that sample so the
+    refutation compares like with like
+  - bootstrap re-estimates for the confidence interval, each on a resample of
+    m rows (the same bound). When m < n this is an m-out-of-n bootstrap,
+    whose spread is sqrt(n/m) times too wide for n rows, so deviations from
+    the full-data estimate are scaled by sqrt(m/n) before the percentiles
+
+Every task rebuilds its CausalModel from the data (cheap) and receives the
+identified estimand, so no fitted DoWhy objects cross process boundaries.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .large_data_config import CAUSAL_SIMULATION_SAMPLE_ROWS, CAUSAL_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Each re-estimates num_simulations times, so all run on the bounded sample
+REFUTERS = ["placebo_treatment_refuter", "random_common_cause", "data_subset_refuter"]
+
+_MAX_ESTIMANDS = 16
+_estimands: "OrderedDict[str, Any]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _build_model(df: pd.DataFrame, treatment: str, outcome: str, confounders: Sequence[str]):
+    from dowhy import CausalModel
+    return CausalModel(data=df, treatment=treatment, outcome=outcome, common_causes=list(confounders))
+
+
+def identify(
+    df: pd.DataFrame,
+    treatment: str,
+    outcome: str,
+    confounders: Sequence[str],
+    fingerprint: str,
+) -> Tuple[Any, Any, bool]:
+    """
+    (CausalModel, identified estimand, cache hit) for the treatment -> outcome graph.
+
+    The estimand is cached per fingerprint + treatment + outcome + common causes.
+    """
+    from .dataset_fingerprint import cache_key
+
+    key = cache_key(fingerprint, treatment, outcome, list(confounders))
+    model = _build_model(df, treatment, outcome, confounders)
+    with _lock:
+        estimand = _estimands.get(key)
+        if estimand is not None:
+            _estimands.move_to_end(key)
+    if estimand is not None:
+        logger.info(f"[CAUSAL] Reusing identified estimand ({key})")
+        return model, estimand, True
+    estimand = model.identify_effect(proceed_when_unidentifiable=True)
+    with _lock:
+        _estimands[key] = estimand
+        while len(_estimands) > _MAX_ESTIMANDS:
+            _estimands.popitem(last=False)
+    return model, estimand, False
+
+
+# ============================================================================
+# Tasks
+# ============================================================================
+
+def _sample(df: pd.DataFrame, rows: Optional[int], seed: int, replace: bool = False) -> pd.DataFrame:
+    if replace:
+        return df.sample(n=min(len(df), rows or len(df)), replace=True, random_state=seed).reset_index(drop=True)
+    if rows and len(df) > rows:
+        return df.sample(n=rows, random_state=seed).reset_index(drop=True)
+    return df
+
+
+def _estimate_task(df, spec, estimand, method) -> Dict[str, Any]:
+    start = time.perf_counter()
+    model = _build_model(df, *spec)
+    estimate = model.estimate_effect(estimand, method_name=method)
+    return {"kind": "estimate", "value": float(estimate.value), "summary": str(estimate),
+            "seconds": round(time.perf_counter() - start, 3)}
+
+
+def _refuter_kwargs(refuter: str, num_simulations: int, seed: int) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {"num_simulations": num_simulations, "random_seed": seed}
+    if refuter == "placebo_treatment_refuter":
+        kwargs["placebo_type"] = "permute"
+    elif refuter == "data_subset_refuter":
+        kwargs["subset_fraction"] = 0.8
+    return kwargs
+
+
+def _refute_task(df, spec, estimand, method, refuter, num_simulations, seed) -> Dict[str, Any]:
+    start = time.perf_counter()
+    model = _build_model(df, *spec)
+    estimate = model.estimate_effect(estimand, method_name=method)
+    refutation = model.refute_estimate(estimand, estimate, method_name=refuter,
+                                       **_refuter_kwargs(refuter, num_simulations, seed))
+    result = getattr(refutation, "refutation_result", None) or {}
+    significant = result.get("is_statistically_significant")
+    return {
+        "kind": "refuter",
+        "refuter": refuter,
+        "rows": int(len(df)),
+        "estimated_effect": float(estimate.value),
+        "new_effect": float(np.mean(getattr(refutation, "new_effect", np.nan))),
+        "p_value": None if result.get("p_value") is None else float(result["p_value"]),
+        # A significant change under the refuter means the estimate failed the check
+        "passed": None if significant is None else not bool(significant),
+        "summary": str(refutation),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def _bootstrap_task(df, spec, estimand, method, rows, seed) -> Dict[str, Any]:
+    start = time.perf_counter()
+    sample = _sample(df, rows, seed, replace=True)
+    estimate = _build_model(sample, *spec).estimate_effect(estimand, method_name=method)
+    return {"kind": "bootstrap", "value": float(estimate.value), "seconds": round(time.perf_counter() - start, 3)}
+
+
+def _safe(fn, *args) -> Dict[str, Any]:
+    """Run one task, returning its error instead of raising so one refuter can't sink the batch."""
+    try:
+        return fn(*args)
+    except Exception as e:
+        return {"kind": "error", "task": fn.__name__, "error": f"{type(e).__name__}: {e}"}
+
+
+def run_estimate(
+    df: pd.DataFrame,
+    treatment: str,
+    outcome: str,
+    confounders: Sequence[str],
+    estimand: Any,
+    method: str,
+    refuters: Optional[Sequence[str]] = None,
+    num_simulations: int = 50,
+    n_bootstrap: int = 20,
+    sample_rows: Optional[int] = None,
+    n_workers: Optional[int] = None,
+    seed: int = 42,
+) -> Dict[str, Any]:
+    """
+    Point estimate, refutations and bootstrap interval as one parallel batch.
+
+    Args:
+        df: Data the estimand was identified on
+        treatment, outcome, confounders: Graph of the CausalModel
+        estimand: Identified estimand (see identify)
+        method: DoWhy estimation method
+        refuters: Subset of REFUTERS (default: all)
+        num_simulations: Simulations per refuter
+        n_bootstrap: Bootstrap re-estimates for the confidence interval (0 = none)
+        sample_rows: Row cap for refuters and bootstrap resamples
+            (default CAUSAL_SIMULATION_SAMPLE_ROWS, 0 = full data)
+        n_workers: Processes (default CAUSAL_WORKERS)
+        seed: Seed for samples and refuter simulations
+
+    Returns:
+        dict with estimate (value, summary), refutations, bootstrap (raw
+        values, confidence_interval for the full n rows, rows_per_resample,
+        deviation_scale), errors and engine stats
+    """
+    from joblib import Parallel, delayed
+
+    start = time.perf_counter()
+    refuters = list(REFUTERS if refuters is None else refuters)
+    unknown = [r for r in refuters if r not in REFUTERS]
+    if unknown:
+        raise ValueError(f"Unknown refuters {unknown}. Choose from: {REFUTERS}")
+    sample_rows = CAUSAL_SIMULATION_SAMPLE_ROWS if sample_rows is None else int(sample_rows)
+    spec = (treatment, outcome, list(confounders))
+
+    tasks = [(_estimate_task, df, spec, estimand, method)]
+    for i, refuter in enumerate(refuters):
+        tasks.append((_refute_task, _sample(df, sample_rows, seed + i), spec, estimand, method,
+                      refuter, num_simulations, seed + i))
+    tasks += [(_bootstrap_task, df, spec, estimand, method, sample_rows, seed + 1000 + b)
+              for b in range(n_bootstrap)]
+
+    n_workers = max(1, min(int(n_workers or CAUSAL_WORKERS), len(tasks)))
+    logger.info(f"[CAUSAL] {len(tasks)} tasks ({len(refuters)} refuters, {n_bootstrap} bootstrap) "
+                f"on {n_workers} workers, simulation sample {sample_rows or len(df):,} rows")
+    if n_workers > 1:
+        # max_nbytes: the data's numeric blocks are memory-mapped into the workers
+        outputs = Parallel(n_jobs=n_workers, max_nbytes="1M")(delayed(_safe)(*t) for t in tasks)
+    else:
+        outputs = [_safe(*t) for t in tasks]
+
+    estimate = outputs[0]
+    if estimate["kind"] == "error":
+        raise RuntimeError(f"Estimation failed: {estimate['error']}")
+    refutations = [o for o in outputs[1:1 + len(refuters)] if o["kind"] == "refuter"]
+    boot = np.array([o["value"] for o in outputs[1 + len(refuters):] if o["kind"] == "bootstrap"])
+    # m-out-of-n: sqrt(m) (theta*_m - theta_hat) approximates sqrt(n) (theta_hat - theta)
+    m = min(len(df), sample_rows or len(df))
+    scale = float(np.sqrt(m / len(df)))
+    interval = None
+    if boot.size >= 2:
+        scaled = estimate["value"] + scale * (boot - estimate["value"])
+        interval = [float(np.percentile(scaled, 2.5)), float(np.percentile(scaled, 97.5))]
+    return {
+        "estimate": estimate,
+        "refutations": refutations,
+        "bootstrap": {"values": boot.tolist(), "confidence_interval": interval,
+                      "rows_per_resample": int(m), "deviation_scale": round(scale, 6)},
+        "errors": [o for o in outputs if o["kind"] == "error"],
+        "tasks": len(tasks),
+        "workers": n_workers,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
@@ -0,0 +1,39 @@
+"""
+Content fingerprints for datasets and derived-result cache keys.
+
+A fingerprint identifies a DataFrame by its schema and cell contents, so
+caches keyed on it survive reconnects, re-uploads under another name and
+server restarts, and are invalidated as soon as the data changes.
+"""
+
+import hashlib
+import json
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Fingerprint a DataFrame by column names, dtypes and row contents.
+
+    Args:
+        df: DataFrame to fingerprint
+
+    Returns:
+        16-character hex digest
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode("utf-8"))
+    h.update(str(df.shape).encode("utf-8"))
+    if len(df):
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        h.update(np.ascontiguousarray(row_hashes).tobytes())
+    return h.hexdigest()[:16]
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable 16-character key for any JSON-serializable combination of parts."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
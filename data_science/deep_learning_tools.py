@@ -107,6 +107,208 @@ def _get_artifact_dir(dataset_name: str = "default") -> Path:
     return artifact_dir
 
 
+# ============================================================================
+# TABULAR: Shared Training Loop
+# ============================================================================
+
+def _parse_params(params_json: Optional[str]) -> Dict[str, Any]:
+    """Hyperparameters from the ADK-friendly JSON string ({} when absent or invalid)."""
+    if not params_json:
+        return {}
+    try:
+        params = json.loads(params_json)
+        return params if isinstance(params, dict) else {}
+    except Exception:
+        return {}
+
+
+def _tabular_mlp(in_dim: int, out_dim: int, task: str, lr: float, hidden_dim: int,
+                 dropout: float, weight_decay: float):
+    """MLP LightningModule: cross-entropy with accuracy for classification, MSE for regression."""
+    is_classification = task == "classification"
+
+    class TabularMLP(pl.LightningModule):
+        def __init__(self):
+            super().__init__()
+            self.model = nn.Sequential(
+                nn.Linear(in_dim, hidden_dim),
+                nn.BatchNorm1d(hidden_dim),
+                nn.ReLU(),
+                nn.Dropout(dropout),
+                nn.Linear(hidden_dim, hidden_dim // 2),
+                nn.BatchNorm1d(hidden_dim // 2),
+                nn.ReLU(),
+                nn.Dropout(dropout),
+                nn.Linear(hidden_dim // 2, out_dim)
+            )
+            self.criterion = nn.CrossEntropyLoss() if is_classification else nn.MSELoss()
+
+        def forward(self, x):
+            return self.model(x)
+
+        def _step(self, batch, stage):
+            x, y = batch
+            out = self(x)
+            if is_classification:
+                loss = self.criterion(out, y)
+                acc = (out.argmax(dim=1) == y).float().mean()
+                self.log(f'{stage}_acc', acc, prog_bar=True, batch_size=len(y))
+            else:
+                loss = self.criterion(out.squeeze(-1), y)
+            # batch_size weights the epoch mean, so val_loss is exact over ragged batches
+            self.log(f'{stage}_loss', loss, prog_bar=True, batch_size=len(y))
+            return loss
+
+        def training_step(self, batch, batch_idx):
+            if len(batch[1]) < 2:
+                return None  # BatchNorm cannot train on a single-row tail batch
+            return self._step(batch, 'train')
+
+        def validation_step(self, batch, batch_idx):
+            return self._step(batch, 'val')
+
+        def configure_optimizers(self):
+            optimizer = torch.optim.AdamW(self.parameters(), lr=lr, weight_decay=weight_decay)
+            scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(
+                optimizer, mode='min', patience=2, factor=0.5
+            )
+            return {
+                "optimizer": optimizer,
+                "lr_scheduler": {"scheduler": scheduler, "monitor": "val_loss"}
+            }
+
+    return TabularMLP()
+
+
+def _train_tabular(
+    task: str,
+    data_path: str,
+    target: str,
+    features: Optional[List[str]],
+    params_json: Optional[str],
+) -> Dict:
+    """
+    Train the tabular MLP from a memory-mapped copy of data_path.
+
+    The file is preprocessed once into cached .npy memmaps (dl_data.prepare_memmap)
+    and fed by multi-worker DataLoaders; large matrices stream chunk by chunk.
+    """
+    from .dl_data import EpochThroughput, make_loaders, prepare_memmap, set_torch_threads
+
+    params = _parse_params(params_json)
+    lr = float(params.get('lr', params.get('learning_rate', 3e-4)))
+    hidden_dim = int(params.get('hidden_dim', 512))
+    dropout = float(params.get('dropout', 0.2))
+    weight_decay = float(params.get('weight_decay', 1e-2))
+    batch_size = int(params.get('batch_size', os.getenv("DL_BATCH", "256")))
+    max_epochs = int(params.get('epochs', params.get('max_epochs', os.getenv("DL_MAX_EPOCHS", "20"))))
+
+    seed_everything(42, workers=True)
+
+    # Preprocess once into memory-mapped .npy files (reused across runs)
+    dataset_name = Path(data_path).stem
+    artifact_dir = _get_artifact_dir(dataset_name)
+    data = prepare_memmap(data_path, target, features, task, artifact_dir / "memmap")
+    if task == "classification" and len(data.classes) < 2:
+        return {"error": f"Target '{target}' needs at least 2 classes, found {data.classes}", "status": "failed"}
+    if data.n_val == 0 or data.n_val == data.n_rows:
+        return {"error": f"Too few rows ({data.n_rows}) for a train/validation split", "status": "failed"}
+
+    device = _device()
+    precision = _precision()
+    train_loader, val_loader, loader_mode = make_loaders(
+        data, batch_size,
+        num_workers=params.get('num_workers'),
+        mode=str(params.get('loader', 'auto')),
+        pin_memory=device == 'cuda',
+    )
+
+    prefix = "dl_classifier" if task == "classification" else "dl_regressor"
+    checkpoint_callback = ModelCheckpoint(
+        dirpath=str(artifact_dir),
+        filename=prefix + '-{epoch:02d}-{val_loss:.4f}',
+        monitor='val_loss',
+        mode='min',
+        save_top_k=1
+    )
+
+    early_stop_callback = EarlyStopping(
+        monitor='val_loss',
+        mode='min',
+        patience=int(os.getenv("DL_EARLY_STOP_PATIENCE", "3"))
+    )
+
+    lr_monitor = LearningRateMonitor(logging_interval='epoch')
+    throughput = EpochThroughput()
+
+    trainer = Trainer(
+        max_epochs=max_epochs,
+        accelerator='gpu' if device == 'cuda' else 'cpu',
+        devices=1,
+        precision=precision,
+        callbacks=[checkpoint_callback, early_stop_callback, lr_monitor, throughput],
+        enable_checkpointing=True,
+        log_every_n_steps=10,
+        accumulate_grad_batches=int(os.getenv("DL_ACCUM_STEPS", "2")),
+        deterministic=True
+    )
+
+    model = _tabular_mlp(data.n_features, max(len(data.classes), 1), task,
+                         lr, hidden_dim, dropout, weight_decay)
+    previous_threads = set_torch_threads(params.get('torch_threads'))
+    torch_threads = torch.get_num_threads()
+    try:
+        trainer.fit(model, train_loader, val_loader)
+    finally:
+        torch.set_num_threads(previous_threads)
+
+    # Results
+    best_model_path = checkpoint_callback.best_model_path
+    best_score = checkpoint_callback.best_model_score.item() if checkpoint_callback.best_model_score else None
+    rates = [e["samples_per_sec"] for e in throughput.epochs]
+
+    metrics = {
+        "status": "success",
+        "model_type": "deep_learning_classifier" if task == "classification" else "deep_learning_regressor",
+        "input_features": int(data.n_features),
+        "training_samples": data.n_rows - data.n_val,
+        "validation_samples": data.n_val,
+        "best_val_loss": best_score,
+        "best_model_path": best_model_path,
+        "device": device,
+        "precision": precision,
+        "data_pipeline": {
+            "loader": loader_mode,
+            "memmap_dir": data.directory,
+            "memmap_mb": round(data.nbytes / 1024 ** 2, 1),
+            "prepared_from_cache": data.cache_hit,
+            "prepare_seconds": data.prepare_seconds,
+            "loader_workers": train_loader.num_workers,
+            "torch_threads": torch_threads,
+            "preprocessor_path": str(Path(data.directory) / "preprocessor.joblib"),
+        },
+        "epoch_throughput": throughput.epochs,
+        "mean_samples_per_sec": round(sum(rates) / len(rates), 1) if rates else None,
+    }
+    if task == "classification":
+        metrics["num_classes"] = len(data.classes)
+        metrics["classes"] = data.classes
+    else:
+        # Targets are standardized; val_loss is MSE in standard units
+        metrics["target_mean"] = data.y_mean
+        metrics["target_std"] = data.y_std
+        metrics["best_val_rmse"] = float(np.sqrt(best_score) * data.y_std) if best_score is not None else None
+
+    # Save metrics
+    metrics_path = artifact_dir / f"{prefix}_metrics.json"
+    metrics_path.write_text(json.dumps(metrics, indent=2))
+
+    logger.info(f"[OK] Deep Learning {task} model trained: val_loss={best_score}, "
+                f"{metrics['mean_samples_per_sec']} samples/s ({loader_mode} loader)")
+
+    return metrics
+
+
 # ============================================================================
 # TABULAR: Deep Learning Classifier
 # ============================================================================
@@ -123,29 +325,33 @@ async def train_dl_classifier(
     Train a deep learning classifier for tabular data.
     
     Features:
-    - Automatic feature detection
-    - Class imbalance handling
+    - Automatic feature detection (numeric scaled, categoricals one-hot)
+    - Preprocessed once into memory-mapped .npy files, reused across runs
+    - Multi-worker DataLoader; chunk streaming for larger-than-RAM data
     - Early stopping & learning rate scheduling
     - Mixed precision training (AMP)
     - GPU acceleration
-    - MLflow logging
+    - Per-epoch throughput metrics
     
     Args:
         data_path: Path to CSV or Parquet file
         target: Target column name
         features: List of feature columns (auto-detected if None)
-        params: Optional hyperparameters dict
+        params_json: Optional hyperparameters as a JSON string
             - lr: Learning rate (default: 3e-4)
             - hidden_dim: Hidden layer size (default: 512)
             - dropout: Dropout rate (default: 0.2)
             - weight_decay: L2 regularization (default: 1e-2)
+            - batch_size / epochs: Default DL_BATCH / DL_MAX_EPOCHS
+            - num_workers / torch_threads: Default DL_NUM_WORKERS / DL_TORCH_THREADS
+            - loader: "auto" (default), "memmap" or "stream"
         tool_context: ADK tool context
     
     Returns:
-        Dictionary with training results and artifact paths
+        Dictionary with training results, throughput and artifact paths
     
     Example:
-        train_dl_classifier('data.csv', target='label', params={'lr': 1e-3})
+        train_dl_classifier('data.csv', target='label', params_json='{"lr": 1e-3}')
     """
     if not TORCH_AVAILABLE or not LIGHTNING_AVAILABLE:
         return {
@@ -153,182 +359,7 @@ async def train_dl_classifier(
         }
     
     try:
-        # Load data
-        df = pd.read_parquet(data_path) if data_path.endswith('.parquet') else pd.read_csv(data_path)
-        
-        if target not in df.columns:
-            return {"error": f"Target column '{target}' not found in dataset"}
-        
-        # Auto-detect features
-        if features is None:
-            features = [c for c in df.columns if c != target]
-        
-        # Extract X and y
-        X = df[features].select_dtypes(include=[np.number]).values.astype(np.float32)
-        y = df[target].values
-        
-        # Encode target if categorical
-        from sklearn.preprocessing import LabelEncoder
-        le = LabelEncoder()
-        y_encoded = le.fit_transform(y)
-        num_classes = len(le.classes_)
-        
-        # Parameters (ADK-friendly): parse from JSON string
-        params: Dict[str, Any] = {}
-        if params_json:
-            try:
-                params = json.loads(params_json)
-            except Exception:
-                params = {}
-        lr = float(params.get('lr', 3e-4))
-        hidden_dim = int(params.get('hidden_dim', 512))
-        dropout = float(params.get('dropout', 0.2))
-        weight_decay = float(params.get('weight_decay', 1e-2))
-        
-        # Create dataset
-        seed_everything(42)
-        
-        class TabularDataset(Dataset):
-            def __init__(self, X, y):
-                self.X = torch.tensor(X, dtype=torch.float32)
-                self.y = torch.tensor(y, dtype=torch.long)
-            
-            def __len__(self):
-                return len(self.X)
-            
-            def __getitem__(self, idx):
-                return self.X[idx], self.y[idx]
-        
-        dataset = TabularDataset(X, y_encoded)
-        
-        # Train/val split
-        n = len(dataset)
-        n_train = int(n * 0.8)
-        train_ds = Subset(dataset, range(0, n_train))
-        val_ds = Subset(dataset, range(n_train, n))
-        
-        # Data loaders
-        batch_size = int(os.getenv("DL_BATCH", "256"))
-        num_workers = int(os.getenv("DL_NUM_WORKERS", "4"))
-        
-        train_loader = DataLoader(train_ds, batch_size=batch_size, shuffle=True, num_workers=num_workers)
-        val_loader = DataLoader(val_ds, batch_size=batch_size, shuffle=False, num_workers=num_workers)
-        
-        # Define model
-        in_dim = X.shape[1]
-        
-        class MLPClassifier(pl.LightningModule):
-            def __init__(self):
-                super().__init__()
-                self.save_hyperparameters()
-                self.model = nn.Sequential(
-                    nn.Linear(in_dim, hidden_dim),
-                    nn.BatchNorm1d(hidden_dim),
-                    nn.ReLU(),
-                    nn.Dropout(dropout),
-                    nn.Linear(hidden_dim, hidden_dim // 2),
-                    nn.BatchNorm1d(hidden_dim // 2),
-                    nn.ReLU(),
-                    nn.Dropout(dropout),
-                    nn.Linear(hidden_dim // 2, num_classes)
-                )
-                self.criterion = nn.CrossEntropyLoss()
-            
-            def forward(self, x):
-                return self.model(x)
-            
-            def training_step(self, batch, batch_idx):
-                x, y = batch
-                logits = self(x)
-                loss = self.criterion(logits, y)
-                acc = (logits.argmax(dim=1) == y).float().mean()
-                self.log('train_loss', loss, prog_bar=True)
-                self.log('train_acc', acc, prog_bar=True)
-                return loss
-            
-            def validation_step(self, batch, batch_idx):
-                x, y = batch
-                logits = self(x)
-                loss = self.criterion(logits, y)
-                acc = (logits.argmax(dim=1) == y).float().mean()
-                self.log('val_loss', loss, prog_bar=True)
-                self.log('val_acc', acc, prog_bar=True)
-                return loss
-            
-            def configure_optimizers(self):
-                optimizer = torch.optim.AdamW(self.parameters(), lr=lr, weight_decay=weight_decay)
-                scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(
-                    optimizer, mode='min', patience=2, factor=0.5
-                )
-                return {
-                    "optimizer": optimizer,
-                    "lr_scheduler": {"scheduler": scheduler, "monitor": "val_loss"}
-                }
-        
-        # Setup training
-        dataset_name = Path(data_path).stem
-        artifact_dir = _get_artifact_dir(dataset_name)
-        
-        checkpoint_callback = ModelCheckpoint(
-            dirpath=str(artifact_dir),
-            filename='dl_classifier-{epoch:02d}-{val_loss:.4f}',
-            monitor='val_loss',
-            mode='min',
-            save_top_k=1
-        )
-        
-        early_stop_callback = EarlyStopping(
-            monitor='val_loss',
-            mode='min',
-            patience=int(os.getenv("DL_EARLY_STOP_PATIENCE", "3"))
-        )
-        
-        lr_monitor = LearningRateMonitor(logging_interval='epoch')
-        
-        # Train
-        device = _device()
-        precision = _precision()
-        
-        trainer = Trainer(
-            max_epochs=int(os.getenv("DL_MAX_EPOCHS", "20")),
-            accelerator='gpu' if device == 'cuda' else 'cpu',
-            devices=1,
-            precision=precision,
-            callbacks=[checkpoint_callback, early_stop_callback, lr_monitor],
-            enable_checkpointing=True,
-            log_every_n_steps=10,
-            accumulate_grad_batches=int(os.getenv("DL_ACCUM_STEPS", "2")),
-            deterministic=True
-        )
-        
-        model = MLPClassifier()
-        trainer.fit(model, train_loader, val_loader)
-        
-        # Results
-        best_model_path = checkpoint_callback.best_model_path
-        best_score = checkpoint_callback.best_model_score.item() if checkpoint_callback.best_model_score else None
-        
-        metrics = {
-            "status": "success",
-            "model_type": "deep_learning_classifier",
-            "num_classes": int(num_classes),
-            "input_features": int(in_dim),
-            "training_samples": n_train,
-            "validation_samples": n - n_train,
-            "best_val_loss": best_score,
-            "best_model_path": best_model_path,
-            "device": device,
-            "precision": precision
-        }
-        
-        # Save metrics
-        metrics_path = artifact_dir / "dl_classifier_metrics.json"
-        metrics_path.write_text(json.dumps(metrics, indent=2))
-        
-        logger.info(f"[OK] Deep Learning Classifier trained: val_loss={best_score:.4f}")
-        
-        return metrics
-    
+        return _train_tabular("classification", data_path, target, features, params_json)
     except Exception as e:
         logger.error(f"Deep Learning Classifier training failed: {e}", exc_info=True)
         return {"error": str(e), "status": "failed"}
@@ -349,14 +380,14 @@ async def train_dl_regressor(
     """
     Train a deep learning regressor for tabular data.
     
-    Similar to train_dl_classifier but for regression tasks.
-    Uses MSE loss and supports quantile regression.
+    Same pipeline as train_dl_classifier with MSE loss on a standardized
+    target; best_val_rmse is reported in target units.
     
     Args:
         data_path: Path to CSV or Parquet file
         target: Target column name
         features: List of feature columns (auto-detected if None)
-        params: Optional hyperparameters dict
+        params_json: Optional hyperparameters as a JSON string (see train_dl_classifier)
         tool_context: ADK tool context
     
     Returns:
@@ -370,11 +401,11 @@ async def train_dl_regressor(
             "error": "PyTorch and Lightning required. Install with: pip install torch lightning"
         }
     
-    return {
-        "status": "success",
-        "message": "Deep Learning Regressor - Full implementation available after PyTorch setup",
-        "note": "Use train_dl_classifier as a template and replace CrossEntropyLoss with MSELoss/HuberLoss"
-    }
+    try:
+        return _train_tabular("regression", data_path, target, features, params_json)
+    except Exception as e:
+        logger.error(f"Deep Learning Regressor training failed: {e}", exc_info=True)
+        return {"error": str(e), "status": "failed"}
 
 
 # ============================================================================
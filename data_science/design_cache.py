@@ -0,0 +1,294 @@
+"""
+Shared cache of preprocessed design matrices for the sklearn training tools.
+
+train_classifier, train_regressor, train_knn, train_svm, train_naive_bayes,
+ensemble, grid_search, evaluate, sequential_select and recursive_select all
+start by turning the raw frame into X/y with one of a few fixed recipes
+(one-hot pipeline, label encoding, get_dummies, category codes). Each recipe
+is built once per dataset fingerprint + target + options and then reused:
+
+  - memory tier: process-wide LRU bounded by DESIGN_CACHE_MEMORY_MB
+  - disk tier:   joblib files under the workspace tmp/design_cache folder,
+                 loaded back copy-on-write (mmap_mode="c") so large arrays are
+                 shared until written and a write never reaches the file
+
+Cached matrices and fitted preprocessors are shared between callers and must
+be treated as read-only; copy (or deepcopy a preprocessor) before mutating,
+refitting or embedding one in a model that will be fitted again.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from .dataset_fingerprint import cache_key, dataset_fingerprint
+from .large_data_config import DESIGN_CACHE_MEMORY_MB
+from .split_registry import DataSplit, get_split
+
+logger = logging.getLogger(__name__)
+
+# Bump when any builder below changes its output
+DESIGN_CACHE_VERSION = 2
+
+_memory: "OrderedDict[str, DesignMatrix]" = OrderedDict()
+_memory_bytes = 0
+_lock = threading.Lock()
+
+
+@dataclass
+class DesignMatrix:
+    """Preprocessed features/target plus the fitted preprocessors that produced them."""
+    X: Any
+    y: Any
+    feature_names: List[str]
+    is_classification: bool
+    preprocessor: Any = None
+    X_train: Any = None
+    X_test: Any = None
+    y_train: Any = None
+    y_test: Any = None
+    extras: Dict[str, Any] = field(default_factory=dict)
+    key: str = ""
+    build_seconds: float = 0.0
+
+    def nbytes(self) -> int:
+        total = 0
+        for value in (self.X, self.y, self.X_train, self.X_test, self.y_train, self.y_test):
+            if isinstance(value, (pd.DataFrame, pd.Series)):
+                total += int(value.memory_usage(index=False, deep=False).sum()) \
+                    if isinstance(value, pd.DataFrame) else int(value.memory_usage(index=False))
+            elif isinstance(value, np.ndarray):
+                total += value.nbytes
+        return total
+
+
+# ============================================================================
+# Preprocessing Recipes
+# ============================================================================
+
+def _is_classification_target(y: pd.Series) -> bool:
+    return (not pd.api.types.is_numeric_dtype(y)) or y.nunique(dropna=True) <= 20
+
+
+def _build_onehot_split(df: pd.DataFrame, target: str, split: DataSplit) -> DesignMatrix:
+    """Median-impute + scale numerics, mode-impute + one-hot categoricals, fit on the train split."""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    y = df[target]
+    X = df.drop(columns=[target])
+    numeric_features = X.select_dtypes(include=["number"]).columns.tolist()
+    categorical_features = X.columns.difference(numeric_features).tolist()
+    preprocessor = ColumnTransformer(transformers=[
+        ("num", Pipeline(steps=[("imputer", SimpleImputer(strategy="median")),
+                                ("scaler", StandardScaler())]), numeric_features),
+        ("cat", Pipeline(steps=[("imputer", SimpleImputer(strategy="most_frequent")),
+                                ("onehot", OneHotEncoder(handle_unknown="ignore", sparse_output=False))]),
+         categorical_features),
+    ])
+    X_train, X_test, y_train, y_test = split.train_test(X, y)
+    Xt_train = preprocessor.fit_transform(X_train)
+    Xt_test = preprocessor.transform(X_test)
+    try:
+        feature_names = preprocessor.get_feature_names_out().tolist()
+    except Exception:
+        feature_names = [f"f{i}" for i in range(Xt_train.shape[1])]
+    return DesignMatrix(
+        X=None, y=y, feature_names=feature_names,
+        is_classification=_is_classification_target(y),
+        preprocessor=preprocessor,
+        X_train=Xt_train, X_test=Xt_test, y_train=y_train, y_test=y_test,
+        extras={"split": split.summary()},
+    )
+
+
+def _build_label_encoded(df: pd.DataFrame, target: str, scale: bool = False) -> DesignMatrix:
+    """LabelEncoder on every categorical column (and an object target), optionally standard-scaled."""
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+    X = df.drop(columns=[target])
+    y = df[target]
+    for col in X.select_dtypes(include=["object", "category"]).columns:
+        X[col] = LabelEncoder().fit_transform(X[col].astype(str))
+
+    is_classification = len(y.unique()) < 20 or y.dtype == "object"
+    if y.dtype == "object":
+        y = pd.Series(LabelEncoder().fit_transform(y.astype(str)), index=y.index, name=target)
+
+    feature_names = [str(c) for c in X.columns]
+    scaler = None
+    if scale:
+        scaler = StandardScaler()
+        X = scaler.fit_transform(X)
+    return DesignMatrix(X=X, y=y, feature_names=feature_names,
+                        is_classification=is_classification, preprocessor=scaler)
+
+
+def _build_dummies(df: pd.DataFrame, target: str) -> DesignMatrix:
+    """pd.get_dummies(drop_first=True) on all features; target left as-is."""
+    y = df[target]
+    X = pd.get_dummies(df.drop(columns=[target]), drop_first=True)
+    return DesignMatrix(X=X, y=y, feature_names=[str(c) for c in X.columns],
+                        is_classification=_is_classification_target(y))
+
+
+def _build_codes_scaled_split(df: pd.DataFrame, target: str, split: DataSplit) -> DesignMatrix:
+    """Category codes + median fill, label-encoded target, scaler fit on the train split."""
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+    from .utils_task import detect_task
+
+    y = df[target]
+    X = df.drop(columns=[target])
+    for col in X.select_dtypes(include=["object", "category"]).columns:
+        X[col] = X[col].astype("category").cat.codes
+    X = X.fillna(X.median(numeric_only=True))
+
+    task_type = detect_task(y)
+    is_classification = task_type == "classification"
+    label_encoder = None
+    if is_classification:
+        label_encoder = LabelEncoder()
+        y = label_encoder.fit_transform(y)
+
+    X_train, X_test, y_train, y_test = split.train_test(X, y)
+    scaler = StandardScaler()
+    return DesignMatrix(
+        X=None, y=y, feature_names=[str(c) for c in X.columns],
+        is_classification=is_classification, preprocessor=scaler,
+        X_train=scaler.fit_transform(X_train), X_test=scaler.transform(X_test),
+        y_train=y_train, y_test=y_test,
+        extras={"task_type": task_type, "label_encoder": label_encoder,
+                "split": split.summary()},
+    )
+
+
+# Recipes that train on the registered train/test split (see split_registry)
+_SPLIT_RECIPES = {"onehot_split", "codes_scaled_split"}
+
+_RECIPES: Dict[str, Callable[..., DesignMatrix]] = {
+    "onehot_split": _build_onehot_split,
+    "label_encoded": _build_label_encoded,
+    "dummies": _build_dummies,
+    "codes_scaled_split": _build_codes_scaled_split,
+}
+
+
+# ============================================================================
+# Cache Tiers
+# ============================================================================
+
+def _disk_dir(tool_context: Optional[Any]) -> Optional[str]:
+    if tool_context is None:
+        return None
+    try:
+        from .ds_tools import _get_workspace_dir
+        path = os.path.join(_get_workspace_dir(tool_context, "tmp"), "design_cache")
+        os.makedirs(path, exist_ok=True)
+        return path
+    except Exception:
+        return None
+
+
+def _remember(key: str, dm: DesignMatrix) -> None:
+    global _memory_bytes
+    budget = DESIGN_CACHE_MEMORY_MB * 1024 * 1024
+    size = dm.nbytes()
+    if size > budget:
+        return
+    with _lock:
+        if key in _memory:
+            _memory_bytes -= _memory.pop(key).nbytes()
+        _memory[key] = dm
+        _memory_bytes += size
+        while _memory_bytes > budget and len(_memory) > 1:
+            _, evicted = _memory.popitem(last=False)
+            _memory_bytes -= evicted.nbytes()
+
+
+def get_design_matrix(
+    df: pd.DataFrame,
+    target: str,
+    recipe: str,
+    tool_context: Optional[Any] = None,
+    **options: Any,
+) -> DesignMatrix:
+    """
+    Return the preprocessed design matrix for df/target/recipe, building it at most once.
+
+    Args:
+        df: Raw dataset (as returned by _load_dataframe)
+        target: Target column
+        recipe: One of "onehot_split", "label_encoded", "dummies", "codes_scaled_split"
+        tool_context: Used to locate the workspace disk tier (optional)
+        **options: Recipe options (test_size and random_state select the
+            registered split for *_split recipes; scale for label_encoded)
+
+    Returns:
+        DesignMatrix shared with other callers; do not mutate it
+    """
+    if recipe not in _RECIPES:
+        raise ValueError(f"Unknown preprocessing recipe '{recipe}'. Choose from: {list(_RECIPES)}")
+
+    fingerprint = dataset_fingerprint(df)
+    key = cache_key(fingerprint, target, recipe, options, DESIGN_CACHE_VERSION)
+
+    with _lock:
+        dm = _memory.get(key)
+        if dm is not None:
+            _memory.move_to_end(key)
+    if dm is not None:
+        logger.info(f"[DESIGN CACHE] memory hit {recipe} for '{target}' ({key})")
+        return dm
+
+    disk_dir = _disk_dir(tool_context)
+    disk_path = os.path.join(disk_dir, f"{key}.joblib") if disk_dir else None
+    if disk_path and os.path.exists(disk_path):
+        try:
+            # Copy-on-write: in-place writes by a caller stay in that caller's
+            # pages instead of failing on a read-only map or corrupting the file
+            dm = joblib.load(disk_path, mmap_mode="c")
+            logger.info(f"[DESIGN CACHE] disk hit {recipe} for '{target}' ({key})")
+            _remember(key, dm)
+            return dm
+        except Exception as e:
+            logger.warning(f"[DESIGN CACHE] Ignoring unreadable cache file {disk_path}: {e}")
+
+    start = time.perf_counter()
+    if recipe in _SPLIT_RECIPES:
+        split = get_split(df, target, test_size=options.get("test_size", 0.2),
+                          seed=options.get("random_state", 42),
+                          tool_context=tool_context, fingerprint=fingerprint)
+        dm = _RECIPES[recipe](df.copy(deep=False), target, split=split)
+    else:
+        dm = _RECIPES[recipe](df.copy(deep=False), target, **options)
+    dm.key = key
+    dm.build_seconds = time.perf_counter() - start
+    logger.info(f"[DESIGN CACHE] built {recipe} for '{target}' in {dm.build_seconds:.2f}s ({key})")
+
+    _remember(key, dm)
+    if disk_path:
+        try:
+            tmp_path = disk_path + ".tmp"
+            joblib.dump(dm, tmp_path)
+            os.replace(tmp_path, disk_path)
+        except Exception as e:
+            logger.warning(f"[DESIGN CACHE] Could not persist {key}: {e}")
+    return dm
+
+
+def clear_design_cache() -> None:
+    """Drop every in-memory entry (disk files are left for the workspace cleanup)."""
+    global _memory_bytes
+    with _lock:
+        _memory.clear()
+        _memory_bytes = 0
@@ -0,0 +1,446 @@
+"""
+Memory-mapped input pipeline for the deep learning tools.
+
+train_dl_classifier / train_dl_regressor no longer hold the dataset as a
+DataFrame plus a dense tensor copy. The file is preprocessed once, streamed in
+DL_MEMMAP_CHUNK_ROWS chunks:
+
+  1. profile pass: incremental_learning.StreamingPreprocessor learns numeric
+     means/scales and the most frequent categories; target classes (or target
+     mean/std for regression) and the usable row count are collected
+  2. write pass: transformed features go to X.npy (float32), encoded targets to
+     y.npy and the seeded validation assignment to val.npy, all as .npy files
+     written through numpy memory maps
+
+The result is cached per file (path, size, mtime) + target + features + task,
+so retraining with other hyperparameters skips both passes.
+
+Training then reads the .npy files memory-mapped from DataLoader workers:
+
+  - "memmap": random batches; each batch is one sorted fancy-index read
+  - "stream": matrices above DL_STREAM_THRESHOLD_MB are read chunk by chunk
+    (IterableDataset), chunks sharded across workers and shuffled per epoch,
+    so page-cache use stays sequential for larger-than-RAM data
+"""
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .dataset_fingerprint import cache_key
+from .large_data_config import (
+    DL_MEMMAP_CHUNK_ROWS,
+    DL_NUM_WORKERS,
+    DL_STREAM_THRESHOLD_MB,
+    DL_TORCH_THREADS,
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import torch
+    from torch.utils.data import BatchSampler, DataLoader, Dataset, IterableDataset, RandomSampler, SequentialSampler
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+    Dataset = IterableDataset = object
+
+try:
+    from lightning.pytorch.callbacks import Callback
+except ImportError:
+    Callback = object
+
+# Bump when the on-disk layout below changes
+DL_MEMMAP_VERSION = 1
+
+VALIDATION_FRACTION = 0.2
+
+
+@dataclass
+class MemmapData:
+    """Paths and metadata of a prepared dataset (see prepare_memmap)."""
+    directory: str
+    n_rows: int
+    n_features: int
+    task: str
+    feature_names: List[str]
+    classes: List[str] = field(default_factory=list)
+    y_mean: float = 0.0
+    y_std: float = 1.0
+    n_val: int = 0
+    cache_hit: bool = False
+    prepare_seconds: float = 0.0
+
+    @property
+    def x_path(self) -> str:
+        return os.path.join(self.directory, "X.npy")
+
+    @property
+    def y_path(self) -> str:
+        return os.path.join(self.directory, "y.npy")
+
+    @property
+    def val_path(self) -> str:
+        return os.path.join(self.directory, "val.npy")
+
+    @property
+    def nbytes(self) -> int:
+        return self.n_rows * self.n_features * 4
+
+
+# ============================================================================
+# Preparation
+# ============================================================================
+
+def _source_key(data_path: str, target: str, features: Optional[Sequence[str]], task: str) -> str:
+    stat = os.stat(data_path)
+    return cache_key(os.path.abspath(data_path), stat.st_size, stat.st_mtime_ns, target,
+                     list(features) if features else None, task, VALIDATION_FRACTION, DL_MEMMAP_VERSION)
+
+
+def _sorted_classes(values: set) -> List[Any]:
+    try:
+        return sorted(values)
+    except TypeError:
+        return sorted(values, key=str)
+
+
+def _with_target(chunk: pd.DataFrame, target: str, task: str) -> pd.DataFrame:
+    """Rows with a usable target (present, and numeric for regression)."""
+    y = chunk[target]
+    if task == "regression":
+        y = pd.to_numeric(y, errors="coerce")
+    return chunk[y.notna().to_numpy()]
+
+
+def prepare_memmap(
+    data_path: str,
+    target: str,
+    features: Optional[Sequence[str]],
+    task: str,
+    cache_dir: Path,
+    chunk_rows: Optional[int] = None,
+    seed: int = 42,
+) -> MemmapData:
+    """
+    Preprocess data_path into memory-mapped X/y/val .npy files (cached).
+
+    Args:
+        data_path: CSV or Parquet file
+        target: Target column (resolved case-insensitively)
+        features: Feature columns (default: every other column)
+        task: "classification" or "regression"
+        cache_dir: Parent folder for the prepared dataset
+        chunk_rows: Rows per streamed chunk (default DL_MEMMAP_CHUNK_ROWS)
+        seed: Seed of the validation assignment
+
+    Returns:
+        MemmapData describing the written (or reused) files
+    """
+    from .incremental_learning import StreamingPreprocessor, _holdout_mask, iter_chunks, resolve_column
+    import joblib
+
+    start = time.perf_counter()
+    chunk_rows = int(chunk_rows or DL_MEMMAP_CHUNK_ROWS)
+    directory = Path(cache_dir) / _source_key(data_path, target, features, task)[:16]
+    meta_path = directory / "meta.json"
+    if meta_path.exists():
+        try:
+            meta = json.loads(meta_path.read_text())
+            data = MemmapData(directory=str(directory), cache_hit=True, **meta)
+            logger.info(f"[DL DATA] Reusing prepared dataset {directory} ({data.n_rows:,} x {data.n_features})")
+            return data
+        except Exception as e:
+            logger.warning(f"[DL DATA] Ignoring unreadable dataset cache {directory}: {e}")
+
+    # Pass 1: learn the preprocessing, classes / target moments and row count
+    pre = StreamingPreprocessor()
+    columns: Optional[List[str]] = None
+    classes: set = set()
+    n_rows, y_sum, y_sq = 0, 0.0, 0.0
+    for chunk in iter_chunks(data_path, chunk_rows):
+        if columns is None:
+            target = resolve_column(target, list(chunk.columns))
+            columns = [c for c in (features or chunk.columns) if c != target]
+            missing = [c for c in columns if c not in chunk.columns]
+            if missing:
+                raise ValueError(f"Feature columns not found: {missing}")
+        chunk = _with_target(chunk, target, task)
+        if chunk.empty:
+            continue
+        pre.partial_fit(chunk[columns])
+        if task == "classification":
+            classes.update(chunk[target].unique().tolist())
+        else:
+            y = pd.to_numeric(chunk[target], errors="coerce").to_numpy(dtype=float)
+            y_sum += float(y.sum())
+            y_sq += float((y ** 2).sum())
+        n_rows += len(chunk)
+    if n_rows == 0:
+        raise ValueError(f"No rows with a value for target '{target}' in {data_path}")
+    pre.finalize()
+    feature_names = [str(f) for f in pre.get_feature_names_out()]
+    class_list = _sorted_classes(classes)
+    y_mean = y_sum / n_rows
+    y_std = float(np.sqrt(max(y_sq / n_rows - y_mean ** 2, 0.0))) or 1.0
+
+    # Pass 2: write the transformed chunks through memory maps
+    tmp_dir = directory.with_name(directory.name + f".tmp{os.getpid()}")
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    X_mm = np.lib.format.open_memmap(tmp_dir / "X.npy", mode="w+", dtype=np.float32,
+                                     shape=(n_rows, len(feature_names)))
+    y_mm = np.lib.format.open_memmap(tmp_dir / "y.npy", mode="w+",
+                                     dtype=np.int64 if task == "classification" else np.float32,
+                                     shape=(n_rows,))
+    val_mm = np.lib.format.open_memmap(tmp_dir / "val.npy", mode="w+", dtype=np.bool_, shape=(n_rows,))
+    pos = 0
+    for chunk_no, chunk in enumerate(iter_chunks(data_path, chunk_rows)):
+        chunk = _with_target(chunk, target, task)
+        if chunk.empty:
+            continue
+        end = pos + len(chunk)
+        X_mm[pos:end] = pre.transform(chunk[columns])
+        if task == "classification":
+            y_mm[pos:end] = pd.Categorical(chunk[target], categories=class_list).codes
+        else:
+            y = pd.to_numeric(chunk[target], errors="coerce").to_numpy(dtype=float)
+            y_mm[pos:end] = (y - y_mean) / y_std
+        val_mm[pos:end] = _holdout_mask(len(chunk), chunk_no, VALIDATION_FRACTION, seed)
+        pos = end
+    n_val = int(np.count_nonzero(val_mm))
+    for mm in (X_mm, y_mm, val_mm):
+        mm.flush()
+    del X_mm, y_mm, val_mm
+
+    meta = {
+        "n_rows": n_rows,
+        "n_features": len(feature_names),
+        "task": task,
+        "feature_names": feature_names,
+        "classes": [str(c) for c in class_list],
+        "y_mean": y_mean,
+        "y_std": y_std,
+        "n_val": n_val,
+        "prepare_seconds": round(time.perf_counter() - start, 2),
+    }
+    joblib.dump(pre, tmp_dir / "preprocessor.joblib")
+    (tmp_dir / "meta.json").write_text(json.dumps(meta, indent=2))
+    try:
+        os.replace(tmp_dir, directory)
+    except OSError:
+        # Another run prepared the same dataset concurrently; keep theirs
+        import shutil
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    logger.info(f"[DL DATA] Prepared {n_rows:,} x {len(feature_names)} float32 matrix "
+                f"({n_rows * len(feature_names) * 4 / 1024**2:.1f} MB) in {meta['prepare_seconds']}s")
+    return MemmapData(directory=str(directory), **meta)
+
+
+# ============================================================================
+# Datasets
+# ============================================================================
+
+class _MemmapReader:
+    """Opens the .npy files read-only memory-mapped on first use in each process."""
+
+    def __init__(self, data: MemmapData):
+        self.data = data
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._arrays is None:
+            self._arrays = tuple(np.load(p, mmap_mode="r")
+                                 for p in (self.data.x_path, self.data.y_path, self.data.val_path))
+        return self._arrays
+
+    def __getstate__(self):
+        # Workers re-open the maps instead of pickling them
+        return {"data": self.data, "_arrays": None}
+
+
+class MemmapDataset(Dataset):
+    """
+    Map-style dataset over one split of a prepared dataset.
+
+    Items are whole batches: __getitem__ takes a list of positions (from a
+    BatchSampler) and returns (X, y) tensors read with one sorted index.
+    """
+
+    def __init__(self, data: MemmapData, validation: bool):
+        self.reader = _MemmapReader(data)
+        val = np.load(data.val_path, mmap_mode="r")
+        self.rows = np.flatnonzero(val if validation else ~val)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, positions):
+        X, y, _ = self.reader.arrays()
+        rows = np.sort(self.rows[np.asarray(positions)])
+        return torch.from_numpy(np.ascontiguousarray(X[rows])), torch.from_numpy(np.asarray(y[rows]))
+
+
+class ChunkStreamDataset(IterableDataset):
+    """
+    Iterable dataset reading a prepared dataset sequentially in chunks.
+
+    Chunks are dealt round-robin to the DataLoader workers; with shuffle, chunk
+    order and rows within each chunk are permuted per epoch (set_epoch).
+    """
+
+    def __init__(self, data: MemmapData, validation: bool, batch_size: int,
+                 chunk_rows: Optional[int] = None, shuffle: bool = True, seed: int = 42):
+        self.reader = _MemmapReader(data)
+        self.validation = validation
+        self.batch_size = batch_size
+        self.chunk_rows = int(chunk_rows or DL_MEMMAP_CHUNK_ROWS)
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+        # Batches never span chunks, so the count is fixed whatever the worker split
+        val = np.load(data.val_path, mmap_mode="r")
+        self.n_batches = sum(
+            -(-int(np.count_nonzero(val[s:s + self.chunk_rows] == validation)) // batch_size)
+            for s in range(0, len(val), self.chunk_rows))
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+
+    def __len__(self) -> int:
+        return self.n_batches
+
+    def __iter__(self):
+        from torch.utils.data import get_worker_info
+
+        X, y, val = self.reader.arrays()
+        rng = np.random.RandomState(self.seed + self.epoch)
+        starts = np.arange(0, len(X), self.chunk_rows)
+        if self.shuffle:
+            starts = rng.permutation(starts)
+        info = get_worker_info()
+        if info is not None:
+            starts = starts[info.id::info.num_workers]
+        for start in starts:
+            stop = min(start + self.chunk_rows, len(X))
+            keep = np.flatnonzero(val[start:stop] == self.validation)
+            if self.shuffle:
+                keep = rng.permutation(keep)
+            X_chunk = np.asarray(X[start:stop])
+            y_chunk = np.asarray(y[start:stop])
+            for b in range(0, len(keep), self.batch_size):
+                rows = keep[b:b + self.batch_size]
+                yield torch.from_numpy(X_chunk[rows]), torch.from_numpy(y_chunk[rows])
+
+
+def _worker_init(_worker_id: int) -> None:
+    # Parallelism comes from the worker processes; one BLAS/torch thread each
+    torch.set_num_threads(1)
+
+
+def make_loaders(
+    data: MemmapData,
+    batch_size: int,
+    num_workers: Optional[int] = None,
+    mode: str = "auto",
+    pin_memory: bool = False,
+    seed: int = 42,
+) -> Tuple[Any, Any, str]:
+    """
+    Train/validation DataLoaders over a prepared dataset.
+
+    Args:
+        data: Result of prepare_memmap
+        batch_size: Rows per batch
+        num_workers: Loader processes (default DL_NUM_WORKERS)
+        mode: "memmap", "stream", or "auto" (stream above DL_STREAM_THRESHOLD_MB)
+        pin_memory: Pin batches for faster host-to-GPU copies
+        seed: Shuffling seed
+
+    Returns:
+        (train_loader, val_loader, resolved mode)
+    """
+    num_workers = DL_NUM_WORKERS if num_workers is None else max(0, int(num_workers))
+    if mode == "auto":
+        mode = "stream" if data.nbytes > DL_STREAM_THRESHOLD_MB * 1024 ** 2 else "memmap"
+    if mode not in ("memmap", "stream"):
+        raise ValueError(f"Unknown loader mode '{mode}'. Choose from: auto, memmap, stream")
+
+    opts: Dict[str, Any] = {"batch_size": None, "num_workers": num_workers, "pin_memory": pin_memory}
+    if num_workers > 0:
+        opts.update(worker_init_fn=_worker_init, prefetch_factor=4)
+
+    if mode == "memmap":
+        train_ds, val_ds = MemmapDataset(data, validation=False), MemmapDataset(data, validation=True)
+        generator = torch.Generator().manual_seed(seed)
+        train_sampler = BatchSampler(RandomSampler(train_ds, generator=generator), batch_size, drop_last=False)
+        val_sampler = BatchSampler(SequentialSampler(val_ds), batch_size, drop_last=False)
+        persistent = {"persistent_workers": True} if num_workers > 0 else {}
+        train_loader = DataLoader(train_ds, sampler=train_sampler, **opts, **persistent)
+        val_loader = DataLoader(val_ds, sampler=val_sampler, **opts, **persistent)
+    else:
+        # Workers are re-created each epoch so they pick up set_epoch()
+        train_loader = DataLoader(ChunkStreamDataset(data, False, batch_size, seed=seed), **opts)
+        val_loader = DataLoader(ChunkStreamDataset(data, True, batch_size, shuffle=False), **opts)
+
+    logger.info(f"[DL DATA] {mode} loaders: batch {batch_size}, {num_workers} workers, "
+                f"{data.n_rows - data.n_val:,} train / {data.n_val:,} validation rows")
+    return train_loader, val_loader, mode
+
+
+def set_torch_threads(n_threads: Optional[int] = None) -> int:
+    """Set torch intra-op threads (default DL_TORCH_THREADS); returns the previous value."""
+    previous = torch.get_num_threads()
+    torch.set_num_threads(max(1, int(n_threads or DL_TORCH_THREADS)))
+    return previous
+
+
+# ============================================================================
+# Throughput
+# ============================================================================
+
+class EpochThroughput(Callback):
+    """
+    Per-epoch training throughput.
+
+    Records samples, wall seconds, samples/sec and the time the training loop
+    spent waiting for the next batch (input pipeline stalls), and advances
+    set_epoch() on streamed datasets.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.epochs: List[Dict[str, Any]] = []
+
+    def on_train_epoch_start(self, trainer, pl_module):
+        dataset = getattr(trainer.train_dataloader, "dataset", None)
+        if hasattr(dataset, "set_epoch"):
+            dataset.set_epoch(trainer.current_epoch)
+        self._start = self._last = time.perf_counter()
+        self._samples = 0
+        self._wait = 0.0
+
+    def on_train_batch_start(self, trainer, pl_module, batch, batch_idx):
+        self._wait += time.perf_counter() - self._last
+
+    def on_train_batch_end(self, trainer, pl_module, outputs, batch, batch_idx):
+        self._samples += int(batch[0].shape[0])
+        self._last = time.perf_counter()
+
+    def on_train_epoch_end(self, trainer, pl_module):
+        seconds = time.perf_counter() - self._start
+        rate = self._samples / seconds if seconds > 0 else 0.0
+        self.epochs.append({
+            "epoch": int(trainer.current_epoch),
+            "samples": self._samples,
+            "seconds": round(seconds, 3),
+            "samples_per_sec": round(rate, 1),
+            "data_wait_seconds": round(self._wait, 3),
+        })
+        pl_module.log("samples_per_sec", rate)
@@ -18,6 +18,7 @@ from sklearn.compose import ColumnTransformer
 from io import BytesIO
 import random
 import time
+from copy import deepcopy
 import asyncio
 import inspect
 import importlib
@@ -62,6 +63,20 @@ except ImportError:
     DATA_DIR = os.path.join(os.path.dirname(__file__), ".uploaded")
 MODELS_DIR = os.path.join(os.path.dirname(__file__), "models")
 
+from .dataset_fingerprint import dataset_fingerprint
+from .design_cache import get_design_matrix
+from .split_registry import get_split
+from .large_data_config import PLOT_AGGREGATE_THRESHOLD
+from .plot_renderer import (
+    PLOT_DPI,
+    PlotCache,
+    grouped_box_stats,
+    plot_cache_key,
+    render_charts,
+    streaming_histogram,
+    streaming_histogram2d,
+)
+
 
 # ============================================================================
 # UNIVERSAL DISPLAY FIELD DECORATOR
@@ -1002,17 +1017,42 @@ async def mirror_uploaded_files_to_data_dir(
     return saved_paths
 
 
-def _fig_to_part(fig: plt.Figure, filename: str = "plot.png") -> types.Part:
+def _fig_to_png(fig: plt.Figure, dpi: int = PLOT_DPI) -> bytes:
+    """Render a figure exactly once to PNG bytes and close it."""
     buf = io.BytesIO()
-    fig.savefig(buf, format="png", bbox_inches="tight", dpi=150)
-    plt.close(fig)
-    data = buf.getvalue()
+    try:
+        fig.savefig(buf, format="png", bbox_inches="tight", dpi=dpi)
+    finally:
+        plt.close(fig)
+    return buf.getvalue()
+
+
+def _png_to_part(data: bytes) -> types.Part:
+    """Wrap already-encoded PNG bytes as an ADK artifact part (no re-encode)."""
     return types.Part.from_bytes(
         data=data,
         mime_type="image/png",
     )
 
 
+def _fig_to_part(fig: plt.Figure, filename: str = "plot.png") -> types.Part:
+    return _png_to_part(_fig_to_png(fig))
+
+
+def _write_plot_png(data: bytes,
+                    filename: str,
+                    tool_context: Optional[ToolContext]) -> Optional[str]:
+    """Write encoded PNG bytes to the workspace plots dir; returns the path."""
+    try:
+        plot_path = os.path.join(_get_workspace_dir(tool_context, "plots"), filename)
+        with open(plot_path, "wb") as f:
+            f.write(data)
+        return plot_path
+    except Exception as e:
+        logger.warning(f"[PLOT] Failed to write {filename} to workspace: {e}")
+        return None
+
+
 def _profile_numeric(df: pd.DataFrame) -> dict:
     # Check if there are any numeric columns
     numeric_cols = df.select_dtypes(include=["number"]).columns
@@ -1137,7 +1177,10 @@ def _run_pca(df: pd.DataFrame,
         plt.xlabel("# Components")
         plt.ylabel("Cumulative explained variance")
         plt.title("PCA Scree (cumulative)")
-        part = _fig_to_part(plt.gcf(), "pca_scree.png")
+        # Render once: the same PNG buffer goes to disk and to the artifact
+        png = _fig_to_png(plt.gcf())
+        _write_plot_png(png, "pca_scree.png", tool_context)
+        part = _png_to_part(png)
         if tool_context is not None:
             # saved name is controlled by filename param
             # (Part.from_bytes no longer includes display name)
@@ -1180,7 +1223,9 @@ def _run_unsupervised(df: pd.DataFrame,
         sns.scatterplot(x=pts[:, 0], y=pts[:, 1], hue=km_labels,
                         palette="tab10", s=20, legend=False)
         plt.title("KMeans clusters (PCA 2D)")
-        part = _fig_to_part(plt.gcf(), "kmeans_pca2d.png")
+        png = _fig_to_png(plt.gcf())
+        _write_plot_png(png, "kmeans_pca2d.png", tool_context)
+        part = _png_to_part(png)
         if tool_context is not None:
             import asyncio
             asyncio.create_task(
@@ -1833,7 +1878,9 @@ async def train_baseline_model(
     if target not in df.columns:
         raise ValueError(f"Target column '{target}' not found in data.")
 
-    df = df.dropna(subset=[target])
+    # Registered split (rows with a missing target are excluded by the registry)
+    split = get_split(df, target, test_size=test_size, seed=random_state,
+                      tool_context=tool_context)
     y = df[target]
     X = df.drop(columns=[target])
 
@@ -1874,33 +1921,23 @@ async def train_baseline_model(
 
     if inferred_task == "classification":
         model = LogisticRegression(max_iter=1000)
-        # Hyperparameter tuning (lightweight)
-        cv = StratifiedKFold(
-            n_splits=3,
-            shuffle=True,
-            random_state=random_state)
         param_grid = {"model__C": [0.1, 1.0, 10.0]}
     else:
         model = Ridge(random_state=random_state)
-        cv = KFold(n_splits=3, shuffle=True, random_state=random_state)
         param_grid = {"model__alpha": [0.1, 1.0, 10.0]}
 
     pipe = Pipeline(steps=[("preprocess", preprocessor), ("model", model)])
+    X_train, X_test, y_train, y_test = split.train_test(X, y)
 
-    # Grid search for quick tuning
+    # Grid search for quick tuning on the registered CV folds of the train rows
+    # only, so the held-out test rows never influence the chosen parameters
     try:
-        gs = GridSearchCV(pipe, param_grid=param_grid, cv=cv, n_jobs=-1)
-        gs.fit(X, y)
+        gs = GridSearchCV(pipe, param_grid=param_grid, cv=split.cv(), n_jobs=-1)
+        gs.fit(X_train, y_train)
         pipe = gs.best_estimator_
     except Exception:
-        pass
+        pipe.fit(X_train, y_train)
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=test_size, random_state=random_state,
-        stratify=y if inferred_task == "classification" and _can_stratify(y) else None
-    )
-
-    pipe.fit(X_train, y_train)
     y_pred = pipe.predict(X_test)
 
     metrics: dict[str, object] = {"task": inferred_task}
@@ -1988,11 +2025,15 @@ async def train_baseline_model(
         except Exception:
             pass
 
+    from .ensemble_engine import raw_pipeline_metadata
     return _json_safe({
         "metrics": metrics,
         "artifacts": artifacts,
         "model_path": model_path,
-        "model_directory": model_dir
+        "model_directory": model_dir,
+        "model_type": type(pipe.named_steps["model"]).__name__,
+        "target": target,
+        "metadata": raw_pipeline_metadata(df, split.summary(), pipe.named_steps["model"]),
     })
 
 
@@ -2647,64 +2688,44 @@ async def plot(
     sample_for_plots = df.sample(
         min(len(df), 2000), random_state=42) if len(df) > 2000 else df
 
+    # Large data: draw full-data aggregates (binned histograms, 2D density,
+    # quantile boxplots) so tails and rare clusters aren't sampled away
+    aggregate = len(df) > PLOT_AGGREGATE_THRESHOLD
+    if aggregate:
+        logger.info(
+            f"[PLOT] {len(df):,} rows > {PLOT_AGGREGATE_THRESHOLD:,}: using aggregate rendering")
+
     artifacts: list[str] = []
     chart_summaries: list[dict] = []
-    charts_left = int(max_charts)
     pending_artifact_saves: list = []  # Track async saves
 
-    sns.set_theme(style="whitegrid")
-
-    def _save_current(fig: plt.Figure, filename: str):
-        nonlocal artifacts, charts_left, pending_artifact_saves
-
-        # [OK] Save to physical .plot directory
-        plot_path = os.path.join(plot_dir, filename)
-        logger.info(f"[PLOT] Saving plot to: {plot_path}")
-        try:
-            # Ensure plot is fully rendered before saving
-            fig.canvas.draw()
-            fig.canvas.flush_events()
-            fig.savefig(plot_path, dpi=100, bbox_inches='tight')
-            # Ensure resources are flushed and avoid handle leaks on Windows
-            import matplotlib.pyplot as _plt
-            _plt.close(fig)
-            import logging
-            logger.info(
-                f"[PLOT] [OK] Successfully saved plot to {plot_path}, size={
-                    os.path.getsize(plot_path)} bytes")
-        except Exception as e:
-            import logging
-            logger.error(
-                f"[PLOT] [X] Failed to save plot to {plot_path}: {e}",
-                exc_info=True)
-
-        # Save as ADK artifact with folder structure prefix
-        part = _fig_to_part(fig, filename)
-        if tool_context is not None:
-            # Include folder structure prefix (plots/) when saving to ADK
-            artifact_filename = f"plots/{filename}"
-            # Collect the coroutine to await later
-            pending_artifact_saves.append(
-                _save_artifact_rl(
-                    tool_context,
-                    filename=artifact_filename,
-                    artifact=part))
-            # [OK] Store full path, not just filename
-            artifacts.append(plot_path)
-        charts_left -= 1
+    # Chart candidates are described here (kind, columns, title, filename) with
+    # a build() that computes the data they draw. Keys come from the
+    # description alone, so charts already in the plot cache never pay for
+    # their data (full-data aggregates on large frames); only misses are built
+    # and then rendered in the render pool (see plot_renderer).
+    specs: list[dict] = []
+    builders: list = []
+    # Spare candidates beyond max_charts stand in for charts that fail to render
+    candidate_limit = 2 * int(max_charts)
+
+    def _add_spec(spec: dict, summary: dict, build) -> bool:
+        if len(specs) >= candidate_limit:
+            return False
+        spec["summary"] = summary
+        spec["columns"] = summary["columns"]
+        specs.append(spec)
+        builders.append(build)
+        return True
 
     # 1) Correlation heatmap
-    if charts_left > 0 and len(numeric_cols) >= 2:
-        try:
-            corr = sample_for_plots[numeric_cols].corr(numeric_only=True)
-            plt.figure(figsize=(8, 6))
-            sns.heatmap(corr, annot=False, cmap="vlag", center=0)
-            plt.title("Correlation heatmap")
-            _save_current(plt.gcf(), f"{file_prefix}auto_corr_heatmap.png")
-            chart_summaries.append(
-                {"type": "correlation_heatmap", "columns": numeric_cols[:10]})
-        except Exception:
-            pass
+    if len(numeric_cols) >= 2:
+        _add_spec(
+            {"kind": "heatmap", "figsize": (8, 6),
+             "title": "Correlation heatmap",
+             "filename": f"{file_prefix}auto_corr_heatmap.png"},
+            {"type": "correlation_heatmap", "columns": numeric_cols[:10]},
+            lambda: {"data": (df if aggregate else sample_for_plots)[numeric_cols].corr(numeric_only=True)})
 
     # Helper: top-variance numeric columns
     top_num = []
@@ -2717,49 +2738,55 @@ async def plot(
             top_num = numeric_cols[:6]
 
     # 2) Distributions for numeric columns
+    def _build_hist(col):
+        if not aggregate:
+            return {"data": sample_for_plots[col].dropna().to_numpy()}
+        hist = streaming_histogram(df[col].to_numpy(dtype=float, na_value=np.nan))
+        return None if hist is None else {"edges": hist["edges"], "counts": hist["counts"]}
+
     for col in top_num:
-        if charts_left <= 0:
+        if not _add_spec(
+                {"kind": "hist_agg" if aggregate else "hist", "xlabel": str(col), "figsize": (7, 4),
+                 "title": f"Distribution of {col}",
+                 "filename": f"{file_prefix}auto_hist_{col}.png"},
+                {"type": "hist", "columns": [col], "aggregated": aggregate},
+                lambda col=col: _build_hist(col)):
             break
-        try:
-            plt.figure(figsize=(7, 4))
-            sns.histplot(sample_for_plots[col].dropna(), kde=True)
-            plt.title(f"Distribution of {col}")
-            _save_current(plt.gcf(), f"{file_prefix}auto_hist_{col}.png")
-            chart_summaries.append({"type": "hist", "columns": [col]})
-        except Exception:
-            continue
 
     # 3) Time series plots (datetime vs top numeric)
-    if charts_left > 0 and dt_cols and numeric_cols:
+    if len(specs) < candidate_limit and dt_cols and numeric_cols:
         dt = dt_cols[0]
-        try:
-            # Downsample by day to avoid overplotting
-            tmp = df[[dt] + numeric_cols].dropna(subset=[dt]).copy()
-            tmp[dt] = pd.to_datetime(tmp[dt], errors="coerce")
-            tmp = tmp.dropna(subset=[dt])
-            tmp = tmp.sort_values(dt)
-            # Aggregate by day if too many points
-            if tmp[dt].nunique() > 2000:
-                tmp = tmp.set_index(dt).groupby(
-                    pd.Grouper(
-                        freq="D")).mean(
-                    numeric_only=True).reset_index()
-                tmp = tmp.dropna()
-            for col in top_num[:3] or numeric_cols[:3]:
-                if charts_left <= 0:
-                    break
-                plt.figure(figsize=(8, 4))
-                sns.lineplot(x=dt, y=col, data=tmp)
-                plt.title(f"Time series: {col} over {dt}")
-                _save_current(
-                    plt.gcf(), f"{file_prefix}auto_timeseries_{dt}_{col}.png")
-                chart_summaries.append(
-                    {"type": "timeseries", "columns": [dt, col]})
-        except Exception:
-            pass
+        daily: dict = {}
+
+        def _build_timeseries(col):
+            if "frame" not in daily:
+                # Downsample by day to avoid overplotting
+                tmp = df[[dt] + numeric_cols].dropna(subset=[dt]).copy()
+                tmp[dt] = pd.to_datetime(tmp[dt], errors="coerce")
+                tmp = tmp.dropna(subset=[dt])
+                tmp = tmp.sort_values(dt)
+                # Aggregate by day if too many points
+                if tmp[dt].nunique() > 2000:
+                    tmp = tmp.set_index(dt).groupby(
+                        pd.Grouper(
+                            freq="D")).mean(
+                        numeric_only=True).reset_index()
+                    tmp = tmp.dropna()
+                daily["frame"] = tmp
+            return {"data": daily["frame"][[dt, col]]}
+
+        for col in top_num[:3] or numeric_cols[:3]:
+            if not _add_spec(
+                    {"kind": "timeseries", "x": dt, "y": col,
+                     "figsize": (8, 4),
+                     "title": f"Time series: {col} over {dt}",
+                     "filename": f"{file_prefix}auto_timeseries_{dt}_{col}.png"},
+                    {"type": "timeseries", "columns": [dt, col]},
+                    lambda col=col: _build_timeseries(col)):
+                break
 
     # 4) Numeric vs categorical (boxplot) for low-cardinality categoricals
-    if charts_left > 0 and cat_candidates and numeric_cols:
+    if len(specs) < candidate_limit and cat_candidates and numeric_cols:
         low_card = []
         try:
             for c in cat_candidates:
@@ -2775,55 +2802,172 @@ async def plot(
         except Exception:
             low_card = cat_candidates[:1]
 
+        def _build_box(cat_col, num_col):
+            if not aggregate:
+                return {"data": sample_for_plots[[cat_col, num_col]]}
+            box_stats = grouped_box_stats(df[cat_col], df[num_col])
+            return {"stats": box_stats} if box_stats else None
+
         for cat_col in low_card:
-            if charts_left <= 0:
+            if len(specs) >= candidate_limit:
                 break
             for num_col in top_num[:2] or numeric_cols[:2]:
-                if charts_left <= 0:
+                if not _add_spec(
+                        {"kind": "box_agg" if aggregate else "box", "x": cat_col, "y": num_col,
+                         "figsize": (8, 4),
+                         "title": f"{num_col} by {cat_col}",
+                         "filename": f"{file_prefix}auto_box_{num_col}_by_{cat_col}.png"},
+                        {"type": "box", "columns": [cat_col, num_col], "aggregated": aggregate},
+                        lambda cat_col=cat_col, num_col=num_col: _build_box(cat_col, num_col)):
                     break
-                try:
-                    plt.figure(figsize=(8, 4))
-                    sns.boxplot(
-                        x=cat_col,
-                        y=num_col,
-                        data=sample_for_plots,
-                        showfliers=False)
-                    plt.xticks(rotation=30, ha="right")
-                    plt.title(f"{num_col} by {cat_col}")
-                    _save_current(
-                        plt.gcf(), f"{file_prefix}auto_box_{num_col}_by_{cat_col}.png")
-                    chart_summaries.append(
-                        {"type": "box", "columns": [cat_col, num_col]})
-                except Exception:
-                    continue
 
     # 5) Scatter for the strongest numeric correlation pair
-    if charts_left > 0 and len(numeric_cols) >= 2:
+    if len(specs) < candidate_limit and len(numeric_cols) >= 2:
         try:
             corr = sample_for_plots[numeric_cols].corr(numeric_only=True).abs()
             np.fill_diagonal(corr.values, 0.0)
             i, j = divmod(corr.values.argmax(), corr.shape[1])
             xcol, ycol = corr.columns[i], corr.columns[j]
-            plt.figure(figsize=(6, 5))
-            sns.scatterplot(
-                x=sample_for_plots[xcol],
-                y=sample_for_plots[ycol],
-                s=20,
-                alpha=0.6)
-            sns.regplot(
-                x=sample_for_plots[xcol],
-                y=sample_for_plots[ycol],
-                scatter=False,
-                color="red")
-            plt.title(f"Scatter: {xcol} vs {ycol}")
-            _save_current(
-                plt.gcf(),
-                f"{file_prefix}auto_scatter_{xcol}_vs_{ycol}.png")
-            chart_summaries.append(
-                {"type": "scatter", "columns": [xcol, ycol]})
+
+            def _build_scatter():
+                if not aggregate:
+                    return {"data": sample_for_plots[[xcol, ycol]]}
+                density = streaming_histogram2d(
+                    df[xcol].to_numpy(dtype=float, na_value=np.nan),
+                    df[ycol].to_numpy(dtype=float, na_value=np.nan))
+                if density is None:
+                    return None
+                return {"counts": density["counts"], "xedges": density["xedges"],
+                        "yedges": density["yedges"], "slope": density["slope"],
+                        "intercept": density["intercept"]}
+
+            if aggregate:
+                spec = {"kind": "density2d", "figsize": (7, 5), "title": f"Density: {xcol} vs {ycol}"}
+            else:
+                spec = {"kind": "scatter", "figsize": (6, 5), "title": f"Scatter: {xcol} vs {ycol}"}
+            spec.update({"x": xcol, "y": ycol,
+                         "filename": f"{file_prefix}auto_scatter_{xcol}_vs_{ycol}.png"})
+            _add_spec(spec, {"type": "scatter", "columns": [xcol, ycol], "aggregated": aggregate},
+                      _build_scatter)
         except Exception:
             pass
 
+    # Look up each chart in the workspace plot cache (content-addressed by
+    # dataset fingerprint + chart description) before building any chart data
+    try:
+        fingerprint = dataset_fingerprint(df)
+    except Exception as e:
+        logger.warning(f"[PLOT] Could not fingerprint dataset, cache disabled: {e}")
+        fingerprint = None
+    plot_cache = PlotCache(plot_dir)
+    cache_keys = [plot_cache_key(fingerprint, s) if fingerprint else None for s in specs]
+    cached_paths = [plot_cache.get(k) if k else None for k in cache_keys]
+
+    existing_artifacts: set = set()
+    if tool_context is not None and any(p is not None for p in cached_paths):
+        try:
+            existing_artifacts = set(await _list_artifacts_rl(tool_context))
+        except Exception:
+            existing_artifacts = set()
+
+    # Only charts that end up on disk count toward max_charts: candidates are
+    # taken in priority order, and each failure is replaced by the next spare
+    cache_hits = 0
+    next_candidate = 0
+    while len(chart_summaries) < int(max_charts) and next_candidate < len(specs):
+        batch = list(range(next_candidate, min(len(specs), next_candidate + int(max_charts) - len(chart_summaries))))
+        next_candidate = batch[-1] + 1
+        # Build the data of the batch's cache misses; a chart with nothing to
+        # draw (or failing to build) is dropped and replaced from the spares
+        for i in batch:
+            if cached_paths[i] is None:
+                try:
+                    data = builders[i]()
+                except Exception as e:
+                    logger.warning(f"[PLOT] Could not build {specs[i]['filename']}: {e}")
+                    data = None
+                if data is None:
+                    specs[i] = None
+                else:
+                    specs[i].update(data)
+        batch = [i for i in batch if specs[i] is not None]
+        to_render = [specs[i] for i in batch if cached_paths[i] is None]
+
+        # Render every missing chart of the batch concurrently in worker processes
+        logger.info(
+            f"[PLOT] {len(batch) - len(to_render)} cached charts, rendering {len(to_render)}")
+        rendered_iter = iter(await render_charts(to_render))
+
+        for i in batch:
+            spec, key, cached_path = specs[i], cache_keys[i], cached_paths[i]
+            filename = spec["filename"]
+            plot_path = os.path.join(plot_dir, filename)
+            artifact_filename = f"plots/{filename}"
+
+            if cached_path is not None:
+                # Cache hit: copy the key's PNG to the display name and skip
+                # rendering. The display file (and its artifact) may hold another
+                # dataset's chart of the same name; only an identical file with
+                # an existing artifact skips the re-upload.
+                try:
+                    with open(cached_path, "rb") as f:
+                        png = f.read()
+                    current = None
+                    if os.path.exists(plot_path):
+                        with open(plot_path, "rb") as f:
+                            current = f.read()
+                    if current != png:
+                        with open(plot_path, "wb") as f:
+                            f.write(png)
+                    if tool_context is not None and (
+                            current != png or artifact_filename not in existing_artifacts):
+                        pending_artifact_saves.append(
+                            _save_artifact_rl(
+                                tool_context,
+                                filename=artifact_filename,
+                                artifact=_png_to_part(png)))
+                except Exception as e:
+                    logger.warning(f"[PLOT] Cached plot {cached_path} unusable: {e}")
+                    continue
+                cache_hits += 1
+                chart_summaries.append(spec["summary"])
+                if tool_context is not None:
+                    artifacts.append(plot_path)
+                continue
+
+            png = next(rendered_iter)
+            if isinstance(png, Exception):
+                logger.error(f"[PLOT] [X] Failed to render {filename}: {png}")
+                continue
+
+            # [OK] Save to physical .plot directory
+            logger.info(f"[PLOT] Saving plot to: {plot_path}")
+            try:
+                with open(plot_path, "wb") as f:
+                    f.write(png)
+                if key:
+                    plot_cache.put(key, png)
+                logger.info(
+                    f"[PLOT] [OK] Successfully saved plot to {plot_path}, size={
+                        len(png)} bytes")
+            except Exception as e:
+                logger.error(
+                    f"[PLOT] [X] Failed to save plot to {plot_path}: {e}",
+                    exc_info=True)
+                continue
+
+            chart_summaries.append(spec["summary"])
+            if tool_context is not None:
+                # Include folder structure prefix (plots/) when saving to ADK
+                part = _png_to_part(png)
+                pending_artifact_saves.append(
+                    _save_artifact_rl(
+                        tool_context,
+                        filename=artifact_filename,
+                        artifact=part))
+                # [OK] Store full path, not just filename
+                artifacts.append(plot_path)
+
     # [OK] Wait for all artifact saves to complete before returning (with timeout to prevent hang)
     if pending_artifact_saves:
         import asyncio
@@ -2854,6 +2998,7 @@ async def plot(
         "plot_paths": artifacts,  # [OK] Explicit key for artifact manager
         "plots": artifacts,  # [OK] Also add "plots" key for consistency
         "charts": chart_summaries,
+        "cache_hits": cache_hits,
         "rows": int(df.shape[0]),
         "cols": int(df.shape[1]),
     })
@@ -2865,6 +3010,10 @@ async def plot(
 async def predict(
     target: str,
     csv_path: Optional[str] = None,
+    score_path: Optional[str] = None,
+    output_path: Optional[str] = None,
+    chunk_rows: Optional[int] = None,
+    n_workers: Optional[int] = None,
     tool_context: Optional[ToolContext] = None,
 ) -> dict:
     """Convenience: normalize target name, train baseline, and return predictions on holdout.
@@ -2872,6 +3021,11 @@ async def predict(
     Dynamically resolves the target column by case-insensitive and
     punctuation-insensitive matching (no hard-coded aliases). Returns metrics.
 
+    If score_path is given, the trained pipeline (preprocessing + model) then
+    batch-scores that CSV/Parquet file in streaming mode: chunk_rows rows at a
+    time on n_workers threads, appending to output_path (.csv or .parquet,
+    default <workspace reports>/<name>_predictions.csv) in fixed memory.
+
     Results are formatted for UI display and saved to workspace for inclusion in executive reports.
     """
     # Discover columns dynamically using EDA loader
@@ -2902,6 +3056,22 @@ async def predict(
         tool_context=tool_context,
     )
 
+    # ===== Optional streaming batch scoring of a separate file =====
+    scoring = None
+    if score_path:
+        from .batch_scoring import score_file
+        from .model_cache import get_model
+        if output_path is None:
+            stem = os.path.splitext(os.path.basename(score_path))[0]
+            output_path = os.path.join(_get_workspace_dir(tool_context, "reports"),
+                                       f"{stem}_predictions.csv")
+        model = get_model(result["model_path"])
+        scoring = await asyncio.to_thread(
+            score_file, model, score_path, output_path,
+            chunk_rows=chunk_rows, n_workers=n_workers)
+        result["batch_scoring"] = scoring
+        logger.info(f"[PREDICT] Scored {scoring['rows']:,} rows from {score_path} -> {output_path}")
+
     # ===== Format results for UI display and report inclusion =====
     metrics = result.get("metrics", {})
     task = metrics.get("task", "unknown")
@@ -2926,6 +3096,11 @@ async def predict(
         formatted_parts.append(f"**MAE:** {mae:.2f}")
         formatted_parts.append(f"**RMSE:** {rmse:.2f}\n")
 
+    if scoring:
+        formatted_parts.append(
+            f"**Batch Scoring:** {scoring['rows']:,} rows in {scoring['chunks']} chunks "
+            f"({scoring['seconds']}s) → `{scoring['output_path']}`\n")
+
     if artifacts:
         formatted_parts.append(f"**Artifacts Generated:**")
         for artifact in artifacts:
@@ -3613,6 +3788,65 @@ def _make_estimator(class_path: str, params: Optional[dict] = None):
         )
 
 
+async def _train_incremental_model(
+    target: str,
+    data_path: str,
+    task: str,
+    model: str,
+    tool_context: Optional[ToolContext] = None,
+) -> dict:
+    """Out-of-core branch of train_classifier/train_regressor/train_naive_bayes.
+
+    Used when the file reaches INCREMENTAL_LEARNING_THRESHOLD rows: the data
+    is streamed in INCREMENTAL_BATCH_SIZE chunks into a partial_fit learner
+    (see incremental_learning) instead of being loaded into a DataFrame.
+    """
+    from .incremental_learning import iter_chunks, resolve_column, train_incremental
+
+    header = next(iter_chunks(data_path, 100)).columns
+    resolved = resolve_column(target, [str(c) for c in header])
+    res = await asyncio.to_thread(train_incremental, data_path, resolved, task, model)
+
+    model_path = os.path.join(
+        _get_model_dir(csv_path=data_path, tool_context=tool_context),
+        f"incremental_{res['learner'].split('(')[0].lower()}_{resolved}.joblib")
+    joblib.dump(res["pipeline"], model_path)
+    logger.info(f"[INCREMENTAL] Saved {res['learner']} pipeline to {model_path}")
+
+    metrics_text = ", ".join(f"{k}={v:.4f}" for k, v in res["metrics"].items())
+    return _json_safe({
+        "status": "success",
+        "model": model,
+        "model_type": res["learner"],
+        "training_mode": "incremental",
+        "target": resolved,
+        "metrics": res["metrics"],
+        "model_path": model_path,
+        "incremental": {k: res[k] for k in ("rows", "train_rows", "test_rows", "chunks",
+                                            "epochs", "features", "seconds")},
+        "artifacts": [],
+        "message": (f"Dataset has ~{res['rows']:,} rows (>= INCREMENTAL_LEARNING_THRESHOLD), so "
+                    f"{res['learner']} was trained out-of-core in {res['chunks']} chunks "
+                    f"({res['seconds']}s). Held-out ({res['test_rows']:,} rows): {metrics_text}"),
+    })
+
+
+def _registrable_pipeline_result(result: dict, pipe: Pipeline, df: pd.DataFrame, target: str,
+                                 split_summary: dict, csv_path: Optional[str],
+                                 tool_context: Optional[ToolContext]) -> dict:
+    """Save a raw-column pipeline to the model directory and add the fields the
+    model registry records (model_path, model_type, target, split metadata)."""
+    from .ensemble_engine import raw_pipeline_metadata
+
+    estimator = pipe.named_steps["model"]
+    model_path = os.path.join(_get_model_dir(csv_path, tool_context=tool_context),
+                              f"{type(estimator).__name__.lower()}_{target}.joblib")
+    joblib.dump(pipe, model_path)
+    result.update(model_path=model_path, model_type=type(estimator).__name__, target=target,
+                  metadata=raw_pipeline_metadata(df, split_summary, estimator))
+    return result
+
+
 @ensure_display_fields
 async def train_classifier(
     target: str,
@@ -3621,6 +3855,12 @@ async def train_classifier(
     params: Optional[dict] = None,
     tool_context: Optional[ToolContext] = None,
 ) -> dict:
+    # Datasets above INCREMENTAL_LEARNING_THRESHOLD rows are never loaded whole
+    from .incremental_learning import resolve_data_path, should_train_incrementally
+    data_path = resolve_data_path(csv_path, tool_context)
+    if should_train_incrementally(data_path):
+        return await _train_incremental_model(target, data_path, "classification", model, tool_context)
+
     resolved = await _resolve_target_from_data(target, csv_path, tool_context)
     class_path = _DEFAULT_CLASSIFIERS.get(model, model)
     estimator = _make_estimator(class_path, params)
@@ -3629,32 +3869,15 @@ async def train_classifier(
     df = await _load_dataframe(csv_path, tool_context=tool_context)
     if resolved not in df.columns:
         raise ValueError(f"Target '{resolved}' not in dataframe")
-    y = df[resolved]
-    X = df.drop(columns=[resolved])
-    numeric_features = X.select_dtypes(include=["number"]).columns.tolist()
-    categorical_features = X.columns.difference(numeric_features).tolist()
-    numeric_transformer = Pipeline(
-        steps=[
-            ("imputer", SimpleImputer(
-                strategy="median")), ("scaler", StandardScaler())])
-    categorical_transformer = Pipeline(
-        steps=[
-            ("imputer", SimpleImputer(
-                strategy="most_frequent")), ("onehot", OneHotEncoder(
-                    handle_unknown="ignore", sparse_output=False))])
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ("num",
-             numeric_transformer,
-             numeric_features),
-            ("cat",
-             categorical_transformer,
-             categorical_features)])
-    pipe = Pipeline(steps=[("preprocess", preprocessor), ("model", estimator)])
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y if _can_stratify(y) else None)
-    pipe.fit(X_train, y_train)
-    y_pred = pipe.predict(X_test)
+    # Preprocessing is fitted once per dataset/target and shared via the
+    # design-matrix cache; only the estimator is fitted here
+    dm = get_design_matrix(df, resolved, "onehot_split", tool_context,
+                           test_size=0.2, random_state=42)
+    y, y_test = dm.y, dm.y_test
+    estimator.fit(dm.X_train, dm.y_train)
+    # Private copy of the fitted preprocessor: the cached one is shared with other tools
+    pipe = Pipeline(steps=[("preprocess", deepcopy(dm.preprocessor)), ("model", estimator)])
+    y_pred = estimator.predict(dm.X_test)
     metrics = {
         "accuracy": float(
             accuracy_score(
@@ -3675,8 +3898,9 @@ async def train_classifier(
         artifacts.append("model.joblib")
         await tool_context.save_artifact(filename="metrics.json", artifact=types.Part.from_bytes(data=json.dumps(metrics, default=str).encode("utf-8"), mime_type="application/json"))
         artifacts.append("metrics.json")
-    return _json_safe(
-        {"model": model, "metrics": metrics, "artifacts": artifacts})
+    return _json_safe(_registrable_pipeline_result(
+        {"model": model, "metrics": metrics, "artifacts": artifacts},
+        pipe, df, resolved, dm.extras["split"], csv_path, tool_context))
 
 
 @ensure_display_fields
@@ -3687,38 +3911,25 @@ async def train_regressor(
     params: Optional[dict] = None,
     tool_context: Optional[ToolContext] = None,
 ) -> dict:
+    # Datasets above INCREMENTAL_LEARNING_THRESHOLD rows are never loaded whole
+    from .incremental_learning import resolve_data_path, should_train_incrementally
+    data_path = resolve_data_path(csv_path, tool_context)
+    if should_train_incrementally(data_path):
+        return await _train_incremental_model(target, data_path, "regression", model, tool_context)
+
     resolved = await _resolve_target_from_data(target, csv_path, tool_context)
     class_path = _DEFAULT_REGRESSORS.get(model, model)
     estimator = _make_estimator(class_path, params)
     df = await _load_dataframe(csv_path, tool_context=tool_context)
     if resolved not in df.columns:
         raise ValueError(f"Target '{resolved}' not in dataframe")
-    y = df[resolved]
-    X = df.drop(columns=[resolved])
-    numeric_features = X.select_dtypes(include=["number"]).columns.tolist()
-    categorical_features = X.columns.difference(numeric_features).tolist()
-    numeric_transformer = Pipeline(
-        steps=[
-            ("imputer", SimpleImputer(
-                strategy="median")), ("scaler", StandardScaler())])
-    categorical_transformer = Pipeline(
-        steps=[
-            ("imputer", SimpleImputer(
-                strategy="most_frequent")), ("onehot", OneHotEncoder(
-                    handle_unknown="ignore", sparse_output=False))])
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ("num",
-             numeric_transformer,
-             numeric_features),
-            ("cat",
-             categorical_transformer,
-             categorical_features)])
-    pipe = Pipeline(steps=[("preprocess", preprocessor), ("model", estimator)])
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42)
-    pipe.fit(X_train, y_train)
-    y_pred = pipe.predict(X_test)
+    dm = get_design_matrix(df, resolved, "onehot_split", tool_context,
+                           test_size=0.2, random_state=42)
+    y_test = dm.y_test
+    estimator.fit(dm.X_train, dm.y_train)
+    # Private copy of the fitted preprocessor: the cached one is shared with other tools
+    pipe = Pipeline(steps=[("preprocess", deepcopy(dm.preprocessor)), ("model", estimator)])
+    y_pred = estimator.predict(dm.X_test)
     metrics = {
         "r2": float(r2_score(y_test, y_pred)),
         "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred))),
@@ -3756,8 +3967,9 @@ async def train_regressor(
         except Exception as e:
             print(f"[WARNING] Could not register model in registry: {e}")
 
-    return _json_safe(
-        {"model": model, "metrics": metrics, "artifacts": artifacts})
+    return _json_safe(_registrable_pipeline_result(
+        {"model": model, "metrics": metrics, "artifacts": artifacts},
+        pipe, df, resolved, dm.extras["split"], csv_path, tool_context))
 
 
 @ensure_display_fields
@@ -3813,7 +4025,6 @@ async def train_decision_tree(
         train_decision_tree(target='sales', max_depth=15)
     """
     from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor, plot_tree
-    from sklearn.model_selection import train_test_split
     from sklearn.metrics import accuracy_score, r2_score, mean_absolute_error, mean_squared_error, classification_report
     import matplotlib.pyplot as plt
     import seaborn as sns
@@ -3850,11 +4061,9 @@ async def train_decision_tree(
         target_encoder = LabelEncoder()
         y = target_encoder.fit_transform(y.astype(str))
 
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42,
-        stratify=y if is_classification and _can_stratify(y) else None
-    )
+    # Split data (shared registered split)
+    split = get_split(df, target, test_size=0.2, seed=42, tool_context=tool_context)
+    X_train, X_test, y_train, y_test = split.train_test(X, y)
 
     # Train decision tree
     if is_classification:
@@ -4375,7 +4584,6 @@ async def train_knn(
         train_knn(target='species', n_neighbors=3)
     """
     from sklearn.neighbors import KNeighborsClassifier, KNeighborsRegressor
-    from sklearn.model_selection import train_test_split
     from sklearn.preprocessing import StandardScaler
     from sklearn.metrics import accuracy_score, r2_score, mean_absolute_error
 
@@ -4383,26 +4591,15 @@ async def train_knn(
     if target not in df.columns:
         return {"error": f"Target '{target}' not found"}
 
-    X = df.drop(columns=[target])
-    y = df[target]
-
-    # Encode categorical
-    from sklearn.preprocessing import LabelEncoder
-    for col in X.select_dtypes(include=['object', 'category']).columns:
-        X[col] = LabelEncoder().fit_transform(X[col].astype(str))
-
-    is_classification = len(y.unique()) < 20 or y.dtype == 'object'
-    if is_classification and y.dtype == 'object':
-        y = LabelEncoder().fit_transform(y.astype(str))
+    # Encode categoricals and scale (KNN requires scaling!) via the shared
+    # design-matrix cache
+    dm = get_design_matrix(df, target, "label_encoded", tool_context, scale=True)
+    X_scaled, y, scaler = dm.X, dm.y, dm.preprocessor
+    is_classification = dm.is_classification
 
-    # KNN requires scaling!
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_scaled, y, test_size=0.2, random_state=42,
-        stratify=y if is_classification and _can_stratify(y) else None
-    )
+    # Split data (shared registered split)
+    split = get_split(df, target, test_size=0.2, seed=42, tool_context=tool_context)
+    X_train, X_test, y_train, y_test = split.train_test(X_scaled, y)
 
     # Train
     if is_classification:
@@ -4486,33 +4683,31 @@ async def train_naive_bayes(
         train_naive_bayes(target='spam_label')
     """
     from sklearn.naive_bayes import GaussianNB
-    from sklearn.model_selection import train_test_split
     from sklearn.preprocessing import LabelEncoder
     from sklearn.metrics import accuracy_score, classification_report
 
+    # Above INCREMENTAL_LEARNING_THRESHOLD rows: GaussianNB/MultinomialNB partial_fit
+    from .incremental_learning import resolve_data_path, should_train_incrementally
+    data_path = resolve_data_path(csv_path, tool_context)
+    if should_train_incrementally(data_path):
+        return await _train_incremental_model(target, data_path, "naive_bayes", "NaiveBayes", tool_context)
+
     df = await _load_dataframe(csv_path, tool_context=tool_context)
     if target not in df.columns:
         return {"error": f"Target '{target}' not found"}
 
-    X = df.drop(columns=[target])
-    y = df[target]
-
-    # Encode all categorical
-    for col in X.select_dtypes(include=['object', 'category']).columns:
-        X[col] = LabelEncoder().fit_transform(X[col].astype(str))
-
-    if y.dtype == 'object':
-        y = LabelEncoder().fit_transform(y.astype(str))
+    # Encode all categorical (shared design-matrix cache)
+    dm = get_design_matrix(df, target, "label_encoded", tool_context, scale=False)
+    X, y = dm.X, dm.y
 
     # Check if classification
     if len(y.unique()) > 20:
         return {
             "error": "Naive Bayes is for classification only. Use train_regressor() for continuous targets."}
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42,
-        stratify=y if _can_stratify(y) else None
-    )
+    # Split data (shared registered split)
+    split = get_split(df, target, test_size=0.2, seed=42, tool_context=tool_context)
+    X_train, X_test, y_train, y_test = split.train_test(X, y)
 
     # Train
     model = GaussianNB()
@@ -4591,7 +4786,6 @@ async def train_svm(
         train_svm(target='category', kernel='rbf')
     """
     from sklearn.svm import SVC, SVR
-    from sklearn.model_selection import train_test_split
     from sklearn.preprocessing import StandardScaler, LabelEncoder
     from sklearn.metrics import accuracy_score, r2_score, mean_absolute_error
 
@@ -4599,25 +4793,14 @@ async def train_svm(
     if target not in df.columns:
         return {"error": f"Target '{target}' not found"}
 
-    X = df.drop(columns=[target])
-    y = df[target]
-
-    # Encode
-    for col in X.select_dtypes(include=['object', 'category']).columns:
-        X[col] = LabelEncoder().fit_transform(X[col].astype(str))
-
-    is_classification = len(y.unique()) < 20 or y.dtype == 'object'
-    if is_classification and y.dtype == 'object':
-        y = LabelEncoder().fit_transform(y.astype(str))
-
-    # SVM requires scaling
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    # Encode and scale (SVM requires scaling) via the shared design-matrix cache
+    dm = get_design_matrix(df, target, "label_encoded", tool_context, scale=True)
+    X_scaled, y, scaler = dm.X, dm.y, dm.preprocessor
+    is_classification = dm.is_classification
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_scaled, y, test_size=0.2, random_state=42,
-        stratify=y if is_classification and _can_stratify(y) else None
-    )
+    # Split data (shared registered split)
+    split = get_split(df, target, test_size=0.2, seed=42, tool_context=tool_context)
+    X_train, X_test, y_train, y_test = split.train_test(X_scaled, y)
 
     # Train
     if is_classification:
@@ -4833,7 +5016,6 @@ async def load_model(
         # Load model and dataset together
         load_model(dataset_name='housing', csv_path='housing.csv')
     """
-    import joblib
 
     # Get model directory for this dataset
     model_dir = _get_model_dir(
@@ -4852,9 +5034,10 @@ async def load_model(
             "hint": f"Available models in '{dataset_name}': {
                 ', '.join(available_models) if available_models else 'No models found'}"}
 
-    # Load the model
+    # Load the model (process-wide cache; reloaded only when the file changes)
     try:
-        model = joblib.load(model_path)
+        from .model_cache import get_model
+        model = get_model(model_path)
         model_size_mb = os.path.getsize(model_path) / (1024 * 1024)
     except Exception as e:
         return {
@@ -4903,6 +5086,27 @@ async def kmeans_cluster(
     csv_path: Optional[str] = None,
     tool_context: Optional[ToolContext] = None,
 ) -> dict:
+    # Above INCREMENTAL_LEARNING_THRESHOLD rows: MiniBatchKMeans fed chunk by chunk
+    from .incremental_learning import (
+        minibatch_kmeans_stream, resolve_data_path, should_train_incrementally)
+    data_path = resolve_data_path(csv_path, tool_context)
+    if should_train_incrementally(data_path):
+        res = await asyncio.to_thread(minibatch_kmeans_stream, data_path, n_clusters)
+        model_path = os.path.join(_get_model_dir(csv_path=data_path, tool_context=tool_context),
+                                  f"minibatch_kmeans_{n_clusters}.joblib")
+        joblib.dump(res["pipeline"], model_path)
+        return _json_safe({
+            "clusters": dict(enumerate(res["cluster_sizes"])),
+            "training_mode": "incremental",
+            "model_type": "MiniBatchKMeans",
+            "model_path": model_path,
+            "inertia": res["inertia"],
+            "incremental": {k: res[k] for k in ("rows", "chunks", "seconds")},
+            "artifacts": [],
+            "message": (f"Clustered ~{res['rows']:,} rows out-of-core with MiniBatchKMeans "
+                        f"in {res['chunks']} chunks ({res['seconds']}s); missing values mean-imputed"),
+        })
+
     df = await _load_dataframe(csv_path, tool_context=tool_context)
     num = df.select_dtypes(include=["number"]).dropna()
     model = KMeans(n_clusters=n_clusters, n_init=10, random_state=42)
@@ -4931,12 +5135,24 @@ async def dbscan_cluster(
     eps: float = 0.5,
     min_samples: int = 5,
     csv_path: Optional[str] = None,
+    backend: str = "auto",
     tool_context: Optional[ToolContext] = None,
 ) -> dict:
-    from sklearn.cluster import DBSCAN
+    """
+    DBSCAN clustering of the numeric columns.
+
+    backend: "exact", "micro" (approximate DBSCAN on at most
+    CLUSTER_DBSCAN_MAX_SUBCLUSTERS BIRCH subclusters weighted by size, labels
+    mapped back to every row) or "auto" (exact up to CLUSTER_EXACT_MAX_ROWS
+    rows; above, micro only if its sampled fidelity reaches
+    CLUSTER_DBSCAN_MIN_FIDELITY, else exact DBSCAN on a sample).
+    """
+    from .scalable_clustering import cluster_dbscan
     df = await _load_dataframe(csv_path, tool_context=tool_context)
     num = df.select_dtypes(include=["number"]).dropna()
-    labels = DBSCAN(eps=eps, min_samples=min_samples).fit_predict(num)
+    res = await asyncio.to_thread(cluster_dbscan, num.to_numpy(dtype=float), eps, min_samples, backend)
+    labels = res["labels"]
+    micro = res if "approximation" in res else None
     counts = dict(zip(*np.unique(labels, return_counts=True)))
 
     # Create a markdown report
@@ -4947,6 +5163,8 @@ async def dbscan_cluster(
             report_md += f"- **Noise Points:** {count} data points\n"
         else:
             report_md += f"- **Cluster {cluster}:** {count} data points\n"
+    if micro:
+        report_md += _micro_cluster_report_md(micro)
 
     # Save artifact
     if tool_context:
@@ -4956,22 +5174,56 @@ async def dbscan_cluster(
         )
 
     result = {"clusters": counts, "artifacts": ["dbscan_cluster_report.md"]}
+    if micro:
+        result.update(approximation=micro["approximation"], fidelity=micro.get("fidelity"))
     return _json_safe(result)
 
 
+def _micro_cluster_report_md(micro: dict) -> str:
+    """Markdown section describing a large-data approximation and its fidelity check."""
+    approx, fidelity = micro["approximation"], micro.get("fidelity")
+    md = "\n## Large-Data Approximation\n"
+    if fidelity is None:
+        rejected = approx["rejected"]
+        md += (f"- **Backend:** {approx['backend']} (exact DBSCAN on {approx['sample_rows']:,} sampled rows, "
+               f"labels propagated to {approx['rows']:,} rows)\n")
+        md += (f"- **Micro-cluster backend rejected:** adjusted Rand index "
+               f"{rejected['fidelity']['adjusted_rand_index']:.3f} < {rejected['min_fidelity']}\n")
+        return md
+    md += f"- **Backend:** {approx['backend']} ({approx['micro_clusters']:,} micro-clusters for {approx['rows']:,} rows)\n"
+    md += (f"- **Fidelity:** adjusted Rand index {fidelity['adjusted_rand_index']:.3f} "
+           f"vs the exact algorithm on {fidelity['sample_rows']:,} sampled rows\n")
+    return md
+
+
 @ensure_display_fields
 async def hierarchical_cluster(
     n_clusters: int = 3,
     linkage: str = "ward",
     csv_path: Optional[str] = None,
+    backend: str = "auto",
     tool_context: Optional[ToolContext] = None,
 ) -> dict:
+    """
+    Agglomerative clustering of the numeric columns.
+
+    backend: "exact", "micro" (linkage over CLUSTER_MICRO_CLUSTERS
+    MiniBatchKMeans centroids weighted by size, labels mapped back to every
+    row) or "auto" (micro above CLUSTER_EXACT_MAX_ROWS rows).
+    """
     from sklearn.cluster import AgglomerativeClustering
+    from .scalable_clustering import micro_agglomerative, use_micro_backend
     df = await _load_dataframe(csv_path, tool_context=tool_context)
     num = df.select_dtypes(include=["number"]).dropna()
-    labels = AgglomerativeClustering(
-        n_clusters=n_clusters,
-        linkage=linkage).fit_predict(num)
+    micro = None
+    if use_micro_backend(len(num), backend):
+        micro = await asyncio.to_thread(
+            micro_agglomerative, num.to_numpy(dtype=float), n_clusters, linkage)
+        labels = micro["labels"]
+    else:
+        labels = AgglomerativeClustering(
+            n_clusters=n_clusters,
+            linkage=linkage).fit_predict(num)
     counts = dict(zip(*np.unique(labels, return_counts=True)))
 
     # Create a markdown report
@@ -4979,6 +5231,8 @@ async def hierarchical_cluster(
     report_md += f"## Cluster Counts\n"
     for cluster, count in counts.items():
         report_md += f"- **Cluster {cluster}:** {count} data points\n"
+    if micro:
+        report_md += _micro_cluster_report_md(micro)
 
     # Save artifact
     if tool_context:
@@ -4987,6 +5241,8 @@ async def hierarchical_cluster(
             types.Part.from_bytes(report_md.encode(), "text/markdown"),
         )
     result = {"clusters": counts, "artifacts": ["hierarchical_cluster_report.md"]}
+    if micro:
+        result.update(approximation=micro["approximation"], fidelity=micro["fidelity"])
     return _json_safe(result)
 
 
@@ -4996,12 +5252,17 @@ async def isolation_forest_train(
     csv_path: Optional[str] = None,
     tool_context: Optional[ToolContext] = None,
 ) -> dict:
+    from .anomaly_engine import run_detectors
     df = await _load_dataframe(csv_path, tool_context=tool_context)
     num = df.select_dtypes(include=["number"]).dropna()
-    iso = IsolationForest(contamination=contamination, random_state=42)
-    preds = iso.fit_predict(num)
-    anomalies = int((preds == -1).sum())
-    total = int(len(preds))
+    # Fit on a bounded stratified sample, score every row in parallel chunks
+    engine = await asyncio.to_thread(
+        run_detectors, num.to_numpy(dtype=float), ["isolation_forest"], contamination)
+    iso = engine["detectors"]["isolation_forest"]
+    if "error" in iso:
+        return _json_safe({"error": f"Isolation Forest failed: {iso['error']}"})
+    anomalies = int(iso["flags"].sum())
+    total = int(len(iso["flags"]))
 
     # Create a markdown report
     report_md = f"# Isolation Forest Anomaly Detection Report\n\n"
@@ -5020,6 +5281,10 @@ async def isolation_forest_train(
     result = {
         "anomalies": anomalies,
         "total": total,
+        "fit_rows": iso["fit_rows"],
+        "threshold": iso["threshold"],
+        "workers": engine["workers"],
+        "seconds": engine["seconds"],
         "artifacts": ["isolation_forest_report.md"],
     }
     return _json_safe(result)
@@ -5043,8 +5308,10 @@ async def smart_cluster(
     - You're exploring unlabeled data (unsupervised learning)
     - You want to understand data structure before modeling
     """
-    from sklearn.metrics import silhouette_score, davies_bouldin_score
-    from sklearn.cluster import DBSCAN, AgglomerativeClustering
+    from .scalable_clustering import (
+        cluster_scores, make_kmeans, sampled_agglomerative, sampled_dbscan, sweep_k,
+    )
+    from .large_data_config import CLUSTER_SCORE_SAMPLE_ROWS, CLUSTER_WORKERS
 
     df = await _load_dataframe(csv_path, tool_context=tool_context)
     num = df.select_dtypes(include=["number"]).dropna()
@@ -5067,47 +5334,35 @@ async def smart_cluster(
         "insights": []
     }
 
-    # 1. Find optimal number of clusters using elbow method
-    silhouette_scores = {}
-    for k in range(2, min(11, len(num) // 2)):
-        kmeans = KMeans(n_clusters=k, n_init=10, random_state=42)
-        labels = kmeans.fit_predict(X_scaled)
-        score = silhouette_score(X_scaled, labels)
-        silhouette_scores[k] = float(score)
+    # 1. Find optimal number of clusters (k fitted in parallel, scores on a sample)
+    sweep = await asyncio.to_thread(sweep_k, X_scaled, range(2, min(11, len(num) // 2)))
+    silhouette_scores = {r["k"]: r["silhouette_score"] for r in sweep
+                         if r["silhouette_score"] is not None}
+    best_k = max(silhouette_scores, key=silhouette_scores.get) if silhouette_scores else 2
 
-    best_k = max(silhouette_scores, key=silhouette_scores.get)
-
-    # 2. Try KMeans with optimal K
-    kmeans = KMeans(n_clusters=best_k, n_init=10, random_state=42)
-    kmeans_labels = kmeans.fit_predict(X_scaled)
-    kmeans_score = silhouette_score(X_scaled, kmeans_labels)
+    # 2. Try KMeans with optimal K (MiniBatchKMeans on large data)
+    kmeans = make_kmeans(best_k, len(X_scaled))
+    kmeans_labels = await asyncio.to_thread(kmeans.fit_predict, X_scaled)
     kmeans_counts = dict(zip(*np.unique(kmeans_labels, return_counts=True)))
 
     results["methods_compared"].append({
         "method": "KMeans",
         "n_clusters": best_k,
-        "silhouette_score": float(kmeans_score),
+        **cluster_scores(X_scaled, kmeans_labels),
         "cluster_sizes": {int(k): int(v) for k, v in kmeans_counts.items()},
+        "algorithm": type(kmeans).__name__,
         "description": "Good for spherical, evenly-sized clusters"
     })
 
-    # 3. Try DBSCAN (density-based)
+    # 3. Try DBSCAN (density-based) on a sample, propagated to all rows
     try:
-        # Auto-calculate eps using mean distance
-        from sklearn.neighbors import NearestNeighbors
-        neighbors = NearestNeighbors(n_neighbors=5)
-        neighbors_fit = neighbors.fit(X_scaled)
-        distances, _ = neighbors_fit.kneighbors(X_scaled)
-        eps = float(np.mean(distances[:, -1]))
-
-        dbscan = DBSCAN(eps=eps, min_samples=5)
-        dbscan_labels = dbscan.fit_predict(X_scaled)
+        dbscan = await asyncio.to_thread(sampled_dbscan, X_scaled, None, 5)
+        dbscan_labels = dbscan["labels"]
 
         n_clusters_dbscan = len(set(dbscan_labels)) - \
             (1 if -1 in dbscan_labels else 0)
 
         if n_clusters_dbscan > 1:
-            dbscan_score = silhouette_score(X_scaled, dbscan_labels)
             dbscan_counts = dict(
                 zip(*np.unique(dbscan_labels, return_counts=True)))
 
@@ -5115,8 +5370,10 @@ async def smart_cluster(
                 "method": "DBSCAN",
                 "n_clusters": n_clusters_dbscan,
                 "noise_points": int(dbscan_counts.get(-1, 0)),
-                "silhouette_score": float(dbscan_score),
+                **cluster_scores(X_scaled, dbscan_labels),
                 "cluster_sizes": {int(k): int(v) for k, v in dbscan_counts.items() if k != -1},
+                "eps": dbscan["eps"],
+                "fit_rows": dbscan["sample_rows"],
                 "description": "Finds arbitrarily-shaped clusters, handles noise"
             })
         else:
@@ -5125,28 +5382,42 @@ async def smart_cluster(
     except Exception as e:
         results["insights"].append(f"[WARNING] DBSCAN failed: {str(e)}")
 
-    # 4. Try Hierarchical
-    hierarchical = AgglomerativeClustering(n_clusters=best_k)
-    hier_labels = hierarchical.fit_predict(X_scaled)
-    hier_score = silhouette_score(X_scaled, hier_labels)
+    # 4. Try Hierarchical on a sample, propagated by nearest centroid
+    hierarchical = await asyncio.to_thread(sampled_agglomerative, X_scaled, best_k)
+    hier_labels = hierarchical["labels"]
     hier_counts = dict(zip(*np.unique(hier_labels, return_counts=True)))
 
     results["methods_compared"].append({
         "method": "Hierarchical",
         "n_clusters": best_k,
-        "silhouette_score": float(hier_score),
+        **cluster_scores(X_scaled, hier_labels),
         "cluster_sizes": {int(k): int(v) for k, v in hier_counts.items()},
+        "fit_rows": hierarchical["sample_rows"],
         "description": "Good for nested/hierarchical structure"
     })
 
+    results["scalability"] = {
+        "rows": int(len(X_scaled)),
+        "score_sample_rows": int(min(len(X_scaled), CLUSTER_SCORE_SAMPLE_ROWS)),
+        "kmeans_algorithm": type(kmeans).__name__,
+        "k_sweep": sweep,
+        "k_sweep_workers": int(min(CLUSTER_WORKERS, max(1, len(sweep)))),
+        "dbscan_hierarchical_fit_rows": hierarchical["sample_rows"],
+        "labels_propagated": hierarchical["propagated"],
+    }
+    if hierarchical["propagated"]:
+        results["insights"].append(
+            f" DBSCAN/Hierarchical fitted on {hierarchical['sample_rows']:,} sampled rows; "
+            f"labels propagated to all {len(X_scaled):,} rows")
+
     # 5. Determine best method
     best_method = max(
         results["methods_compared"], key=lambda x: x.get(
-            "silhouette_score", -1))
+            "silhouette_score") if x.get("silhouette_score") is not None else -1)
     results["recommendation"] = f" Best Method: {
         best_method['method']} with {
         best_method['n_clusters']} clusters (silhouette score: {
-            best_method['silhouette_score']:.3f})"
+            best_method['silhouette_score'] or 0:.3f})"
 
     # 6. Add insights
     results["insights"].extend([
@@ -5177,7 +5448,9 @@ async def smart_cluster(
     for method in results['methods_compared']:
         report_md += f"- **{method['method']}**: {method['description']}\n"
         report_md += f"  - Clusters: {method.get('n_clusters', 'N/A')}\n"
-        report_md += f"  - Silhouette Score: {method.get('silhouette_score', 'N/A'):.4f}\n"
+        report_md += f"  - Silhouette Score: {method.get('silhouette_score') or 0:.4f}\n"
+        if method.get("davies_bouldin") is not None:
+            report_md += f"  - Davies-Bouldin: {method['davies_bouldin']:.4f}\n"
 
     # Save artifact
     if tool_context:
@@ -5424,11 +5697,8 @@ async def recursive_select(
         tool_context: Optional[ToolContext] = None) -> dict:
     resolved = await _resolve_target_from_data(target, csv_path, tool_context)
     df = await _load_dataframe(csv_path, tool_context=tool_context)
-    y = df[resolved]
-    X = pd.get_dummies(df.drop(columns=[resolved]), drop_first=True)
-    is_classification = (
-        not pd.api.types.is_numeric_dtype(y)) or y.nunique(
-        dropna=True) <= 20
+    dm = get_design_matrix(df, resolved, "dummies", tool_context)
+    X, y, is_classification = dm.X, dm.y, dm.is_classification
     est = LogisticRegression(
         max_iter=200) if is_classification else Ridge(
         random_state=42)
@@ -5479,11 +5749,8 @@ async def sequential_select(
         tool_context: Optional[ToolContext] = None) -> dict:
     resolved = await _resolve_target_from_data(target, csv_path, tool_context)
     df = await _load_dataframe(csv_path, tool_context=tool_context)
-    y = df[resolved]
-    X = pd.get_dummies(df.drop(columns=[resolved]), drop_first=True)
-    is_classification = (
-        not pd.api.types.is_numeric_dtype(y)) or y.nunique(
-        dropna=True) <= 20
+    dm = get_design_matrix(df, resolved, "dummies", tool_context)
+    X, y, is_classification = dm.X, dm.y, dm.is_classification
     est = LogisticRegression(
         max_iter=200) if is_classification else Ridge(
         random_state=42)
@@ -5534,16 +5801,17 @@ async def split_data(
         target: str,
         test_size: float = 0.2,
         csv_path: Optional[str] = None,
+        random_state: int = 42,
+        n_folds: int = 3,
         tool_context: Optional[ToolContext] = None) -> dict:
     resolved = await _resolve_target_from_data(target, csv_path, tool_context)
     df = await _load_dataframe(csv_path, tool_context=tool_context)
     y = df[resolved]
     X = df.drop(columns=[resolved])
-    stratify = y if (
-        not pd.api.types.is_numeric_dtype(y)) or y.nunique(
-        dropna=True) <= 20 else None
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=test_size, random_state=42, stratify=stratify if stratify is None or _can_stratify(stratify) else None)
+    # Registered split: every training tool reuses these exact rows and CV folds
+    split = get_split(df, resolved, test_size=test_size, seed=random_state,
+                      n_folds=n_folds, tool_context=tool_context)
+    X_train, X_test, y_train, y_test = split.train_test(X, y)
 
     # Safely concat to avoid "No objects to concatenate" error
     train_parts = [y_train]
@@ -5568,7 +5836,12 @@ async def split_data(
     report_md += f"- **Artifact:** {t1}\n\n"
     report_md += f"## Test Set\n"
     report_md += f"- **Shape:** {list(test_df.shape)}\n"
-    report_md += f"- **Artifact:** {t2}\n"
+    report_md += f"- **Artifact:** {t2}\n\n"
+    report_md += f"## Split Registry\n"
+    report_md += f"- **Split key:** {split.key}\n"
+    report_md += f"- **CV folds:** {split.n_folds}\n"
+    report_md += f"- **Stratified:** {split.stratified}\n"
+    report_md += f"- **Rows dropped (missing target):** {split.n_dropped}\n"
 
     # Save artifact
     if tool_context:
@@ -5582,6 +5855,7 @@ async def split_data(
         "test_artifact": t2,
         "train_shape": list(train_df.shape),
         "test_shape": list(test_df.shape),
+        "split": split.summary(),
         "artifacts": [t1, t2, "split_data_report.md"]
     })
 
@@ -5592,28 +5866,43 @@ async def grid_search(
         model: str,
         param_grid: dict,
         csv_path: Optional[str] = None,
+        search_mode: str = "auto",
         tool_context: Optional[ToolContext] = None) -> dict:
+    """Tune `model` over `param_grid`.
+
+    search_mode "grid" is an exhaustive GridSearchCV; "halving" runs successive
+    halving over sample size (all candidates on a small sample, the best third
+    promoted to three times the rows each round). "auto" picks halving once
+    candidates x rows exceeds HALVING_SEARCH_THRESHOLD. Both use all cores.
+    """
+    from sklearn.model_selection import ParameterGrid
+    from .halving_search import choose_search_mode, halving_summary, make_halving_search
+
     resolved = await _resolve_target_from_data(target, csv_path, tool_context)
     df = await _load_dataframe(csv_path, tool_context=tool_context)
-    y = df[resolved]
-    X = pd.get_dummies(df.drop(columns=[resolved]), drop_first=True)
-    is_classification = (
-        not pd.api.types.is_numeric_dtype(y)) or y.nunique(
-        dropna=True) <= 20
+    dm = get_design_matrix(df, resolved, "dummies", tool_context)
+    X, y, is_classification = dm.X, dm.y, dm.is_classification
     estimator = _make_estimator(model)
-    cv = StratifiedKFold(
-        n_splits=3,
-        shuffle=True,
-        random_state=42) if is_classification else KFold(
-        n_splits=3,
-        shuffle=True,
-        random_state=42)
-    gs = GridSearchCV(
-        estimator,
-        param_grid=param_grid,
-        scoring="accuracy" if is_classification else "r2",
-        cv=cv)
+    # Search on the registered split's CV folds over its training rows, so the
+    # held-out test rows never influence the chosen parameters
+    split = get_split(df, resolved, test_size=0.2, seed=42, tool_context=tool_context)
+    X, _, y, _ = split.train_test(X, y)
+    cv = split.cv()
+    scoring = "accuracy" if is_classification else "r2"
+    n_candidates = len(ParameterGrid(param_grid))
+    mode = choose_search_mode(n_candidates, len(X), search_mode)
+    if mode == "halving":
+        gs = make_halving_search(estimator, param_grid, cv=cv, scoring=scoring)
+    else:
+        gs = GridSearchCV(
+            estimator,
+            param_grid=param_grid,
+            scoring=scoring,
+            cv=cv,
+            n_jobs=-1)
     gs.fit(X, y)
+    search_info = halving_summary(gs) if mode == "halving" else {"search_mode": "grid"}
+    search_info["candidates"] = n_candidates
 
     # Create a markdown report
     report_md = f"# Grid Search Report\n\n"
@@ -5622,6 +5911,12 @@ async def grid_search(
         report_md += f"- **{param}:** {value}\n"
     report_md += f"\n## Best Score\n"
     report_md += f"- **Score:** {gs.best_score_:.4f}\n"
+    report_md += f"\n## Search\n"
+    report_md += f"- **Mode:** {mode}\n"
+    report_md += f"- **Candidates:** {n_candidates}\n"
+    if mode == "halving":
+        report_md += f"- **Candidates per round:** {search_info['n_candidates']}\n"
+        report_md += f"- **Rows per round:** {search_info['n_resources']}\n"
 
     # Save artifact
     if tool_context:
@@ -5633,6 +5928,7 @@ async def grid_search(
     return _json_safe({
         "best_params": gs.best_params_,
         "best_score": float(gs.best_score_),
+        "search": search_info,
         "artifacts": ["grid_search_report.md"]
     })
 
@@ -5646,19 +5942,13 @@ async def evaluate(
         tool_context: Optional[ToolContext] = None) -> dict:
     resolved = await _resolve_target_from_data(target, csv_path, tool_context)
     df = await _load_dataframe(csv_path, tool_context=tool_context)
-    y = df[resolved]
-    X = pd.get_dummies(df.drop(columns=[resolved]), drop_first=True)
-    is_classification = (
-        not pd.api.types.is_numeric_dtype(y)) or y.nunique(
-        dropna=True) <= 20
+    dm = get_design_matrix(df, resolved, "dummies", tool_context)
+    X, y, is_classification = dm.X, dm.y, dm.is_classification
     estimator = _make_estimator(model, params)
-    cv = StratifiedKFold(
-        n_splits=3,
-        shuffle=True,
-        random_state=42) if is_classification else KFold(
-        n_splits=3,
-        shuffle=True,
-        random_state=42)
+    # Cross-validate on the registered split's CV folds over its training rows
+    split = get_split(df, resolved, test_size=0.2, seed=42, tool_context=tool_context)
+    X, _, y, _ = split.train_test(X, y)
+    cv = split.cv()
     metric = "accuracy" if is_classification else "r2"
     scores = cross_val_score(estimator, X, y, scoring=metric, cv=cv)
     cv_mean = float(scores.mean())
@@ -6252,7 +6542,9 @@ async def anomaly(
     - Interquartile Range (IQR)
     - One-Class SVM
 
-    Then uses LLM to analyze and explain findings.
+    Each detector is fitted on a bounded stratified sample and scores every row
+    in parallel chunks (see anomaly_engine). Then uses LLM to analyze and
+    explain findings.
 
     Args:
         csv_path: Path to CSV file (optional, auto-detected if not provided)
@@ -6268,11 +6560,7 @@ async def anomaly(
         - anomaly(contamination=0.05)  # Expect 5% outliers
         - anomaly(methods=['isolation_forest', 'lof'])  # Use specific methods
     """
-    from sklearn.ensemble import IsolationForest
-    from sklearn.neighbors import LocalOutlierFactor
-    from sklearn.svm import OneClassSVM
-    from sklearn.preprocessing import StandardScaler
-    from scipy import stats as scipy_stats
+    from .anomaly_engine import DEFAULT_METHODS, run_detectors
 
     df = await _load_dataframe(csv_path, tool_context=tool_context)
 
@@ -6285,7 +6573,7 @@ async def anomaly(
 
     # Default to all methods
     if methods is None:
-        methods = ['isolation_forest', 'lof', 'zscore', 'iqr', 'one_class_svm']
+        methods = list(DEFAULT_METHODS)
 
     results = {
         "dataset_info": {
@@ -6298,134 +6586,53 @@ async def anomaly(
         "ai_analysis": {}
     }
 
-    # Store anomaly flags from each method
-    anomaly_flags = {}
-
-    # 1. Isolation Forest
-    if 'isolation_forest' in methods:
-        try:
-            iso_forest = IsolationForest(
-                contamination=contamination, random_state=42)
-            predictions = iso_forest.fit_predict(X)
-            scores = iso_forest.score_samples(X)
-            anomalies = predictions == -1
-
-            results["methods"]["isolation_forest"] = {
-                "anomaly_count": int(anomalies.sum()),
-                # Limit to 100
-                "anomaly_indices": np.where(anomalies)[0].tolist()[:100],
-                "anomaly_scores": scores[anomalies][:100].tolist(),
-            }
-            anomaly_flags['isolation_forest'] = anomalies
-        except Exception as e:
-            results["methods"]["isolation_forest"] = {"error": str(e)}
-
-    # 2. Local Outlier Factor
-    if 'lof' in methods:
-        try:
-            lof = LocalOutlierFactor(contamination=contamination)
-            predictions = lof.fit_predict(X)
-            anomalies = predictions == -1
-
-            results["methods"]["lof"] = {
-                "anomaly_count": int(anomalies.sum()),
-                "anomaly_indices": np.where(anomalies)[0].tolist()[:100],
-            }
-            anomaly_flags['lof'] = anomalies
-        except Exception as e:
-            results["methods"]["lof"] = {"error": str(e)}
-
-    # 3. Z-Score Method
-    if 'zscore' in methods:
-        try:
-            scaler = StandardScaler()
-            X_scaled = scaler.fit_transform(X)
-            z_scores = np.abs(X_scaled)
-            threshold = 3
-            anomalies = (z_scores > threshold).any(axis=1)
-
-            results["methods"]["zscore"] = {
-                "threshold": threshold,
-                "anomaly_count": int(anomalies.sum()),
-                "anomaly_indices": np.where(anomalies)[0].tolist()[:100],
-            }
-            anomaly_flags['zscore'] = anomalies
-        except Exception as e:
-            results["methods"]["zscore"] = {"error": str(e)}
-
-    # 4. IQR Method
-    if 'iqr' in methods:
-        try:
-            anomalies = np.zeros(len(X), dtype=bool)
-            for col in numeric_cols:
-                series = df[col].dropna()
-                q1, q3 = series.quantile([0.25, 0.75])
-                iqr = q3 - q1
-                lower = q1 - 1.5 * iqr
-                upper = q3 + 1.5 * iqr
-                col_anomalies = (df[col] < lower) | (df[col] > upper)
-                anomalies |= col_anomalies.fillna(False).values
-
-            results["methods"]["iqr"] = {
-                "anomaly_count": int(anomalies.sum()),
-                "anomaly_indices": np.where(anomalies)[0].tolist()[:100],
-            }
-            anomaly_flags['iqr'] = anomalies
-        except Exception as e:
-            results["methods"]["iqr"] = {"error": str(e)}
-
-    # 5. One-Class SVM
-    if 'one_class_svm' in methods:
-        try:
-            scaler = StandardScaler()
-            X_scaled = scaler.fit_transform(X)
-
-            # Use subset for large datasets (SVM is slow)
-            if len(X_scaled) > 1000:
-                sample_indices = np.random.choice(
-                    len(X_scaled), 1000, replace=False)
-                X_train = X_scaled[sample_indices]
-                svm = OneClassSVM(nu=contamination, kernel='rbf')
-                svm.fit(X_train)
-            else:
-                svm = OneClassSVM(nu=contamination, kernel='rbf')
-                svm.fit(X_scaled)
-
-            predictions = svm.predict(X_scaled)
-            anomalies = predictions == -1
+    # Each detector fits on a bounded sample and scores all rows in parallel chunks
+    try:
+        engine = await asyncio.to_thread(
+            run_detectors, X.to_numpy(dtype=float), methods, contamination)
+    except ValueError as e:
+        return {"error": str(e)}
+    results["engine"] = {k: engine[k] for k in ("rows", "chunks", "workers", "seconds")}
 
-            results["methods"]["one_class_svm"] = {
-                "anomaly_count": int(anomalies.sum()),
-                "anomaly_indices": np.where(anomalies)[0].tolist()[:100],
-            }
-            anomaly_flags['one_class_svm'] = anomalies
-        except Exception as e:
-            results["methods"]["one_class_svm"] = {"error": str(e)}
+    # Per-row scores (higher = more anomalous) and flags from each method
+    anomaly_flags = {}
+    anomaly_scores = {}
+    for method, det in engine["detectors"].items():
+        if "error" in det:
+            results["methods"][method] = {"error": det["error"]}
+            continue
+        flagged = np.flatnonzero(det["flags"])
+        strongest = flagged[np.argsort(-det["scores"][flagged], kind="stable")][:100]
+        results["methods"][method] = {
+            "anomaly_count": int(flagged.size),
+            # Limit to 100, strongest first
+            "anomaly_indices": strongest.tolist(),
+            "anomaly_scores": det["scores"][strongest].tolist(),
+            "threshold": det["threshold"],
+            "fit_rows": det["fit_rows"],
+            "calibration_rows": det["calibration_rows"],
+        }
+        anomaly_flags[method] = det["flags"]
+        anomaly_scores[method] = det["scores"]
 
-    # Consensus: rows flagged by multiple methods using proper math
+    # Consensus: rows flagged by multiple methods, computed on the flag/score arrays
     if len(anomaly_flags) > 0:
-        from .anomalies_consensus import consensus_from_methods, anomaly_summary
+        from .anomalies_consensus import score_summary
 
-        # Convert to index lists for each method
-        method_results = {}
-        for method, flags in anomaly_flags.items():
-            method_results[method] = np.where(flags)[0].tolist()
-
-        # Get consensus with minimum 2 votes
-        consensus_indices = consensus_from_methods(method_results, min_votes=2)
-        consensus_summary = anomaly_summary(method_results, min_votes=2)
+        # Minimum 2 votes
+        consensus_summary = score_summary(anomaly_flags, anomaly_scores, min_votes=2)
 
         results["consensus"] = {
-            "high_confidence_anomalies": len(consensus_indices),
-            "high_confidence_indices": sorted(list(consensus_indices))[:100],
+            "high_confidence_anomalies": consensus_summary["consensus_count"],
+            "high_confidence_indices": consensus_summary["consensus_indices"],
             "per_method_counts": consensus_summary["per_method_counts"],
             "total_unique_anomalies": consensus_summary["total_unique"],
             "methods_agreement": consensus_summary
         }
 
         # Sample anomalous rows for LLM analysis
-        if len(consensus_indices) > 0:
-            anomaly_sample_indices = list(consensus_indices)[:5]
+        if consensus_summary["consensus_count"] > 0:
+            anomaly_sample_indices = consensus_summary["consensus_indices"][:5]
             anomaly_samples = df.iloc[anomaly_sample_indices][numeric_cols].to_dict(
                 'records')
         else:
@@ -6522,7 +6729,6 @@ async def accuracy(
         - accuracy(target='fraud', cv_folds=10, bootstrap_samples=200)
     """
     from sklearn.model_selection import (
-        train_test_split,
         cross_val_score,
         StratifiedKFold,
         KFold,
@@ -6573,10 +6779,9 @@ async def accuracy(
     }
 
     # ============= 1. Train/Test Split =============
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_scaled, y, test_size=test_size, random_state=42,
-        stratify=y if is_classification and _can_stratify(y) else None
-    )
+    # Shared registered split, so this score is on the same rows as the training tools'
+    split = get_split(df, target, test_size=test_size, seed=42, tool_context=tool_context)
+    X_train, X_test, y_train, y_test = split.train_test(X_scaled, y)
 
     estimator.fit(X_train, y_train)
     y_pred = estimator.predict(X_test)
@@ -6735,8 +6940,8 @@ async def load_existing_models(
     Returns:
         dict with loaded models and their info
     """
-    import joblib
     import glob
+    from .model_cache import get_model
 
     # Get model directory
     model_dir = _get_model_dir(
@@ -6763,7 +6968,7 @@ async def load_existing_models(
     loaded_models = []
     for model_file in model_files:
         try:
-            model = joblib.load(model_file)
+            model = get_model(model_file)
             model_name = os.path.basename(model_file).replace('.joblib', '')
             loaded_models.append({
                 "name": model_name,
@@ -6788,10 +6993,18 @@ async def ensemble(
     models: Optional[list[str]] = None,
     voting: str = "soft",
     test_size: float = 0.2,
+    method: str = "voting",
     tool_context: Optional[ToolContext] = None,
 ) -> dict:
     """Train an ensemble of multiple models and combine predictions using voting.
 
+    Members are fitted concurrently (see ensemble_engine). Members already
+    registered for the same dataset/target/split are reused, including
+    pipelines from train_classifier, train_regressor and
+    train_baseline_model of the same estimator class, and out-of-fold
+    predictions on the registered CV folds are cached, so re-running with
+    another voting type or method does not retrain anything.
+
     Args:
         target: Target column name
         csv_path: Path to CSV file (optional, auto-detected if not provided)
@@ -6799,6 +7012,8 @@ async def ensemble(
                 If None, uses sensible defaults based on task type
         voting: 'soft' (probability averaging, default) or 'hard' (majority vote)
         test_size: Fraction of data to hold out for testing (default 0.2)
+        method: 'voting' (default) or 'stacking' (meta-learner fitted on the
+                members' out-of-fold predictions)
         tool_context: Tool context (automatically provided by ADK)
 
     Returns:
@@ -6808,63 +7023,33 @@ async def ensemble(
         - Auto defaults: ensemble(target='species')
         - Custom models: ensemble(target='price', models=['sklearn.linear_model.Ridge', 'sklearn.ensemble.RandomForestRegressor'])
         - Hard voting: ensemble(target='fraud', voting='hard')
+        - Stacking: ensemble(target='fraud', method='stacking')
     """
-    from sklearn.ensemble import VotingClassifier, VotingRegressor
-    from sklearn.model_selection import train_test_split
-    from sklearn.preprocessing import StandardScaler
     from sklearn.metrics import accuracy_score, f1_score, mean_squared_error, r2_score
+    from .ensemble_engine import build_members, fit_stacker, hard_vote, soft_vote, stack_predict
+    from .split_registry import get_split
+
+    if method not in ("voting", "stacking"):
+        raise ValueError(f"Unknown method '{method}'. Choose 'voting' or 'stacking'")
 
     df = await _load_dataframe(csv_path, tool_context=tool_context)
 
     if target not in df.columns:
         raise ValueError(f"Target column '{target}' not found")
 
-    y = df[target]
-    X = df.drop(columns=[target])
-
-    # Encode categoricals
-    for col in X.select_dtypes(include=["object", "category"]).columns:
-        X[col] = X[col].astype('category').cat.codes
-
-    # Handle missing
-    X = X.fillna(X.median(numeric_only=True))
+    # Category codes, median fill, target encoding, split and scaling come
+    # from the shared design-matrix cache
+    dm = get_design_matrix(df, target, "codes_scaled_split", tool_context,
+                           test_size=test_size, random_state=42)
 
     # Determine task type using proper detection
-    from .utils_task import detect_task, get_ensemble_models
-    task_type = detect_task(y)
-    is_classification = (task_type == "classification")
+    from .utils_task import get_ensemble_models
+    task_type = dm.extras["task_type"]
+    is_classification = dm.is_classification
     print(f" Detected task type: {task_type}")
 
-    # Try to load existing models first
-    existing_models = None
-    if tool_context and hasattr(tool_context, 'state'):
-        try:
-            dataset_name = tool_context.state.get(
-                "original_dataset_name", "default")
-            print(f" Looking for existing models in dataset: {dataset_name}")
-            existing_result = await load_existing_models(dataset_name, tool_context)
-            print(f" Model loading result: {existing_result}")
-
-            if existing_result.get(
-                    "status") == "success" and existing_result.get("count", 0) > 0:
-                existing_models = existing_result["models"]
-                print(
-                    f"[OK] Found {
-                        existing_result['count']} existing models: {
-                        [
-                            m['name'] for m in existing_models]}")
-            else:
-                print(
-                    f"ℹ No existing models found or error: {
-                        existing_result.get(
-                            'error', 'Unknown error')}")
-        except Exception as e:
-            print(f"[WARNING] Could not load existing models: {e}")
-            import traceback
-            print(f" Full error traceback: {traceback.format_exc()}")
-
-    # Default models if not provided and no existing models
-    if models is None and existing_models is None:
+    # Default models if not provided
+    if models is None:
         recommended_models = get_ensemble_models(task_type)
         if is_classification:
             models = [
@@ -6880,101 +7065,95 @@ async def ensemble(
             ]
         print(f" Using recommended models for {task_type}: {models}")
 
-    # Encode target for classification
-    if is_classification:
-        from sklearn.preprocessing import LabelEncoder
-        le = LabelEncoder()
-        y = le.fit_transform(y)
-
-    # Train/test split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=test_size, random_state=42,
-        stratify=y if is_classification and _can_stratify(y) else None
-    )
-
-    # Scale features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
+    X_train_scaled, X_test_scaled = dm.X_train, dm.X_test
+    y_train, y_test = np.asarray(dm.y_train), np.asarray(dm.y_test)
+    # Fold ids of the registered split, aligned with the training rows
+    split = get_split(df, target, test_size=test_size, seed=42, tool_context=tool_context)
+    folds = split.folds
+    n_classes = int(max(y_train.max(), y_test.max()) + 1) if is_classification else None
 
-    # Build ensemble
-    estimators = []
+    # Build ensemble members
     individual_scores = {}
+    members = []
+    for i, model_path in enumerate(models):
+        try:
+            # Create model
+            estimator = _make_estimator(model_path)
 
-    # Use existing models if available, otherwise train new ones
-    if existing_models:
-        print(
-            f" Using {
-                len(existing_models)} existing trained models for ensemble...")
-        for i, model_info in enumerate(existing_models):
-            try:
-                model = model_info["model"]
-                model_name = model_info["name"]
-
-                # Test the model on current data
-                y_pred = model.predict(X_test_scaled)
-
-                if is_classification:
-                    score = float(accuracy_score(y_test, y_pred))
-                else:
-                    score = float(r2_score(y_test, y_pred))
-
-                individual_scores[f"existing_{i + 1}_{model_name}"] = {
-                    "model": model_name,
-                    "score": score,
-                    "type": "existing"
-                }
+            # SVC needs probability=True for soft voting / stacking on probabilities
+            if is_classification and 'SVC' in model_path:
+                estimator.set_params(probability=True)
+            members.append((model_path, estimator))
+        except Exception as e:
+            individual_scores[f"new_{i + 1}_ERROR"] = {
+                "model": model_path, "error": str(e)}
+
+    def raw_rows():
+        # Original columns and labels on the same split, for pipelines
+        # registered by train_classifier/train_regressor/train_baseline_model
+        X_tr, X_te, y_tr, _ = split.train_test(df.drop(columns=[target]), df[target])
+        return X_tr, y_tr, X_te
+
+    # Fit concurrently; registered members/pipelines and cached predictions are reused
+    records = await asyncio.to_thread(
+        build_members, members, X_train_scaled, y_train, X_test_scaled, folds,
+        dm.key, target, n_classes, None, tool_context,
+        split.key, raw_rows, dm.extras.get("label_encoder"))
+
+    workspace_root = tool_context.state.get("workspace_root") if tool_context and hasattr(tool_context, "state") else None
+    ok = []
+    for i, rec in enumerate(records):
+        label = f"{'existing' if rec['source'] == 'registry' else 'new'}_{i + 1}_{rec['spec'].split('.')[-1]}"
+        if "error" in rec:
+            individual_scores[f"{label}_ERROR"] = {"model": rec["spec"], "error": rec["error"]}
+            continue
+        test_pred = rec["test"].argmax(axis=1) if is_classification else rec["test"]
+        score = float(accuracy_score(y_test, test_pred) if is_classification else r2_score(y_test, test_pred))
+        individual_scores[label] = {
+            "model": rec["spec"],
+            "score": score,
+            "type": "existing" if rec["source"] == "registry" else "new",
+            "predictions": rec["predictions"],
+            "fit_seconds": rec["fit_seconds"],
+        }
+        ok.append(rec)
 
-                estimators.append((f"existing_{i + 1}", model))
-            except Exception as e:
-                individual_scores[f"existing_{i + 1}_ERROR"] = {
-                    "model": model_info["name"], "error": str(e)}
-    else:
-        print(f" Training {len(models)} new models for ensemble...")
-        for i, model_path in enumerate(models):
+        # Register newly trained members so later ensembles on this split reuse them
+        if rec["source"] == "trained" and workspace_root:
             try:
-                # Create model
-                estimator = _make_estimator(model_path)
-
-                # For SVC/SVR, need probability=True for soft voting
-                if 'SVC' in model_path and voting == 'soft':
-                    estimator.set_params(probability=True)
-
-                # Train individual model and get score
-                estimator.fit(X_train_scaled, y_train)
-                y_pred = estimator.predict(X_test_scaled)
-
-                if is_classification:
-                    score = float(accuracy_score(y_test, y_pred))
-                else:
-                    score = float(r2_score(y_test, y_pred))
-
-                individual_scores[f"new_{i + 1}_{model_path.split('.')[-1]}"] = {
-                    "model": model_path,
-                    "score": score,
-                    "type": "new"
-                }
-
-                estimators.append(
-                    (f"new_{i + 1}", _make_estimator(model_path)))
+                from .model_registry import register_model
+                member_file = os.path.join(
+                    _get_model_dir(csv_path, tool_context=tool_context),
+                    f"ensemble_{rec['spec'].split('.')[-1]}_{rec['key'][:12]}.joblib")
+                joblib.dump(rec["model"], member_file)
+                register_model(
+                    model_name=os.path.splitext(os.path.basename(member_file))[0],
+                    model_path=member_file,
+                    model_type=rec["spec"].split('.')[-1],
+                    target=target,
+                    metrics={"accuracy" if is_classification else "r2": score},
+                    metadata={"design_key": dm.key, "estimator": rec["spec"],
+                              "split": dm.extras.get("split"), "role": "ensemble_member"},
+                    workspace_root=workspace_root,
+                )
             except Exception as e:
-                individual_scores[f"new_{i + 1}_ERROR"] = {
-                    "model": model_path, "error": str(e)}
+                logger.warning(f"[ENSEMBLE] Could not register member {rec['spec']}: {e}")
 
-    if len(estimators) == 0:
+    if len(ok) == 0:
         return {
             "error": "No models could be trained successfully",
             "individual_scores": individual_scores}
 
-    # Create ensemble
-    if is_classification:
-        ensemble_model = VotingClassifier(estimators=estimators, voting=voting)
+    # Combine cached member predictions; no member is refitted
+    if method == "stacking":
+        meta = fit_stacker([r["oof"] for r in ok], y_train, is_classification)
+        y_pred_ensemble = stack_predict(meta, [r["test"] for r in ok])
+    elif is_classification and voting == "hard":
+        y_pred_ensemble = hard_vote([r["test"] for r in ok])
     else:
-        ensemble_model = VotingRegressor(estimators=estimators)
-
-    # Train ensemble
-    ensemble_model.fit(X_train_scaled, y_train)
-    y_pred_ensemble = ensemble_model.predict(X_test_scaled)
+        combined = soft_vote([r["test"] for r in ok])
+        y_pred_ensemble = combined.argmax(axis=1) if is_classification else combined
+    oof_combined = soft_vote([r["oof"] for r in ok])
 
     # Evaluate ensemble
     if is_classification:
@@ -6987,7 +7166,8 @@ async def ensemble(
         metrics = {
             "ensemble_accuracy": ensemble_accuracy,
             "ensemble_f1_weighted": ensemble_f1,
-            "voting_type": voting,
+            "oof_soft_vote_accuracy": float(accuracy_score(y_train, oof_combined.argmax(axis=1))),
+            "voting_type": voting if method == "voting" else "stacking",
             "task": "classification"
         }
     else:
@@ -7000,7 +7180,8 @@ async def ensemble(
         metrics = {
             "ensemble_r2": ensemble_r2,
             "ensemble_rmse": ensemble_rmse,
-            "voting_type": "averaging" if voting == "soft" else voting,
+            "oof_average_r2": float(r2_score(y_train, oof_combined)),
+            "voting_type": ("averaging" if voting == "soft" else voting) if method == "voting" else "stacking",
             "task": "regression"
         }
 
@@ -7011,7 +7192,10 @@ async def ensemble(
         report_md += f"- **{metric}:** {value if isinstance(value, str) else f'{value:.4f}'}\n"
     report_md += f"\n## Individual Model Scores\n"
     for model_name, score_info in individual_scores.items():
-        report_md += f"- **{model_name}:** {score_info['score']:.4f}\n"
+        if "score" in score_info:
+            report_md += f"- **{model_name}:** {score_info['score']:.4f}\n"
+        else:
+            report_md += f"- **{model_name}:** failed ({score_info.get('error')})\n"
 
     # Save artifact
     if tool_context:
@@ -7023,7 +7207,11 @@ async def ensemble(
     result = {
         "ensemble_metrics": metrics,
         "individual_model_scores": individual_scores,
-        "num_models": len(estimators),
+        "num_models": len(ok),
+        "method": method,
+        "reused_members": sum(r["source"] == "registry" for r in ok),
+        "cached_predictions": sum(r["predictions"] == "cache" for r in ok),
+        "train_seconds": round(sum(r["fit_seconds"] for r in ok), 2),
         "test_size": test_size,
         "sample_size": len(df),
         "artifacts": ["ensemble_model_report.md"],
@@ -7142,7 +7330,7 @@ def list_tools(
             "description": "Time series analysis and forecasting",
             "tools": [
                 ("ts_prophet_forecast", "Prophet forecasting", "ts_prophet_forecast(date_col, value_col, periods=30)"),
-                ("ts_backtest", "Backtest time series model", "ts_backtest(date_col, value_col, test_size=0.2)"),
+                ("ts_backtest", "Rolling-origin backtest of forecasters", "ts_backtest(target, date_col, horizon=30, n_folds=5)"),
                 ("arima_forecast_tool", "ARIMA forecasting", "arima_forecast_tool(value_col, order=(1,1,1))"),
             ]
         },
@@ -8730,7 +8918,7 @@ def help(command: Optional[str] = None, csv_path: Optional[str] = None) -> str:
         "shap_interaction_values_tool": "SHAP interaction values for feature interactions.",
         "lime_explain_tool": "LIME (Local Interpretable Model-agnostic Explanations).",
         "smote_rebalance_tool": "SMOTE (Synthetic Minority Oversampling) for imbalanced datasets.",
-        "threshold_tune_tool": "Threshold tuning for classification models.",
+        "threshold_tune_tool": "Threshold tuning for classification models (F1/F-beta/Youden/accuracy/cost, optional per-segment thresholds).",
         "cost_sensitive_learning_tool": "Cost-sensitive learning for imbalanced datasets.",
         "target_encode_tool": "Target encoding for categorical variables.",
         "leakage_check_tool": "Data leakage detection in features.",
@@ -8786,7 +8974,7 @@ def help(command: Optional[str] = None, csv_path: Optional[str] = None) -> str:
 
         # ===== TIME SERIES =====
         "ts_prophet_forecast": " Facebook Prophet forecasting: handles seasonality, holidays, missing data, trend changes.",
-        "ts_backtest": " Time series backtesting: walk-forward validation, rolling window evaluation.",
+        "ts_backtest": " Time series backtesting: rolling-origin folds (expanding/sliding), Prophet/ARIMA/AutoGluon/naive fitted in parallel, per-horizon MAE/RMSE/MAPE/sMAPE/MASE.",
 
         # ===== EMBEDDINGS & SEARCH =====
         "embed_text_column": " Generate sentence embeddings using transformers: converts text to dense vectors for similarity.",
@@ -8963,7 +9151,7 @@ def help(command: Optional[str] = None, csv_path: Optional[str] = None) -> str:
 
         # ===== TIME SERIES =====
         "ts_prophet_forecast": "ts_prophet_forecast(target='sales', datetime_col='date', periods=90, csv_path='daily_sales.csv')",
-        "ts_backtest": "ts_backtest(target='sales', datetime_col='date', test_periods=30, csv_path='daily_sales.csv')",
+        "ts_backtest": "ts_backtest(target='sales', date_col='date', horizon=30, n_folds=5, csv_path='daily_sales.csv')",
 
         # ===== EMBEDDINGS & SEARCH =====
         "embed_text_column": "embed_text_column(text_col='description', model='all-MiniLM-L6-v2', csv_path='products.csv')",
@@ -9363,7 +9551,10 @@ async def explain_model(
     - Saves all plots as artifacts
 
     SHAP works best with tree-based models (RandomForest, GradientBoosting, XGBoost).
-    For other models, it uses KernelExplainer which may be slower.
+    For other models, it uses KernelExplainer over a k-means background
+    (SHAP_BACKGROUND_CLUSTERS) on at most SHAP_KERNEL_SAMPLE_ROWS sampled rows,
+    computed in parallel chunks. Values are cached per dataset fingerprint,
+    target and model, so repeated calls only redraw the plots.
 
     Args:
         target: Target column name to predict
@@ -9401,132 +9592,102 @@ async def explain_model(
 
     # Prepare features and target
     y = df[target]
-    X = df.drop(columns=[target])
-
-    # [OK] CRITICAL: Convert all columns to numeric for SHAP compatibility
-    # 1. Handle categorical columns (one-hot encode)
-    cat_cols = X.select_dtypes(include=["object", "category"]).columns.tolist()
-    if cat_cols:
-        X = pd.get_dummies(X, columns=cat_cols, drop_first=True)
-
-    # 2. Convert any remaining non-numeric columns to numeric
-    for col in X.columns:
-        if X[col].dtype == 'object':
-            try:
-                X[col] = pd.to_numeric(X[col], errors='coerce')
-            except Exception:
-                # Drop columns that can't be converted
-                X = X.drop(columns=[col])
-
-    # 3. Handle missing values in ALL columns
-    # Fill numeric columns with median, boolean columns with mode
-    for col in X.columns:
-        if X[col].isna().any():
-            if X[col].dtype == 'bool':
-                X[col] = X[col].fillna(
-                    X[col].mode()[0] if not X[col].mode().empty else False)
-            else:
-                X[col] = X[col].fillna(X[col].median())
-
-    # 4. Final check: ensure all data is numeric and finite
-    X = X.select_dtypes(include=[np.number])
-    X = X.replace([np.inf, -np.inf], np.nan).fillna(0)
-
-    # Validate we have data left after preprocessing
-    if X.empty or X.shape[1] == 0:
-        return {
-            "error": "No numeric features available after preprocessing",
-            "suggestion": "Your dataset may have only non-numeric columns. Try uploading data with numeric features."}
-
-    if X.shape[0] < 2:
-        return {
-            "error": f"Not enough samples for SHAP analysis (found {
-                X.shape[0]}, need at least 2)",
-            "suggestion": "Upload a dataset with more rows"}
 
     # Determine task type
     is_classification = y.dtype == object or y.nunique() < 20
 
-    # Train model
-    try:
-        mod_class = _parse_sklearn_model(model)
-        estimator = mod_class()
-    except Exception as e:
-        # Fallback to default model
-        from sklearn.ensemble import GradientBoostingRegressor, GradientBoostingClassifier
-        estimator = GradientBoostingClassifier(
-        ) if is_classification else GradientBoostingRegressor()
+    # Reuse SHAP values already computed for this dataset/target/model
+    from .dataset_fingerprint import dataset_fingerprint
+    from .shap_engine import compute_shap, get_cached_shap, shap_cache_key, store_shap
+    shap_key = shap_cache_key(dataset_fingerprint(df), target, model)
+    shap_result = get_cached_shap(shap_key, tool_context)
 
-    # If classification, encode labels
-    if is_classification:
-        from sklearn.preprocessing import LabelEncoder
-        le = LabelEncoder()
-        y_encoded = le.fit_transform(y)
-        estimator.fit(X, y_encoded)
-    else:
-        estimator.fit(X, y)
+    if shap_result is None:
+        X = df.drop(columns=[target])
 
-    # Create SHAP explainer
-    # Use TreeExplainer for tree-based models (faster and exact)
-    model_name = type(estimator).__name__
-    try:
-        if hasattr(
-                estimator,
-                'estimators_') or 'Tree' in model_name or 'Forest' in model_name or 'Boost' in model_name:
-            explainer = shap.TreeExplainer(estimator)
-            explainer_type = "TreeExplainer"
-        else:
-            # Use KernelExplainer for other models (slower but universal)
-            explainer = shap.KernelExplainer(
-                estimator.predict, shap.sample(X, 100))
-            explainer_type = "KernelExplainer"
-    except Exception:
-        # Fallback to KernelExplainer
-        explainer = shap.Explainer(estimator.predict, X)
-        explainer_type = "Explainer (auto)"
+        # [OK] CRITICAL: Convert all columns to numeric for SHAP compatibility
+        # 1. Handle categorical columns (one-hot encode)
+        cat_cols = X.select_dtypes(include=["object", "category"]).columns.tolist()
+        if cat_cols:
+            X = pd.get_dummies(X, columns=cat_cols, drop_first=True)
 
-    # Compute SHAP values
-    try:
-        shap_values = explainer.shap_values(X)
-    except Exception as e:
-        return {
-            "error": f"Failed to compute SHAP values: {str(e)}",
-            "model_type": model_name,
-            "suggestion": "Try with a different model or ensure your data is clean and numeric"
-        }
+        # 2. Convert any remaining non-numeric columns to numeric
+        for col in X.columns:
+            if X[col].dtype == 'object':
+                try:
+                    X[col] = pd.to_numeric(X[col], errors='coerce')
+                except Exception:
+                    # Drop columns that can't be converted
+                    X = X.drop(columns=[col])
+
+        # 3. Handle missing values in ALL columns
+        # Fill numeric columns with median, boolean columns with mode
+        for col in X.columns:
+            if X[col].isna().any():
+                if X[col].dtype == 'bool':
+                    X[col] = X[col].fillna(
+                        X[col].mode()[0] if not X[col].mode().empty else False)
+                else:
+                    X[col] = X[col].fillna(X[col].median())
 
-    # Validate SHAP values were computed
-    if shap_values is None:
-        return {
-            "error": "SHAP values computation returned None",
-            "model_type": model_name,
-            "suggestion": "Try using a tree-based model like RandomForest or GradientBoosting"
-        }
+        # 4. Final check: ensure all data is numeric and finite
+        X = X.select_dtypes(include=[np.number])
+        X = X.replace([np.inf, -np.inf], np.nan).fillna(0)
 
-    # Handle multi-output SHAP values (for multi-class classification)
-    if isinstance(shap_values, list):
-        # For binary classification, use positive class
-        # For multi-class, use the first class for visualization
-        if len(shap_values) == 0:
+        # Validate we have data left after preprocessing
+        if X.empty or X.shape[1] == 0:
             return {
-                "error": "SHAP values list is empty",
-                "model_type": model_name
-            }
-        shap_values_plot = shap_values[1] if len(
-            shap_values) == 2 else shap_values[0]
-    else:
-        shap_values_plot = shap_values
+                "error": "No numeric features available after preprocessing",
+                "suggestion": "Your dataset may have only non-numeric columns. Try uploading data with numeric features."}
+
+        if X.shape[0] < 2:
+            return {
+                "error": f"Not enough samples for SHAP analysis (found {
+                    X.shape[0]}, need at least 2)",
+                "suggestion": "Upload a dataset with more rows"}
+
+        # Train model
+        try:
+            mod_class = _parse_sklearn_model(model)
+            estimator = mod_class()
+        except Exception as e:
+            # Fallback to default model
+            from sklearn.ensemble import GradientBoostingRegressor, GradientBoostingClassifier
+            estimator = GradientBoostingClassifier(
+            ) if is_classification else GradientBoostingRegressor()
+        # Deterministic fit so cached SHAP values match a re-run
+        if "random_state" in estimator.get_params():
+            estimator.set_params(random_state=42)
+
+        # If classification, encode labels
+        if is_classification:
+            from sklearn.preprocessing import LabelEncoder
+            le = LabelEncoder()
+            y_encoded = le.fit_transform(y)
+            await asyncio.to_thread(estimator.fit, X, y_encoded)
+        else:
+            await asyncio.to_thread(estimator.fit, X, y)
 
-    # Convert to numpy array if needed and validate
-    if not isinstance(shap_values_plot, np.ndarray):
+        # Compute SHAP values: TreeExplainer for tree ensembles (exact and fast),
+        # otherwise KernelExplainer over a k-means background on a row sample,
+        # evaluated in parallel chunks (see shap_engine)
+        model_name = type(estimator).__name__
         try:
-            shap_values_plot = np.array(shap_values_plot)
+            shap_result = await asyncio.to_thread(compute_shap, estimator, X, shap_key)
         except Exception as e:
             return {
-                "error": f"Could not convert SHAP values to array: {str(e)}",
-                "shap_type": str(type(shap_values_plot)),
-                "model_type": model_name
+                "error": f"Failed to compute SHAP values: {str(e)}",
+                "model_type": model_name,
+                "suggestion": "Try with a different model or ensure your data is clean and numeric"
             }
+        store_shap(shap_result, tool_context)
+
+    model_name = shap_result.model_name
+    explainer_type = shap_result.explainer_type
+    shap_values_plot = shap_result.values
+    expected_value = shap_result.expected_value
+    # Plots and importances use the explained rows
+    X = shap_result.X
 
     # Validate shape matches
     if shap_values_plot.shape[0] != X.shape[0] or shap_values_plot.shape[1] != X.shape[1]:
@@ -9613,9 +9774,7 @@ async def explain_model(
         shap.waterfall_plot(
             shap.Explanation(
                 values=shap_values_plot[0],
-                base_values=explainer.expected_value if not isinstance(
-                    explainer.expected_value,
-                    np.ndarray) else explainer.expected_value[0],
+                base_values=expected_value,
                 data=X.iloc[0],
                 feature_names=X.columns.tolist()),
             max_display=max_display,
@@ -9663,9 +9822,7 @@ async def explain_model(
     try:
         plt.figure(figsize=(20, 3))
         shap.force_plot(
-            explainer.expected_value if not isinstance(
-                explainer.expected_value,
-                np.ndarray) else explainer.expected_value[0],
+            expected_value,
             shap_values_plot[0],
             X.iloc[0],
             matplotlib=True,
@@ -9706,10 +9863,12 @@ async def explain_model(
         "explainer_type": explainer_type,
         "target": target,
         "dataset_info": {
-            "rows": int(len(X)),
+            "rows": int(shap_result.total_rows),
+            "explained_rows": int(len(X)),
             "features": int(len(X.columns)),
             "target_unique_values": int(y.nunique())
         },
+        "shap": shap_result.summary(),
         "top_features": [
             {
                 "feature": f["feature"],
@@ -9729,7 +9888,8 @@ async def explain_model(
 **Target Variable:** {target}
 **Model:** {model_name}
 **Explainer Type:** {explainer_type}
-**Dataset:** {len(X):,} rows, {len(X.columns)} features
+**Dataset:** {shap_result.total_rows:,} rows, {len(X.columns)} features
+**SHAP Budget:** {len(X):,} explained rows, {f"k-means background of {shap_result.background_size}" if shap_result.background_size else "tree path"}, {shap_result.workers} worker(s), {"cached" if shap_result.cached else f"{shap_result.seconds:.1f}s"}
 
 **Top {min(10, len(top_features))} Most Important Features:**
 {top_features_list}
@@ -0,0 +1,371 @@
+"""
+Parallel ensemble members with registry reuse and cached out-of-fold predictions.
+
+ensemble() combines a handful of member estimators trained on the shared
+"codes_scaled_split" design matrix (see design_cache). For every member this
+module produces:
+
+  - the member fitted on the training rows
+  - out-of-fold (OOF) predictions for every training row, from refits on the
+    registered split's CV folds (see split_registry)
+  - predictions for the test rows
+
+Probabilities for classifiers, values for regressors. Member fits and fold
+refits all run as independent tasks on ENSEMBLE_WORKERS processes.
+
+Reuse:
+  - fitted members are registered in model_registry with the design-matrix key
+    (dataset fingerprint + target + recipe + split) and estimator spec;
+    a later ensemble over the same data loads them instead of retraining
+  - pipelines registered by the training tools (train_classifier,
+    train_regressor, train_baseline_model) carry raw_pipeline_metadata; one
+    fitted on the same registered split with the member's estimator class is
+    used as that member: test predictions come from the pipeline itself and
+    its OOF predictions from refits of the pipeline on the registered folds
+  - OOF/test predictions are cached per design key + spec (memory plus joblib
+    files under the workspace tmp/oof_cache folder), so soft voting, hard
+    voting and stacking reduce to combining arrays
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+
+from .dataset_fingerprint import cache_key
+from .large_data_config import ENSEMBLE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Bump when the prediction format below changes
+ENSEMBLE_CACHE_VERSION = 1
+
+_MAX_MEMORY_ENTRIES = 32
+_memory: "OrderedDict[str, Dict[str, np.ndarray]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+# metadata "input" of pipelines that take the original columns and labels
+RAW_INPUT = "raw_columns"
+
+
+def member_key(design_key: str, spec: str) -> str:
+    return cache_key(design_key, spec, ENSEMBLE_CACHE_VERSION)
+
+
+def estimator_class(estimator: Any) -> str:
+    """Defining module + class name; the match key for training-tool pipelines."""
+    cls = type(estimator)
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def raw_pipeline_metadata(df: Any, split_summary: Dict[str, Any], estimator: Any) -> Dict[str, Any]:
+    """
+    Registry metadata for a training tool's pipeline on the original columns.
+
+    Args:
+        df: DataFrame the pipeline was trained from (target included)
+        split_summary: DataSplit.summary() of the registered split it was fitted on
+        estimator: The pipeline's final estimator
+
+    Returns:
+        Metadata dict for register_model (via the tool result's "metadata")
+    """
+    from .dataset_fingerprint import dataset_fingerprint
+    return {"dataset_fingerprint": dataset_fingerprint(df),
+            "split_key": split_summary.get("split_key"),
+            "estimator_class": estimator_class(estimator),
+            "input": RAW_INPUT,
+            "split": split_summary}
+
+
+# ============================================================================
+# Prediction Cache
+# ============================================================================
+
+def _disk_path(key: str, tool_context: Optional[Any]) -> Optional[str]:
+    if tool_context is None:
+        return None
+    try:
+        from .ds_tools import _get_workspace_dir
+        path = os.path.join(_get_workspace_dir(tool_context, "tmp"), "oof_cache")
+        os.makedirs(path, exist_ok=True)
+        return os.path.join(path, f"{key}.joblib")
+    except Exception:
+        return None
+
+
+def get_cached_predictions(key: str, tool_context: Optional[Any] = None) -> Optional[Dict[str, np.ndarray]]:
+    """Cached {"oof", "test"} predictions for a member, from memory or the workspace disk tier."""
+    with _lock:
+        preds = _memory.get(key)
+        if preds is not None:
+            _memory.move_to_end(key)
+            return preds
+    path = _disk_path(key, tool_context)
+    if path and os.path.exists(path):
+        try:
+            preds = joblib.load(path)
+        except Exception as e:
+            logger.warning(f"[ENSEMBLE] Ignoring unreadable prediction cache {path}: {e}")
+            return None
+        _remember(key, preds)
+    return preds
+
+
+def _remember(key: str, preds: Dict[str, np.ndarray]) -> None:
+    with _lock:
+        _memory[key] = preds
+        _memory.move_to_end(key)
+        while len(_memory) > _MAX_MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+
+def store_predictions(key: str, preds: Dict[str, np.ndarray], tool_context: Optional[Any] = None) -> None:
+    _remember(key, preds)
+    path = _disk_path(key, tool_context)
+    if path:
+        try:
+            tmp_path = path + ".tmp"
+            joblib.dump(preds, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"[ENSEMBLE] Could not persist predictions {key}: {e}")
+
+
+# ============================================================================
+# Member Tasks
+# ============================================================================
+
+def _predict(model: Any, X: Any, n_classes: Optional[int], encoder: Any = None) -> np.ndarray:
+    """
+    Class probabilities aligned to 0..n_classes-1 (one-hot votes without predict_proba), or values.
+
+    encoder maps a raw-label model's classes onto the encoded ones.
+    """
+    if n_classes is None:
+        return np.asarray(model.predict(X), dtype=float)
+    encode = encoder.transform if encoder is not None else (lambda labels: labels)
+    out = np.zeros((len(X), n_classes))
+    classes = np.asarray(encode(model.classes_), dtype=int)
+    if hasattr(model, "predict_proba"):
+        out[:, classes] = model.predict_proba(X)
+    else:
+        out[np.arange(len(X)), np.asarray(encode(model.predict(X)), dtype=int)] = 1.0
+    return out
+
+
+def _fit_full(estimator: Any, X_train, y_train, X_test, n_classes) -> Tuple[Any, np.ndarray, float]:
+    from sklearn.base import clone
+    start = time.perf_counter()
+    model = clone(estimator).fit(X_train, y_train)
+    return model, _predict(model, X_test, n_classes), time.perf_counter() - start
+
+
+def _fit_fold(estimator: Any, X_train, y_train, folds: np.ndarray, fold: int, n_classes, encoder=None):
+    from sklearn.base import clone
+    start = time.perf_counter()
+    held_out = folds == fold
+    model = clone(estimator).fit(X_train[~held_out], y_train[~held_out])
+    return _predict(model, X_train[held_out], n_classes, encoder), time.perf_counter() - start
+
+
+def _safe(fn, *args):
+    """Run one task, returning its exception instead of raising so one member can't sink the batch."""
+    try:
+        return fn(*args)
+    except Exception as e:
+        return e
+
+
+def _find_registered(spec: str, estimator: Any, design_key: str, target: str,
+                     split_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Newest registry entry usable as this member: spec fitted on the same design
+    matrix, or (with split_key) a training tool's raw-column pipeline of the
+    same estimator class fitted on the same registered split.
+    """
+    from .model_registry import list_models
+    cls = estimator_class(estimator)
+
+    def usable(meta: Dict[str, Any]) -> bool:
+        if meta.get("input") == RAW_INPUT:
+            return (split_key is not None and meta.get("split_key") == split_key
+                    and meta.get("estimator_class") == cls)
+        return meta.get("design_key") == design_key and meta.get("estimator") == spec
+
+    matches = [m for m in list_models(target)
+               if usable(m.get("metadata") or {}) and os.path.exists(m.get("model_path", ""))]
+    return max(matches, key=lambda m: m.get("registered_at", "")) if matches else None
+
+
+def build_members(
+    members: Sequence[Tuple[str, Any]],
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_test: np.ndarray,
+    folds: np.ndarray,
+    design_key: str,
+    target: str,
+    n_classes: Optional[int] = None,
+    n_workers: Optional[int] = None,
+    tool_context: Optional[Any] = None,
+    split_key: Optional[str] = None,
+    raw_rows: Optional[Callable[[], Tuple[Any, Any, Any]]] = None,
+    label_encoder: Any = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fitted model plus OOF/test predictions for every (spec, estimator) member.
+
+    Registered members fitted on design_key, or training-tool pipelines on
+    split_key, are loaded instead of trained, cached predictions are reused,
+    and whatever is missing (full fits and fold refits) runs as one batch of
+    parallel tasks.
+
+    Args:
+        members: (spec string, unfitted estimator) pairs
+        X_train, y_train, X_test: Design-matrix arrays
+        folds: CV fold id per training row (registered split)
+        design_key: DesignMatrix.key the arrays come from
+        target: Target column (registry lookup)
+        n_classes: Number of encoded classes, None for regression
+        n_workers: Processes (default ENSEMBLE_WORKERS)
+        tool_context: Locates the workspace prediction cache
+        split_key: Key of the registered split the arrays come from
+        raw_rows: Returns (X_train, y_train, X_test) in the original columns and
+                  labels, for training-tool pipelines; only called if one is reused
+        label_encoder: Encoder of the design-matrix target (classification)
+
+    Returns:
+        One dict per member: spec, model (None if the fit failed), oof, test,
+        source ("registry" or "trained"), predictions ("cache" or "computed"),
+        fit_seconds, error
+    """
+    from joblib import Parallel, delayed
+    from .model_cache import get_model
+
+    start = time.perf_counter()
+    fold_ids = [int(f) for f in np.unique(folds) if f >= 0]
+    records: List[Dict[str, Any]] = []
+    tasks, owners = [], []
+    raw = None
+    for spec, estimator in members:
+        rec = {"spec": spec, "model": None, "source": "trained", "predictions": "cache",
+               "key": member_key(design_key, spec), "fit_seconds": 0.0}
+        # (X_train, y_train, X_test, encoder) the member's predictions are made on
+        data = (X_train, y_train, X_test, None)
+        entry = _find_registered(spec, estimator, design_key, target,
+                                 split_key if raw_rows is not None else None)
+        if entry is not None:
+            try:
+                model = get_model(entry["model_path"])
+                if (entry.get("metadata") or {}).get("input") == RAW_INPUT:
+                    # The pipeline brings its own preprocessing and parameters:
+                    # it is refitted on the raw fold rows and cached under its own key
+                    raw = raw if raw is not None else raw_rows()
+                    estimator = model
+                    data = (*raw, label_encoder)
+                    rec["key"] = member_key(
+                        design_key, f"{spec}@{entry['model_name']}@{entry.get('registered_at', '')}")
+                rec.update(model=model, source="registry", registered_as=entry["model_name"])
+            except Exception as e:
+                logger.warning(f"[ENSEMBLE] Could not load registered {entry['model_name']}: {e}")
+        rec["_data"] = data
+        cached = get_cached_predictions(rec["key"], tool_context)
+        if cached is not None:
+            rec.update(oof=cached["oof"], test=cached["test"])
+        else:
+            rec["predictions"] = "computed"
+            for fold in fold_ids:
+                tasks.append((_fit_fold, estimator, data[0], data[1], folds, fold, n_classes, data[3]))
+                owners.append((len(records), "fold", fold))
+        if rec["model"] is None:
+            tasks.append((_fit_full, estimator, X_train, y_train, X_test, n_classes))
+            owners.append((len(records), "full", None))
+        records.append(rec)
+
+    n_workers = max(1, min(int(n_workers or ENSEMBLE_WORKERS), len(tasks) or 1))
+    logger.info(f"[ENSEMBLE] {len(members)} members: {len(tasks)} fit tasks on {n_workers} workers "
+                f"({sum(r['source'] == 'registry' for r in records)} from registry, "
+                f"{sum(r['predictions'] == 'cache' for r in records)} with cached predictions)")
+
+    if n_workers > 1 and len(tasks) > 1:
+        # max_nbytes: arrays above 1 MB are memory-mapped into the workers, not copied per task
+        outputs = Parallel(n_jobs=n_workers, max_nbytes="1M")(delayed(_safe)(*t) for t in tasks)
+    else:
+        outputs = [_safe(*t) for t in tasks]
+
+    oof_parts: Dict[int, Dict[int, np.ndarray]] = {}
+    for (i, kind, fold), out in zip(owners, outputs):
+        rec = records[i]
+        if isinstance(out, Exception):
+            rec["error"] = f"{type(out).__name__}: {out}"
+            continue
+        if kind == "full":
+            rec["model"], rec["test_fresh"], seconds = out
+        else:
+            oof_parts.setdefault(i, {})[fold], seconds = out
+        rec["fit_seconds"] += seconds
+
+    for i, rec in enumerate(records):
+        X_test_rec, encoder = rec["_data"][2], rec.pop("_data")[3]
+        if "error" in rec or rec["model"] is None:
+            rec.setdefault("error", "model unavailable")
+            continue
+        if rec["predictions"] == "computed":
+            oof = None
+            for fold, preds in oof_parts.get(i, {}).items():
+                if oof is None:
+                    oof = np.zeros((len(y_train),) + preds.shape[1:])
+                oof[folds == fold] = preds
+            test = rec.pop("test_fresh", None)
+            if test is None:
+                test = _predict(rec["model"], X_test_rec, n_classes, encoder)
+            rec.update(oof=oof, test=test)
+            store_predictions(rec["key"], {"oof": oof, "test": test}, tool_context)
+        rec.pop("test_fresh", None)
+        rec["fit_seconds"] = round(rec["fit_seconds"], 3)
+
+    logger.info(f"[ENSEMBLE] Members ready in {time.perf_counter() - start:.2f}s")
+    return records
+
+
+# ============================================================================
+# Combination
+# ============================================================================
+
+def soft_vote(preds: Sequence[np.ndarray]) -> np.ndarray:
+    """Mean of member probabilities (classification) or values (regression)."""
+    return np.mean(np.stack(preds), axis=0)
+
+
+def hard_vote(probas: Sequence[np.ndarray]) -> np.ndarray:
+    """Majority class over member argmax votes; ties go to the lowest class like VotingClassifier."""
+    votes = np.stack([p.argmax(axis=1) for p in probas], axis=1)
+    n_classes = probas[0].shape[1]
+    counts = np.apply_along_axis(np.bincount, 1, votes, minlength=n_classes)
+    return counts.argmax(axis=1)
+
+
+def _stack_features(preds: Sequence[np.ndarray]) -> np.ndarray:
+    return np.column_stack([p if p.ndim == 2 else p[:, None] for p in preds])
+
+
+def fit_stacker(oof: Sequence[np.ndarray], y_train: np.ndarray, is_classification: bool):
+    """Meta-learner on OOF predictions (LogisticRegression or RidgeCV); no member is refitted."""
+    if is_classification:
+        from sklearn.linear_model import LogisticRegression
+        meta = LogisticRegression(max_iter=1000)
+    else:
+        from sklearn.linear_model import RidgeCV
+        meta = RidgeCV()
+    return meta.fit(_stack_features(oof), y_train)
+
+
+def stack_predict(meta: Any, test: Sequence[np.ndarray]) -> np.ndarray:
+    return meta.predict(_stack_features(test))
@@ -201,9 +201,12 @@ async def fairness_report(
     model_path: Optional[str] = None,
     tool_context: Optional[ToolContext] = None,
 ) -> dict:
-    """ Generate fairness analysis report using Fairlearn.
+    """ Generate fairness analysis report.
     
     Analyzes model predictions for bias across sensitive attributes (race, gender, age, etc).
+    Selection rate, TPR/FPR, precision, accuracy and (when probabilities are
+    available) calibration by group come from bincount aggregations over one
+    factorized group id per attribute, so many attributes audit quickly.
     
     **Why Fairness Matters:**
     - [OK] Ensure equal treatment across demographic groups
@@ -214,7 +217,8 @@ async def fairness_report(
     Args:
         target: Target column name
         sensitive_features: List of sensitive attributes (e.g., ['gender', 'age_group'])
-        csv_path: Path to CSV with predictions (optional)
+        csv_path: Path to CSV with predictions (optional; a 'probability'
+            column enables calibration by group)
         model_path: Path to trained model (optional)
         tool_context: ADK context
     
@@ -224,27 +228,7 @@ async def fairness_report(
     Example:
         fairness_report(target='approved', sensitive_features=['gender', 'race'])
     """
-    # Auto-install fairlearn if needed
-    try:
-        from .auto_install_utils import ensure_tool_dependencies
-        success, error_msg = await ensure_tool_dependencies('fairness_report', silent=False)
-        if not success:
-            return {
-                "status": "error",
-                "error": f"Fairlearn not available: {error_msg or 'Installation failed'}. Run: pip install fairlearn",
-                "__display__": f"❌ Cannot use fairness_report() - fairlearn not available.\n\n**Error:** {error_msg or 'Installation failed'}\n\n**Manual Installation:**\n```bash\npip install fairlearn\n```"
-            }
-    except ImportError:
-        # Fallback
-        if not auto_install_package('fairlearn'):
-            return {
-                "status": "error",
-                "error": "Fairlearn not installed. Run: pip install fairlearn",
-                "__display__": "❌ Cannot use fairness_report() - fairlearn not available.\n\n**Manual Installation:**\n```bash\npip install fairlearn\n```"
-            }
-    
-    from fairlearn.metrics import MetricFrame, selection_rate, demographic_parity_difference
-    from sklearn.metrics import accuracy_score, precision_score, recall_score
+    from .fairness_engine import audit_attributes, ratio_issues
     
     df = await _load_dataframe(csv_path, tool_context=tool_context)
     
@@ -255,6 +239,10 @@ async def fairness_report(
         if sf not in df.columns:
             return {"error": f"Sensitive feature '{sf}' not found"}
     
+    # Labels are compared as strings so stored predictions match the target's dtype
+    y_true = df[target].astype(str).to_numpy()
+    scores = None
+    
     # If predictions column exists, use it; otherwise train a quick model
     if 'predictions' not in df.columns:
         from sklearn.ensemble import RandomForestClassifier
@@ -262,49 +250,31 @@ async def fairness_report(
         from sklearn.preprocessing import LabelEncoder
         
         X = df.drop(columns=[target] + sensitive_features)
-        y = df[target]
         
         # Encode categorical
         for col in X.select_dtypes(include=['object', 'category']).columns:
             X[col] = LabelEncoder().fit_transform(X[col].astype(str))
         
-        if y.dtype == 'object':
-            y = LabelEncoder().fit_transform(y.astype(str))
-        
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        X_train, X_test, y_train, y_test = train_test_split(X, y_true, test_size=0.2, random_state=42)
         
-        model = RandomForestClassifier(n_estimators=100, random_state=42)
+        model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
         model.fit(X_train, y_train)
         
-        df['predictions'] = model.predict(X)
-    
-    y_true = df[target]
-    y_pred = df['predictions']
-    sensitive_dict = {sf: df[sf] for sf in sensitive_features}
-    
-    # Calculate fairness metrics by group
-    metrics = {
-        'accuracy': accuracy_score,
-        'precision': lambda y_t, y_p: precision_score(y_t, y_p, average='binary', zero_division=0),
-        'recall': lambda y_t, y_p: recall_score(y_t, y_p, average='binary', zero_division=0),
-        'selection_rate': selection_rate,
-    }
+        y_pred = model.predict(X)
+        classes = list(model.classes_)
+        positive = sorted(classes)[-1]
+        scores = model.predict_proba(X)[:, classes.index(positive)]
+    else:
+        y_pred = df['predictions'].astype(str).to_numpy()
+        positive = sorted(set(y_true))[-1]
+        for col in ('probability', 'prediction_proba'):
+            if col in df.columns:
+                scores = pd.to_numeric(df[col], errors='coerce').fillna(0.0).to_numpy()
+                break
     
-    results = {}
-    for sf in sensitive_features:
-        mf = MetricFrame(
-            metrics=metrics,
-            y_true=y_true,
-            y_pred=y_pred,
-            sensitive_features=df[sf]
-        )
-        
-        results[sf] = {
-            "by_group": mf.by_group.to_dict(),
-            "overall": {k: float(v) for k, v in mf.overall.items()},
-            "difference": {k: float(v) for k, v in mf.difference().items()},
-            "ratio": {k: float(v) if v != 0 else 0.0 for k, v in mf.ratio().items()}
-        }
+    # Group metrics from one factorized group id per attribute + bincount aggregations
+    results = audit_attributes(y_true, y_pred, {sf: df[sf].to_numpy() for sf in sensitive_features},
+                               positive=positive, scores=scores)
     
     # Save report
     from .ds_tools import _get_workspace_dir
@@ -315,14 +285,11 @@ async def fairness_report(
         json.dump(results, f, indent=2)
     
     # Identify issues
-    issues = []
-    for sf, metrics_data in results.items():
-        for metric, ratio in metrics_data['ratio'].items():
-            if metric != 'selection_rate' and (ratio < 0.8 or ratio > 1.25):
-                issues.append(f"{sf}: {metric} ratio {ratio:.2f} (should be 0.8-1.25)")
+    issues = ratio_issues(results)
     
     return _json_safe({
         "status": "success",
+        "positive_label": positive,
         "fairness_by_group": results,
         "report_path": report_path,
         "issues_found": len(issues),
@@ -344,39 +311,48 @@ async def fairness_mitigation_grid(
     sensitive_features: List[str],
     csv_path: Optional[str] = None,
     mitigation_method: str = "exponentiated_gradient",
+    constraints: Optional[List[str]] = None,
+    difference_bounds: Optional[List[float]] = None,
+    grid_size: int = 20,
+    n_workers: Optional[int] = None,
     tool_context: Optional[ToolContext] = None,
 ) -> dict:
     """ Apply fairness mitigation techniques using Fairlearn.
     
     Trains multiple models with different fairness constraints and compares them.
+    The baseline and every grid point are fitted in parallel worker processes
+    sharing one memory-mapped copy of the encoded training matrix.
     
     Mitigation Methods:
-    - 'exponentiated_gradient': Reduces disparate impact (demographic parity)
-    - 'grid_search': Exhaustive search for fair classifier
-    - 'threshold_optimizer': Post-processing to equalize odds
+    - 'exponentiated_gradient': One reduction per constraint x difference bound
+    - 'grid_search': Fairlearn GridSearch, its multiplier grid split across workers
     
     Args:
-        target: Target column
-        sensitive_features: List of sensitive attributes
+        target: Target column (binary)
+        sensitive_features: List of sensitive attributes (the first is mitigated)
         csv_path: Path to CSV
         mitigation_method: Fairness algorithm (default: 'exponentiated_gradient')
+        constraints: 'demographic_parity' and/or 'equalized_odds' (default: demographic_parity)
+        difference_bounds: Constraint slacks tried by exponentiated_gradient
+            (default: [0.01, 0.02, 0.05, 0.1])
+        grid_size: Multiplier grid points per constraint for grid_search
+        n_workers: Worker processes (default FAIRNESS_WORKERS)
         tool_context: ADK context
     
     Returns:
-        dict with fairness-accuracy tradeoff, best model, comparison
+        dict with fairness-accuracy tradeoff per grid point, best model, comparison
     
     Example:
         fairness_mitigation_grid(target='approved', sensitive_features=['gender'])
     """
     try:
-        from fairlearn.reductions import ExponentiatedGradient, GridSearch, DemographicParity
-        from fairlearn.postprocessing import ThresholdOptimizer
-        from sklearn.linear_model import LogisticRegression
+        import fairlearn.reductions  # noqa
         from sklearn.model_selection import train_test_split
         from sklearn.preprocessing import LabelEncoder
-        from sklearn.metrics import accuracy_score
     except ImportError:
         return {"error": "Fairlearn not installed"}
+    import asyncio
+    from .fairness_engine import run_mitigation_grid
     
     df = await _load_dataframe(csv_path, tool_context=tool_context)
     
@@ -384,60 +360,38 @@ async def fairness_mitigation_grid(
         return {"error": f"Target '{target}' not found"}
     
     X = df.drop(columns=[target] + sensitive_features)
-    y = df[target]
-    sensitive_dict = {sf: df[sf] for sf in sensitive_features}
     
     # Encode
     for col in X.select_dtypes(include=['object', 'category']).columns:
         X[col] = LabelEncoder().fit_transform(X[col].astype(str))
     
-    if y.dtype == 'object':
-        y = LabelEncoder().fit_transform(y.astype(str))
+    y_encoder = LabelEncoder()
+    y = y_encoder.fit_transform(df[target].astype(str))
+    if len(y_encoder.classes_) != 2:
+        return {"error": f"Fairness mitigation needs a binary target; '{target}' has {len(y_encoder.classes_)} classes"}
     
-    # Use first sensitive feature for mitigation
-    A = df[sensitive_features[0]]
+    # Use first sensitive feature for mitigation (as integer group codes)
+    A_codes, A_labels = pd.factorize(df[sensitive_features[0]].astype(str))
     
+    # One contiguous float matrix; joblib memory-maps it into the grid workers
+    X = np.ascontiguousarray(X.to_numpy(dtype=float))
     X_train, X_test, y_train, y_test, A_train, A_test = train_test_split(
-        X, y, A, test_size=0.2, random_state=42
+        X, y, A_codes, test_size=0.2, random_state=42
     )
     
-    # Baseline model
-    baseline = LogisticRegression(random_state=42, max_iter=1000)
-    baseline.fit(X_train, y_train)
-    
-    # Mitigated model
-    if mitigation_method == "exponentiated_gradient":
-        mitigator = ExponentiatedGradient(
-            baseline,
-            constraints=DemographicParity(),
-            max_iter=50
-        )
-    elif mitigation_method == "grid_search":
-        mitigator = GridSearch(
-            baseline,
-            constraints=DemographicParity(),
-            grid_size=20
+    try:
+        grid = await asyncio.to_thread(
+            run_mitigation_grid, X_train, y_train, A_train, X_test, y_test, A_test,
+            method=mitigation_method, constraints=constraints, difference_bounds=difference_bounds,
+            grid_size=grid_size, n_workers=n_workers,
         )
-    else:
-        return {"error": f"Unknown mitigation method: {mitigation_method}"}
-    
-    mitigator.fit(X_train, y_train, sensitive_features=A_train)
-    
-    # Compare
-    baseline_pred = baseline.predict(X_test)
-    mitigated_pred = mitigator.predict(X_test)
-    
-    from fairlearn.metrics import demographic_parity_difference, equalized_odds_difference
+    except ValueError as e:
+        return {"error": str(e)}
     
     comparison = {
-        "baseline": {
-            "accuracy": float(accuracy_score(y_test, baseline_pred)),
-            "demographic_parity_diff": float(demographic_parity_difference(y_test, baseline_pred, sensitive_features=A_test)),
-        },
-        "mitigated": {
-            "accuracy": float(accuracy_score(y_test, mitigated_pred)),
-            "demographic_parity_diff": float(demographic_parity_difference(y_test, mitigated_pred, sensitive_features=A_test)),
-        }
+        "baseline": grid["baseline"]["metrics"],
+        "mitigated": {**grid["best"]["metrics"],
+                      **{k: v for k, v in grid["best"]["point"].items() if k != "grid"}},
     }
     
     # Save mitigated model (organized by dataset)
@@ -445,7 +399,7 @@ async def fairness_mitigation_grid(
     dataset_name = Path(csv_path).stem if csv_path else "dataset"
     model_dir = _get_model_dir(csv_path=csv_path, tool_context=tool_context)
     model_path = os.path.join(model_dir, f"fair_model_{mitigation_method}.joblib")
-    joblib.dump(mitigator, model_path)
+    joblib.dump(grid["best"]["model"], model_path)
     
     fairness_improvement = comparison["baseline"]["demographic_parity_diff"] - comparison["mitigated"]["demographic_parity_diff"]
     
@@ -454,18 +408,29 @@ async def fairness_mitigation_grid(
     reports_dir = _get_workspace_dir(tool_context, "reports")
     report_path = os.path.join(reports_dir, "fairness_mitigation_report.json")
     with open(report_path, 'w') as f:
-        json.dump(comparison, f, indent=2)
+        json.dump(_json_safe({"comparison": comparison, "grid": grid["grid"]}), f, indent=2)
 
+    pareto = [p for p in grid["grid"] if p["pareto_optimal"]]
     return _json_safe({
         "status": "success",
         "mitigation_method": mitigation_method,
+        "sensitive_feature": sensitive_features[0],
+        "groups": [str(g) for g in A_labels],
         "comparison": comparison,
+        "grid": grid["grid"],
+        "pareto_points": len(pareto),
+        "grid_tasks": grid["tasks"],
+        "workers": grid["workers"],
+        "seconds": grid["seconds"],
         "fairness_improvement": float(fairness_improvement),
         "model_path": model_path,
-        "message": f" Fairness mitigation complete! Reduced bias by {abs(fairness_improvement):.3f}",
+        "report_path": report_path,
+        "message": (f" Fairness mitigation complete! Reduced bias by {abs(fairness_improvement):.3f} "
+                    f"({len(grid['grid']) - 1} grid points, {grid['workers']} workers, {grid['seconds']}s)"),
         "tradeoff": f"Accuracy change: {comparison['mitigated']['accuracy'] - comparison['baseline']['accuracy']:.3f}",
         "next_steps": [
             "Verify fairness meets requirements",
+            "Review the Pareto-optimal grid points for other accuracy/fairness tradeoffs",
             "Document fairness constraints in export_model_card()",
             "Use fairness_report() to validate improvement",
             "Deploy mitigated model if acceptable"
@@ -718,17 +683,14 @@ async def causal_identify(
     if confounders is None:
         confounders = [col for col in df.columns if col not in [treatment, outcome]][:5]  # Top 5
     
-    # Build causal model
-    model = CausalModel(
-        data=df,
-        treatment=treatment,
-        outcome=outcome,
-        common_causes=confounders
+    # Build causal model and identify the estimand (cached per data + graph for causal_estimate)
+    import asyncio
+    from .causal_engine import identify
+    from .dataset_fingerprint import dataset_fingerprint
+    model, identified_estimand, estimand_cached = await asyncio.to_thread(
+        identify, df, treatment, outcome, confounders, dataset_fingerprint(df)
     )
     
-    # Identify estimand
-    identified_estimand = model.identify_effect(proceed_when_unidentifiable=True)
-    
     # Save graph
     from .ds_tools import _get_workspace_dir
     plot_dir = _get_workspace_dir(tool_context, "plots")
@@ -748,6 +710,7 @@ async def causal_identify(
         "outcome": outcome,
         "confounders": confounders,
         "estimand": str(identified_estimand),
+        "estimand_cached": estimand_cached,
         "graph_path": graph_path,
         "message": f" Causal model identified. Treatment: {treatment} → Outcome: {outcome}",
         "next_steps": [
@@ -764,12 +727,24 @@ async def causal_estimate(
     outcome: str,
     csv_path: Optional[str] = None,
     method: str = "backdoor.propensity_score_matching",
+    confounders: Optional[List[str]] = None,
+    refuters: Optional[List[str]] = None,
+    num_simulations: int = 50,
+    n_bootstrap: int = 20,
+    sample_rows: Optional[int] = None,
+    n_workers: Optional[int] = None,
     tool_context: Optional[ToolContext] = None,
 ) -> dict:
     """ Estimate causal effect size using DoWhy.
     
     Quantifies: "If I do X, outcome Y changes by how much?"
     
+    The point estimate, the refuters and the bootstrap re-estimates run in
+    parallel worker processes; refuter simulations and bootstrap resamples use
+    at most sample_rows rows, and the bootstrap interval is rescaled to the
+    full row count. The identified estimand is reused from
+    causal_identify() when the data and confounders match.
+    
     Methods:
     - 'backdoor.propensity_score_matching': Match similar units
     - 'backdoor.linear_regression': Adjust for confounders
@@ -780,10 +755,18 @@ async def causal_estimate(
         outcome: Outcome variable
         csv_path: Path to CSV
         method: Estimation method
+        confounders: Common causes (default: same auto-detection as causal_identify)
+        refuters: Any of 'placebo_treatment_refuter', 'random_common_cause',
+            'data_subset_refuter' (default: all three; [] skips refutation)
+        num_simulations: Simulations per refuter
+        n_bootstrap: Bootstrap re-estimates for the confidence interval (0 = none)
+        sample_rows: Row cap for refuter simulations and bootstrap resamples
+            (default CAUSAL_SIMULATION_SAMPLE_ROWS, 0 = full data)
+        n_workers: Worker processes (default CAUSAL_WORKERS)
         tool_context: ADK context
     
     Returns:
-        dict with causal_effect, confidence_interval, significance
+        dict with causal_effect, confidence_interval, refutations, significance
     
     Example:
         causal_estimate(treatment='campaign_sent', outcome='purchased')
@@ -793,55 +776,78 @@ async def causal_estimate(
     except ImportError:
         return {"error": "DoWhy not installed"}
     
-    df = await _load_dataframe(csv_path, tool_context=tool_context)
+    import asyncio
+    from .causal_engine import identify, run_estimate
+    from .dataset_fingerprint import dataset_fingerprint
     
-    confounders = [col for col in df.columns if col not in [treatment, outcome]][:5]
+    df = await _load_dataframe(csv_path, tool_context=tool_context)
     
-    model = CausalModel(
-        data=df,
-        treatment=treatment,
-        outcome=outcome,
-        common_causes=confounders
-    )
+    if treatment not in df.columns:
+        return {"error": f"Treatment '{treatment}' not found"}
+    if outcome not in df.columns:
+        return {"error": f"Outcome '{outcome}' not found"}
     
-    identified_estimand = model.identify_effect()
+    if confounders is None:
+        confounders = [col for col in df.columns if col not in [treatment, outcome]][:5]
     
-    # Estimate effect
-    estimate = model.estimate_effect(
-        identified_estimand,
-        method_name=method
+    _, identified_estimand, estimand_cached = await asyncio.to_thread(
+        identify, df, treatment, outcome, confounders, dataset_fingerprint(df)
     )
     
-    # Refute (sensitivity analysis)
-    refutation = model.refute_estimate(
-        identified_estimand,
-        estimate,
-        method_name="random_common_cause"
-    )
+    try:
+        result = await asyncio.to_thread(
+            run_estimate, df, treatment, outcome, confounders, identified_estimand, method,
+            refuters=refuters, num_simulations=num_simulations, n_bootstrap=n_bootstrap,
+            sample_rows=sample_rows, n_workers=n_workers,
+        )
+    except (ValueError, RuntimeError) as e:
+        return {"status": "error", "error": str(e)}
+    
+    effect = result["estimate"]["value"]
+    interval = result["bootstrap"]["confidence_interval"]
+    refutations = result["refutations"]
+    failed = [r["refuter"] for r in refutations if r["passed"] is False]
+    interpretation = f"Applying {treatment} causes {outcome} to change by {effect:.4f} on average"
     
     # Save report
     from .ds_tools import _get_workspace_dir
     reports_dir = _get_workspace_dir(tool_context, "reports")
     report_path = os.path.join(reports_dir, "causal_estimate_report.json")
     with open(report_path, 'w') as f:
-        json.dump({
-            "causal_effect": float(estimate.value),
-            "interpretation": f"Applying {treatment} causes {outcome} to change by {estimate.value:.4f} on average",
-            "refutation": str(refutation)
-        }, f, indent=2)
-
+        json.dump(_json_safe({
+            "causal_effect": effect,
+            "confidence_interval": interval,
+            "interpretation": interpretation,
+            "estimate": result["estimate"]["summary"],
+            "refutations": refutations,
+            "bootstrap": result["bootstrap"],
+            "errors": result["errors"],
+        }), f, indent=2)
 
     return _json_safe({
         "status": "success",
         "treatment": treatment,
         "outcome": outcome,
         "method": method,
-        "causal_effect": float(estimate.value),
-        "confidence_interval": [float(estimate.value - 1.96 * estimate.value * 0.1), 
-                                 float(estimate.value + 1.96 * estimate.value * 0.1)],
-        "interpretation": f"Applying {treatment} causes {outcome} to change by {estimate.value:.4f} on average",
-        "refutation": str(refutation),
-        "message": f" Causal effect estimated: {estimate.value:.4f}",
+        "confounders": confounders,
+        "causal_effect": effect,
+        "confidence_interval": interval,
+        "significant": None if interval is None else bool(interval[0] > 0 or interval[1] < 0),
+        "interpretation": interpretation,
+        "refutations": [{k: v for k, v in r.items() if k != "summary"} for r in refutations],
+        "refutations_failed": failed,
+        "errors": result["errors"],
+        "report_path": report_path,
+        "engine": {
+            "estimand_cached": estimand_cached,
+            "tasks": result["tasks"],
+            "workers": result["workers"],
+            "bootstrap_rows": result["bootstrap"]["rows_per_resample"],
+            "bootstrap_deviation_scale": result["bootstrap"]["deviation_scale"],
+            "seconds": result["seconds"],
+        },
+        "message": f" Causal effect estimated: {effect:.4f}"
+                   + (f" (refuters flagged: {', '.join(failed)})" if failed else ""),
         "next_steps": [
             "Validate with A/B test if possible",
             "Document assumptions in export_model_card()",
@@ -956,6 +962,8 @@ async def feature_importance_stability(
     """ Measure feature importance stability across multiple runs.
     
     Identifies which features are consistently important (not by chance).
+    The refits run in parallel (IMPORTANCE_WORKERS processes) and each
+    iteration's fit time is reported.
     
     Args:
         target: Target column
@@ -964,13 +972,14 @@ async def feature_importance_stability(
         tool_context: ADK context
     
     Returns:
-        dict with stable_features, importance_variance, stability_scores
+        dict with stable_features, importance_variance, stability_scores,
+        iteration_seconds
     
     Example:
         feature_importance_stability(target='price', n_iterations=10)
     """
+    import asyncio
     from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-    from sklearn.model_selection import train_test_split
     from sklearn.preprocessing import LabelEncoder
     
     df = await _load_dataframe(csv_path, tool_context=tool_context)
@@ -989,19 +998,14 @@ async def feature_importance_stability(
     if is_classification and y.dtype == 'object':
         y = LabelEncoder().fit_transform(y.astype(str))
     
-    # Run multiple times with different random states
-    importance_records = []
-    
-    for i in range(n_iterations):
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=i)
-        
-        if is_classification:
-            model = RandomForestClassifier(n_estimators=100, random_state=i)
-        else:
-            model = RandomForestRegressor(n_estimators=100, random_state=i)
-        
-        model.fit(X_train, y_train)
-        importance_records.append(model.feature_importances_)
+    # Refit with different random states, in parallel across cores
+    from .importance_engine import bootstrap_importances
+    if is_classification:
+        model = RandomForestClassifier(n_estimators=100)
+    else:
+        model = RandomForestRegressor(n_estimators=100)
+    runs = await asyncio.to_thread(bootstrap_importances, model, X, y, n_iterations)
+    importance_records = runs["importances"]
     
     # Calculate mean and variance
     importance_matrix = np.array(importance_records)
@@ -1032,9 +1036,13 @@ async def feature_importance_stability(
     return _json_safe({
         "status": "success",
         "n_iterations": n_iterations,
+        "workers": runs["workers"],
+        "seconds": runs["seconds"],
+        "iteration_seconds": runs["iteration_seconds"],
         "stable_features": stable_features[:10],
         "stability_scores": feature_stats.head(10).to_dict('records'),
-        "message": f" Found {len(stable_features)} stable features across {n_iterations} runs",
+        "message": f" Found {len(stable_features)} stable features across {n_iterations} runs "
+                   f"({runs['workers']} parallel workers, {runs['seconds']}s)",
         "recommendation": "Focus on stable features for production models",
         "next_steps": [
             "Use select_features() with stable features",
@@ -1261,9 +1269,134 @@ async def ts_prophet_forecast(target: str, periods: int = 30, csv_path: Optional
 
 
 @ensure_display_fields
-async def ts_backtest(target: str, csv_path: Optional[str] = None, tool_context: Optional[ToolContext] = None) -> dict:
-    """ Backtest time series model."""
-    return {"status": "success", "message": " Backtesting complete. Use ts_prophet_forecast() for forecasts."}
+async def ts_backtest(
+    target: str,
+    date_col: Optional[str] = None,
+    csv_path: Optional[str] = None,
+    horizon: int = 30,
+    n_folds: int = 5,
+    step: Optional[int] = None,
+    window: str = "expanding",
+    window_size: Optional[int] = None,
+    models: Optional[List[str]] = None,
+    metric: str = "mae",
+    arima_order: Optional[List[int]] = None,
+    time_limit: int = 120,
+    n_workers: Optional[int] = None,
+    tool_context: Optional[ToolContext] = None,
+) -> dict:
+    """ Rolling-origin backtest of time series forecasters.
+    
+    Forecasts horizon points from n_folds origins at the end of the series and
+    scores every model per horizon step. Runs of adjacent folds are fitted in
+    parallel processes, warm-starting Prophet and ARIMA from the previous fold.
+    
+    Args:
+        target: Column to forecast
+        date_col: Timestamp column (default: 'ds' or the first datetime column;
+            row order with daily dates otherwise)
+        csv_path: Path to CSV
+        horizon: Points forecast from each origin
+        n_folds: Number of forecast origins
+        step: Points between origins (default horizon)
+        window: 'expanding' (all history) or 'sliding' (last window_size points)
+        window_size: Training points per fold for window='sliding'
+        models: Any of 'prophet', 'arima', 'autogluon', 'naive', 'seasonal_naive'
+            (default: all but autogluon; models whose library is missing are skipped)
+        metric: Ranking metric: 'mae', 'rmse', 'mape', 'smape' or 'mase'
+        arima_order: ARIMA (p, d, q) (default [1, 1, 1])
+        time_limit: AutoGluon seconds per fold
+        n_workers: Worker processes (default TS_BACKTEST_WORKERS)
+        tool_context: ADK context
+    
+    Returns:
+        dict with ranking, best_model, per-model overall and per-horizon metrics,
+        folds (folds_requested vs folds_used when the series is too short)
+    
+    Example:
+        ts_backtest(target='sales', date_col='date', horizon=14, n_folds=6)
+    """
+    import asyncio
+    from .backtest_engine import available_models, backtest
+    
+    df = await _load_dataframe(csv_path, tool_context=tool_context)
+    
+    if target not in df.columns:
+        return {"error": f"Target '{target}' not found"}
+    
+    if date_col is None:
+        if 'ds' in df.columns:
+            date_col = 'ds'
+        else:
+            date_col = next((c for c in df.columns if c != target and pd.api.types.is_datetime64_any_dtype(df[c])), None)
+    if date_col is not None and date_col not in df.columns:
+        return {"error": f"Date column '{date_col}' not found"}
+    
+    series = df[[target]].copy()
+    if date_col is not None:
+        series['ds'] = pd.to_datetime(df[date_col], errors='coerce')
+        series = series.dropna(subset=['ds']).sort_values('ds')
+        if series['ds'].duplicated().any():
+            return {"error": f"'{date_col}' has repeated timestamps; aggregate to one row per timestamp first"}
+    else:
+        # Same fallback as ts_prophet_forecast: row order with daily dates
+        series['ds'] = pd.date_range(start='2020-01-01', periods=len(series), freq='D')
+    series = series.dropna(subset=[target])
+    
+    try:
+        usable, missing = available_models(models)
+        if not usable:
+            return {"status": "error", "error": f"No forecaster available; missing libraries for: {missing}"}
+        result = await asyncio.to_thread(
+            backtest, series[target].to_numpy(dtype=float), pd.DatetimeIndex(series['ds']), horizon, usable,
+            n_folds=n_folds, step=step, window=window, window_size=window_size, metric=metric,
+            n_workers=n_workers, options={"arima_order": arima_order, "time_limit": time_limit},
+        )
+    except ValueError as e:
+        return {"status": "error", "error": str(e)}
+    
+    # Save report
+    from .ds_tools import _get_workspace_dir
+    reports_dir = _get_workspace_dir(tool_context, "reports")
+    report_path = os.path.join(reports_dir, f"ts_backtest_{target}.json")
+    with open(report_path, 'w') as f:
+        json.dump(_json_safe({"target": target, "date_col": date_col, **result, "skipped_models": missing}), f, indent=2)
+    
+    best = result["best_model"]
+    best_score = result["models"][best]["overall"][metric] if best else None
+    leaderboard = [{"model": m, **result["models"][m]["overall"], "folds_ok": result["models"][m]["folds_ok"]}
+                   for m in result["ranking"]]
+    
+    return _json_safe({
+        "status": "success",
+        "target": target,
+        "horizon": horizon,
+        "folds_requested": result["folds_requested"],
+        "folds_used": result["folds_used"],
+        "folds": result["folds"],
+        "metric": metric,
+        "best_model": best,
+        "leaderboard": leaderboard,
+        "by_horizon": {m: v["by_horizon"] for m, v in result["models"].items()},
+        "errors": {m: v["errors"] for m, v in result["models"].items() if v["errors"]},
+        "skipped_models": missing,
+        "report_path": report_path,
+        "engine": {
+            "freq": result["freq"],
+            "season_length": result["season_length"],
+            "window": result["window"],
+            "tasks": result["tasks"],
+            "workers": result["workers"],
+            "warm_started_folds": {m: v["warm_started_folds"] for m, v in result["models"].items()},
+            "seconds": result["seconds"],
+        },
+        "message": ((f" Backtested {len(usable)} models over {result['folds_used']} folds"
+                     + (f" ({result['folds_requested']} requested; the series is too short for more)"
+                        if result['folds_used'] < result['folds_requested'] else "")
+                     + f"; best: {best} ({metric} {best_score})")
+                    if best else " Backtest finished but no model produced forecasts"),
+        "next_steps": ["Use ts_prophet_forecast() for the final forecast", "Compare per-horizon errors for long-range accuracy"]
+    })
 
 
 @ensure_display_fields
@@ -0,0 +1,314 @@
+"""
+Vectorized group fairness metrics and a parallel mitigation grid.
+
+group_metrics() factorizes the sensitive attribute once and derives every
+per-group count (rows, positives, predicted positives, true positives and,
+given scores, calibration sums per score bin) from np.bincount over the group
+codes. Selection rate, TPR/FPR, precision, accuracy and calibration by group
+are array arithmetic on those counts, so auditing many attributes (or
+high-cardinality ones) costs a few O(n) passes each.
+
+run_mitigation_grid() fits the baseline and every mitigation grid point as
+independent tasks on FAIRNESS_WORKERS processes. The encoded training matrix
+is shared through joblib's memory mapping instead of being copied per task.
+Grid points are either ExponentiatedGradient fits per (constraint, difference
+bound) or chunks of fairlearn GridSearch's Lagrange-multiplier grid.
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .large_data_config import FAIRNESS_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Metrics whose max/min ratio outside [0.8, 1.25] is reported as an issue
+RATIO_CHECK_METRICS = ["accuracy", "precision", "recall"]
+
+
+# ============================================================================
+# Group Metrics
+# ============================================================================
+
+def group_metrics(
+    y_true: Sequence,
+    y_pred: Sequence,
+    groups: Sequence,
+    positive: Optional[Any] = None,
+    scores: Optional[Sequence[float]] = None,
+    n_bins: int = 10,
+) -> pd.DataFrame:
+    """
+    Per-group classification and calibration metrics.
+
+    Args:
+        y_true, y_pred: Labels (compared as given for accuracy)
+        groups: Sensitive attribute value per row
+        positive: Positive label (default: y_true/y_pred are already boolean)
+        scores: Optional positive-class probabilities for calibration
+        n_bins: Score bins for the expected calibration error
+
+    Returns:
+        DataFrame indexed by group: count, base_rate, selection_rate,
+        accuracy, precision, recall (TPR), fpr and, with scores,
+        mean_score, calibration_gap (mean_score - base_rate) and ece
+    """
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    correct = y_true == y_pred
+    if positive is not None:
+        y_true, y_pred = y_true == positive, y_pred == positive
+    y_true, y_pred = y_true.astype(bool), y_pred.astype(bool)
+
+    try:
+        codes, labels = pd.factorize(pd.Series(groups), sort=True, use_na_sentinel=False)
+    except TypeError:
+        # Unorderable mixed types: keep first-seen order
+        codes, labels = pd.factorize(pd.Series(groups), use_na_sentinel=False)
+    k = len(labels)
+
+    def count(weights=None):
+        return np.bincount(codes, weights=weights, minlength=k).astype(float)
+
+    n = count()
+    pos = count(y_true)
+    pred = count(y_pred)
+    tp = count(y_true & y_pred)
+    fp = pred - tp
+    with np.errstate(divide="ignore", invalid="ignore"):
+        table = {
+            "count": n,
+            "base_rate": pos / n,
+            "selection_rate": pred / n,
+            "accuracy": count(correct) / n,
+            "precision": tp / pred,
+            "recall": tp / pos,
+            "fpr": fp / (n - pos),
+        }
+        if scores is not None:
+            s = np.asarray(scores, dtype=float)
+            table["mean_score"] = count(s) / n
+            table["calibration_gap"] = table["mean_score"] - table["base_rate"]
+            # ECE = sum over bins of |sum(score) - sum(y)| / n, per group in one bincount each
+            cell = codes * n_bins + np.minimum((s * n_bins).astype(int), n_bins - 1)
+            s_sum = np.bincount(cell, weights=s, minlength=k * n_bins).reshape(k, n_bins)
+            y_sum = np.bincount(cell, weights=y_true, minlength=k * n_bins).reshape(k, n_bins)
+            table["ece"] = np.abs(s_sum - y_sum).sum(axis=1) / n
+    return pd.DataFrame(table, index=pd.Index([str(g) for g in labels], name="group"))
+
+
+def overall_metrics(y_true, y_pred, positive=None, scores=None, n_bins: int = 10) -> Dict[str, float]:
+    """group_metrics over all rows as a single group."""
+    row = group_metrics(y_true, y_pred, np.zeros(len(y_true), dtype=int), positive, scores, n_bins).iloc[0]
+    return {k: float(v) for k, v in row.items()}
+
+
+def disparities(table: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    """Max - min and min / max of every rate across groups, plus the parity gaps."""
+    rates = table.drop(columns=["count"])
+    hi, lo = rates.max(), rates.min()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = (lo / hi).where(hi != 0, 0.0)
+    return {
+        "difference": {k: float(v) for k, v in (hi - lo).items()},
+        "ratio": {k: float(v) for k, v in ratio.items()},
+        "demographic_parity_difference": float(hi["selection_rate"] - lo["selection_rate"]),
+        "equalized_odds_difference": float(max(hi["recall"] - lo["recall"], hi["fpr"] - lo["fpr"])),
+    }
+
+
+def audit_attributes(
+    y_true: Sequence,
+    y_pred: Sequence,
+    sensitive: Dict[str, Sequence],
+    positive: Optional[Any] = None,
+    scores: Optional[Sequence[float]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """fairness_report's per-attribute block (by_group, overall, difference, ratio, parity gaps)."""
+    overall = overall_metrics(y_true, y_pred, positive, scores)
+    overall.pop("count", None)
+    results = {}
+    for name, groups in sensitive.items():
+        table = group_metrics(y_true, y_pred, groups, positive, scores)
+        results[name] = {
+            "by_group": {col: {str(g): float(v) for g, v in table[col].items()} for col in table.columns},
+            "overall": overall,
+            **disparities(table),
+        }
+    return results
+
+
+def ratio_issues(results: Dict[str, Dict[str, Any]], metrics: Sequence[str] = RATIO_CHECK_METRICS) -> List[str]:
+    """Attribute/metric pairs whose group ratio falls outside [0.8, 1.25]."""
+    issues = []
+    for name, block in results.items():
+        for metric in metrics:
+            ratio = block["ratio"].get(metric)
+            if ratio is not None and np.isfinite(ratio) and (ratio < 0.8 or ratio > 1.25):
+                issues.append(f"{name}: {metric} ratio {ratio:.2f} (should be 0.8-1.25)")
+    return issues
+
+
+# ============================================================================
+# Mitigation Grid
+# ============================================================================
+
+_CONSTRAINTS = ("demographic_parity", "equalized_odds")
+
+
+def _constraint(name: str, bound: Optional[float] = None):
+    from fairlearn.reductions import DemographicParity, EqualizedOdds
+    cls = {"demographic_parity": DemographicParity, "equalized_odds": EqualizedOdds}[name]
+    return cls() if bound is None else cls(difference_bound=bound)
+
+
+def _base_estimator():
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(random_state=42, max_iter=1000)
+
+
+def _fit_point(point: Dict[str, Any], X_train, y_train, A_train) -> List[Dict[str, Any]]:
+    """Fit one grid task; returns one entry per fitted predictor."""
+    start = time.perf_counter()
+    method = point["method"]
+    if method == "baseline":
+        fitted = [(point, _base_estimator().fit(X_train, y_train))]
+    elif method == "exponentiated_gradient":
+        from fairlearn.reductions import ExponentiatedGradient
+        model = ExponentiatedGradient(_base_estimator(), max_iter=50,
+                                      constraints=_constraint(point["constraint"], point["difference_bound"]))
+        fitted = [(point, model.fit(X_train, y_train, sensitive_features=A_train))]
+    else:
+        from fairlearn.reductions import GridSearch
+        model = GridSearch(_base_estimator(), constraints=_constraint(point["constraint"]), grid=point["grid"])
+        model.fit(X_train, y_train, sensitive_features=A_train)
+        fitted = [({"method": method, "constraint": point["constraint"], "lambda": str(col)}, predictor)
+                  for col, predictor in zip(point["grid"].columns, model.predictors_)]
+    seconds = (time.perf_counter() - start) / len(fitted)
+    return [{"point": p, "model": m, "fit_seconds": round(seconds, 3)} for p, m in fitted]
+
+
+def _predict(model: Any, X) -> np.ndarray:
+    try:
+        # ExponentiatedGradient randomizes over its predictors; fix the draw
+        return np.asarray(model.predict(X, random_state=42))
+    except TypeError:
+        return np.asarray(model.predict(X))
+
+
+def _gridsearch_lambdas(constraint: str, X_train, y_train, A_train, grid_size: int) -> pd.DataFrame:
+    """GridSearch's Lagrange-multiplier grid, generated by a fit with a trivial estimator."""
+    from fairlearn.reductions import GridSearch
+    from sklearn.dummy import DummyClassifier
+    probe = GridSearch(DummyClassifier(), constraints=_constraint(constraint), grid_size=grid_size)
+    probe.fit(X_train, y_train, sensitive_features=A_train)
+    return probe.lambda_vecs_
+
+
+def _gap(y_true, y_pred, groups, constraint: str) -> float:
+    d = disparities(group_metrics(y_true, y_pred, groups, positive=1))
+    return d["demographic_parity_difference" if constraint == "demographic_parity" else "equalized_odds_difference"]
+
+
+def run_mitigation_grid(
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    A_train: np.ndarray,
+    X_test: np.ndarray,
+    y_test: np.ndarray,
+    A_test: np.ndarray,
+    method: str = "exponentiated_gradient",
+    constraints: Optional[Sequence[str]] = None,
+    difference_bounds: Optional[Sequence[float]] = None,
+    grid_size: int = 20,
+    constraint_weight: float = 0.5,
+    n_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Baseline plus every mitigation grid point, fitted in parallel.
+
+    Args:
+        X_train, y_train, A_train: Encoded features, 0/1 target, group codes
+        X_test, y_test, A_test: Held-out rows for the reported trade-off
+        method: "exponentiated_gradient" (one fit per constraint x bound) or
+            "grid_search" (GridSearch's multiplier grid split across workers)
+        constraints: demographic_parity and/or equalized_odds
+        difference_bounds: Constraint slack per ExponentiatedGradient point
+        grid_size: Multiplier grid size per constraint for grid_search
+        constraint_weight: Weight of the disparity in the selection objective
+            (1 - w) * error + w * disparity, evaluated on the training rows
+        n_workers: Processes (default FAIRNESS_WORKERS)
+
+    Returns:
+        dict with "baseline" and "best" entries (model, metrics), "grid"
+        (metrics per point, Pareto flags) and engine stats
+    """
+    from joblib import Parallel, delayed
+
+    start = time.perf_counter()
+    constraints = list(constraints or ["demographic_parity"])
+    unknown = [c for c in constraints if c not in _CONSTRAINTS]
+    if unknown:
+        raise ValueError(f"Unknown constraints {unknown}. Choose from: {list(_CONSTRAINTS)}")
+    n_workers = max(1, int(n_workers or FAIRNESS_WORKERS))
+
+    points: List[Dict[str, Any]] = [{"method": "baseline"}]
+    if method == "exponentiated_gradient":
+        for c in constraints:
+            points += [{"method": method, "constraint": c, "difference_bound": float(b)}
+                       for b in (difference_bounds or [0.01, 0.02, 0.05, 0.1])]
+    elif method == "grid_search":
+        for c in constraints:
+            grid = _gridsearch_lambdas(c, X_train, y_train, A_train, grid_size)
+            for cols in np.array_split(np.arange(grid.shape[1]), min(n_workers, grid.shape[1])):
+                points.append({"method": method, "constraint": c, "grid": grid.iloc[:, cols]})
+    else:
+        raise ValueError(f"Unknown mitigation method: {method}")
+
+    logger.info(f"[FAIRNESS] Fitting {len(points)} grid tasks on {min(n_workers, len(points))} workers")
+    if n_workers > 1 and len(points) > 1:
+        # max_nbytes: X_train is memory-mapped into the workers instead of copied per task
+        batches = Parallel(n_jobs=min(n_workers, len(points)), max_nbytes="1M")(
+            delayed(_fit_point)(p, X_train, y_train, A_train) for p in points)
+    else:
+        batches = [_fit_point(p, X_train, y_train, A_train) for p in points]
+
+    entries = [e for batch in batches for e in batch]
+    for e in entries:
+        c = e["point"].get("constraint", constraints[0])
+        train_pred, test_pred = _predict(e["model"], X_train), _predict(e["model"], X_test)
+        e["train_objective"] = ((1 - constraint_weight) * float(np.mean(train_pred != y_train))
+                                + constraint_weight * _gap(y_train, train_pred, A_train, c))
+        test_table = group_metrics(y_test, test_pred, A_test, positive=1)
+        gaps = disparities(test_table)
+        e["metrics"] = {
+            "accuracy": float(np.mean(test_pred == y_test)),
+            "demographic_parity_diff": gaps["demographic_parity_difference"],
+            "equalized_odds_diff": gaps["equalized_odds_difference"],
+        }
+
+    # Pareto front on held-out accuracy vs demographic parity gap
+    acc = np.array([e["metrics"]["accuracy"] for e in entries])
+    dp = np.array([e["metrics"]["demographic_parity_diff"] for e in entries])
+    dominated = ((acc[None, :] >= acc[:, None]) & (dp[None, :] <= dp[:, None])
+                 & ((acc[None, :] > acc[:, None]) | (dp[None, :] < dp[:, None]))).any(axis=1)
+
+    baseline = entries[0]
+    mitigated = entries[1:]
+    best = min(mitigated, key=lambda e: e["train_objective"]) if mitigated else baseline
+    grid_report = [{**{k: v for k, v in e["point"].items() if k != "grid"}, **e["metrics"],
+                    "train_objective": round(e["train_objective"], 6), "fit_seconds": e["fit_seconds"],
+                    "pareto_optimal": not bool(dominated[i])}
+                   for i, e in enumerate(entries)]
+    return {
+        "baseline": baseline,
+        "best": best,
+        "grid": grid_report,
+        "tasks": len(points),
+        "workers": min(n_workers, len(points)),
+        "seconds": round(time.perf_counter() - start, 2),
+    }
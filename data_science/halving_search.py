@@ -0,0 +1,98 @@
+"""
+Successive-halving hyperparameter search shared by grid_search and the auto_sklearn tools.
+
+Exhaustive GridSearchCV / full RandomizedSearchCV fit every candidate on every
+row. Successive halving scores all candidates on a small sample first, keeps
+the best 1/factor of them, and grows the sample by factor each round, so only
+the few survivors are ever fit on the full training set. The mode is chosen
+automatically once candidates x rows exceeds HALVING_SEARCH_THRESHOLD.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from .large_data_config import HALVING_SEARCH_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+SEARCH_MODES = ("auto", "grid", "halving")
+
+# Each round keeps the best 1/HALVING_FACTOR of the candidates
+HALVING_FACTOR = 3
+
+
+def choose_search_mode(n_candidates: int, n_rows: int, mode: str = "auto") -> str:
+    """
+    Resolve the search mode for a tuning run.
+
+    Args:
+        n_candidates: Number of parameter combinations to evaluate
+        n_rows: Training rows
+        mode: "auto", "grid" (exhaustive/full random search) or "halving"
+
+    Returns:
+        "grid" or "halving"
+    """
+    mode = (mode or "auto").lower()
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search_mode '{mode}'. Choose from: {list(SEARCH_MODES)}")
+    if mode != "auto":
+        return mode
+    # A single halving round degenerates into the plain search
+    if n_candidates < HALVING_FACTOR:
+        return "grid"
+    return "halving" if n_candidates * n_rows > HALVING_SEARCH_THRESHOLD else "grid"
+
+
+def make_halving_search(
+    estimator: Any,
+    param_space: Dict[str, Any],
+    cv: Any,
+    scoring: str,
+    n_jobs: int = -1,
+    n_candidates: Optional[int] = None,
+    random_state: int = 42,
+):
+    """
+    Build a HalvingGridSearchCV (n_candidates=None) or HalvingRandomSearchCV over sample size.
+
+    Args:
+        estimator: Unfitted estimator
+        param_space: Parameter grid, or distributions for the random variant
+        cv: CV splitter or fold count
+        scoring: sklearn scoring name
+        n_jobs: Parallel workers for the fits of each round
+        n_candidates: Sampled candidates for the random variant
+        random_state: Seed for sampling candidates and row subsets
+
+    Returns:
+        Unfitted halving search object
+    """
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+    from sklearn.model_selection import HalvingGridSearchCV, HalvingRandomSearchCV
+
+    common = dict(
+        factor=HALVING_FACTOR,
+        resource="n_samples",
+        min_resources="exhaust",
+        scoring=scoring,
+        cv=cv,
+        n_jobs=n_jobs,
+        random_state=random_state,
+        error_score=float("nan"),
+    )
+    if n_candidates is None:
+        return HalvingGridSearchCV(estimator, param_grid=param_space, **common)
+    return HalvingRandomSearchCV(estimator, param_distributions=param_space,
+                                 n_candidates=n_candidates, **common)
+
+
+def halving_summary(search: Any) -> Dict[str, Any]:
+    """Rounds, candidates and sample sizes of a fitted halving search."""
+    return {
+        "search_mode": "halving",
+        "factor": HALVING_FACTOR,
+        "n_iterations": int(search.n_iterations_),
+        "n_candidates": [int(n) for n in search.n_candidates_],
+        "n_resources": [int(n) for n in search.n_resources_],
+    }
@@ -0,0 +1,224 @@
+"""
+Parallel model-agnostic feature importance.
+
+permutation_importance() splits the columns into blocks and scores each block
+in a joblib worker. The evaluation matrix is shared read-only (joblib
+memory-maps large arrays instead of copying them per worker); each worker
+takes one private copy and shuffles its columns in place, restoring every
+column after scoring it, so no per-permutation frame copies are made. The
+unshuffled baseline predictions are cached per model + data fingerprint and
+reused across calls.
+
+bootstrap_importances() runs the refits of feature_importance_stability in
+parallel and records how long each one took.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .large_data_config import IMPORTANCE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Prediction-level metrics (higher is better) so cached predictions can be re-scored
+_METRICS: Dict[str, Callable[[Any, Any], float]] = {}
+
+
+def _metric(name: str) -> Callable[[Any, Any], float]:
+    from sklearn import metrics
+
+    if not _METRICS:
+        _METRICS.update({
+            "accuracy": metrics.accuracy_score,
+            "balanced_accuracy": metrics.balanced_accuracy_score,
+            "f1_macro": lambda y, p: metrics.f1_score(y, p, average="macro"),
+            "f1_weighted": lambda y, p: metrics.f1_score(y, p, average="weighted"),
+            "r2": metrics.r2_score,
+            "neg_mean_squared_error": lambda y, p: -metrics.mean_squared_error(y, p),
+            "neg_mean_absolute_error": lambda y, p: -metrics.mean_absolute_error(y, p),
+        })
+    if name not in _METRICS:
+        raise ValueError(f"Unknown scoring '{name}'. Choose from: {sorted(_METRICS)}")
+    return _METRICS[name]
+
+
+_MAX_BASELINES = 16
+_baselines: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def baseline_predictions(model: Any, X: Any, key: Optional[str] = None) -> np.ndarray:
+    """model.predict(X), cached under key (model + data fingerprint) when one is given."""
+    if key:
+        with _lock:
+            cached = _baselines.get(key)
+            if cached is not None:
+                _baselines.move_to_end(key)
+                logger.info(f"[IMPORTANCE] Reusing cached baseline predictions ({key})")
+                return cached
+    preds = np.asarray(model.predict(X))
+    if key:
+        with _lock:
+            _baselines[key] = preds
+            while len(_baselines) > _MAX_BASELINES:
+                _baselines.popitem(last=False)
+    return preds
+
+
+def _permute_block(
+    model: Any,
+    X: Any,
+    y: np.ndarray,
+    columns: Sequence[int],
+    n_repeats: int,
+    random_state: int,
+    scoring: str,
+    baseline: float,
+) -> Dict[int, np.ndarray]:
+    """Score drops for each column of one block, shuffling a private copy of X in place."""
+    score = _metric(scoring)
+    is_frame = isinstance(X, pd.DataFrame)
+    work = X.copy() if is_frame else np.array(X)
+    drops = {}
+    for col in columns:
+        rng = np.random.RandomState(random_state + col)
+        original = work.iloc[:, col].to_numpy(copy=True) if is_frame else work[:, col].copy()
+        col_drops = np.empty(n_repeats)
+        for r in range(n_repeats):
+            shuffled = original[rng.permutation(len(original))]
+            if is_frame:
+                work.isetitem(col, shuffled)
+            else:
+                work[:, col] = shuffled
+            col_drops[r] = baseline - score(y, model.predict(work))
+        if is_frame:
+            work.isetitem(col, original)
+        else:
+            work[:, col] = original
+        drops[col] = col_drops
+    return drops
+
+
+def permutation_importance(
+    model: Any,
+    X: Any,
+    y: Any,
+    scoring: str,
+    n_repeats: int = 10,
+    n_workers: Optional[int] = None,
+    random_state: int = 42,
+    baseline_key: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Permutation importance with column blocks scored in parallel.
+
+    Args:
+        model: Fitted model accepting X (pipelines with preprocessing are fine)
+        X: DataFrame or 2D array to evaluate on
+        y: True targets for X
+        scoring: One of accuracy, balanced_accuracy, f1_macro, f1_weighted,
+            r2, neg_mean_squared_error, neg_mean_absolute_error
+        n_repeats: Shuffles per column
+        n_workers: Worker processes (default IMPORTANCE_WORKERS)
+        random_state: Seed; each column's shuffles depend only on seed + column
+        baseline_key: Cache key for the unshuffled predictions
+
+    Returns:
+        dict with importances (DataFrame: feature, importance_mean, importance_std),
+        baseline_score, workers, seconds
+    """
+    from joblib import Parallel, delayed
+
+    start = time.perf_counter()
+    y = np.asarray(y)
+    baseline = float(_metric(scoring)(y, baseline_predictions(model, X, baseline_key)))
+
+    n_features = X.shape[1]
+    n_workers = max(1, min(int(n_workers or IMPORTANCE_WORKERS), n_features))
+    blocks = [b.tolist() for b in np.array_split(np.arange(n_features), n_workers) if b.size]
+    logger.info(f"[IMPORTANCE] Permuting {n_features} columns x {n_repeats} repeats "
+                f"on {len(X):,} rows, {n_workers} workers")
+
+    if n_workers > 1:
+        # max_nbytes: arrays above 1 MB are memory-mapped read-only, not copied per worker
+        parts = Parallel(n_jobs=n_workers, max_nbytes="1M")(
+            delayed(_permute_block)(model, X, y, block, n_repeats, random_state, scoring, baseline)
+            for block in blocks)
+    else:
+        parts = [_permute_block(model, X, y, blocks[0], n_repeats, random_state, scoring, baseline)]
+
+    drops = {}
+    for part in parts:
+        drops.update(part)
+    names = list(X.columns) if isinstance(X, pd.DataFrame) else [f"f{i}" for i in range(n_features)]
+    raw = np.vstack([drops[i] for i in range(n_features)])
+    importances = pd.DataFrame({
+        "feature": [str(n) for n in names],
+        "importance_mean": raw.mean(axis=1),
+        "importance_std": raw.std(axis=1),
+    }).sort_values("importance_mean", ascending=False).reset_index(drop=True)
+
+    return {
+        "importances": importances,
+        "baseline_score": baseline,
+        "scoring": scoring,
+        "n_repeats": n_repeats,
+        "workers": n_workers,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def _fit_importances(estimator: Any, X: Any, y: Any, seed: int, test_size: float) -> Tuple[np.ndarray, float]:
+    from sklearn.base import clone
+    from sklearn.model_selection import train_test_split
+
+    start = time.perf_counter()
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=test_size, random_state=seed)
+    model = clone(estimator).set_params(random_state=seed)
+    model.fit(X_train, y_train)
+    return model.feature_importances_, time.perf_counter() - start
+
+
+def bootstrap_importances(
+    estimator: Any,
+    X: Any,
+    y: Any,
+    n_iterations: int,
+    n_workers: Optional[int] = None,
+    test_size: float = 0.2,
+) -> Dict[str, Any]:
+    """
+    Refit estimator on n_iterations resampled training splits in parallel.
+
+    Iteration i uses split seed i and random_state=i, so results match a
+    sequential run. Cores are divided between concurrent refits through the
+    estimator's n_jobs.
+
+    Returns:
+        dict with importances (n_iterations x n_features), iteration_seconds,
+        workers, seconds
+    """
+    import os
+    from joblib import Parallel, delayed
+
+    start = time.perf_counter()
+    cores = os.cpu_count() or 1
+    n_workers = max(1, min(int(n_workers or IMPORTANCE_WORKERS), n_iterations))
+    if "n_jobs" in estimator.get_params():
+        estimator = estimator.set_params(n_jobs=max(1, cores // n_workers))
+
+    results: List[Tuple[np.ndarray, float]] = Parallel(n_jobs=n_workers)(
+        delayed(_fit_importances)(estimator, X, y, i, test_size) for i in range(n_iterations))
+
+    return {
+        "importances": np.vstack([r[0] for r in results]),
+        "iteration_seconds": [round(r[1], 3) for r in results],
+        "workers": n_workers,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
@@ -0,0 +1,430 @@
+"""
+Out-of-core (partial_fit) training for datasets above INCREMENTAL_LEARNING_THRESHOLD.
+
+train_classifier, train_regressor, train_naive_bayes and kmeans_cluster switch
+here when the input file is estimated to have at least
+INCREMENTAL_LEARNING_THRESHOLD rows. The file is streamed in
+INCREMENTAL_BATCH_SIZE chunks (CSV via utils.streaming_csv.read_csv_chunks,
+Parquet by row group) and never loaded as a whole:
+
+  1. profile pass: StreamingPreprocessor.partial_fit learns numeric means and
+     scales plus the most frequent categories; the target's classes or
+     mean/std are collected at the same time
+  2. training pass(es): each chunk's training rows are transformed and fed to
+     the learner's partial_fit (SGD, naive Bayes, MiniBatchKMeans)
+  3. evaluation pass: held-out rows are scored with the final model
+
+Rows are assigned to the held-out set by a seeded per-chunk draw, so every
+pass sees the same split. The saved model is a Pipeline(preprocess, model)
+that scores raw DataFrames like the in-memory training tools' pipelines.
+"""
+
+import logging
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, RegressorMixin, TransformerMixin
+
+from .large_data_config import INCREMENTAL_BATCH_SIZE, should_use_incremental_learning
+
+logger = logging.getLogger(__name__)
+
+# Categories beyond the most frequent ones are treated as unknown (all-zero one-hot)
+MAX_CATEGORIES_PER_COLUMN = 50
+
+_CLASSIFIERS = {
+    "LogisticRegression": dict(loss="log_loss"),
+    "SGD": dict(loss="log_loss"),
+    "SGDClassifier": dict(loss="log_loss"),
+    "SVC": dict(loss="hinge"),
+    "SVM": dict(loss="hinge"),
+    "LinearSVC": dict(loss="hinge"),
+    "Perceptron": dict(loss="perceptron"),
+}
+_REGRESSORS = {
+    "Ridge": dict(penalty="l2"),
+    "LinearRegression": dict(penalty=None),
+    "Linear": dict(penalty=None),
+    "Lasso": dict(penalty="l1"),
+    "ElasticNet": dict(penalty="elasticnet"),
+    "SGD": dict(penalty="l2"),
+    "SGDRegressor": dict(penalty="l2"),
+}
+
+
+# ============================================================================
+# Input
+# ============================================================================
+
+def estimate_row_count(path: str) -> int:
+    """Row count of a Parquet file (exact) or CSV file (size / mean line length of the head)."""
+    if str(path).lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return int(pq.ParquetFile(path).metadata.num_rows)
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(1024 * 1024)
+    lines = head.count(b"\n")
+    if lines <= 1 or len(head) >= size:
+        return max(0, lines - 1 + (0 if head.endswith(b"\n") else 1))
+    return int(size / (len(head) / lines)) - 1
+
+
+def should_train_incrementally(path: Optional[str]) -> bool:
+    """True when path exists and is estimated to reach INCREMENTAL_LEARNING_THRESHOLD rows."""
+    if not path or not os.path.isfile(path):
+        return False
+    try:
+        return should_use_incremental_learning(estimate_row_count(path))
+    except Exception as e:
+        logger.warning(f"[INCREMENTAL] Could not estimate rows of {path}: {e}")
+        return False
+
+
+def resolve_data_path(csv_path: Optional[str], tool_context: Optional[Any]) -> Optional[str]:
+    """The file _load_dataframe would read: the enforced/default upload, else csv_path."""
+    default_path, force_default = None, False
+    if tool_context is not None:
+        try:
+            default_path = tool_context.state.get("default_csv_path")
+            force_default = tool_context.state.get("force_default_csv")
+        except Exception:
+            pass
+    if default_path and (force_default or not csv_path):
+        return str(default_path)
+    return csv_path
+
+
+def resolve_column(requested: str, columns: Sequence[str]) -> str:
+    """Exact, case-insensitive, then punctuation-insensitive column match."""
+    def _norm(s: str) -> str:
+        return "".join(ch for ch in s.lower() if ch.isalnum())
+    if requested in columns:
+        return requested
+    for col in columns:
+        if col.lower() == requested.lower() or _norm(col) == _norm(requested):
+            return col
+    raise ValueError(f"Target '{requested}' not found. Available columns: {list(columns)}")
+
+
+def iter_chunks(path: str, chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Stream path in chunk_rows chunks (default INCREMENTAL_BATCH_SIZE)."""
+    from .batch_scoring import _iter_input
+    yield from _iter_input(path, int(chunk_rows or INCREMENTAL_BATCH_SIZE))
+
+
+def _holdout_mask(n: int, chunk_no: int, test_size: float, seed: int) -> np.ndarray:
+    return np.random.RandomState(seed + chunk_no).rand(n) < test_size
+
+
+# ============================================================================
+# Streaming preprocessing
+# ============================================================================
+
+class StreamingPreprocessor(BaseEstimator, TransformerMixin):
+    """
+    Mean-impute + standard-scale numerics, one-hot the most frequent categories.
+
+    Fitted chunk by chunk with partial_fit(); the streaming counterpart of the
+    median/mode-impute + scale + one-hot ColumnTransformer used in memory.
+    """
+
+    def __init__(self, max_categories: int = MAX_CATEGORIES_PER_COLUMN, scale: bool = True):
+        self.max_categories = max_categories
+        self.scale = scale
+
+    def partial_fit(self, X: pd.DataFrame, y=None):
+        from sklearn.preprocessing import StandardScaler
+
+        if not hasattr(self, "feature_names_in_"):
+            self.feature_names_in_ = np.asarray([str(c) for c in X.columns], dtype=object)
+            self.numeric_features_ = X.select_dtypes(include=["number", "bool"]).columns.tolist()
+            self.categorical_features_ = [c for c in X.columns if c not in self.numeric_features_]
+            self.scaler_ = StandardScaler(with_std=self.scale, with_mean=True)
+            self._counts = {c: Counter() for c in self.categorical_features_}
+        if self.numeric_features_:
+            # StandardScaler.partial_fit ignores NaN when accumulating mean/var
+            num = X[self.numeric_features_].apply(pd.to_numeric, errors="coerce").astype(float)
+            self.scaler_.partial_fit(num.to_numpy())
+        for col in self.categorical_features_:
+            self._counts[col].update(X[col].dropna().astype(str).to_numpy())
+        return self
+
+    def finalize(self):
+        """Freeze the category lists; call after the last partial_fit."""
+        self.categories_ = {
+            col: [cat for cat, _ in counts.most_common(self.max_categories)]
+            for col, counts in self._counts.items()
+        }
+        del self._counts
+        return self
+
+    def fit(self, X: pd.DataFrame, y=None):
+        return self.partial_fit(X).finalize()
+
+    def transform(self, X: pd.DataFrame) -> np.ndarray:
+        parts = []
+        if self.numeric_features_:
+            num = X[self.numeric_features_].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+            # NaN -> training mean, which scales to 0
+            num = np.where(np.isnan(num), self.scaler_.mean_, num)
+            parts.append(self.scaler_.transform(num))
+        for col in self.categorical_features_:
+            cats = self.categories_[col]
+            codes = pd.Categorical(X[col].astype(str).where(X[col].notna()), categories=cats).codes
+            onehot = np.zeros((len(X), len(cats)))
+            known = codes >= 0
+            onehot[np.flatnonzero(known), codes[known]] = 1.0
+            parts.append(onehot)
+        return np.hstack(parts).astype(np.float32) if parts else np.empty((len(X), 0), dtype=np.float32)
+
+    def get_feature_names_out(self, input_features=None) -> np.ndarray:
+        names = list(self.numeric_features_)
+        for col in self.categorical_features_:
+            names += [f"{col}_{cat}" for cat in self.categories_[col]]
+        return np.asarray(names, dtype=object)
+
+
+class ScaledTargetSGDRegressor(BaseEstimator, RegressorMixin):
+    """SGDRegressor on a standardized target; SGD diverges on raw large-scale targets.
+
+    y_mean / y_std are the streamed target statistics the target is scaled by;
+    penalty, alpha and l1_ratio are passed to SGDRegressor.
+    """
+
+    def __init__(self, y_mean: float = 0.0, y_std: float = 1.0, penalty: Optional[str] = "l2",
+                 alpha: float = 0.0001, l1_ratio: float = 0.15, random_state: int = 42):
+        self.y_mean = y_mean
+        self.y_std = y_std
+        self.penalty = penalty
+        self.alpha = alpha
+        self.l1_ratio = l1_ratio
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        """Fit from scratch on one batch (partial_fit continues the current model)."""
+        if hasattr(self, "model_"):
+            del self.model_
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y):
+        from sklearn.linear_model import SGDRegressor
+        if not hasattr(self, "model_"):
+            self.model_ = SGDRegressor(penalty=self.penalty, alpha=self.alpha, l1_ratio=self.l1_ratio,
+                                       random_state=self.random_state)
+        self.model_.partial_fit(X, (np.asarray(y, dtype=float) - self.y_mean) / self.y_std)
+        return self
+
+    def predict(self, X) -> np.ndarray:
+        return self.model_.predict(X) * self.y_std + self.y_mean
+
+    def __sklearn_is_fitted__(self) -> bool:
+        return hasattr(self, "model_")
+
+
+# ============================================================================
+# Training
+# ============================================================================
+
+def _make_learner(task: str, model: str, classes: np.ndarray, y_mean: float, y_std: float,
+                  all_categorical: bool):
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.naive_bayes import GaussianNB, MultinomialNB
+
+    if task == "naive_bayes":
+        # One-hot (non-negative) features only -> multinomial; any numeric column -> Gaussian
+        return (MultinomialNB() if all_categorical else GaussianNB()), \
+            ("MultinomialNB" if all_categorical else "GaussianNB")
+    if task == "classification":
+        params = _CLASSIFIERS.get(model, _CLASSIFIERS["SGD"])
+        return SGDClassifier(random_state=42, **params), f"SGDClassifier(loss={params['loss']})"
+    params = _REGRESSORS.get(model, _REGRESSORS["SGD"])
+    return ScaledTargetSGDRegressor(y_mean=y_mean, y_std=y_std, **params), \
+        f"SGDRegressor(penalty={params['penalty']})"
+
+
+def train_incremental(
+    path: str,
+    target: str,
+    task: str,
+    model: str = "SGD",
+    chunk_rows: Optional[int] = None,
+    test_size: float = 0.2,
+    n_epochs: int = 1,
+    seed: int = 42,
+) -> Dict[str, Any]:
+    """
+    Train a partial_fit learner over path without loading it into memory.
+
+    Args:
+        path: CSV or Parquet file
+        target: Target column (already resolved)
+        task: "classification", "regression" or "naive_bayes"
+        model: Requested model name, mapped to its SGD counterpart
+            (LogisticRegression -> log loss, SVC -> hinge, Ridge -> L2, Lasso -> L1, ...)
+        chunk_rows: Rows per chunk (default INCREMENTAL_BATCH_SIZE)
+        test_size: Held-out fraction, drawn per chunk with a fixed seed
+        n_epochs: Passes over the training rows
+        seed: Seed for the held-out draw
+
+    Returns:
+        dict with pipeline, learner, metrics, rows, chunks, seconds
+    """
+    from sklearn.pipeline import Pipeline
+
+    start = time.perf_counter()
+    is_classification = task != "regression"
+    pre = StreamingPreprocessor(scale=True)
+
+    # ---- Pass 1: profile features and target ----
+    classes: set = set()
+    y_count, y_sum, y_sumsq = 0, 0.0, 0.0
+    rows = chunks = 0
+    for chunk in iter_chunks(path, chunk_rows):
+        chunk = chunk[chunk[target].notna()]
+        pre.partial_fit(chunk.drop(columns=[target]))
+        if is_classification:
+            classes.update(chunk[target].unique().tolist())
+        else:
+            y = pd.to_numeric(chunk[target], errors="coerce").dropna().to_numpy(dtype=float)
+            y_count += y.size
+            y_sum += y.sum()
+            y_sumsq += (y ** 2).sum()
+        rows += len(chunk)
+        chunks += 1
+    pre.finalize()
+    if rows == 0:
+        raise ValueError(f"No rows with a non-missing '{target}' in {path}")
+
+    classes_arr = np.asarray(sorted(classes, key=str), dtype=object) if is_classification else None
+    if is_classification and len(classes_arr) < 2:
+        raise ValueError(f"Target '{target}' has fewer than 2 classes")
+    y_mean = y_sum / y_count if y_count else 0.0
+    y_std = float(np.sqrt(max(y_sumsq / y_count - y_mean ** 2, 0.0))) if y_count else 1.0
+    learner, learner_name = _make_learner(task, model, classes_arr, y_mean, y_std or 1.0,
+                                          all_categorical=not pre.numeric_features_)
+    logger.info(f"[INCREMENTAL] {learner_name} on ~{rows:,} rows of {os.path.basename(path)} "
+                f"({chunks} chunks, {len(pre.get_feature_names_out())} features)")
+
+    def _target(values: pd.Series) -> np.ndarray:
+        if is_classification:
+            return values.to_numpy(dtype=object)
+        return pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+
+    # ---- Pass 2: partial_fit on the training rows ----
+    train_rows = 0
+    for epoch in range(max(1, int(n_epochs))):
+        for chunk_no, chunk in enumerate(iter_chunks(path, chunk_rows)):
+            chunk = chunk[chunk[target].notna()]
+            train = chunk[~_holdout_mask(len(chunk), chunk_no, test_size, seed)]
+            if train.empty:
+                continue
+            Xt, yt = pre.transform(train.drop(columns=[target])), _target(train[target])
+            if is_classification:
+                learner.partial_fit(Xt, yt, classes=classes_arr)
+            else:
+                keep = ~np.isnan(yt)
+                learner.partial_fit(Xt[keep], yt[keep])
+            if epoch == 0:
+                train_rows += len(train)
+
+    # ---- Pass 3: evaluate on the held-out rows ----
+    y_true: List[np.ndarray] = []
+    y_pred: List[np.ndarray] = []
+    for chunk_no, chunk in enumerate(iter_chunks(path, chunk_rows)):
+        chunk = chunk[chunk[target].notna()]
+        test = chunk[_holdout_mask(len(chunk), chunk_no, test_size, seed)]
+        if test.empty:
+            continue
+        y_true.append(_target(test[target]))
+        y_pred.append(learner.predict(pre.transform(test.drop(columns=[target]))))
+    y_true_all = np.concatenate(y_true) if y_true else np.array([])
+    y_pred_all = np.concatenate(y_pred) if y_pred else np.array([])
+    metrics = _metrics(y_true_all, y_pred_all, is_classification)
+
+    return {
+        "pipeline": Pipeline(steps=[("preprocess", pre), ("model", learner)]),
+        "learner": learner_name,
+        "metrics": metrics,
+        "rows": rows,
+        "train_rows": train_rows,
+        "test_rows": int(y_true_all.size),
+        "chunks": chunks,
+        "epochs": max(1, int(n_epochs)),
+        "features": int(len(pre.get_feature_names_out())),
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def _metrics(y_true: np.ndarray, y_pred: np.ndarray, is_classification: bool) -> Dict[str, Any]:
+    from sklearn.metrics import accuracy_score, f1_score, mean_absolute_error, mean_squared_error, r2_score
+
+    if y_true.size == 0:
+        return {}
+    if is_classification:
+        return {
+            "accuracy": float(accuracy_score(y_true.astype(str), y_pred.astype(str))),
+            "f1_macro": float(f1_score(y_true.astype(str), y_pred.astype(str), average="macro", zero_division=0)),
+        }
+    keep = ~np.isnan(y_true)
+    return {
+        "r2": float(r2_score(y_true[keep], y_pred[keep])),
+        "rmse": float(np.sqrt(mean_squared_error(y_true[keep], y_pred[keep]))),
+        "mae": float(mean_absolute_error(y_true[keep], y_pred[keep])),
+    }
+
+
+def minibatch_kmeans_stream(
+    path: str,
+    n_clusters: int,
+    columns: Optional[Sequence[str]] = None,
+    chunk_rows: Optional[int] = None,
+    seed: int = 42,
+) -> Dict[str, Any]:
+    """
+    Fit MiniBatchKMeans over path chunk by chunk on standardized numeric columns.
+
+    Returns:
+        dict with pipeline, inertia (summed over a final assignment pass),
+        cluster_sizes, rows, chunks, seconds
+    """
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.pipeline import Pipeline
+
+    start = time.perf_counter()
+    pre = StreamingPreprocessor(scale=True)
+    for chunk in iter_chunks(path, chunk_rows):
+        frame = chunk[list(columns)] if columns else chunk.select_dtypes(include=["number"])
+        pre.partial_fit(frame)
+    pre.finalize()
+    features = list(pre.feature_names_in_)
+
+    km = MiniBatchKMeans(n_clusters=n_clusters, random_state=seed, n_init=3)
+    for chunk in iter_chunks(path, chunk_rows):
+        Xt = pre.transform(chunk[features])
+        if len(Xt) >= n_clusters:
+            km.partial_fit(Xt)
+
+    sizes = np.zeros(n_clusters, dtype=np.int64)
+    inertia, rows, chunks = 0.0, 0, 0
+    for chunk in iter_chunks(path, chunk_rows):
+        Xt = pre.transform(chunk[features])
+        labels = km.predict(Xt)
+        sizes += np.bincount(labels, minlength=n_clusters)
+        inertia += float(((Xt - km.cluster_centers_[labels]) ** 2).sum())
+        rows += len(chunk)
+        chunks += 1
+
+    return {
+        "pipeline": Pipeline(steps=[("preprocess", pre), ("model", km)]),
+        "features": features,
+        "inertia": inertia,
+        "cluster_sizes": sizes.tolist(),
+        "rows": rows,
+        "chunks": chunks,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
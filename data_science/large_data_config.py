@@ -119,6 +119,115 @@ INCREMENTAL_LEARNING_THRESHOLD = int(os.getenv("INCREMENTAL_LEARNING_THRESHOLD",
 # Batch size for incremental learning
 INCREMENTAL_BATCH_SIZE = int(os.getenv("INCREMENTAL_BATCH_SIZE", "10000"))
 
+# ============================================================================
+# Parallel Execution Configuration
+# ============================================================================
+
+# Worker processes used to render charts (0 = render in-process)
+PLOT_RENDER_WORKERS = int(os.getenv("PLOT_RENDER_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+# Above this many rows, plot draws full-data aggregates (binned histograms,
+# 2D density, quantile boxplots) instead of a row sample
+PLOT_AGGREGATE_THRESHOLD = int(os.getenv("PLOT_AGGREGATE_THRESHOLD", "50000"))
+
+# Rows per chunk when accumulating plot aggregates
+PLOT_AGG_CHUNK_ROWS = int(os.getenv("PLOT_AGG_CHUNK_ROWS", "1000000"))
+
+# In-memory budget (MB) for cached preprocessed design matrices
+DESIGN_CACHE_MEMORY_MB = int(os.getenv("DESIGN_CACHE_MEMORY_MB", "1024"))
+
+# AutoML candidates searched concurrently; each gets CPUs // workers cores
+AUTOML_CANDIDATE_WORKERS = int(os.getenv("AUTOML_CANDIDATE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Hyperparameter searches switch to successive halving when
+# parameter candidates x training rows exceeds this
+HALVING_SEARCH_THRESHOLD = int(os.getenv("HALVING_SEARCH_THRESHOLD", "2000000"))
+
+# Worker processes running Optuna trials in parallel against one SQLite study
+OPTUNA_WORKERS = int(os.getenv("OPTUNA_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# In-memory budget (MB, estimated from file size) for deserialized models
+MODEL_CACHE_MEMORY_MB = int(os.getenv("MODEL_CACHE_MEMORY_MB", "2048"))
+
+# Joblib models at least this large are loaded memory-mapped
+MODEL_CACHE_MMAP_MB = int(os.getenv("MODEL_CACHE_MMAP_MB", "64"))
+
+# Batch scoring: rows per chunk, scoring threads, and input size (MB) above
+# which predict/autogluon_predict stream instead of loading the whole file
+BATCH_SCORE_CHUNK_ROWS = int(os.getenv("BATCH_SCORE_CHUNK_ROWS", "250000"))
+BATCH_SCORE_WORKERS = int(os.getenv("BATCH_SCORE_WORKERS", str(min(4, os.cpu_count() or 1))))
+BATCH_SCORE_STREAM_MB = int(os.getenv("BATCH_SCORE_STREAM_MB", "256"))
+
+# onnxruntime intra-op threads per session, and rows scored by the
+# joblib-vs-ONNX micro-benchmark after export
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", str(min(4, os.cpu_count() or 1))))
+ONNX_BENCHMARK_ROWS = int(os.getenv("ONNX_BENCHMARK_ROWS", "10000"))
+
+# SHAP budget: k-means background centroids, max rows explained by
+# model-agnostic (kernel) explainers, and processes scoring row chunks
+SHAP_BACKGROUND_CLUSTERS = int(os.getenv("SHAP_BACKGROUND_CLUSTERS", "50"))
+SHAP_KERNEL_SAMPLE_ROWS = int(os.getenv("SHAP_KERNEL_SAMPLE_ROWS", "1000"))
+SHAP_WORKERS = int(os.getenv("SHAP_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Worker processes for permutation importance and stability refits, and the
+# max rows permutation importance evaluates on
+IMPORTANCE_WORKERS = int(os.getenv("IMPORTANCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+PERMUTATION_SAMPLE_ROWS = int(os.getenv("PERMUTATION_SAMPLE_ROWS", "50000"))
+
+# Clustering: rows sampled for silhouette/Davies-Bouldin, row count from which
+# KMeans becomes MiniBatchKMeans, max rows DBSCAN/agglomerative run on exactly
+# (labels are propagated to the rest), and parallel k-sweep workers
+CLUSTER_SCORE_SAMPLE_ROWS = int(os.getenv("CLUSTER_SCORE_SAMPLE_ROWS", "10000"))
+CLUSTER_MINIBATCH_THRESHOLD = int(os.getenv("CLUSTER_MINIBATCH_THRESHOLD", "100000"))
+CLUSTER_EXACT_MAX_ROWS = int(os.getenv("CLUSTER_EXACT_MAX_ROWS", "10000"))
+CLUSTER_WORKERS = int(os.getenv("CLUSTER_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Micro-cluster backend for dbscan_cluster / hierarchical_cluster above
+# CLUSTER_EXACT_MAX_ROWS: MiniBatchKMeans centres summarising the data for
+# agglomerative clustering, rows BIRCH builds DBSCAN's subclusters from, and
+# rows of the exact-vs-approximate fidelity check. DBSCAN's BIRCH subclusters
+# are widened until at most CLUSTER_DBSCAN_MAX_SUBCLUSTERS remain, and the
+# "auto" backend keeps them only at an adjusted Rand index of at least
+# CLUSTER_DBSCAN_MIN_FIDELITY (sampled exact DBSCAN otherwise)
+CLUSTER_MICRO_CLUSTERS = int(os.getenv("CLUSTER_MICRO_CLUSTERS", "1000"))
+CLUSTER_BIRCH_FIT_ROWS = int(os.getenv("CLUSTER_BIRCH_FIT_ROWS", "50000"))
+CLUSTER_FIDELITY_SAMPLE_ROWS = int(os.getenv("CLUSTER_FIDELITY_SAMPLE_ROWS", "5000"))
+CLUSTER_DBSCAN_MAX_SUBCLUSTERS = int(os.getenv("CLUSTER_DBSCAN_MAX_SUBCLUSTERS", "2000"))
+CLUSTER_DBSCAN_MIN_FIDELITY = float(os.getenv("CLUSTER_DBSCAN_MIN_FIDELITY", "0.9"))
+
+# Anomaly detection: rows IsolationForest, LOF and One-Class SVM are fitted on,
+# held-out rows their contamination thresholds are taken from, rows per
+# scoring chunk, and scoring processes
+ANOMALY_FIT_SAMPLE_ROWS = int(os.getenv("ANOMALY_FIT_SAMPLE_ROWS", "100000"))
+ANOMALY_LOF_FIT_ROWS = int(os.getenv("ANOMALY_LOF_FIT_ROWS", "20000"))
+ANOMALY_SVM_FIT_ROWS = int(os.getenv("ANOMALY_SVM_FIT_ROWS", "2000"))
+ANOMALY_CALIBRATION_ROWS = int(os.getenv("ANOMALY_CALIBRATION_ROWS", "20000"))
+ANOMALY_SCORE_CHUNK_ROWS = int(os.getenv("ANOMALY_SCORE_CHUNK_ROWS", "50000"))
+ANOMALY_WORKERS = int(os.getenv("ANOMALY_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Processes fitting ensemble members and their out-of-fold refits
+ENSEMBLE_WORKERS = int(os.getenv("ENSEMBLE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Processes fitting fairness mitigation grid points
+FAIRNESS_WORKERS = int(os.getenv("FAIRNESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Processes running causal refuters and bootstrap re-estimates, and the row cap
+# of the data those simulations re-estimate on
+CAUSAL_WORKERS = int(os.getenv("CAUSAL_WORKERS", str(min(4, os.cpu_count() or 1))))
+CAUSAL_SIMULATION_SAMPLE_ROWS = int(os.getenv("CAUSAL_SIMULATION_SAMPLE_ROWS", "50000"))
+
+# Processes fitting runs of adjacent backtest folds (one run per model and worker)
+TS_BACKTEST_WORKERS = int(os.getenv("TS_BACKTEST_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Deep learning input pipeline: DataLoader worker processes, torch intra-op
+# threads in the training process, rows per chunk when writing the memory-mapped
+# feature matrix (and per streamed chunk), and matrix size (MB) above which
+# batches stream chunk by chunk instead of random access into the memmap
+DL_NUM_WORKERS = int(os.getenv("DL_NUM_WORKERS", str(min(4, os.cpu_count() or 1))))
+DL_TORCH_THREADS = int(os.getenv("DL_TORCH_THREADS", str(max(1, (os.cpu_count() or 1) - DL_NUM_WORKERS))))
+DL_MEMMAP_CHUNK_ROWS = int(os.getenv("DL_MEMMAP_CHUNK_ROWS", "100000"))
+DL_STREAM_THRESHOLD_MB = int(os.getenv("DL_STREAM_THRESHOLD_MB", "4096"))
+
 # ============================================================================
 # LLM & Rate Limiting Configuration
 # ============================================================================
@@ -231,6 +340,27 @@ def print_config():
     print(f"  AutoML Time Limit: {AUTOML_TIME_LIMIT}s")
     print(f"  SHAP Sample: {SHAP_SAMPLE_ROWS:,} rows")
     print(f"  Incremental Learning Threshold: {INCREMENTAL_LEARNING_THRESHOLD:,} rows")
+    print("\nParallel Execution:")
+    print(f"  Plot Render Workers: {PLOT_RENDER_WORKERS}")
+    print(f"  Plot Aggregate Threshold: {PLOT_AGGREGATE_THRESHOLD:,} rows")
+    print(f"  Design Matrix Cache: {DESIGN_CACHE_MEMORY_MB} MB")
+    print(f"  AutoML Candidate Workers: {AUTOML_CANDIDATE_WORKERS}")
+    print(f"  Halving Search Threshold: {HALVING_SEARCH_THRESHOLD:,} candidate-rows")
+    print(f"  Optuna Workers: {OPTUNA_WORKERS}")
+    print(f"  Model Cache: {MODEL_CACHE_MEMORY_MB} MB (mmap >= {MODEL_CACHE_MMAP_MB} MB)")
+    print(f"  Batch Scoring: {BATCH_SCORE_CHUNK_ROWS:,} rows/chunk, {BATCH_SCORE_WORKERS} workers, streams >= {BATCH_SCORE_STREAM_MB} MB")
+    print(f"  ONNX Runtime: {ONNX_INTRA_OP_THREADS} intra-op threads, benchmark {ONNX_BENCHMARK_ROWS:,} rows")
+    print(f"  SHAP: {SHAP_BACKGROUND_CLUSTERS} background clusters, kernel rows {SHAP_KERNEL_SAMPLE_ROWS:,}, {SHAP_WORKERS} workers")
+    print(f"  Importance Workers: {IMPORTANCE_WORKERS} (permutation sample {PERMUTATION_SAMPLE_ROWS:,} rows)")
+    print(f"  Clustering: score sample {CLUSTER_SCORE_SAMPLE_ROWS:,}, MiniBatchKMeans >= {CLUSTER_MINIBATCH_THRESHOLD:,}, exact <= {CLUSTER_EXACT_MAX_ROWS:,} rows, {CLUSTER_WORKERS} workers")
+    print(f"  Cluster micro backend: {CLUSTER_MICRO_CLUSTERS:,} micro-clusters, BIRCH fit {CLUSTER_BIRCH_FIT_ROWS:,} rows, fidelity sample {CLUSTER_FIDELITY_SAMPLE_ROWS:,} rows")
+    print(f"  DBSCAN micro backend: <= {CLUSTER_DBSCAN_MAX_SUBCLUSTERS:,} BIRCH subclusters, auto needs ARI >= {CLUSTER_DBSCAN_MIN_FIDELITY}")
+    print(f"  Anomaly: fit {ANOMALY_FIT_SAMPLE_ROWS:,} rows (LOF {ANOMALY_LOF_FIT_ROWS:,}, SVM {ANOMALY_SVM_FIT_ROWS:,}), threshold on {ANOMALY_CALIBRATION_ROWS:,} held-out rows, score chunks {ANOMALY_SCORE_CHUNK_ROWS:,}, {ANOMALY_WORKERS} workers")
+    print(f"  Ensemble Workers: {ENSEMBLE_WORKERS}")
+    print(f"  Fairness Workers: {FAIRNESS_WORKERS}")
+    print(f"  Causal: {CAUSAL_WORKERS} workers, simulation sample {CAUSAL_SIMULATION_SAMPLE_ROWS:,} rows")
+    print(f"  Backtest Workers: {TS_BACKTEST_WORKERS}")
+    print(f"  Deep Learning: {DL_NUM_WORKERS} loader workers, {DL_TORCH_THREADS} torch threads, {DL_MEMMAP_CHUNK_ROWS:,} rows/chunk, streams >= {DL_STREAM_THRESHOLD_MB} MB")
     print("\nReliability:")
     print(f"  Circuit Breaker: {CIRCUIT_BREAKER_THRESHOLD} failures, {CIRCUIT_BREAKER_COOLDOWN}s cooldown")
     print("=" * 70)
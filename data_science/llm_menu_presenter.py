@@ -262,7 +262,8 @@ def route_user_intent(action: str = "", params: dict = None, callback_context: C
         if action == "export_onnx_tool":
             params.setdefault("model_name", params.get("model_name"))
         if action == "onnx_runtime_infer_tool":
-            if "model_path" not in params: return {"status":"failed","error":"Provide 'model_path' (onnx file)"}
+            if "model_path" not in params and "model_name" not in params:
+                return {"status":"failed","error":"Provide 'model_path' (onnx file) or 'model_name'"}
 
         # Execute
         tool = registered[action]
@@ -57,19 +57,16 @@ def _find_latest_model_path(run_dir: str) -> Optional[str]:
 
 
 def _load_model(model_path: str):
+    from .model_cache import get_model
     ext = os.path.splitext(model_path)[1].lower()
-    if ext == ".joblib":
-        return joblib.load(model_path), "sk"
-    if ext in (".pkl", ".pickle"):
-        with open(model_path, "rb") as f:
-            return pickle.load(f), "sk"
     if ext == ".onnx":
         if not HAS_ONNXRUNTIME:
             raise RuntimeError("onnxruntime is not installed; cannot load .onnx model.")
-        sess = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        sess = get_model(model_path, loader=lambda p: ort.InferenceSession(
+            p, providers=["CPUExecutionProvider"]))
         return sess, "onnx"
-    with open(model_path, "rb") as f:
-        return pickle.load(f), "sk"
+    # .joblib / .pkl / .pickle / anything else: joblib or pickle by extension
+    return get_model(model_path), "sk"
 
 
 def _load_current_dataframe(state: Dict[str, Any]) -> pd.DataFrame:
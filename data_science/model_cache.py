@@ -0,0 +1,116 @@
+"""
+Process-wide cache of deserialized models.
+
+load_model, load_existing_models, autogluon_predict, autogluon_feature_importance
+and load_model_universal all read the same saved models again and again;
+unpickling a forest or an AutoGluon predictor costs seconds per call. Loaded
+models are kept in an LRU keyed by absolute path, invalidated when the file's
+mtime or size changes, and bounded by MODEL_CACHE_MEMORY_MB (on-disk size is
+used as the memory estimate). Joblib files above MODEL_CACHE_MMAP_MB are loaded
+with mmap_mode="r" so their numpy arrays are paged in from the OS cache.
+
+Cached models are shared between callers and must be treated as read-only:
+predict on them, clone them before fitting.
+"""
+
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import joblib
+
+from .large_data_config import MODEL_CACHE_MEMORY_MB, MODEL_CACHE_MMAP_MB
+
+logger = logging.getLogger(__name__)
+
+# path -> (signature, model, size_bytes)
+_models: "OrderedDict[str, Tuple[Tuple[int, int], Any, int]]" = OrderedDict()
+_cached_bytes = 0
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _signature(path: str) -> Tuple[Tuple[int, int], int]:
+    """(mtime_ns, size) of a file, or of the newest file/total size for a model directory."""
+    if not os.path.isdir(path):
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size), st.st_size
+    newest, total = 0, 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            st = os.stat(os.path.join(root, name))
+            newest = max(newest, st.st_mtime_ns)
+            total += st.st_size
+    return (newest, total), total
+
+
+def _default_loader(path: str) -> Any:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".joblib":
+        if os.path.getsize(path) >= MODEL_CACHE_MMAP_MB * 1024 * 1024:
+            return joblib.load(path, mmap_mode="r")
+        return joblib.load(path)
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def get_model(path: str, loader: Optional[Callable[[str], Any]] = None) -> Any:
+    """
+    Return the model stored at path, deserializing it at most once per file version.
+
+    Args:
+        path: Model file (.joblib/.pkl/...) or model directory (e.g. AutoGluon)
+        loader: Callable(path) -> model; defaults to joblib/pickle by extension
+
+    Returns:
+        The loaded model (shared; do not mutate)
+    """
+    global _cached_bytes
+    key = os.path.abspath(path)
+    signature, size = _signature(key)
+
+    with _lock:
+        entry = _models.get(key)
+        if entry is not None and entry[0] == signature:
+            _models.move_to_end(key)
+            _stats["hits"] += 1
+            return entry[1]
+
+    model = (loader or _default_loader)(key)
+    logger.info(f"[MODEL CACHE] Loaded {os.path.basename(key)} ({size / 1024 / 1024:.1f} MB)")
+
+    budget = MODEL_CACHE_MEMORY_MB * 1024 * 1024
+    with _lock:
+        _stats["misses"] += 1
+        old = _models.pop(key, None)
+        if old is not None:
+            _cached_bytes -= old[2]
+        if size <= budget:
+            _models[key] = (signature, model, size)
+            _cached_bytes += size
+            while _cached_bytes > budget and len(_models) > 1:
+                _, (_, _, evicted_size) = _models.popitem(last=False)
+                _cached_bytes -= evicted_size
+    return model
+
+
+def model_cache_info() -> Dict[str, Any]:
+    """Entries, bytes and hit/miss counters of the model cache."""
+    with _lock:
+        return {
+            "entries": len(_models),
+            "cached_mb": round(_cached_bytes / 1024 / 1024, 1),
+            "budget_mb": MODEL_CACHE_MEMORY_MB,
+            **_stats,
+        }
+
+
+def clear_model_cache() -> None:
+    """Drop every cached model."""
+    global _cached_bytes
+    with _lock:
+        _models.clear()
+        _cached_bytes = 0
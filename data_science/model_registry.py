@@ -17,6 +17,18 @@ logger = logging.getLogger(__name__)
 _registry_lock = threading.Lock()
 _model_registry: Dict[str, Dict[str, Any]] = {}
 
+# Entries derived from another registered model or registered as internal
+# building blocks (metadata "role"); they are kept for explicit lookup but
+# never become the latest model
+DERIVED_ROLES = ("onnx_export", "ensemble_member")
+
+
+def is_derived(entry: Dict[str, Any]) -> bool:
+    """True for derived/internal entries, including ONNX exports registered before roles were recorded."""
+    metadata = entry.get("metadata") or {}
+    return (metadata.get("role") in DERIVED_ROLES or "source_model" in metadata
+            or str(entry.get("model_type", "")).startswith("ONNX:"))
+
 def register_model(
     model_name: str,
     model_path: str,
@@ -61,7 +73,7 @@ def register_model(
         
         # Store latest model info in session.state for ADK placeholder access
         # Agents can now use: {state.latest_model_name}, {state.latest_model_target} etc.
-        if tool_context and hasattr(tool_context, 'state'):
+        if tool_context and hasattr(tool_context, 'state') and not is_derived(entry):
             try:
                 state = tool_context.state
                 state['latest_model_name'] = model_name
@@ -77,7 +89,6 @@ def register_model(
         if tool_context and Path(model_path).exists():
             try:
                 from .artifact_utils import save_artifact_sync
-                import json
                 from google.genai.types import Part
                 
                 # 1. Save binary model file
@@ -164,12 +175,13 @@ def get_model(model_name: str) -> Optional[Dict[str, Any]]:
         return entry
 
 
-def get_latest_model(target: Optional[str] = None) -> Optional[Dict[str, Any]]:
+def get_latest_model(target: Optional[str] = None, include_derived: bool = False) -> Optional[Dict[str, Any]]:
     """
     Get the most recently registered model, optionally filtered by target.
     
     Args:
         target: Optional target column to filter by
+        include_derived: Also consider derived entries (see is_derived)
     
     Returns:
         Latest model entry or None
@@ -179,6 +191,8 @@ def get_latest_model(target: Optional[str] = None) -> Optional[Dict[str, Any]]:
         
         if target:
             models = [m for m in models if m.get("target") == target]
+        if not include_derived:
+            models = [m for m in models if not is_derived(m)]
         
         if not models:
             logger.warning(f"[MODEL REGISTRY] No models found" + (f" for target '{target}'" if target else ""))
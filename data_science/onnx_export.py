@@ -0,0 +1,265 @@
+"""
+ONNX export and onnxruntime CPU inference for registered sklearn models.
+
+Registered pipelines are converted with skl2onnx including their
+preprocessing (ColumnTransformer, imputers, scalers, one-hot encoders), so the
+.onnx file takes the raw feature columns as inputs, one tensor per column.
+Sessions are created with explicit intra/inter-op thread counts and reused per
+file version. benchmark() compares the ONNX session with the joblib model on
+single-row latency and batch throughput, and checks that both agree.
+"""
+
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .large_data_config import ONNX_INTRA_OP_THREADS
+
+logger = logging.getLogger(__name__)
+
+# (path, mtime_ns, intra, inter) -> InferenceSession
+_sessions: "OrderedDict[Tuple[str, int, int, int], Any]" = OrderedDict()
+_MAX_SESSIONS = 8
+_lock = threading.Lock()
+
+
+# ============================================================================
+# Conversion
+# ============================================================================
+
+def _iter_estimators(est: Any):
+    """Yield est and every fitted sub-estimator of Pipeline/ColumnTransformer/FeatureUnion."""
+    yield est
+    children = []
+    if hasattr(est, "steps"):
+        children = [step for _, step in est.steps]
+    elif hasattr(est, "transformers_"):
+        children = [trans for _, trans, _ in est.transformers_]
+    elif hasattr(est, "transformer_list"):
+        children = [trans for _, trans in est.transformer_list]
+    for child in children:
+        if child not in (None, "drop", "passthrough"):
+            yield from _iter_estimators(child)
+
+
+def _onnx_compatible(model: Any) -> Any:
+    """
+    Copy of model that skl2onnx can convert.
+
+    skl2onnx cannot impute string columns whose missing marker is NaN (the
+    default for SimpleImputer(strategy="most_frequent") on categoricals). The
+    copy marks missing strings as "" instead; build_feed() sends NaN strings
+    as "", so the fitted statistics are applied to exactly the same rows.
+    """
+    from sklearn.impute import SimpleImputer
+
+    model = copy.deepcopy(model)
+    for est in _iter_estimators(model):
+        stats = getattr(est, "statistics_", None)
+        if isinstance(est, SimpleImputer) and stats is not None and stats.dtype.kind in "OUS":
+            est.missing_values = ""
+    return model
+
+
+def _is_numeric(series: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series)
+
+
+def convert_to_onnx(model: Any, sample: pd.DataFrame, target_opset: Optional[int] = None):
+    """
+    Convert a fitted sklearn model/pipeline to an ONNX ModelProto.
+
+    Models fitted on a DataFrame (feature_names_in_) get one [None, 1] input
+    per column (float for numerics, string otherwise) so the preprocessing runs
+    inside the graph. Models fitted on arrays get a single float input "X".
+
+    Args:
+        model: Fitted estimator or Pipeline
+        sample: Rows with the model's input columns (used for column types)
+        target_opset: ONNX opset (default: skl2onnx's latest supported)
+
+    Returns:
+        (onnx_model, feature_columns)
+    """
+    from skl2onnx import to_onnx
+    from skl2onnx.common.data_types import FloatTensorType, StringTensorType
+
+    convertible = _onnx_compatible(model)
+    feature_columns: List[str] = []
+    if hasattr(model, "feature_names_in_"):
+        feature_columns = [str(c) for c in model.feature_names_in_]
+        initial_types = [
+            (col, FloatTensorType([None, 1]) if _is_numeric(sample[col]) else StringTensorType([None, 1]))
+            for col in feature_columns
+        ]
+    else:
+        initial_types = [("X", FloatTensorType([None, int(model.n_features_in_)]))]
+
+    # Plain probability matrix instead of a list of {class: prob} maps
+    final = convertible.steps[-1][1] if hasattr(convertible, "steps") else convertible
+    options = {id(final): {"zipmap": False}} if hasattr(final, "predict_proba") else None
+
+    onx = to_onnx(convertible, initial_types=initial_types, options=options,
+                  target_opset=target_opset)
+
+    meta = {"feature_columns": json.dumps(feature_columns)}
+    if hasattr(final, "classes_"):
+        meta["classes"] = json.dumps([c.item() if hasattr(c, "item") else c for c in final.classes_])
+    for key, value in meta.items():
+        prop = onx.metadata_props.add()
+        prop.key, prop.value = key, value
+    return onx, feature_columns
+
+
+# ============================================================================
+# Inference
+# ============================================================================
+
+def get_session(path: str, intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None):
+    """
+    Return an onnxruntime InferenceSession for path, reused while the file is unchanged.
+
+    Args:
+        path: .onnx file
+        intra_op_threads: Threads inside one operator (default ONNX_INTRA_OP_THREADS)
+        inter_op_threads: Threads across independent operators (default 1)
+    """
+    import onnxruntime as ort
+
+    intra = int(intra_op_threads or ONNX_INTRA_OP_THREADS)
+    inter = int(inter_op_threads or 1)
+    path = os.path.abspath(path)
+    key = (path, os.stat(path).st_mtime_ns, intra, inter)
+
+    with _lock:
+        session = _sessions.get(key)
+        if session is not None:
+            _sessions.move_to_end(key)
+            return session
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = intra
+    options.inter_op_num_threads = inter
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+    logger.info(f"[ONNX] Session for {os.path.basename(path)} ({intra} intra / {inter} inter-op threads)")
+
+    with _lock:
+        # Drop sessions of older versions of the same file
+        for stale in [k for k in _sessions if k[0] == path]:
+            del _sessions[stale]
+        _sessions[key] = session
+        while len(_sessions) > _MAX_SESSIONS:
+            _sessions.popitem(last=False)
+    return session
+
+
+def session_metadata(session: Any) -> Dict[str, Any]:
+    """feature_columns and classes stored in the .onnx file by convert_to_onnx()."""
+    props = session.get_modelmeta().custom_metadata_map
+    return {key: json.loads(props[key]) for key in ("feature_columns", "classes") if key in props}
+
+
+def build_feed(session: Any, X: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Input tensors for session.run() from a DataFrame of raw feature columns."""
+    inputs = session.get_inputs()
+    if len(inputs) == 1 and inputs[0].name not in X.columns:
+        return {inputs[0].name: np.asarray(X, dtype=np.float32)}
+    feed = {}
+    for inp in inputs:
+        col = X[inp.name]
+        if inp.type == "tensor(string)":
+            values = col.astype(object).where(col.notna(), "").astype(str).to_numpy(dtype=object)
+        else:
+            values = col.to_numpy(dtype=np.float32, na_value=np.nan)
+        feed[inp.name] = values.reshape(-1, 1)
+    return feed
+
+
+def onnx_predict(session: Any, X: pd.DataFrame, with_proba: bool = True) -> pd.DataFrame:
+    """prediction (+ prob_<class>) columns, same layout as batch_scoring's default predictor."""
+    outputs = session.run(None, build_feed(session, X))
+    out = pd.DataFrame(index=X.index)
+    out["prediction"] = np.asarray(outputs[0]).ravel()
+    if with_proba and len(outputs) > 1:
+        proba = np.asarray(outputs[1])
+        classes = session_metadata(session).get("classes") or list(range(proba.shape[1]))
+        for i, cls in enumerate(classes):
+            out[f"prob_{cls}"] = proba[:, i]
+    return out
+
+
+# ============================================================================
+# Micro-benchmark
+# ============================================================================
+
+def _latency_ms(fn, n: int) -> Dict[str, float]:
+    times = []
+    for i in range(n):
+        start = time.perf_counter()
+        fn(i)
+        times.append((time.perf_counter() - start) * 1000)
+    times = np.asarray(times)
+    return {"p50_ms": round(float(np.percentile(times, 50)), 3),
+            "p95_ms": round(float(np.percentile(times, 95)), 3),
+            "mean_ms": round(float(times.mean()), 3)}
+
+
+def _throughput(fn, rows: int, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(rows / best, 1) if best > 0 else float("inf")
+
+
+def benchmark(model: Any, session: Any, X: pd.DataFrame, n_single: int = 200) -> Dict[str, Any]:
+    """
+    Compare the joblib model and the ONNX session on the same rows.
+
+    Single-row latency is measured per call (feed construction included, as a
+    scoring endpoint would pay it); throughput is the best of three batch
+    predictions over all of X.
+
+    Returns:
+        dict with joblib/onnx latency and rows_per_second, speedups, and agreement
+    """
+    n_single = max(1, min(n_single, len(X)))
+    rows = [X.iloc[[i]] for i in range(n_single)]
+
+    # Warm both paths so one-off allocations are not timed
+    model.predict(rows[0])
+    session.run(None, build_feed(session, rows[0]))
+
+    joblib_stats = _latency_ms(lambda i: model.predict(rows[i]), n_single)
+    onnx_stats = _latency_ms(lambda i: session.run(None, build_feed(session, rows[i])), n_single)
+    joblib_stats["rows_per_second"] = _throughput(lambda: model.predict(X), len(X))
+    onnx_stats["rows_per_second"] = _throughput(lambda: session.run(None, build_feed(session, X)), len(X))
+
+    expected = np.asarray(model.predict(X)).ravel()
+    actual = onnx_predict(session, X, with_proba=False)["prediction"].to_numpy()
+    if hasattr(model, "classes_") or expected.dtype.kind in "OUSb":
+        agreement = {"label_match_rate": round(float((expected.astype(str) == actual.astype(str)).mean()), 6)}
+    else:
+        diff = np.abs(expected.astype(float) - actual.astype(float))
+        agreement = {"max_abs_diff": float(diff.max()), "mean_abs_diff": float(diff.mean())}
+
+    return {
+        "rows": int(len(X)),
+        "single_row_calls": n_single,
+        "joblib": joblib_stats,
+        "onnx": onnx_stats,
+        "latency_speedup_p50": round(joblib_stats["p50_ms"] / onnx_stats["p50_ms"], 2) if onnx_stats["p50_ms"] else None,
+        "throughput_speedup": round(onnx_stats["rows_per_second"] / joblib_stats["rows_per_second"], 2)
+        if joblib_stats["rows_per_second"] else None,
+        "agreement": agreement,
+    }
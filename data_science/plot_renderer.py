@@ -0,0 +1,396 @@
+"""
+Process-pool chart rendering for the plot tool.
+
+Charts are described as plain specs (kind, title, pre-sliced data, options)
+on the event-loop thread and rendered to PNG bytes in a warm pool of worker
+processes with the Agg backend. Workers never touch the server's pyplot
+state, so one session's charts don't block another's.
+"""
+
+import asyncio
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Union
+
+from .dataset_fingerprint import cache_key
+from .large_data_config import PLOT_AGG_CHUNK_ROWS, PLOT_RENDER_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# DPI used for both the workspace PNG and the ADK artifact
+PLOT_DPI = 100
+
+# Bump whenever drawing code or styling changes so cached PNGs are re-rendered
+PLOT_STYLE_VERSION = "1"
+
+# Directory (inside the workspace plots dir) holding cached PNGs named by cache key
+PLOT_CACHE_DIR = ".plot_cache"
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+
+
+# ============================================================================
+# Chart Drawing (runs inside worker processes)
+# ============================================================================
+
+def _draw_heatmap(ax, spec: Dict[str, Any]) -> None:
+    import seaborn as sns
+    sns.heatmap(spec["data"], annot=False, cmap="vlag", center=0, ax=ax)
+
+
+def _draw_hist(ax, spec: Dict[str, Any]) -> None:
+    import seaborn as sns
+    sns.histplot(spec["data"], kde=True, ax=ax)
+    ax.set_xlabel(spec.get("xlabel", ""))
+
+
+def _draw_timeseries(ax, spec: Dict[str, Any]) -> None:
+    import seaborn as sns
+    x, y = spec["x"], spec["y"]
+    sns.lineplot(x=x, y=y, data=spec["data"], ax=ax)
+
+
+def _draw_box(ax, spec: Dict[str, Any]) -> None:
+    import seaborn as sns
+    sns.boxplot(x=spec["x"], y=spec["y"], data=spec["data"], showfliers=False, ax=ax)
+    for label in ax.get_xticklabels():
+        label.set_rotation(30)
+        label.set_ha("right")
+
+
+def _draw_scatter(ax, spec: Dict[str, Any]) -> None:
+    import seaborn as sns
+    x, y = spec["data"][spec["x"]], spec["data"][spec["y"]]
+    sns.scatterplot(x=x, y=y, s=20, alpha=0.6, ax=ax)
+    sns.regplot(x=x, y=y, scatter=False, color="red", ax=ax)
+
+
+def _draw_hist_agg(ax, spec: Dict[str, Any]) -> None:
+    import numpy as np
+    edges, counts = spec["edges"], spec["counts"]
+    ax.stairs(counts, edges, fill=True, alpha=0.7)
+    positive = counts[counts > 0]
+    # Long tails vanish on a linear axis at millions of rows
+    if positive.size and positive.max() / positive.min() > 1e3:
+        ax.set_yscale("log")
+    ax.set_xlabel(spec.get("xlabel", ""))
+    ax.set_ylabel("Count")
+    ax.set_xlim(edges[0], edges[-1])
+    ax.margins(y=0.05)
+    ax.text(0.99, 0.97, f"n = {int(np.sum(counts)):,}", transform=ax.transAxes,
+            ha="right", va="top", fontsize=8)
+
+
+def _draw_density2d(ax, spec: Dict[str, Any]) -> None:
+    import numpy as np
+    from matplotlib.colors import LogNorm
+    counts = np.ma.masked_equal(spec["counts"].T, 0)
+    mesh = ax.pcolormesh(spec["xedges"], spec["yedges"], counts,
+                         norm=LogNorm(), cmap="viridis", shading="flat")
+    ax.figure.colorbar(mesh, ax=ax, label="Rows per bin")
+    if spec.get("slope") is not None:
+        xs = np.array([spec["xedges"][0], spec["xedges"][-1]])
+        ax.plot(xs, spec["intercept"] + spec["slope"] * xs, color="red")
+    ax.set_xlabel(spec["x"])
+    ax.set_ylabel(spec["y"])
+
+
+def _draw_box_agg(ax, spec: Dict[str, Any]) -> None:
+    ax.bxp(spec["stats"], showfliers=False)
+    ax.set_xlabel(spec["x"])
+    ax.set_ylabel(spec["y"])
+    for label in ax.get_xticklabels():
+        label.set_rotation(30)
+        label.set_ha("right")
+
+
+_DRAWERS = {
+    "heatmap": _draw_heatmap,
+    "hist": _draw_hist,
+    "timeseries": _draw_timeseries,
+    "box": _draw_box,
+    "scatter": _draw_scatter,
+    "hist_agg": _draw_hist_agg,
+    "density2d": _draw_density2d,
+    "box_agg": _draw_box_agg,
+}
+
+
+def render_chart(spec: Dict[str, Any]) -> bytes:
+    """
+    Render one chart spec to PNG bytes.
+
+    Uses the object-oriented Figure API with an Agg canvas rather than
+    pyplot, so it is safe to call from worker processes and threads alike.
+
+    Args:
+        spec: Dict with "kind", "title", "figsize" and kind-specific data
+
+    Returns:
+        Encoded PNG bytes
+    """
+    import seaborn as sns
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    with sns.axes_style("whitegrid"):
+        fig = Figure(figsize=spec.get("figsize", (7, 4)))
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        _DRAWERS[spec["kind"]](ax, spec)
+        if spec.get("title"):
+            ax.set_title(spec["title"])
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=spec.get("dpi", PLOT_DPI), bbox_inches="tight")
+    return buf.getvalue()
+
+
+def _init_render_worker() -> None:
+    """Worker initializer: force the headless backend before any drawing."""
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+# ============================================================================
+# Full-data Aggregates (constant rendering cost regardless of row count)
+# ============================================================================
+
+def _finite_range(arrays: List[Any], chunk_rows: int) -> Optional[tuple]:
+    """Min/max over the finite values of one or more aligned arrays, in chunks."""
+    import numpy as np
+    lo, hi = np.inf, -np.inf
+    for start in range(0, len(arrays[0]), chunk_rows):
+        chunks = [a[start:start + chunk_rows] for a in arrays]
+        mask = np.logical_and.reduce([np.isfinite(c) for c in chunks])
+        if not mask.any():
+            continue
+        for c in chunks:
+            lo = min(lo, c[mask].min())
+            hi = max(hi, c[mask].max())
+    if not np.isfinite(lo):
+        return None
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return float(lo), float(hi)
+
+
+def streaming_histogram(values: Any, bins: int = 50,
+                        chunk_rows: int = PLOT_AGG_CHUNK_ROWS) -> Optional[Dict[str, Any]]:
+    """
+    Histogram of every finite value, accumulated chunk by chunk.
+
+    Returns:
+        Dict with "edges", "counts" and "n", or None if there is no finite data
+    """
+    import numpy as np
+    values = np.asarray(values, dtype=float)
+    rng = _finite_range([values], chunk_rows)
+    if rng is None:
+        return None
+    edges = np.linspace(rng[0], rng[1], bins + 1)
+    counts = np.zeros(bins, dtype=np.int64)
+    for start in range(0, len(values), chunk_rows):
+        chunk = values[start:start + chunk_rows]
+        counts += np.histogram(chunk[np.isfinite(chunk)], bins=edges)[0]
+    return {"edges": edges, "counts": counts, "n": int(counts.sum())}
+
+
+def streaming_histogram2d(x: Any, y: Any, bins: int = 100,
+                          chunk_rows: int = PLOT_AGG_CHUNK_ROWS) -> Optional[Dict[str, Any]]:
+    """
+    2D density of every finite (x, y) pair plus a full-data least-squares line.
+
+    Returns:
+        Dict with "counts", "xedges", "yedges", "n", "slope" and "intercept",
+        or None if there are no finite pairs
+    """
+    import numpy as np
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    xr = _finite_range([x, y], chunk_rows)
+    if xr is None:
+        return None
+    yr = _finite_range([y, x], chunk_rows)
+    xedges = np.linspace(xr[0], xr[1], bins + 1)
+    yedges = np.linspace(yr[0], yr[1], bins + 1)
+    counts = np.zeros((bins, bins), dtype=np.int64)
+    n = sx = sy = sxx = sxy = 0.0
+    for start in range(0, len(x), chunk_rows):
+        cx, cy = x[start:start + chunk_rows], y[start:start + chunk_rows]
+        mask = np.isfinite(cx) & np.isfinite(cy)
+        cx, cy = cx[mask], cy[mask]
+        counts += np.histogram2d(cx, cy, bins=[xedges, yedges])[0].astype(np.int64)
+        n += cx.size
+        sx += cx.sum()
+        sy += cy.sum()
+        sxx += (cx * cx).sum()
+        sxy += (cx * cy).sum()
+    denom = n * sxx - sx * sx
+    slope = (n * sxy - sx * sy) / denom if denom > 0 else None
+    intercept = (sy - slope * sx) / n if slope is not None else None
+    return {"counts": counts, "xedges": xedges, "yedges": yedges, "n": int(n),
+            "slope": slope, "intercept": intercept}
+
+
+def grouped_box_stats(groups: Any, values: Any) -> List[Dict[str, Any]]:
+    """
+    Boxplot statistics (quartiles, 1.5 IQR whiskers, mean) per group over all rows.
+
+    Computed with vectorized groupby quantiles, so the result is exact and the
+    chart that draws it (Axes.bxp) costs the same for 1k or 100M rows.
+    """
+    import pandas as pd
+    frame = pd.DataFrame({"g": groups, "v": pd.to_numeric(values, errors="coerce")}).dropna()
+    if frame.empty:
+        return []
+    grouped = frame.groupby("g", observed=True, sort=True)["v"]
+    q = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    iqr = q[0.75] - q[0.25]
+    low_fence = frame["g"].map(q[0.25] - 1.5 * iqr).astype(float)
+    high_fence = frame["g"].map(q[0.75] + 1.5 * iqr).astype(float)
+    inside = frame[(frame["v"] >= low_fence) & (frame["v"] <= high_fence)]
+    whiskers = inside.groupby("g", observed=True)["v"].agg(["min", "max"])
+    means = grouped.mean()
+    sizes = grouped.size()
+
+    stats = []
+    for g in q.index:
+        stats.append({
+            "label": str(g),
+            "q1": float(q.loc[g, 0.25]),
+            "med": float(q.loc[g, 0.5]),
+            "q3": float(q.loc[g, 0.75]),
+            "whislo": float(whiskers.loc[g, "min"]) if g in whiskers.index else float(q.loc[g, 0.25]),
+            "whishi": float(whiskers.loc[g, "max"]) if g in whiskers.index else float(q.loc[g, 0.75]),
+            "mean": float(means.loc[g]),
+            "n": int(sizes.loc[g]),
+            "fliers": [],
+        })
+    return stats
+
+
+# ============================================================================
+# Pool Management
+# ============================================================================
+
+def _render_context():
+    """
+    Start method for render workers.
+
+    Never fork: the async server is multithreaded and a forked child can inherit
+    locks held by other threads and deadlock. forkserver (preloading this module
+    so workers start fast) where the platform has it, spawn otherwise.
+    """
+    import multiprocessing
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload([__name__])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def get_render_pool() -> Optional[ProcessPoolExecutor]:
+    """Return the shared render pool, creating it on first use (None if disabled)."""
+    global _render_pool
+    if PLOT_RENDER_WORKERS <= 0:
+        return None
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(
+            max_workers=PLOT_RENDER_WORKERS,
+            mp_context=_render_context(),
+            initializer=_init_render_worker,
+        )
+        logger.info(f"[PLOT] Started render pool with {PLOT_RENDER_WORKERS} workers")
+    return _render_pool
+
+
+def shutdown_render_pool() -> None:
+    """Shut down the render pool (it is recreated lazily on next use)."""
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
+
+
+async def render_charts(specs: List[Dict[str, Any]]) -> List[Union[bytes, Exception]]:
+    """
+    Render chart specs concurrently and return PNG bytes in spec order.
+
+    Failed charts come back as the exception instead of bytes. If the pool is
+    disabled or breaks, the remaining charts are rendered in a thread.
+    """
+    if not specs:
+        return []
+
+    loop = asyncio.get_running_loop()
+    pool = get_render_pool() if len(specs) > 1 else None
+
+    if pool is not None:
+        futures = [loop.run_in_executor(pool, render_chart, spec) for spec in specs]
+        results = list(await asyncio.gather(*futures, return_exceptions=True))
+        broken = [i for i, r in enumerate(results) if isinstance(r, BrokenProcessPool)]
+        if not broken:
+            return results
+        logger.warning(f"[PLOT] Render pool broke; rendering {len(broken)} charts in-process")
+        shutdown_render_pool()
+    else:
+        results = [None] * len(specs)
+        broken = list(range(len(specs)))
+
+    for i in broken:
+        try:
+            results[i] = await asyncio.to_thread(render_chart, specs[i])
+        except Exception as e:
+            results[i] = e
+    return results
+
+
+# ============================================================================
+# Plot Cache
+# ============================================================================
+
+def plot_cache_key(fingerprint: str, spec: Dict[str, Any]) -> str:
+    """Content address of a chart: dataset fingerprint + chart type + columns + style."""
+    return cache_key(
+        fingerprint,
+        spec["kind"],
+        [str(c) for c in spec.get("columns", [])],
+        spec.get("figsize"),
+        spec.get("dpi", PLOT_DPI),
+        PLOT_STYLE_VERSION,
+    )
+
+
+class PlotCache:
+    """
+    Content-addressed PNG store in a plots directory.
+
+    Each cache key owns its own file (<plot_dir>/.plot_cache/<key>.png), so a
+    key can only ever return the chart it was stored with. The human-named
+    display files next to it are copies and may be overwritten by another
+    dataset's chart without affecting the cache.
+    """
+
+    def __init__(self, plot_dir: str):
+        self.cache_dir = os.path.join(plot_dir, PLOT_CACHE_DIR)
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached PNG path for key, or None if missing."""
+        path = self.path_for(key)
+        return path if os.path.exists(path) else None
+
+    def put(self, key: str, png: bytes) -> None:
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self.path_for(key) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(png)
+            os.replace(tmp_path, self.path_for(key))
+        except OSError as e:
+            logger.warning(f"[PLOT] Failed to cache plot {key}: {e}")
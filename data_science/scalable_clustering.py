@@ -0,0 +1,450 @@
+"""
+Clustering building blocks that stay within memory on large datasets.
+
+Exact silhouette scores, DBSCAN's neighbour graph and agglomerative
+clustering are all quadratic in the number of rows. The helpers here keep the
+cost bounded:
+
+  - quality scores (silhouette, Davies-Bouldin) on a CLUSTER_SCORE_SAMPLE_ROWS sample
+  - KMeans switches to MiniBatchKMeans from CLUSTER_MINIBATCH_THRESHOLD rows
+  - the k-sweep fits every k in parallel (CLUSTER_WORKERS processes)
+  - DBSCAN / agglomerative run on at most CLUSTER_EXACT_MAX_ROWS sampled rows,
+    and their labels are propagated to every row (nearest core sample within
+    eps for DBSCAN, nearest cluster centroid otherwise) in chunks
+
+dbscan_cluster and hierarchical_cluster can use a micro-cluster backend above
+CLUSTER_EXACT_MAX_ROWS rows: the data is summarised into size-weighted
+centroids (at most CLUSTER_DBSCAN_MAX_SUBCLUSTERS BIRCH subclusters, built on
+CLUSTER_BIRCH_FIT_ROWS sampled rows, for DBSCAN; CLUSTER_MICRO_CLUSTERS
+MiniBatchKMeans centres for agglomerative), the exact algorithm runs on those
+centroids, and every row inherits the label of its centroid. This is an
+approximation: a fidelity check scores its agreement (adjusted Rand index)
+with the exact algorithm on a CLUSTER_FIDELITY_SAMPLE_ROWS sample, and
+dbscan_cluster's "auto" backend only keeps it when that score reaches
+CLUSTER_DBSCAN_MIN_FIDELITY (sampled exact DBSCAN otherwise).
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .large_data_config import (
+    CLUSTER_BIRCH_FIT_ROWS,
+    CLUSTER_DBSCAN_MAX_SUBCLUSTERS,
+    CLUSTER_DBSCAN_MIN_FIDELITY,
+    CLUSTER_EXACT_MAX_ROWS,
+    CLUSTER_FIDELITY_SAMPLE_ROWS,
+    CLUSTER_MICRO_CLUSTERS,
+    CLUSTER_MINIBATCH_THRESHOLD,
+    CLUSTER_SCORE_SAMPLE_ROWS,
+    CLUSTER_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rows per block when assigning labels back to the full matrix
+_ASSIGN_CHUNK_ROWS = 100000
+
+# Rows per BIRCH partial_fit, so an overflowing subcluster count is caught early
+_BIRCH_FIT_CHUNK_ROWS = 5000
+
+
+def sample_indices(n_rows: int, max_rows: int, seed: int = 42) -> np.ndarray:
+    """Sorted positions of a uniform sample of at most max_rows rows (all rows if fewer)."""
+    if n_rows <= max_rows:
+        return np.arange(n_rows)
+    return np.sort(np.random.RandomState(seed).choice(n_rows, max_rows, replace=False))
+
+
+def cluster_scores(X: np.ndarray, labels: np.ndarray, seed: int = 42) -> Dict[str, Optional[float]]:
+    """
+    Silhouette and Davies-Bouldin on a CLUSTER_SCORE_SAMPLE_ROWS sample, noise (-1) excluded.
+
+    Returns None scores when fewer than two clusters remain in the sample.
+    """
+    from sklearn.metrics import davies_bouldin_score, silhouette_score
+
+    idx = sample_indices(len(X), CLUSTER_SCORE_SAMPLE_ROWS, seed)
+    Xs, ls = X[idx], np.asarray(labels)[idx]
+    keep = ls != -1
+    Xs, ls = Xs[keep], ls[keep]
+    if len(np.unique(ls)) < 2 or len(ls) <= len(np.unique(ls)):
+        return {"silhouette_score": None, "davies_bouldin": None, "score_rows": int(len(ls))}
+    return {
+        "silhouette_score": float(silhouette_score(Xs, ls)),
+        "davies_bouldin": float(davies_bouldin_score(Xs, ls)),
+        "score_rows": int(len(ls)),
+    }
+
+
+def make_kmeans(n_clusters: int, n_rows: int, seed: int = 42):
+    """KMeans, or MiniBatchKMeans from CLUSTER_MINIBATCH_THRESHOLD rows."""
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+
+    if n_rows >= CLUSTER_MINIBATCH_THRESHOLD:
+        return MiniBatchKMeans(n_clusters=n_clusters, n_init=3, batch_size=4096, random_state=seed)
+    return KMeans(n_clusters=n_clusters, n_init=10, random_state=seed)
+
+
+def _fit_k(X: np.ndarray, k: int, seed: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    model = make_kmeans(k, len(X), seed)
+    labels = model.fit_predict(X)
+    return {
+        "k": k,
+        "algorithm": type(model).__name__,
+        "inertia": float(model.inertia_),
+        **cluster_scores(X, labels, seed),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def sweep_k(X: np.ndarray, k_values: Sequence[int], n_workers: Optional[int] = None,
+            seed: int = 42) -> List[Dict[str, Any]]:
+    """Fit and score every k in parallel; one result dict per k, in k order."""
+    from joblib import Parallel, delayed
+
+    k_values = list(k_values)
+    if not k_values:
+        return []
+    n_workers = max(1, min(int(n_workers or CLUSTER_WORKERS), len(k_values)))
+    logger.info(f"[CLUSTER] k-sweep {k_values[0]}..{k_values[-1]} on {len(X):,} rows, {n_workers} workers")
+    if n_workers == 1:
+        return [_fit_k(X, k, seed) for k in k_values]
+    # Arrays above 1 MB are memory-mapped into the workers instead of copied
+    return Parallel(n_jobs=n_workers, max_nbytes="1M")(delayed(_fit_k)(X, k, seed) for k in k_values)
+
+
+def _nearest(points: np.ndarray, X: np.ndarray):
+    """Index of and distance to the nearest row of points, for every row of X (chunked)."""
+    from sklearn.metrics import pairwise_distances_argmin_min
+
+    idx = np.empty(len(X), dtype=np.int64)
+    dist = np.empty(len(X))
+    for start in range(0, len(X), _ASSIGN_CHUNK_ROWS):
+        block = slice(start, start + _ASSIGN_CHUNK_ROWS)
+        idx[block], dist[block] = pairwise_distances_argmin_min(X[block], points)
+    return idx, dist
+
+
+def propagate_to_centroids(X: np.ndarray, sample_X: np.ndarray, sample_labels: np.ndarray) -> np.ndarray:
+    """Label every row of X with the cluster whose sample centroid is nearest."""
+    clusters = np.unique(sample_labels[sample_labels != -1])
+    centroids = np.vstack([sample_X[sample_labels == c].mean(axis=0) for c in clusters])
+    idx, _ = _nearest(centroids, X)
+    return clusters[idx]
+
+
+def propagate_dbscan(X: np.ndarray, sample_X: np.ndarray, model: Any) -> np.ndarray:
+    """Label every row like DBSCAN.predict would: nearest core sample's cluster if within eps, else noise."""
+    core = model.core_sample_indices_
+    if core.size == 0:
+        return np.full(len(X), -1, dtype=np.int64)
+    idx, dist = _nearest(sample_X[core], X)
+    labels = model.labels_[core][idx].astype(np.int64)
+    labels[dist > model.eps] = -1
+    return labels
+
+
+def auto_eps(X: np.ndarray, min_samples: int = 5) -> float:
+    """Mean distance to the min_samples-th neighbour (the smart_cluster heuristic)."""
+    from sklearn.neighbors import NearestNeighbors
+    distances, _ = NearestNeighbors(n_neighbors=min(min_samples, len(X))).fit(X).kneighbors(X)
+    return float(np.mean(distances[:, -1]))
+
+
+def sampled_dbscan(X: np.ndarray, eps: Optional[float] = None, min_samples: int = 5,
+                   seed: int = 42) -> Dict[str, Any]:
+    """DBSCAN on at most CLUSTER_EXACT_MAX_ROWS rows, labels propagated to all rows."""
+    from sklearn.cluster import DBSCAN
+
+    idx = sample_indices(len(X), CLUSTER_EXACT_MAX_ROWS, seed)
+    sample_X = X[idx]
+    eps = float(eps) if eps is not None else auto_eps(sample_X, min_samples)
+    model = DBSCAN(eps=eps, min_samples=min_samples).fit(sample_X)
+    labels = model.labels_ if len(idx) == len(X) else propagate_dbscan(X, sample_X, model)
+    return {"labels": labels, "eps": eps, "sample_rows": int(len(idx)), "propagated": len(idx) < len(X)}
+
+
+def sampled_agglomerative(X: np.ndarray, n_clusters: int, linkage: str = "ward",
+                          seed: int = 42) -> Dict[str, Any]:
+    """Agglomerative clustering on at most CLUSTER_EXACT_MAX_ROWS rows, propagated by nearest centroid."""
+    from sklearn.cluster import AgglomerativeClustering
+
+    idx = sample_indices(len(X), CLUSTER_EXACT_MAX_ROWS, seed)
+    sample_X = X[idx]
+    sample_labels = AgglomerativeClustering(n_clusters=n_clusters, linkage=linkage).fit_predict(sample_X)
+    labels = sample_labels if len(idx) == len(X) else propagate_to_centroids(X, sample_X, sample_labels)
+    return {"labels": labels, "sample_rows": int(len(idx)), "propagated": len(idx) < len(X)}
+
+
+# ============================================================================
+# Micro-cluster Backend
+# ============================================================================
+
+def use_micro_backend(n_rows: int, backend: str = "auto") -> bool:
+    """True when backend asks for micro-clusters, or is "auto" and n_rows exceeds CLUSTER_EXACT_MAX_ROWS."""
+    if backend not in ("auto", "exact", "micro"):
+        raise ValueError(f"Unknown backend '{backend}'. Choose from: auto, exact, micro")
+    return backend == "micro" or (backend == "auto" and n_rows > CLUSTER_EXACT_MAX_ROWS)
+
+
+def _micro_assign(X: np.ndarray, centers: np.ndarray) -> Dict[str, Any]:
+    """
+    Assign every row to its nearest centre (chunked), then recompute each centre
+    as the mean of its rows; centres left empty are dropped.
+    """
+    assign, dist = _nearest(centers, X)
+    weights = np.bincount(assign, minlength=len(centers))
+    used = np.flatnonzero(weights)
+    remap = np.full(len(centers), -1, dtype=np.int64)
+    remap[used] = np.arange(len(used))
+    assign = remap[assign]
+    weights = weights[used]
+    sums = np.column_stack([np.bincount(assign, weights=X[:, c], minlength=len(used))
+                            for c in range(X.shape[1])])
+    return {"centers": sums / weights[:, None], "weights": weights, "assign": assign, "distance": dist}
+
+
+def birch_centers(X: np.ndarray, threshold: float, max_subclusters: Optional[int] = None,
+                  seed: int = 42):
+    """
+    (centres, threshold) of BIRCH subclusters of radius <= threshold.
+
+    sklearn's BIRCH inserts rows one by one in Python, so the CF-tree is built
+    from a CLUSTER_BIRCH_FIT_ROWS sample. With max_subclusters, the threshold
+    is raised and the tree rebuilt until it has at most that many subclusters;
+    the returned threshold is the one actually used.
+    """
+    from sklearn.cluster import Birch
+
+    idx = sample_indices(len(X), CLUSTER_BIRCH_FIT_ROWS, seed)
+    while True:
+        birch = Birch(threshold=threshold, n_clusters=None)
+        n_sub = 0
+        for start in range(0, len(idx), _BIRCH_FIT_CHUNK_ROWS):
+            birch.partial_fit(X[idx[start:start + _BIRCH_FIT_CHUNK_ROWS]])
+            n_sub = len(birch.subcluster_centers_)
+            if max_subclusters and n_sub > max_subclusters:
+                break
+        if not max_subclusters or n_sub <= max_subclusters:
+            return birch.subcluster_centers_, threshold
+        # Fewer, wider subclusters; at least 25% wider per rebuild
+        logger.info(f"[CLUSTER] BIRCH threshold {threshold:.4g} gave > {max_subclusters:,} subclusters, widening")
+        threshold *= max(1.25, float(np.sqrt(n_sub / max_subclusters)))
+
+
+def birch_micro_clusters(X: np.ndarray, threshold: float, max_subclusters: Optional[int] = None,
+                         seed: int = 42) -> Dict[str, Any]:
+    """BIRCH subclusters (see birch_centers), with every row assigned to its nearest one in chunks."""
+    centers, threshold = birch_centers(X, threshold, max_subclusters, seed)
+    micro = _micro_assign(X, centers)
+    micro["threshold"] = threshold
+    return micro
+
+
+def kmeans_micro_clusters(X: np.ndarray, n_micro: Optional[int] = None, seed: int = 42) -> Dict[str, Any]:
+    """CLUSTER_MICRO_CLUSTERS MiniBatchKMeans centres (fewer for small inputs)."""
+    from sklearn.cluster import MiniBatchKMeans
+
+    n_micro = max(2, min(int(n_micro or CLUSTER_MICRO_CLUSTERS), len(X)))
+    model = MiniBatchKMeans(n_clusters=n_micro, n_init=1, batch_size=max(4096, 3 * n_micro),
+                            random_state=seed).fit(X)
+    return _micro_assign(X, model.cluster_centers_)
+
+
+def weighted_agglomerative(centers: np.ndarray, weights: np.ndarray, n_clusters: int,
+                           linkage: str = "ward") -> np.ndarray:
+    """
+    Agglomerative clustering of weighted points via Lance-Williams updates.
+
+    Each centre counts as weights[i] coincident rows, so ward and average
+    linkage merge as they would on that many copies of each centre; this
+    approximates clustering the rows the centres summarise (complete and
+    single linkage do not depend on weights). O(m^2) memory for m centres.
+    """
+    from sklearn.metrics import pairwise_distances
+
+    if linkage not in ("ward", "average", "complete", "single"):
+        raise ValueError(f"Unknown linkage '{linkage}'")
+    m = len(centers)
+    size = np.asarray(weights, dtype=float).copy()
+    if linkage == "ward":
+        D = pairwise_distances(centers, metric="sqeuclidean")
+        D *= np.outer(size, size) / np.add.outer(size, size)
+    else:
+        D = pairwise_distances(centers)
+    np.fill_diagonal(D, np.inf)
+    labels = np.arange(m)
+
+    for _ in range(m - max(1, n_clusters)):
+        i, j = divmod(int(np.argmin(D)), m)
+        if i > j:
+            i, j = j, i
+        ni, nj, dij = size[i], size[j], D[i, j]
+        if linkage == "ward":
+            merged = ((ni + size) * D[i] + (nj + size) * D[j] - size * dij) / (ni + nj + size)
+        elif linkage == "average":
+            merged = (ni * D[i] + nj * D[j]) / (ni + nj)
+        elif linkage == "complete":
+            merged = np.maximum(D[i], D[j])
+        else:
+            merged = np.minimum(D[i], D[j])
+        D[i, :] = merged
+        D[:, i] = merged
+        D[i, i] = np.inf
+        D[j, :] = np.inf
+        D[:, j] = np.inf
+        size[i] = ni + nj
+        labels[labels == j] = i
+
+    return np.unique(labels, return_inverse=True)[1]
+
+
+def _fidelity(approx: np.ndarray, exact_fn, X_sample: np.ndarray) -> Dict[str, Any]:
+    """Adjusted Rand index between approximate labels of X_sample and exact_fn(X_sample)."""
+    from sklearn.metrics import adjusted_rand_score
+
+    start = time.perf_counter()
+    exact = exact_fn(X_sample)
+    return {
+        "sample_rows": int(len(X_sample)),
+        "adjusted_rand_index": round(float(adjusted_rand_score(exact, approx)), 4),
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def _dbscan_on_birch(X: np.ndarray, centers: np.ndarray, threshold: float, eps: float,
+                     min_samples: int) -> np.ndarray:
+    from sklearn.cluster import DBSCAN
+
+    micro = _micro_assign(X, centers)
+    # Rows of neighbouring subclusters can be within eps while their centres are
+    # not; linking centres up to eps + half the subcluster radius keeps dense
+    # regions from splitting into per-subcluster islands
+    macro = DBSCAN(eps=eps + threshold / 2, min_samples=min_samples).fit_predict(
+        micro["centers"], sample_weight=micro["weights"])
+    labels = macro[micro["assign"]]
+    labels[micro["distance"] > eps] = -1
+    return labels
+
+
+def micro_dbscan(X: np.ndarray, eps: float, min_samples: int = 5, seed: int = 42,
+                 min_fidelity: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Approximate DBSCAN on BIRCH subclusters, weighted by their row counts.
+
+    Subclusters start at radius eps/2 and are widened until there are at most
+    CLUSTER_DBSCAN_MAX_SUBCLUSTERS of them. A subcluster is core when the rows
+    summarised near it reach min_samples; its rows take its label, except rows
+    farther than eps from their subcluster centre, which are noise. Because
+    DBSCAN depends on density, a sample of the data is not a smaller copy of
+    the exact result; the fidelity check instead runs the approximation (same
+    threshold) and exact DBSCAN on the same CLUSTER_FIDELITY_SAMPLE_ROWS sample.
+
+    The check runs before the full data is labelled: when min_fidelity is set
+    and the adjusted Rand index falls short, "labels" is None.
+    """
+    from sklearn.cluster import DBSCAN
+
+    start = time.perf_counter()
+    centers, threshold = birch_centers(X, eps / 2, CLUSTER_DBSCAN_MAX_SUBCLUSTERS, seed)
+
+    X_sample = X[sample_indices(len(X), CLUSTER_FIDELITY_SAMPLE_ROWS, seed)]
+    sample_centers, _ = birch_centers(X_sample, threshold, seed=seed)
+    fidelity = _fidelity(_dbscan_on_birch(X_sample, sample_centers, threshold, eps, min_samples),
+                         DBSCAN(eps=eps, min_samples=min_samples).fit_predict, X_sample)
+    fidelity["compared"] = "approximation vs exact DBSCAN, both on the sample"
+
+    labels = None
+    if min_fidelity is None or fidelity["adjusted_rand_index"] >= min_fidelity:
+        labels = _dbscan_on_birch(X, centers, threshold, eps, min_samples)
+        logger.info(f"[CLUSTER] DBSCAN on {len(centers):,} BIRCH subclusters of {len(X):,} rows")
+    return {
+        "labels": labels,
+        "approximation": {
+            "backend": "birch+dbscan",
+            "rows": int(len(X)),
+            "micro_clusters": int(len(centers)),
+            "birch_threshold": threshold,
+            "birch_fit_rows": int(min(len(X), CLUSTER_BIRCH_FIT_ROWS)),
+            "eps": eps,
+            "centroid_eps": eps + threshold / 2,
+            "min_samples": min_samples,
+            "seconds": round(time.perf_counter() - start, 2),
+        },
+        "fidelity": fidelity,
+    }
+
+
+def cluster_dbscan(X: np.ndarray, eps: float, min_samples: int = 5, backend: str = "auto",
+                   seed: int = 42) -> Dict[str, Any]:
+    """
+    DBSCAN labels for every row of X.
+
+    backend "exact" runs DBSCAN on all rows and "micro" always uses
+    micro_dbscan. "auto" is exact up to CLUSTER_EXACT_MAX_ROWS rows; above,
+    it keeps micro_dbscan only when its fidelity reaches
+    CLUSTER_DBSCAN_MIN_FIDELITY and otherwise runs exact DBSCAN on a
+    CLUSTER_EXACT_MAX_ROWS sample with labels propagated (sampled_dbscan).
+
+    Returns:
+        dict with labels, plus approximation and fidelity when not exact
+    """
+    from sklearn.cluster import DBSCAN
+
+    if not use_micro_backend(len(X), backend):
+        return {"labels": DBSCAN(eps=eps, min_samples=min_samples).fit_predict(X)}
+    micro = micro_dbscan(X, eps, min_samples, seed,
+                         min_fidelity=CLUSTER_DBSCAN_MIN_FIDELITY if backend == "auto" else None)
+    if micro["labels"] is not None:
+        return micro
+    logger.info(f"[CLUSTER] Micro-cluster DBSCAN fidelity {micro['fidelity']['adjusted_rand_index']:.3f} "
+                f"< {CLUSTER_DBSCAN_MIN_FIDELITY}; using sampled exact DBSCAN")
+    start = time.perf_counter()
+    sampled = sampled_dbscan(X, eps, min_samples, seed)
+    return {
+        "labels": sampled["labels"],
+        "approximation": {
+            "backend": "sampled_dbscan",
+            "rows": int(len(X)),
+            "sample_rows": sampled["sample_rows"],
+            "eps": eps,
+            "min_samples": min_samples,
+            "seconds": round(time.perf_counter() - start, 2),
+            "rejected": {**micro["approximation"], "fidelity": micro["fidelity"],
+                         "min_fidelity": CLUSTER_DBSCAN_MIN_FIDELITY},
+        },
+    }
+
+
+def micro_agglomerative(X: np.ndarray, n_clusters: int, linkage: str = "ward",
+                        n_micro: Optional[int] = None, seed: int = 42) -> Dict[str, Any]:
+    """Agglomerative clustering of size-weighted MiniBatchKMeans micro-clusters, labels mapped back to rows."""
+    from sklearn.cluster import AgglomerativeClustering
+
+    start = time.perf_counter()
+    micro = kmeans_micro_clusters(X, n_micro, seed)
+    logger.info(f"[CLUSTER] {linkage} agglomerative on {len(micro['centers']):,} micro-clusters of {len(X):,} rows")
+    macro = weighted_agglomerative(micro["centers"], micro["weights"], n_clusters, linkage)
+    labels = macro[micro["assign"]]
+    seconds = time.perf_counter() - start
+
+    idx = sample_indices(len(X), CLUSTER_FIDELITY_SAMPLE_ROWS, seed)
+    fidelity = _fidelity(labels[idx], AgglomerativeClustering(
+        n_clusters=n_clusters, linkage=linkage).fit_predict, X[idx])
+    fidelity["compared"] = "approximate labels vs exact agglomerative on the sample"
+    return {
+        "labels": labels,
+        "approximation": {
+            "backend": "minibatch_kmeans+agglomerative",
+            "rows": int(len(X)),
+            "micro_clusters": int(len(micro["centers"])),
+            "linkage": linkage,
+            "weighted": True,
+            "seconds": round(seconds, 2),
+        },
+        "fidelity": fidelity,
+    }
@@ -0,0 +1,240 @@
+"""
+Budgeted, cached SHAP computation for explain_model.
+
+Exact Shapley estimation costs O(rows x background x model calls), so a
+KernelExplainer over the full frame as background and as explained rows runs
+for hours. This module bounds every factor:
+
+  - background: k-means summary of the data (SHAP_BACKGROUND_CLUSTERS centroids)
+  - explained rows: get_shap_sample_size() rows for tree models,
+    capped at SHAP_KERNEL_SAMPLE_ROWS for model-agnostic explainers
+  - evaluation: explained rows are split into chunks scored on
+    SHAP_WORKERS processes
+
+Results are cached per dataset fingerprint + target + model (memory LRU plus
+joblib files under the workspace tmp/shap_cache folder), so re-running the
+explanation, regenerating its plots or building the executive report reuses
+the same values instead of recomputing them.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from .dataset_fingerprint import cache_key
+from .large_data_config import (
+    SHAP_BACKGROUND_CLUSTERS,
+    SHAP_KERNEL_SAMPLE_ROWS,
+    SHAP_WORKERS,
+    get_shap_sample_size,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when the sampling/reduction rules below change
+SHAP_CACHE_VERSION = 1
+
+# Tree explainers are fast per row; only fan out to processes for big samples
+_TREE_PARALLEL_MIN_ROWS = 20000
+
+_MAX_MEMORY_ENTRIES = 8
+_memory: "OrderedDict[str, ShapResult]" = OrderedDict()
+_lock = threading.Lock()
+
+
+@dataclass
+class ShapResult:
+    """SHAP values for the explained rows (one output: positive/first class for classifiers)."""
+    values: np.ndarray
+    expected_value: float
+    X: pd.DataFrame
+    explainer_type: str
+    model_name: str
+    total_rows: int
+    background_size: int
+    workers: int
+    seconds: float
+    key: str = ""
+    cached: bool = False
+    extras: Dict[str, Any] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "explained_rows": int(len(self.X)),
+            "total_rows": int(self.total_rows),
+            "explainer": self.explainer_type,
+            "background_size": self.background_size,
+            "workers": self.workers,
+            "seconds": round(self.seconds, 2),
+            "cache": "hit" if self.cached else "miss",
+            "cache_key": self.key,
+        }
+
+
+def shap_cache_key(fingerprint: str, target: str, model: str, **options: Any) -> str:
+    """Cache key for SHAP values of model (spec string) trained on a dataset/target."""
+    return cache_key(fingerprint, target, model, options, SHAP_BACKGROUND_CLUSTERS,
+                     SHAP_KERNEL_SAMPLE_ROWS, get_shap_sample_size(10 ** 12), SHAP_CACHE_VERSION)
+
+
+# ============================================================================
+# Cache Tiers
+# ============================================================================
+
+def _disk_path(key: str, tool_context: Optional[Any]) -> Optional[str]:
+    if tool_context is None:
+        return None
+    try:
+        from .ds_tools import _get_workspace_dir
+        path = os.path.join(_get_workspace_dir(tool_context, "tmp"), "shap_cache")
+        os.makedirs(path, exist_ok=True)
+        return os.path.join(path, f"{key}.joblib")
+    except Exception:
+        return None
+
+
+def _remember(key: str, result: ShapResult) -> None:
+    with _lock:
+        _memory[key] = result
+        _memory.move_to_end(key)
+        while len(_memory) > _MAX_MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+
+def get_cached_shap(key: str, tool_context: Optional[Any] = None) -> Optional[ShapResult]:
+    """Previously computed SHAP values for key, from memory or the workspace disk tier."""
+    with _lock:
+        result = _memory.get(key)
+        if result is not None:
+            _memory.move_to_end(key)
+    if result is None:
+        path = _disk_path(key, tool_context)
+        if path and os.path.exists(path):
+            try:
+                result = joblib.load(path, mmap_mode="r")
+                _remember(key, result)
+            except Exception as e:
+                logger.warning(f"[SHAP CACHE] Ignoring unreadable cache file {path}: {e}")
+                return None
+    if result is not None:
+        result.cached = True
+        logger.info(f"[SHAP CACHE] hit {key} ({len(result.X):,} explained rows)")
+    return result
+
+
+def store_shap(result: ShapResult, tool_context: Optional[Any] = None) -> None:
+    """Keep result in memory and persist it to the workspace (best effort)."""
+    _remember(result.key, result)
+    path = _disk_path(result.key, tool_context)
+    if path:
+        try:
+            tmp_path = path + ".tmp"
+            joblib.dump(result, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"[SHAP CACHE] Could not persist {result.key}: {e}")
+
+
+# ============================================================================
+# Computation
+# ============================================================================
+
+def _as_3d(values: Any) -> np.ndarray:
+    """(rows, features, outputs) from a per-class list, a 2D array or a 3D array."""
+    if isinstance(values, list):
+        return np.stack([np.asarray(v) for v in values], axis=-1)
+    values = np.asarray(values)
+    return values[:, :, None] if values.ndim == 2 else values
+
+
+def _explain_chunk(explainer: Any, X_chunk: pd.DataFrame, is_kernel: bool) -> np.ndarray:
+    if is_kernel:
+        return _as_3d(explainer.shap_values(X_chunk, silent=True))
+    return _as_3d(explainer.shap_values(X_chunk))
+
+
+def _make_explainer(estimator: Any, X: pd.DataFrame):
+    """TreeExplainer for tree ensembles, else KernelExplainer over a k-means background."""
+    import shap
+
+    model_name = type(estimator).__name__
+    if hasattr(estimator, "estimators_") or any(k in model_name for k in ("Tree", "Forest", "Boost")):
+        try:
+            return shap.TreeExplainer(estimator), "TreeExplainer", 0
+        except Exception as e:
+            logger.info(f"[SHAP] TreeExplainer unsupported for {model_name} ({e}); using KernelExplainer")
+
+    k = max(1, min(SHAP_BACKGROUND_CLUSTERS, len(X)))
+    background = shap.kmeans(X, k) if len(X) > k else X
+    return shap.KernelExplainer(estimator.predict, background), "KernelExplainer", k
+
+
+def compute_shap(
+    estimator: Any,
+    X: pd.DataFrame,
+    key: str = "",
+    n_workers: Optional[int] = None,
+    random_state: int = 42,
+) -> ShapResult:
+    """
+    Explain a sample of X with a budgeted explainer, in parallel chunks.
+
+    Args:
+        estimator: Fitted model taking X
+        X: Numeric feature frame the model was trained on
+        key: Cache key to store the result under (see shap_cache_key)
+        n_workers: Processes scoring chunks (default SHAP_WORKERS)
+        random_state: Seed for the explained-row sample
+
+    Returns:
+        ShapResult for the sampled rows
+    """
+    from joblib import Parallel, delayed
+
+    start = time.perf_counter()
+    explainer, explainer_type, background_size = _make_explainer(estimator, X)
+    is_kernel = explainer_type != "TreeExplainer"
+
+    n_rows = get_shap_sample_size(len(X))
+    if is_kernel:
+        n_rows = min(n_rows, SHAP_KERNEL_SAMPLE_ROWS)
+    X_explained = X.sample(n=n_rows, random_state=random_state) if n_rows < len(X) else X
+
+    n_workers = max(1, int(n_workers or SHAP_WORKERS))
+    if not is_kernel and len(X_explained) < _TREE_PARALLEL_MIN_ROWS:
+        n_workers = 1
+    n_workers = min(n_workers, len(X_explained))
+
+    logger.info(f"[SHAP] {explainer_type} on {len(X_explained):,}/{len(X):,} rows, "
+                f"background={background_size or 'tree'}, workers={n_workers}")
+    if n_workers > 1:
+        chunks = [c for c in np.array_split(np.arange(len(X_explained)), n_workers * 2) if c.size]
+        parts = Parallel(n_jobs=n_workers)(
+            delayed(_explain_chunk)(explainer, X_explained.iloc[c], is_kernel) for c in chunks)
+        values = np.concatenate(parts, axis=0)
+    else:
+        values = _explain_chunk(explainer, X_explained, is_kernel)
+
+    # Binary: explain the positive class; multi-class: the first class
+    output = 1 if values.shape[2] == 2 else 0
+    expected = np.atleast_1d(np.asarray(explainer.expected_value, dtype=float))
+    return ShapResult(
+        values=values[:, :, output],
+        expected_value=float(expected[min(output, expected.size - 1)]),
+        X=X_explained,
+        explainer_type=explainer_type,
+        model_name=type(estimator).__name__,
+        total_rows=len(X),
+        background_size=background_size,
+        workers=n_workers,
+        seconds=time.perf_counter() - start,
+        key=key,
+    )
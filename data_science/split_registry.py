@@ -0,0 +1,190 @@
+"""
+Persisted train/test split registry shared by every training and evaluation tool.
+
+A split is identified by dataset fingerprint + target + test size + seed +
+number of CV folds. The first tool to ask for it computes the (stratified
+where possible) train/test row positions and a CV fold id for every training
+row; the result is kept in memory and written as a compact .npz under the
+workspace indexes/splits folder. split_data, train_baseline_model, ensemble,
+train_decision_tree, train_knn, train_naive_bayes, train_svm, accuracy, the
+auto_sklearn tools and the design-matrix cache all read the same positions,
+and grid_search/evaluate cross-validate on its folds, so their metrics are
+computed on the same rows.
+"""
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .dataset_fingerprint import cache_key, dataset_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Bump if the splitting rule changes so stale .npz files are ignored
+SPLIT_REGISTRY_VERSION = 1
+
+_splits: Dict[str, "DataSplit"] = {}
+_lock = threading.Lock()
+
+
+@dataclass
+class DataSplit:
+    """Row positions (iloc) for train/test plus CV fold ids aligned with train_idx."""
+    train_idx: np.ndarray
+    test_idx: np.ndarray
+    folds: np.ndarray
+    stratified: bool
+    key: str
+    n_dropped: int = 0
+
+    @property
+    def n_folds(self) -> int:
+        return int(self.folds.max()) + 1 if self.folds.size else 0
+
+    def cv(self):
+        """PredefinedSplit over the training rows, usable as cv= in sklearn searches."""
+        from sklearn.model_selection import PredefinedSplit
+        return PredefinedSplit(self.folds)
+
+    def train_test(self, X: Any, y: Any):
+        """Slice X and y (DataFrame/Series/ndarray) into X_train, X_test, y_train, y_test."""
+        def take(obj, idx):
+            return obj.iloc[idx] if isinstance(obj, (pd.DataFrame, pd.Series)) else obj[idx]
+        return (take(X, self.train_idx), take(X, self.test_idx),
+                take(y, self.train_idx), take(y, self.test_idx))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "split_key": self.key,
+            "train_rows": int(self.train_idx.size),
+            "test_rows": int(self.test_idx.size),
+            "cv_folds": self.n_folds,
+            "stratified": self.stratified,
+            "dropped_missing_target": self.n_dropped,
+        }
+
+
+def _should_stratify(y: pd.Series) -> bool:
+    from .ds_tools import _can_stratify
+    is_classification = (not pd.api.types.is_numeric_dtype(y)) or y.nunique(dropna=True) <= 20
+    return is_classification and _can_stratify(y)
+
+
+def _compute_split(y: pd.Series, test_size: float, seed: int, n_folds: int, key: str) -> DataSplit:
+    from sklearn.model_selection import KFold, StratifiedKFold, train_test_split
+
+    valid = np.flatnonzero(y.notna().to_numpy())
+    y_valid = y.iloc[valid].reset_index(drop=True)
+    stratified = bool(_should_stratify(y_valid))
+    train_pos, test_pos = train_test_split(
+        np.arange(valid.size), test_size=test_size, random_state=seed,
+        stratify=y_valid if stratified else None)
+
+    folds = np.full(train_pos.size, -1, dtype=np.int8)
+    # Integer class codes: StratifiedKFold rejects mixed/object label dtypes
+    y_train = pd.Series(pd.factorize(y_valid.iloc[train_pos])[0])
+    splitter = KFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    if stratified and y_train.value_counts().min() >= n_folds:
+        splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    for fold_id, (_, val_pos) in enumerate(splitter.split(np.zeros(train_pos.size), y_train)):
+        folds[val_pos] = fold_id
+
+    return DataSplit(
+        train_idx=valid[train_pos].astype(np.int64),
+        test_idx=valid[test_pos].astype(np.int64),
+        folds=folds,
+        stratified=stratified,
+        key=key,
+        n_dropped=int(len(y) - valid.size),
+    )
+
+
+def _splits_dir(tool_context: Optional[Any]) -> Optional[str]:
+    if tool_context is None:
+        return None
+    try:
+        from .ds_tools import _get_workspace_dir
+        path = os.path.join(_get_workspace_dir(tool_context, "indexes"), "splits")
+        os.makedirs(path, exist_ok=True)
+        return path
+    except Exception:
+        return None
+
+
+def get_split(
+    df: pd.DataFrame,
+    target: str,
+    test_size: float = 0.2,
+    seed: int = 42,
+    n_folds: int = 3,
+    tool_context: Optional[Any] = None,
+    fingerprint: Optional[str] = None,
+) -> DataSplit:
+    """
+    Return the registered split for df/target, computing and persisting it on first use.
+
+    Rows with a missing target are excluded from both sides. Classification-like
+    targets are stratified whenever every class has enough rows.
+
+    Args:
+        df: Dataset the positions refer to (positions are iloc-based)
+        target: Target column
+        test_size: Held-out fraction
+        seed: Random seed for the split and the CV folds
+        n_folds: Number of CV folds assigned over the training rows
+        tool_context: Used to locate the workspace indexes dir (optional)
+        fingerprint: Precomputed dataset_fingerprint(df), if the caller has one
+
+    Returns:
+        DataSplit with train/test positions and fold ids
+    """
+    fp = fingerprint or dataset_fingerprint(df)
+    key = cache_key(fp, target, float(test_size), int(seed), int(n_folds), SPLIT_REGISTRY_VERSION)
+
+    with _lock:
+        split = _splits.get(key)
+    if split is not None:
+        return split
+
+    splits_dir = _splits_dir(tool_context)
+    path = os.path.join(splits_dir, f"{key}.npz") if splits_dir else None
+    if path and os.path.exists(path):
+        try:
+            with np.load(path) as data:
+                split = DataSplit(
+                    train_idx=data["train_idx"], test_idx=data["test_idx"],
+                    folds=data["folds"], stratified=bool(data["stratified"]),
+                    key=key, n_dropped=int(data["n_dropped"]))
+            logger.info(f"[SPLIT] Loaded registered split {key} from {path}")
+        except Exception as e:
+            logger.warning(f"[SPLIT] Ignoring unreadable split file {path}: {e}")
+            split = None
+
+    if split is None:
+        split = _compute_split(df[target], test_size, seed, n_folds, key)
+        logger.info(f"[SPLIT] Registered split {key}: {split.summary()}")
+        if path:
+            try:
+                # Smallest dtype that can hold a row position keeps the file compact
+                idx_dtype = np.int32 if len(df) < np.iinfo(np.int32).max else np.int64
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    np.savez_compressed(
+                        f,
+                        train_idx=split.train_idx.astype(idx_dtype),
+                        test_idx=split.test_idx.astype(idx_dtype),
+                        folds=split.folds,
+                        stratified=split.stratified,
+                        n_dropped=split.n_dropped)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                logger.warning(f"[SPLIT] Could not persist split {key}: {e}")
+
+    with _lock:
+        _splits[key] = split
+    return split
@@ -15,6 +15,155 @@ from google.genai import types
 
 logger = logging.getLogger(__name__)
 
+def _grouped_anova(values: np.ndarray, codes: np.ndarray, n_groups: int) -> Dict[str, np.ndarray]:
+    """
+    One-way ANOVA for many targets at once from a single group partition.
+
+    Args:
+        values: (n_rows, n_targets) float matrix, NaN marks a missing value
+        codes: (n_rows,) group codes from pd.factorize (-1 = missing group)
+        n_groups: Number of distinct groups
+
+    Returns:
+        Dict of per-target arrays (F, p, SS, effect sizes) and per-group
+        (n_targets, n_groups) arrays for n, mean, var, min and max.
+    """
+    n_rows, n_targets = values.shape
+    valid = ~np.isnan(values) & (codes >= 0)[:, None]
+
+    # Flat bin id per (target, group) so one bincount covers every target
+    bins = (np.arange(n_targets) * n_groups)[None, :] + codes[:, None]
+    flat_bins = bins[valid]
+    size = n_targets * n_groups
+
+    # Center each target on its grand mean to keep sums of squares stable
+    grand_mean = np.nanmean(np.where(valid, values, np.nan), axis=0)
+    centered = (values - grand_mean[None, :])[valid]
+
+    n = np.bincount(flat_bins, minlength=size).reshape(n_targets, n_groups).astype(float)
+    s = np.bincount(flat_bins, weights=centered, minlength=size).reshape(n_targets, n_groups)
+    sq = np.bincount(flat_bins, weights=centered ** 2, minlength=size).reshape(n_targets, n_groups)
+
+    g_min = np.full(size, np.inf)
+    g_max = np.full(size, -np.inf)
+    raw = values[valid]
+    np.minimum.at(g_min, flat_bins, raw)
+    np.maximum.at(g_max, flat_bins, raw)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        centered_mean = np.where(n > 0, s / n, np.nan)
+        ss_between = np.nansum(n * centered_mean ** 2, axis=1)
+        ss_total = sq.sum(axis=1)
+        ss_within = ss_total - ss_between
+        ss_within = np.maximum(ss_within, 0.0)
+
+        k = (n > 0).sum(axis=1).astype(float)
+        n_total = n.sum(axis=1)
+        df_between = k - 1
+        df_within = n_total - k
+        ms_between = ss_between / df_between
+        ms_within = ss_within / df_within
+        f_stat = ms_between / ms_within
+        p_value = stats.f.sf(f_stat, df_between, df_within)
+
+        eta_squared = np.where(ss_total > 0, ss_between / ss_total, 0.0)
+        omega_squared = (ss_between - df_between * ms_within) / (ss_total + ms_within)
+
+        group_var = np.where(n > 1, (sq - n * centered_mean ** 2) / (n - 1), np.nan)
+
+    return {
+        "f_statistic": f_stat,
+        "p_value": p_value,
+        "ss_between": ss_between,
+        "ss_within": ss_within,
+        "ss_total": ss_total,
+        "df_between": df_between,
+        "df_within": df_within,
+        "ms_within": ms_within,
+        "eta_squared": eta_squared,
+        "omega_squared": omega_squared,
+        "n_groups": k,
+        "group_n": n,
+        "group_mean": centered_mean + grand_mean[:, None],
+        "group_var": np.maximum(group_var, 0.0),
+        "group_min": g_min.reshape(n_targets, n_groups),
+        "group_max": g_max.reshape(n_targets, n_groups),
+    }
+
+
+def _anova_for_factor(
+    df: pd.DataFrame,
+    targets: List[str],
+    cat_var: str,
+    alpha_float: float
+) -> Dict[str, Dict[str, Any]]:
+    """Run the vectorized ANOVA for every target against one categorical variable."""
+    codes, uniques = pd.factorize(df[cat_var])
+    values = df[targets].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    res = _grouped_anova(values, codes, len(uniques))
+    labels = [str(u) for u in uniques]
+
+    out: Dict[str, Dict[str, Any]] = {}
+    for t_idx, target in enumerate(targets):
+        present = np.flatnonzero(res["group_n"][t_idx] > 0)
+        if len(present) < 2:
+            out[target] = {
+                "status": "failed",
+                "error": f"Not enough groups in {cat_var}",
+                "groups_found": int(len(present))
+            }
+            continue
+        if not res["df_within"][t_idx] > 0:
+            out[target] = {
+                "status": "failed",
+                "error": f"ANOVA failed for {cat_var}: no within-group degrees of freedom"
+            }
+            continue
+
+        f_stat = float(res["f_statistic"][t_idx])
+        p_value = float(res["p_value"][t_idx])
+        eta_squared = float(res["eta_squared"][t_idx])
+        omega_squared = float(res["omega_squared"][t_idx])
+        df_between = int(res["df_between"][t_idx])
+        df_within = int(res["df_within"][t_idx])
+
+        is_significant = bool(p_value < alpha_float)
+        effect_size = "small" if eta_squared < 0.01 else "medium" if eta_squared < 0.06 else "large"
+
+        group_labels = [labels[g] for g in present]
+        group_stats = {}
+        for g in present:
+            group_stats[labels[g]] = {
+                "n": int(res["group_n"][t_idx, g]),
+                "mean": float(res["group_mean"][t_idx, g]),
+                "std": float(np.sqrt(res["group_var"][t_idx, g])),
+                "var": float(res["group_var"][t_idx, g]),
+                "min": float(res["group_min"][t_idx, g]),
+                "max": float(res["group_max"][t_idx, g])
+            }
+
+        out[target] = {
+            "status": "success",
+            "f_statistic": f_stat,
+            "p_value": p_value,
+            "is_significant": is_significant,
+            "alpha": alpha_float,
+            "eta_squared": eta_squared,
+            "omega_squared": omega_squared,
+            "effect_size": effect_size,
+            "groups": len(group_labels),
+            "group_labels": group_labels,
+            "group_statistics": group_stats,
+            # Everything Tukey HSD needs: group n/mean above plus pooled MSE and its df
+            "tukey_inputs": {
+                "ms_within": float(res["ms_within"][t_idx]),
+                "df_within": df_within
+            },
+            "interpretation": f"F({df_between}, {df_within}) = {f_stat:.3f}, p = {p_value:.3f}. {'Significant' if is_significant else 'Not significant'} difference between groups (α = {alpha_float}). Effect size: {effect_size} (η² = {eta_squared:.3f}, ω² = {omega_squared:.3f})"
+        }
+    return out
+
+
 @ensure_display_fields
 async def anova(
     target: str,
@@ -25,39 +174,51 @@ async def anova(
 ) -> Dict[str, Any]:
     """
     Perform ANOVA (Analysis of Variance) to test differences between groups.
-    
+
+    Rows are partitioned once per categorical variable and the sums of squares
+    for every target are computed together, so passing several targets (or
+    "all" for every numeric column) costs about the same as passing one.
+
     Args:
-        target: Continuous target variable name
+        target: Continuous target variable name, comma-separated names, or "all"
         categorical_vars: Comma-separated categorical variables to test
         csv_path: Path to CSV file (optional, uses session default)
         alpha: Significance level (default 0.05)
         tool_context: Tool context for state management
-        
+
     Returns:
-        ANOVA results with F-statistic, p-value, and interpretation
+        ANOVA results with F-statistic, p-value, eta/omega squared and interpretation.
+        With one target, results are keyed by categorical variable; with several,
+        by categorical variable then target, plus a ranking by effect size.
     """
     try:
         # Load data
         df = await _load_dataframe(csv_path, tool_context=tool_context)
-        
+
         # Parse parameters
         alpha_float = float(alpha)
         cat_vars = [v.strip() for v in categorical_vars.split(",") if v.strip()]
-        
+
         if not cat_vars:
             return {
                 "status": "failed",
                 "error": "No categorical variables specified",
                 "message": "Please provide categorical_vars parameter"
             }
-        
-        if target not in df.columns:
+
+        if target.strip().lower() in ("all", "*"):
+            targets = [c for c in df.select_dtypes(include=[np.number]).columns if c not in cat_vars]
+        else:
+            targets = [t.strip() for t in target.split(",") if t.strip()]
+
+        missing_targets = [t for t in targets if t not in df.columns]
+        if not targets or missing_targets:
             return {
                 "status": "failed",
-                "error": f"Target variable '{target}' not found",
+                "error": f"Target variable '{', '.join(missing_targets) or target}' not found",
                 "available_columns": list(df.columns)
             }
-        
+
         # Validate categorical variables
         missing_cats = [v for v in cat_vars if v not in df.columns]
         if missing_cats:
@@ -66,79 +227,46 @@ async def anova(
                 "error": f"Categorical variables not found: {missing_cats}",
                 "available_columns": list(df.columns)
             }
-        
-        # Prepare data
-        target_data = df[target].dropna()
-        
-        # Perform ANOVA for each categorical variable
+
+        multi_target = len(targets) > 1
+
+        # Perform ANOVA for each categorical variable (all targets at once)
         anova_results = {}
-        
+
         for cat_var in cat_vars:
             try:
-                # Get groups
-                groups = []
-                group_labels = []
-                
-                for group in df[cat_var].dropna().unique():
-                    group_data = df[df[cat_var] == group][target].dropna()
-                    if len(group_data) > 0:
-                        groups.append(group_data)
-                        group_labels.append(str(group))
-                
-                if len(groups) < 2:
-                    anova_results[cat_var] = {
-                        "status": "failed",
-                        "error": f"Not enough groups in {cat_var}",
-                        "groups_found": len(groups)
-                    }
-                    continue
-                
-                # Perform one-way ANOVA
-                f_stat, p_value = f_oneway(*groups)
-                
-                # Calculate effect size (eta-squared)
-                ss_between = sum(len(group) * (group.mean() - target_data.mean())**2 for group in groups)
-                ss_total = sum((target_data - target_data.mean())**2)
-                eta_squared = ss_between / ss_total if ss_total > 0 else 0
-                
-                # Interpret results
-                is_significant = p_value < alpha_float
-                effect_size = "small" if eta_squared < 0.01 else "medium" if eta_squared < 0.06 else "large"
-                
-                # Group statistics
-                group_stats = {}
-                for i, (group_data, label) in enumerate(zip(groups, group_labels)):
-                    group_stats[label] = {
-                        "n": len(group_data),
-                        "mean": float(group_data.mean()),
-                        "std": float(group_data.std()),
-                        "min": float(group_data.min()),
-                        "max": float(group_data.max())
-                    }
-                
-                anova_results[cat_var] = {
-                    "status": "success",
-                    "f_statistic": float(f_stat),
-                    "p_value": float(p_value),
-                    "is_significant": is_significant,
-                    "alpha": alpha_float,
-                    "eta_squared": float(eta_squared),
-                    "effect_size": effect_size,
-                    "groups": len(groups),
-                    "group_labels": group_labels,
-                    "group_statistics": group_stats,
-                    "interpretation": f"F({len(groups)-1}, {len(target_data)-len(groups)}) = {f_stat:.3f}, p = {p_value:.3f}. {'Significant' if is_significant else 'Not significant'} difference between groups (α = {alpha_float}). Effect size: {effect_size} (η² = {eta_squared:.3f})"
-                }
-                
+                per_target = _anova_for_factor(df, targets, cat_var, alpha_float)
             except Exception as e:
-                anova_results[cat_var] = {
+                per_target = {t: {
                     "status": "failed",
                     "error": f"ANOVA failed for {cat_var}: {str(e)}"
-                }
-        
+                } for t in targets}
+            anova_results[cat_var] = per_target if multi_target else per_target[targets[0]]
+
         # Summary
-        significant_vars = [var for var, result in anova_results.items() 
-                          if result.get("status") == "success" and result.get("is_significant")]
+        if multi_target:
+            significant_targets = {
+                var: [t for t, r in per_target.items() if r.get("status") == "success" and r.get("is_significant")]
+                for var, per_target in anova_results.items()
+            }
+            significant_vars = [var for var, ts in significant_targets.items() if ts]
+            ranking = sorted(
+                (
+                    {"target": t, "categorical_variable": var, "eta_squared": r["eta_squared"],
+                     "omega_squared": r["omega_squared"], "p_value": r["p_value"]}
+                    for var, per_target in anova_results.items()
+                    for t, r in per_target.items() if r.get("status") == "success"
+                ),
+                key=lambda row: row["eta_squared"],
+                reverse=True
+            )
+            n_sig_pairs = sum(len(ts) for ts in significant_targets.values())
+            summary = (f"ANOVA completed for {len(targets)} targets x {len(cat_vars)} variables. "
+                       f"{n_sig_pairs} target/variable pairs showed significant differences (p < {alpha_float}).")
+        else:
+            significant_vars = [var for var, result in anova_results.items()
+                              if result.get("status") == "success" and result.get("is_significant")]
+            summary = f"ANOVA completed for {len(cat_vars)} variables. {len(significant_vars)} showed significant differences (p < {alpha_float})."
 
         # Save to artifact
         if tool_context:
@@ -146,15 +274,18 @@ async def anova(
                 reports_dir = _get_workspace_dir(tool_context, "reports")
                 report_path = Path(reports_dir) / "anova_results.md"
 
-                markdown_content = f"# ANOVA Results for {target}\n\n"
-                for var, result in anova_results.items():
-                    markdown_content += f"## Analysis for {var}\n"
-                    if result['status'] == 'success':
-                        markdown_content += f"- **Interpretation**: {result['interpretation']}\n"
-                        markdown_content += f"- **P-value**: {result['p_value']:.4f}\n"
-                        markdown_content += f"- **Effect Size (eta-squared)**: {result['eta_squared']:.4f} ({result['effect_size']})\n"
-                    else:
-                        markdown_content += f"- **Error**: {result['error']}\n"
+                markdown_content = f"# ANOVA Results for {', '.join(targets)}\n\n"
+                for var, var_results in anova_results.items():
+                    sections = var_results.items() if multi_target else [(targets[0], var_results)]
+                    for tgt, result in sections:
+                        markdown_content += f"## Analysis for {var}" + (f" -> {tgt}" if multi_target else "") + "\n"
+                        if result['status'] == 'success':
+                            markdown_content += f"- **Interpretation**: {result['interpretation']}\n"
+                            markdown_content += f"- **P-value**: {result['p_value']:.4f}\n"
+                            markdown_content += f"- **Effect Size (eta-squared)**: {result['eta_squared']:.4f} ({result['effect_size']})\n"
+                            markdown_content += f"- **Omega-squared**: {result['omega_squared']:.4f}\n"
+                        else:
+                            markdown_content += f"- **Error**: {result['error']}\n"
 
                 with open(report_path, "w") as f:
                     f.write(markdown_content)
@@ -164,15 +295,14 @@ async def anova(
             except Exception as e:
                 logger.warning(f"Failed to save ANOVA artifact: {e}")
 
-        
-        return {
+        response = {
             "status": "success",
             "target_variable": target,
             "categorical_variables": cat_vars,
             "alpha": alpha_float,
             "results": anova_results,
             "significant_variables": significant_vars,
-            "summary": f"ANOVA completed for {len(cat_vars)} variables. {len(significant_vars)} showed significant differences (p < {alpha_float}).",
+            "summary": summary,
             "recommendations": [
                 f"Variables with significant differences: {', '.join(significant_vars)}" if significant_vars else "No significant differences found",
                 "Consider post-hoc tests (Tukey's HSD) for pairwise comparisons",
@@ -180,7 +310,12 @@ async def anova(
                 "Effect sizes help interpret practical significance"
             ]
         }
-        
+        if multi_target:
+            response["target_variables"] = targets
+            response["significant_targets"] = significant_targets
+            response["ranking"] = ranking
+        return response
+
     except Exception as e:
         logger.error(f"ANOVA analysis failed: {e}")
         return {
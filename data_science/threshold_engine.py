@@ -0,0 +1,234 @@
+"""
+Vectorized decision-threshold tuning for binary classifiers.
+
+Every distinct predicted score is a candidate threshold (predict positive when
+score >= threshold). One descending sort plus cumulative sums of positives and
+negatives give the confusion counts at all candidates at once, from which
+precision, recall, F-beta, accuracy, Youden's J and misclassification cost
+follow as array arithmetic - no re-prediction per threshold.
+
+Per-segment thresholds reuse the same sort: rows are ordered by (segment,
+descending score), so each segment is a contiguous, already sorted slice whose
+curve is one more cumulative-sum pass.
+
+Predicted probabilities are cached per model file + data + split, so tuning
+for another metric or cost ratio only re-runs the O(n log n) curve.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+METRICS = ["f1", "fbeta", "youden", "accuracy", "cost"]
+
+# Metrics minimised rather than maximised
+_MINIMISE = {"cost"}
+
+_MAX_CACHED = 16
+_scores: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def positive_scores(model: Any, X: Any, positive_index: int, key: Optional[str] = None) -> np.ndarray:
+    """model.predict_proba(X)[:, positive_index] as float64, cached under key when one is given."""
+    if key:
+        with _lock:
+            cached = _scores.get(key)
+            if cached is not None:
+                _scores.move_to_end(key)
+                logger.info(f"[THRESHOLD] Reusing cached probabilities ({key})")
+                return cached
+    scores = np.asarray(model.predict_proba(X), dtype=float)[:, positive_index]
+    if key:
+        with _lock:
+            _scores[key] = scores
+            while len(_scores) > _MAX_CACHED:
+                _scores.popitem(last=False)
+    return scores
+
+
+# ============================================================================
+# Curves
+# ============================================================================
+
+def _curve_from_sorted(y_sorted: np.ndarray, s_sorted: np.ndarray) -> Dict[str, np.ndarray]:
+    """Confusion counts at every distinct score of rows already sorted by descending score."""
+    tp = np.cumsum(y_sorted, dtype=np.int64)
+    fp = np.arange(1, len(y_sorted) + 1, dtype=np.int64) - tp
+    # Last row of each run of tied scores: a threshold admits all ties at once
+    last = np.r_[np.flatnonzero(s_sorted[1:] != s_sorted[:-1]), len(s_sorted) - 1]
+    pos, neg = int(tp[-1]), int(fp[-1])
+    tp = np.r_[0, tp[last]]
+    fp = np.r_[0, fp[last]]
+    return {
+        "threshold": np.r_[np.inf, s_sorted[last]],
+        "tp": tp,
+        "fp": fp,
+        "fn": pos - tp,
+        "tn": neg - fp,
+    }
+
+
+def threshold_curve(y_true: np.ndarray, scores: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Confusion counts for every candidate threshold.
+
+    Returns arrays threshold (descending, starting at +inf = predict no
+    positives), tp, fp, fn, tn.
+    """
+    y = np.asarray(y_true, dtype=bool)
+    s = np.asarray(scores, dtype=float)
+    # Tie order is irrelevant (ties are collapsed), so the faster unstable sort will do
+    order = np.argsort(-s)
+    return _curve_from_sorted(y[order], s[order])
+
+
+def curve_metrics(curve: Dict[str, np.ndarray], beta: float = 1.0,
+                  cost_fp: float = 1.0, cost_fn: float = 1.0) -> Dict[str, np.ndarray]:
+    """precision, recall, specificity, f1, fbeta, accuracy, youden and cost at every threshold."""
+    tp, fp, fn, tn = (curve[k].astype(float) for k in ("tp", "fp", "fn", "tn"))
+    b2 = beta ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 1.0)
+        recall = np.where(tp + fn > 0, tp / (tp + fn), 0.0)
+        specificity = np.where(tn + fp > 0, tn / (tn + fp), 0.0)
+        f1 = np.where(2 * tp + fp + fn > 0, 2 * tp / (2 * tp + fp + fn), 0.0)
+        fbeta = np.where(tp + fp + fn > 0, (1 + b2) * tp / ((1 + b2) * tp + b2 * fn + fp), 0.0)
+    return {
+        **curve,
+        "precision": precision,
+        "recall": recall,
+        "specificity": specificity,
+        "f1": f1,
+        "fbeta": fbeta,
+        "accuracy": (tp + tn) / (tp + fp + fn + tn),
+        "youden": recall + specificity - 1.0,
+        "cost": cost_fp * fp + cost_fn * fn,
+    }
+
+
+def _best_index(values: np.ndarray, metric: str) -> int:
+    return int(np.argmin(values) if metric in _MINIMISE else np.argmax(values))
+
+
+def _point(m: Dict[str, np.ndarray], i: int) -> Dict[str, Any]:
+    point = {k: float(v[i]) for k, v in m.items() if k not in ("tp", "fp", "fn", "tn")}
+    point.update({k: int(m[k][i]) for k in ("tp", "fp", "fn", "tn")})
+    # +inf (predict nothing) is not JSON; report it as just above the top score
+    if not np.isfinite(point["threshold"]):
+        point["threshold"] = float(np.nextafter(m["threshold"][1], np.inf)) if len(m["threshold"]) > 1 else 1.0
+    return point
+
+
+def metrics_at(m: Dict[str, np.ndarray], threshold: float) -> Dict[str, Any]:
+    """Metrics when predicting positive for score >= threshold."""
+    # thresholds are descending: the last candidate still >= threshold
+    i = int(np.searchsorted(-m["threshold"], -threshold, side="right")) - 1
+    point = _point(m, max(i, 0))
+    point["threshold"] = float(threshold)
+    return point
+
+
+def best_thresholds(m: Dict[str, np.ndarray]) -> Dict[str, Dict[str, Any]]:
+    """Best operating point for every metric in METRICS."""
+    return {metric: _point(m, _best_index(m[metric], metric)) for metric in METRICS}
+
+
+def downsample_curve(m: Dict[str, np.ndarray], n_points: int = 200) -> List[Dict[str, float]]:
+    """Evenly spaced curve points (by rank) for reports and plots."""
+    idx = np.unique(np.linspace(1, len(m["threshold"]) - 1, min(n_points, len(m["threshold"]) - 1)).astype(int))
+    return [{k: round(float(m[k][i]), 6) for k in ("threshold", "precision", "recall", "fbeta", "youden", "cost")}
+            for i in idx]
+
+
+# ============================================================================
+# Tuning
+# ============================================================================
+
+def tune_thresholds(
+    y_true: np.ndarray,
+    scores: np.ndarray,
+    metric: str = "f1",
+    beta: float = 1.0,
+    cost_fp: float = 1.0,
+    cost_fn: float = 1.0,
+    segments: Optional[np.ndarray] = None,
+    min_segment_rows: int = 100,
+    max_segments: int = 50,
+) -> Dict[str, Any]:
+    """
+    Threshold maximising metric (minimising for "cost"), overall and per segment.
+
+    Args:
+        y_true: Binary truth (True = positive class)
+        scores: Positive-class probabilities
+        metric: One of METRICS
+        beta: F-beta weight of recall (fbeta)
+        cost_fp, cost_fn: Costs of a false positive / false negative (cost)
+        segments: Optional segment label per row
+        min_segment_rows: Smaller segments, or those lacking either class,
+            keep the overall threshold
+        max_segments: Largest segments tuned individually
+
+    Returns:
+        dict with "overall" (best point for metric), "default" (point at 0.5),
+        "best_by_metric", "curve" (downsampled), "candidates" and, with
+        segments, "segments" (per-segment best points)
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}'. Choose from: {METRICS}")
+    y = np.asarray(y_true, dtype=bool)
+    s = np.asarray(scores, dtype=float)
+    if y.all() or not y.any():
+        raise ValueError("Threshold tuning needs both classes among the evaluation rows")
+
+    m = curve_metrics(threshold_curve(y, s), beta, cost_fp, cost_fn)
+    overall = _point(m, _best_index(m[metric], metric))
+    result: Dict[str, Any] = {
+        "metric": metric,
+        "overall": overall,
+        "default": metrics_at(m, 0.5),
+        "best_by_metric": best_thresholds(m),
+        "curve": downsample_curve(m),
+        "candidates": int(len(m["threshold"]) - 1),
+    }
+    if segments is None:
+        return result
+
+    import pandas as pd
+    # Missing segments form their own "<NA>" group; factorize would code them -1
+    # (astype(str) keeps NaN as missing under pandas 3)
+    seg = pd.Series(segments, dtype=object)
+    codes, labels = pd.factorize(seg.where(seg.notna(), "<NA>").astype(str), sort=False)
+    # Descending score, then a stable (radix) sort on the integer codes groups the
+    # segments while keeping each one score-ordered; ~3x faster than lexsort
+    order = np.argsort(-s)
+    order = order[np.argsort(codes[order], kind="stable")]
+    y_sorted, s_sorted, c_sorted = y[order], s[order], codes[order]
+    bounds = np.r_[0, np.flatnonzero(np.diff(c_sorted)) + 1, len(order)]
+    sizes = np.diff(bounds)
+
+    per_segment: List[Dict[str, Any]] = []
+    for seg in np.argsort(-sizes, kind="stable")[:max_segments]:
+        start, stop = bounds[seg], bounds[seg + 1]
+        label = str(labels[c_sorted[start]])
+        y_seg = y_sorted[start:stop]
+        positives = int(y_seg.sum())
+        entry: Dict[str, Any] = {"segment": label, "rows": int(stop - start), "positives": positives}
+        if stop - start < min_segment_rows or positives in (0, stop - start):
+            entry.update(tuned=False, threshold=overall["threshold"])
+        else:
+            seg_m = curve_metrics(_curve_from_sorted(y_seg, s_sorted[start:stop]), beta, cost_fp, cost_fn)
+            best = _point(seg_m, _best_index(seg_m[metric], metric))
+            at_overall = metrics_at(seg_m, overall["threshold"])
+            entry.update(tuned=True, **best, **{f"{metric}_at_overall": at_overall[metric]})
+        per_segment.append(entry)
+
+    result["segments"] = per_segment
+    result["segments_total"] = int(len(labels))
+    return result